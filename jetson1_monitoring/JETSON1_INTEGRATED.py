@@ -18,7 +18,6 @@ from datetime import datetime, time as dtime, timedelta
 import time
 import os
 import json
-import threading
 import sys
 import numpy as np
 import socket
@@ -26,7 +25,15 @@ import socket
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.communication.mqtt_client import MQTTClient
+from src.communication.envelope import DeviceEnvelope
+from src.communication.outbox import Outbox, OutboxPolicy, parse_policies
 from src.core.system_info import SystemInfo
+from src.storage.frame_sink import FrameSink
+from src.storage.encoders import create_stream_encoders
+from src.storage.catalog import SessionCatalog
+from src.storage.retention import RetentionManager, GB
+from src.storage.event_clips import EventClipBuffer
+from src.monitoring.camera.recorder import SegmentedRecorder, SegmentIndex
 
 # Import GStreamer camera wrapper (optimized for UYVY format)
 from gst_camera import GstCamera
@@ -112,6 +119,16 @@ MOTION_MIN_AREA = config['motion_min_area']
 SNAPSHOT_DIR = config['snapshot_dir']
 SAVE_COOLDOWN_SEC = config['snapshot_cooldown_sec']
 
+# Night motion clips: ring of small JPEGs, pre-roll + post-roll written next to each snapshot
+MOTION_CLIP_ENABLED = config.get('motion_clip_enabled', True)
+MOTION_CLIP_PRE_SEC = config.get('motion_clip_pre_sec', 5)
+MOTION_CLIP_POST_SEC = config.get('motion_clip_post_sec', 5)
+MOTION_CLIP_FPS = config.get('motion_clip_fps', 2)
+MOTION_CLIP_SIZE = config.get('motion_clip_size', {'width': 640, 'height': 512})
+MOTION_CLIP_QUALITY = config.get('motion_clip_quality', 70)
+MOTION_CLIP_BUFFER_MB = config.get('motion_clip_buffer_mb', 16)
+MOTION_CLIP_QUEUE_SIZE = config.get('motion_clip_queue_size', 64)
+
 # Device Identification
 DEVICE_ID = config.get('device_id', 'jetson1')
 DEVICE_NAME = config.get('device_name', 'Jetson1_StirFry_Station')
@@ -132,7 +149,20 @@ MQTT_TOPIC_STIRFRY_STATUS = f"{DEVICE_ID}/stirfry/status"
 MQTT_TOPIC = config.get('mqtt_topic', 'robot/control')  # Legacy topic (robot control)
 MQTT_QOS = config.get('mqtt_qos', 1)
 MQTT_CLIENT_ID = config.get('mqtt_client_id', 'robotcam_jetson')
+MQTT_FAST_JSON = config.get('mqtt_fast_json', False)  # orjson (compact) if installed
+MQTT_CODECS = config.get('mqtt_codecs', {})  # topic -> json|msgpack|cbor|struct (high-rate telemetry)
 MQTT_PUBLISH_INTERVAL = config.get('mqtt_publish_interval', 5)  # seconds
+MQTT_OUTBOX_ENABLED = config.get('mqtt_outbox_enabled', True)  # Store-and-forward while the broker is down
+MQTT_OUTBOX_PATH = config.get('mqtt_outbox_path', '~/.cache/jetson_mqtt/outbox.db')
+MQTT_OUTBOX_MAX_MESSAGES = config.get('mqtt_outbox_max_messages', 10000)
+MQTT_OUTBOX_DRAIN_RATE = config.get('mqtt_outbox_drain_rate', 20)  # messages/sec after reconnect
+MQTT_OUTBOX_POLICIES = parse_policies(config.get('mqtt_outbox_policies', {
+    "robot/control": {"mode": "all", "ttl_sec": 600},
+    "+/system/ai_mode": {"mode": "latest", "ttl_sec": 3600},
+}))
+# Periodic state: only the newest one is worth delivering after an outage
+MQTT_PERIODIC_POLICY = OutboxPolicy('latest', ttl_sec=max(60, MQTT_PUBLISH_INTERVAL * 10), key="robot/control:periodic")
+SYSTEM_METRICS_INTERVAL = config.get('system_metrics_interval', 2.0)  # seconds (background sampler)
 # AI Mode Setting
 AI_MODE_ENABLED = config.get('ai_mode_enabled', False)
 
@@ -152,6 +182,35 @@ STIRFRY_SAVE_RESOLUTION = config.get('stirfry_save_resolution', {'width': 960, '
 STIRFRY_JPEG_QUALITY = config.get('stirfry_jpeg_quality', 70)
 STIRFRY_FRAME_SKIP = config.get('stirfry_frame_skip', 6)
 
+# Stir-fry POT recording mode: 'frames' (JPEG every STIRFRY_FRAME_SKIP frames) or 'video' (segmented video)
+STIRFRY_RECORD_MODE = config.get('stirfry_record_mode', 'frames')
+STIRFRY_VIDEO = config.get('stirfry_video', {})
+STIRFRY_VIDEO_CODEC = STIRFRY_VIDEO.get('codec', 'mjpeg')  # mjpeg / mp4v / x264 / gst_mjpeg
+STIRFRY_VIDEO_SEGMENT_SEC = STIRFRY_VIDEO.get('segment_sec', 60)
+STIRFRY_VIDEO_FPS = STIRFRY_VIDEO.get('fps', 10)
+STIRFRY_VIDEO_FRAME_SKIP = STIRFRY_VIDEO.get('frame_skip', 2)
+STIRFRY_VIDEO_QUALITY = STIRFRY_VIDEO.get('quality', 90)
+
+# Frame sink (background JPEG encoding/writing)
+FRAME_SINK_WORKERS = config.get('frame_sink_workers', 2)
+FRAME_SINK_QUEUE_SIZE = config.get('frame_sink_queue_size', 16)
+FRAME_SINK_POLICY = config.get('frame_sink_policy', 'drop_oldest')
+
+# Per-stream encoder backend (opencv_jpeg / turbojpeg / png / webp / npy)
+STIRFRY_ENCODERS = config.get('stirfry_encoders', {})
+
+# SQLite session/frame catalog (updated by frame sink + recording start/stop)
+CATALOG_ENABLED = config.get('catalog_enabled', True)
+CATALOG_PATH = config.get('catalog_path', '~/AI_Data/catalog.db')
+
+# Disk retention: evict whole sessions / snapshot days (snapshots first) before the disk fills
+RETENTION_ENABLED = config.get('retention_enabled', False)
+RETENTION_DRY_RUN = config.get('retention_dry_run', True)  # log what would be deleted only
+RETENTION_MIN_FREE_GB = config.get('retention_min_free_gb', 20)
+RETENTION_TARGET_FREE_GB = config.get('retention_target_free_gb', 30)
+RETENTION_QUOTA_GB = config.get('retention_quota_gb', 0)  # 0 = no quota
+RETENTION_CHECK_INTERVAL = config.get('retention_check_interval', 60)
+
 # Motion detection & YOLO parameters (configurable via config.json)
 YOLO_IMGSZ = config.get('yolo_imgsz', 416)  # YOLO 입력 이미지 크기 (높을수록 정확, 느림)
 MOG2_HISTORY = 500  # MOG2 배경 모델 히스토리 프레임 수
@@ -240,7 +299,10 @@ class IntegratedMonitorApp:
         # Initialize variables
         print("[초기화] 변수 초기화 중...", flush=True)
         self.mqtt_client = None
+        self.mqtt_outbox = None
         self.system_info = SystemInfo(device_name="Jetson1", location="Kitchen")
+        # 시스템 메트릭은 백그라운드 스레드에서 수집 (MQTT 발행 시 GUI 블로킹 방지)
+        self.system_info.start_sampler(interval=SYSTEM_METRICS_INTERVAL)
         self.yolo_model = None
         self.device = 'cpu'  # Will be set to 'cuda' in init_yolo() if available
 
@@ -261,6 +323,7 @@ class IntegratedMonitorApp:
         self.stirfry_pot1_metadata = []
         self.stirfry_pot1_session_id = None
         self.stirfry_pot1_session_start_time = None
+        self.stirfry_pot1_video = None  # SegmentedRecorder in video mode
 
         # Stir-fry monitoring state - POT2 (right camera = camera_1)
         self.stirfry_pot2_recording = False
@@ -270,6 +333,7 @@ class IntegratedMonitorApp:
         self.stirfry_pot2_metadata = []
         self.stirfry_pot2_session_id = None
         self.stirfry_pot2_session_start_time = None
+        self.stirfry_pot2_video = None  # SegmentedRecorder in video mode
         self.developer_mode = False
         self.snapshot_count = 0
         self.shutdown_tap_count = 0
@@ -296,6 +360,71 @@ class IntegratedMonitorApp:
         # SSR control via GPIO
         self.ssr_enabled = False  # SSR current state
 
+        # Background frame writer (replaces one thread + makedirs per saved frame)
+        self.frame_sink = FrameSink(
+            workers=FRAME_SINK_WORKERS,
+            max_queue=FRAME_SINK_QUEUE_SIZE,
+            policy=FRAME_SINK_POLICY,
+            name="jetson1_sink"
+        )
+        self.frame_sink.start()
+        self.save_encoders = create_stream_encoders(
+            STIRFRY_ENCODERS,
+            ['stirfry_left', 'stirfry_right'],
+            default={'backend': 'opencv_jpeg', 'quality': STIRFRY_JPEG_QUALITY}
+        )
+
+        # Session catalog (indexes every written frame)
+        self.catalog = None
+        if CATALOG_ENABLED:
+            try:
+                self.catalog = SessionCatalog(CATALOG_PATH)
+                self.frame_sink.add_listener(self.catalog.on_frame_written)
+            except Exception as e:
+                print(f"[카탈로그] 초기화 실패: {e}")
+
+        # Disk retention (usage index fed by the frame sink, evicts in its own thread)
+        self.retention = None
+        if RETENTION_ENABLED:
+            try:
+                self.retention = RetentionManager(
+                    roots=[os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}")],
+                    snapshot_roots=[os.path.expanduser(f"~/{SNAPSHOT_DIR}")],
+                    quota_bytes=int(RETENTION_QUOTA_GB * GB) if RETENTION_QUOTA_GB else None,
+                    min_free_bytes=int(RETENTION_MIN_FREE_GB * GB),
+                    target_free_bytes=int(RETENTION_TARGET_FREE_GB * GB),
+                    check_interval=RETENTION_CHECK_INTERVAL,
+                    catalog=self.catalog,
+                    dry_run=RETENTION_DRY_RUN,
+                    on_evict=lambda u: print(f"[보관정책] {'삭제 예정' if RETENTION_DRY_RUN else '삭제'}: {u.path} ({u.bytes / 1e6:.0f}MB, {u.priority_class})")
+                )
+                self.frame_sink.add_listener(self.retention.on_frame_written)
+                self.retention.start()
+            except Exception as e:
+                print(f"[보관정책] 초기화 실패: {e}")
+
+        # Motion snapshot/clip writer (night mode) - keeps disk writes off update_auto_system
+        self.event_sink = FrameSink(
+            workers=1,
+            max_queue=MOTION_CLIP_QUEUE_SIZE,
+            policy='drop_oldest',
+            name="event_sink"
+        )
+        self.event_sink.start()
+        if self.retention:
+            self.event_sink.add_listener(self.retention.on_frame_written)
+        self.motion_clips = None
+        if MOTION_CLIP_ENABLED:
+            self.motion_clips = EventClipBuffer(
+                self.event_sink,
+                pre_sec=MOTION_CLIP_PRE_SEC,
+                post_sec=MOTION_CLIP_POST_SEC,
+                fps=MOTION_CLIP_FPS,
+                size=(MOTION_CLIP_SIZE['width'], MOTION_CLIP_SIZE['height']),
+                quality=MOTION_CLIP_QUALITY,
+                max_bytes=int(MOTION_CLIP_BUFFER_MB * 1024 * 1024)
+            )
+
         # OpenCV background subtractor
         self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
         self.bg = cv2.createBackgroundSubtractorMOG2(
@@ -781,23 +910,40 @@ class IntegratedMonitorApp:
         try:
             print(f"[MQTT] {MQTT_BROKER}:{MQTT_PORT}에 연결 중...")
 
+            # Offline publishes are stored on disk and forwarded after reconnect
+            self.mqtt_outbox = None
+            if MQTT_OUTBOX_ENABLED:
+                self.mqtt_outbox = Outbox(MQTT_OUTBOX_PATH, policies=MQTT_OUTBOX_POLICIES,
+                                          max_messages=MQTT_OUTBOX_MAX_MESSAGES)
+                if self.mqtt_outbox.depth():
+                    print(f"[MQTT] 오프라인 큐: {self.mqtt_outbox.depth()}건 전송 대기")
+
             # Create MQTT client with system info
             self.mqtt_client = MQTTClient(
                 broker=MQTT_BROKER,
                 port=MQTT_PORT,
                 client_id=MQTT_CLIENT_ID,
                 topic_prefix="frying_ai/jetson1",
-                system_info=self.system_info.to_dict()
+                system_info=self.system_info.to_dict(),
+                fast_json=MQTT_FAST_JSON,
+                outbox=self.mqtt_outbox,
+                drain_rate=MQTT_OUTBOX_DRAIN_RATE,
+                prefix_subscriptions=False,  # Robot PC topics are not prefixed
+                codecs=MQTT_CODECS
             )
+            # Device identity is serialized once; IP re-checked on reconnect
+            self.mqtt_envelope = DeviceEnvelope(DEVICE_ID, DEVICE_NAME, DEVICE_LOCATION,
+                                                fast_json=MQTT_FAST_JSON)
+            self.mqtt_client.add_connect_callback(self.mqtt_envelope.invalidate)
 
             # Subscribe to pot1 and pot2 topics separately (from Robot PC)
-            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT1_FOOD_TYPE, self.on_stirfry_pot1_food_type)
-            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT1_CONTROL, self.on_stirfry_pot1_control)
-            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT2_FOOD_TYPE, self.on_stirfry_pot2_food_type)
-            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT2_CONTROL, self.on_stirfry_pot2_control)
+            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT1_FOOD_TYPE, self.on_stirfry_pot1_food_type, decode="message")
+            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT1_CONTROL, self.on_stirfry_pot1_control, decode="message")
+            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT2_FOOD_TYPE, self.on_stirfry_pot2_food_type, decode="message")
+            self.mqtt_client.subscribe(MQTT_TOPIC_STIRFRY_POT2_CONTROL, self.on_stirfry_pot2_control, decode="message")
 
             # Subscribe to vibration control topic
-            self.mqtt_client.subscribe("calibration/vibration/control", self.on_vibration_control)
+            self.mqtt_client.subscribe("calibration/vibration/control", self.on_vibration_control, decode="message")
 
             # Connect to broker
             if self.mqtt_client.connect(blocking=True, timeout=5.0):
@@ -1212,6 +1358,9 @@ class IntegratedMonitorApp:
                     self.auto_detection_label.config(text=f"감지: {remain}초 남음", fg=COLOR_INFO)
         else:
             # Stage 2: Motion detection
+            if self.motion_clips:
+                # Buffer a clean (un-annotated) copy for the pre/post-roll clip
+                self.motion_clips.push(frame)
             if self.frame_idx > WARMUP_FRAMES:
                 fg = self.bg.apply(frame)
                 _, thr = cv2.threshold(fg, BINARY_THRESH, 255, cv2.THRESH_BINARY)
@@ -1249,7 +1398,7 @@ class IntegratedMonitorApp:
                     now_tick = time.monotonic()
                     can_save = (self.last_snapshot_tick is None) or ((now_tick - self.last_snapshot_tick) >= SAVE_COOLDOWN_SEC)
                     if can_save:
-                        self.save_snapshot(frame, now)
+                        self.save_snapshot(frame, now, motion_areas)
                         self.last_snapshot_tick = now_tick
                         self.auto_detection_label.config(text="감지: 모션 저장됨", fg=COLOR_OK)
                 else:
@@ -1285,12 +1434,13 @@ class IntegratedMonitorApp:
 
             self.stirfry_left_skip_counter += 1
             # Save every Nth frame (configurable via STIRFRY_FRAME_SKIP)
-            if self.stirfry_left_skip_counter >= STIRFRY_FRAME_SKIP:
+            skip = STIRFRY_VIDEO_FRAME_SKIP if self.stirfry_pot1_video else STIRFRY_FRAME_SKIP
+            if self.stirfry_left_skip_counter >= skip:
                 # Debug: First save notification
                 if self.stirfry_pot1_frame_count == 0:
                     print("[볶음 POT1] 첫 프레임 저장 시작...")
-                # Save in background thread to prevent GUI blocking
-                threading.Thread(target=self.save_stirfry_left_frame, args=(frame.copy(),), daemon=True).start()
+                # Queue for background encoding (frame is a private copy from GstCamera.read())
+                self.save_stirfry_left_frame(frame)
                 self.stirfry_left_skip_counter = 0  # Reset counter after saving
 
         # Update preview
@@ -1326,12 +1476,13 @@ class IntegratedMonitorApp:
 
             self.stirfry_right_skip_counter += 1
             # Save every Nth frame (configurable via STIRFRY_FRAME_SKIP)
-            if self.stirfry_right_skip_counter >= STIRFRY_FRAME_SKIP:
+            skip = STIRFRY_VIDEO_FRAME_SKIP if self.stirfry_pot2_video else STIRFRY_FRAME_SKIP
+            if self.stirfry_right_skip_counter >= skip:
                 # Debug: First save notification
                 if self.stirfry_pot2_frame_count == 0:
                     print("[볶음 POT2] 첫 프레임 저장 시작...")
-                # Save in background thread to prevent GUI blocking
-                threading.Thread(target=self.save_stirfry_right_frame, args=(frame.copy(),), daemon=True).start()
+                # Queue for background encoding (frame is a private copy from GstCamera.read())
+                self.save_stirfry_right_frame(frame)
                 self.stirfry_right_skip_counter = 0  # Reset counter after saving
 
         # Update preview
@@ -1551,8 +1702,8 @@ class IntegratedMonitorApp:
         return today_start <= now <= today_end
 
     def publish_mqtt(self, message):
-        """Publish message to MQTT broker with enhanced data"""
-        if self.mqtt_client is not None and self.mqtt_client.is_connected():
+        """Publish message to MQTT broker with enhanced data (queued while offline)"""
+        if self.mqtt_client is not None and (self.mqtt_client.is_connected() or self.mqtt_outbox is not None):
             try:
                 # Enhanced payload with system metrics
                 payload = {
@@ -1570,7 +1721,9 @@ class IntegratedMonitorApp:
                     qos=MQTT_QOS
                 )
 
-                if success:
+                if success and not self.mqtt_client.is_connected():
+                    print(f"[MQTT] 오프라인 - 큐에 저장: {message} (대기 {self.mqtt_outbox.depth()}건)")
+                elif success:
                     print(f"[MQTT] 메시지 전송 완료: {message}")
                 else:
                     print(f"[MQTT] 전송 실패")
@@ -1583,7 +1736,7 @@ class IntegratedMonitorApp:
         if not self.running:
             return
 
-        if self.mqtt_client is not None and self.mqtt_client.is_connected():
+        if self.mqtt_client is not None and (self.mqtt_client.is_connected() or self.mqtt_outbox is not None):
             try:
                 # Determine current state
                 current_state = "ON" if self.person_detected else "OFF"
@@ -1597,11 +1750,12 @@ class IntegratedMonitorApp:
                     "system_metrics": self.system_info.get_dynamic_info()
                 }
 
-                # Publish to robot/control topic
+                # Publish to robot/control topic (offline: only the latest is kept)
                 self.mqtt_client.publish(
                     topic_suffix="robot/control",
                     payload=payload,
-                    qos=MQTT_QOS
+                    qos=MQTT_QOS,
+                    outbox_policy=MQTT_PERIODIC_POLICY
                 )
             except Exception as e:
                 print(f"[MQTT 주기발행] 오류: {e}")
@@ -1615,16 +1769,7 @@ class IntegratedMonitorApp:
         if self.mqtt_client and MQTT_ENABLED:
             try:
                 if include_device_info:
-                    # Create JSON message with device info
-                    msg_data = {
-                        "device_id": DEVICE_ID,
-                        "device_name": DEVICE_NAME,
-                        "device_location": DEVICE_LOCATION,
-                        "ip_address": get_ip_address(),
-                        "message": message,
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    payload = json.dumps(msg_data, ensure_ascii=False)
+                    payload = self.mqtt_envelope.build(message)
                 else:
                     payload = message
 
@@ -1636,17 +1781,20 @@ class IntegratedMonitorApp:
             except Exception as e:
                 print(f"[MQTT] 전송 실패: {e}")
 
-    def save_snapshot(self, frame, timestamp):
-        """Save motion snapshot"""
+    def save_snapshot(self, frame, timestamp, motion_areas=None):
+        """Queue motion snapshot (full size) and start the pre/post-roll clip"""
         try:
             day_dir = timestamp.strftime("%Y%m%d")
             ts_name = timestamp.strftime("%H%M%S")
             # Use home directory to avoid permission issues
             base_dir = os.path.expanduser(f"~/{SNAPSHOT_DIR}")
             out_dir = os.path.join(base_dir, day_dir)
-            os.makedirs(out_dir, mode=0o755, exist_ok=True)
             out_path = os.path.join(out_dir, f"{ts_name}.jpg")
-            cv2.imwrite(out_path, frame)
+            # Encoded/written by the event sink (directory created there); 95 = cv2.imwrite default
+            self.event_sink.submit(out_path, frame.copy(), quality=95)
+            if self.motion_clips:
+                self.motion_clips.trigger(os.path.join(out_dir, f"{ts_name}_clip"),
+                                          info={"snapshot": f"{ts_name}.jpg", "motion_areas": motion_areas or []})
 
             # Update tracking
             self.snapshot_count += 1
@@ -1676,74 +1824,80 @@ class IntegratedMonitorApp:
             print(f"[오류] 스냅샷 저장 실패: {e}")
 
     def save_stirfry_left_frame(self, frame):
-        """Save stir-fry LEFT monitoring frame (POT1, camera_0)"""
+        """Queue stir-fry LEFT monitoring frame (POT1, camera_0) to the frame sink"""
         try:
-            now = datetime.now()
-            ts_name = now.strftime("%H%M%S_%f")[:-3]  # Include milliseconds
-
-            # Use POT1 session-based folder structure with camera_0
-            base_dir = os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}")
-            session_dir = os.path.join(base_dir, "pot1", self.stirfry_pot1_session_id, self.stirfry_pot1_food_type)
-            out_dir = os.path.join(session_dir, "camera_0")
-
-            # Create directory with proper permissions
-            os.makedirs(out_dir, mode=0o755, exist_ok=True)
-
-            # Resize based on config (configurable resolution)
-            save_width = STIRFRY_SAVE_RESOLUTION['width']
-            save_height = STIRFRY_SAVE_RESOLUTION['height']
-            resized = cv2.resize(frame, (save_width, save_height), interpolation=cv2.INTER_AREA)
+            if self.stirfry_pot1_video is not None:
+                # Video mode: resized + encoded into segments on the recorder thread
+                queued = self.stirfry_pot1_video.write_frame(frame)
+            else:
+                now = datetime.now()
+                ts_name = now.strftime("%H%M%S_%f")[:-3]  # Include milliseconds
 
-            out_path = os.path.join(out_dir, f"camera_0_{ts_name}.jpg")
-            # Save with configurable JPEG quality
-            cv2.imwrite(out_path, resized, [cv2.IMWRITE_JPEG_QUALITY, STIRFRY_JPEG_QUALITY])
+                # Use POT1 session-based folder structure with camera_0
+                # (directory is created once by the frame sink)
+                base_dir = os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}")
+                session_dir = os.path.join(base_dir, "pot1", self.stirfry_pot1_session_id, self.stirfry_pot1_food_type)
+                encoder = self.save_encoders['stirfry_left']
+                out_path = os.path.join(session_dir, "camera_0", f"camera_0_{ts_name}{encoder.extension}")
+
+                # Resize + encode with configurable resolution/quality in sink workers
+                queued = self.frame_sink.submit(
+                    out_path, frame,
+                    resize=(STIRFRY_SAVE_RESOLUTION['width'], STIRFRY_SAVE_RESOLUTION['height']),
+                    interpolation=cv2.INTER_AREA,
+                    encoder=encoder,
+                    session=self.stirfry_pot1_session_id
+                )
+            if not queued:
+                return
             self.stirfry_pot1_frame_count += 1
 
-            # Update GUI on main thread
-            self.root.after(0, lambda: self.stirfry_left_count_label.config(text=f"POT1: {self.stirfry_pot1_frame_count}장"))
+            # Called from the Tk thread - update label directly
+            self.stirfry_left_count_label.config(text=f"POT1: {self.stirfry_pot1_frame_count}장")
 
             # Debug log
             if self.stirfry_pot1_frame_count % 10 == 0:
                 print(f"[볶음 POT1] {self.stirfry_pot1_frame_count}장 저장됨")
         except Exception as e:
             print(f"[오류] POT1 프레임 저장 실패: {e}")
-            import traceback
-            traceback.print_exc()
 
     def save_stirfry_right_frame(self, frame):
-        """Save stir-fry RIGHT monitoring frame (POT2, camera_1)"""
+        """Queue stir-fry RIGHT monitoring frame (POT2, camera_1) to the frame sink"""
         try:
-            now = datetime.now()
-            ts_name = now.strftime("%H%M%S_%f")[:-3]  # Include milliseconds
-
-            # Use POT2 session-based folder structure with camera_1
-            base_dir = os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}")
-            session_dir = os.path.join(base_dir, "pot2", self.stirfry_pot2_session_id, self.stirfry_pot2_food_type)
-            out_dir = os.path.join(session_dir, "camera_1")
-
-            # Create directory with proper permissions
-            os.makedirs(out_dir, mode=0o755, exist_ok=True)
-
-            # Resize based on config (configurable resolution)
-            save_width = STIRFRY_SAVE_RESOLUTION['width']
-            save_height = STIRFRY_SAVE_RESOLUTION['height']
-            resized = cv2.resize(frame, (save_width, save_height), interpolation=cv2.INTER_AREA)
+            if self.stirfry_pot2_video is not None:
+                # Video mode: resized + encoded into segments on the recorder thread
+                queued = self.stirfry_pot2_video.write_frame(frame)
+            else:
+                now = datetime.now()
+                ts_name = now.strftime("%H%M%S_%f")[:-3]  # Include milliseconds
 
-            out_path = os.path.join(out_dir, f"camera_1_{ts_name}.jpg")
-            # Save with configurable JPEG quality
-            cv2.imwrite(out_path, resized, [cv2.IMWRITE_JPEG_QUALITY, STIRFRY_JPEG_QUALITY])
+                # Use POT2 session-based folder structure with camera_1
+                # (directory is created once by the frame sink)
+                base_dir = os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}")
+                session_dir = os.path.join(base_dir, "pot2", self.stirfry_pot2_session_id, self.stirfry_pot2_food_type)
+                encoder = self.save_encoders['stirfry_right']
+                out_path = os.path.join(session_dir, "camera_1", f"camera_1_{ts_name}{encoder.extension}")
+
+                # Resize + encode with configurable resolution/quality in sink workers
+                queued = self.frame_sink.submit(
+                    out_path, frame,
+                    resize=(STIRFRY_SAVE_RESOLUTION['width'], STIRFRY_SAVE_RESOLUTION['height']),
+                    interpolation=cv2.INTER_AREA,
+                    encoder=encoder,
+                    session=self.stirfry_pot2_session_id
+                )
+            if not queued:
+                return
             self.stirfry_pot2_frame_count += 1
 
-            # Update GUI on main thread
-            self.root.after(0, lambda: self.stirfry_right_count_label.config(text=f"POT2: {self.stirfry_pot2_frame_count}장"))
+            # Called from the Tk thread - update label directly
+            self.stirfry_right_count_label.config(text=f"POT2: {self.stirfry_pot2_frame_count}장")
 
             # Debug log
             if self.stirfry_pot2_frame_count % 10 == 0:
                 print(f"[볶음 POT2] {self.stirfry_pot2_frame_count}장 저장됨")
         except Exception as e:
             print(f"[오류] POT2 프레임 저장 실패: {e}")
-            import traceback
-            traceback.print_exc()
 
     # =========================
     # Control Functions
@@ -1770,6 +1924,27 @@ class IntegratedMonitorApp:
             "food_type": self.stirfry_pot1_food_type
         })
 
+        session_dir = os.path.join(os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}"), "pot1",
+                                   self.stirfry_pot1_session_id, self.stirfry_pot1_food_type)
+        if STIRFRY_RECORD_MODE == 'video':
+            self.stirfry_pot1_video = SegmentedRecorder(
+                os.path.join(session_dir, "camera_0"),
+                codec=STIRFRY_VIDEO_CODEC,
+                segment_sec=STIRFRY_VIDEO_SEGMENT_SEC,
+                fps=STIRFRY_VIDEO_FPS,
+                resolution=(STIRFRY_SAVE_RESOLUTION['width'], STIRFRY_SAVE_RESOLUTION['height']),
+                quality=STIRFRY_VIDEO_QUALITY,
+                prefix="camera_0",
+                on_segment_closed=self.retention.record if self.retention else None
+            )
+            self.stirfry_pot1_video.start_recording()
+        if self.retention:
+            self.retention.begin_session(session_dir)
+        if self.catalog:
+            self.catalog.begin_session(session_dir, session_id=self.stirfry_pot1_session_id,
+                                       food_type=self.stirfry_pot1_food_type, pot="pot1",
+                                       kind="stirfry", device_id=DEVICE_ID)
+
         print(f"[볶음 POT1] 녹화 시작 - 세션: {self.stirfry_pot1_session_id}, 음식: {self.stirfry_pot1_food_type}")
 
     def stop_stirfry_pot1_recording(self):
@@ -1780,6 +1955,12 @@ class IntegratedMonitorApp:
         self.stirfry_pot1_recording = False
         self.stirfry_left_skip_counter = 0  # Reset frame skip counter
 
+        # Finish the open video segment (writes remaining queued frames)
+        video = self.stirfry_pot1_video
+        self.stirfry_pot1_video = None
+        if video is not None:
+            video.stop_recording()
+
         # Add session end metadata
         if self.stirfry_pot1_session_start_time:
             session_end_time = datetime.now()
@@ -1812,20 +1993,36 @@ class IntegratedMonitorApp:
                         "height": STIRFRY_SAVE_RESOLUTION['height']
                     },
                     "jpeg_quality": STIRFRY_JPEG_QUALITY,
-                    "frame_skip": STIRFRY_FRAME_SKIP,
+                    "encoder": self.save_encoders['stirfry_left'].describe(),
+                    "frame_skip": STIRFRY_VIDEO_FRAME_SKIP if video is not None else STIRFRY_FRAME_SKIP,
                     "device_id": DEVICE_ID,
                     "device_name": DEVICE_NAME,
                     "camera": "camera_0",
                     "events": self.stirfry_pot1_metadata
                 }
+                if video is not None:
+                    # Map events to segment/frame numbers (extract with SegmentIndex.extract_frame)
+                    info = video.get_recording_info()
+                    metadata_content["record_mode"] = "video"
+                    metadata_content["video"] = {k: info[k] for k in (
+                        'codec', 'segment_sec', 'fps', 'frames_written', 'frames_dropped', 'segments')}
+                    metadata_content["video"]["index"] = f"camera_0/{info['index']}"
+                    metadata_content["events"] = SegmentIndex(video.recording_dir).map_events(
+                        self.stirfry_pot1_metadata)
 
                 with open(metadata_file, 'w', encoding='utf-8') as f:
                     json.dump(metadata_content, f, ensure_ascii=False, indent=2)
 
                 print(f"[볶음 POT1] 메타데이터 저장 완료: {metadata_file}")
+                if self.catalog:
+                    self.catalog.ingest_session(metadata_dir)
             except Exception as e:
                 print(f"[오류] POT1 메타데이터 저장 실패: {e}")
 
+        if self.retention and self.stirfry_pot1_session_id:
+            self.retention.end_session(os.path.join(os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}"), "pot1",
+                                                    self.stirfry_pot1_session_id, self.stirfry_pot1_food_type))
+
         print(f"[볶음 POT1] 녹화 중지 - 프레임: {self.stirfry_pot1_frame_count}장")
 
     # POT2 Recording Control (Right Camera = camera_1)
@@ -1850,6 +2047,27 @@ class IntegratedMonitorApp:
             "food_type": self.stirfry_pot2_food_type
         })
 
+        session_dir = os.path.join(os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}"), "pot2",
+                                   self.stirfry_pot2_session_id, self.stirfry_pot2_food_type)
+        if STIRFRY_RECORD_MODE == 'video':
+            self.stirfry_pot2_video = SegmentedRecorder(
+                os.path.join(session_dir, "camera_1"),
+                codec=STIRFRY_VIDEO_CODEC,
+                segment_sec=STIRFRY_VIDEO_SEGMENT_SEC,
+                fps=STIRFRY_VIDEO_FPS,
+                resolution=(STIRFRY_SAVE_RESOLUTION['width'], STIRFRY_SAVE_RESOLUTION['height']),
+                quality=STIRFRY_VIDEO_QUALITY,
+                prefix="camera_1",
+                on_segment_closed=self.retention.record if self.retention else None
+            )
+            self.stirfry_pot2_video.start_recording()
+        if self.retention:
+            self.retention.begin_session(session_dir)
+        if self.catalog:
+            self.catalog.begin_session(session_dir, session_id=self.stirfry_pot2_session_id,
+                                       food_type=self.stirfry_pot2_food_type, pot="pot2",
+                                       kind="stirfry", device_id=DEVICE_ID)
+
         print(f"[볶음 POT2] 녹화 시작 - 세션: {self.stirfry_pot2_session_id}, 음식: {self.stirfry_pot2_food_type}")
 
     def stop_stirfry_pot2_recording(self):
@@ -1860,6 +2078,12 @@ class IntegratedMonitorApp:
         self.stirfry_pot2_recording = False
         self.stirfry_right_skip_counter = 0  # Reset frame skip counter
 
+        # Finish the open video segment (writes remaining queued frames)
+        video = self.stirfry_pot2_video
+        self.stirfry_pot2_video = None
+        if video is not None:
+            video.stop_recording()
+
         # Add session end metadata
         if self.stirfry_pot2_session_start_time:
             session_end_time = datetime.now()
@@ -1892,20 +2116,36 @@ class IntegratedMonitorApp:
                         "height": STIRFRY_SAVE_RESOLUTION['height']
                     },
                     "jpeg_quality": STIRFRY_JPEG_QUALITY,
-                    "frame_skip": STIRFRY_FRAME_SKIP,
+                    "encoder": self.save_encoders['stirfry_right'].describe(),
+                    "frame_skip": STIRFRY_VIDEO_FRAME_SKIP if video is not None else STIRFRY_FRAME_SKIP,
                     "device_id": DEVICE_ID,
                     "device_name": DEVICE_NAME,
                     "camera": "camera_1",
                     "events": self.stirfry_pot2_metadata
                 }
+                if video is not None:
+                    # Map events to segment/frame numbers (extract with SegmentIndex.extract_frame)
+                    info = video.get_recording_info()
+                    metadata_content["record_mode"] = "video"
+                    metadata_content["video"] = {k: info[k] for k in (
+                        'codec', 'segment_sec', 'fps', 'frames_written', 'frames_dropped', 'segments')}
+                    metadata_content["video"]["index"] = f"camera_1/{info['index']}"
+                    metadata_content["events"] = SegmentIndex(video.recording_dir).map_events(
+                        self.stirfry_pot2_metadata)
 
                 with open(metadata_file, 'w', encoding='utf-8') as f:
                     json.dump(metadata_content, f, ensure_ascii=False, indent=2)
 
                 print(f"[볶음 POT2] 메타데이터 저장 완료: {metadata_file}")
+                if self.catalog:
+                    self.catalog.ingest_session(metadata_dir)
             except Exception as e:
                 print(f"[오류] POT2 메타데이터 저장 실패: {e}")
 
+        if self.retention and self.stirfry_pot2_session_id:
+            self.retention.end_session(os.path.join(os.path.expanduser(f"~/{STIRFRY_SAVE_DIR}"), "pot2",
+                                                    self.stirfry_pot2_session_id, self.stirfry_pot2_food_type))
+
         print(f"[볶음 POT2] 녹화 중지 - 프레임: {self.stirfry_pot2_frame_count}장")
 
     # LEGACY: Old combined recording functions (kept for backward compatibility)
@@ -2018,12 +2258,12 @@ class IntegratedMonitorApp:
         info_frame = tk.Frame(status_window, bg=COLOR_PANEL, bd=3, relief=tk.RAISED)
         info_frame.pack(pady=10, padx=40, fill=tk.BOTH, expand=True)
 
-        # Get real-time system info
+        # Latest snapshot from the background sampler (no blocking psutil calls)
         try:
-            import psutil
+            metrics = self.system_info.get_dynamic_info()
 
             # CPU Usage
-            cpu_percent = psutil.cpu_percent(interval=0.5)
+            cpu_percent = metrics['cpu_percent']
             cpu_color = COLOR_OK if cpu_percent < 70 else COLOR_WARNING if cpu_percent < 90 else COLOR_ERROR
 
             cpu_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
@@ -2034,8 +2274,7 @@ class IntegratedMonitorApp:
                     bg=COLOR_PANEL, fg=cpu_color, anchor="e").pack(side=tk.RIGHT)
 
             # Memory Usage
-            mem = psutil.virtual_memory()
-            mem_percent = mem.percent
+            mem_percent = metrics['memory']['percent']
             mem_color = COLOR_OK if mem_percent < 70 else COLOR_WARNING if mem_percent < 90 else COLOR_ERROR
 
             mem_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
@@ -2046,8 +2285,7 @@ class IntegratedMonitorApp:
                     bg=COLOR_PANEL, fg=mem_color, anchor="e").pack(side=tk.RIGHT)
 
             # Disk Usage
-            disk = psutil.disk_usage('/')
-            disk_percent = disk.percent
+            disk_percent = metrics['disk']['percent']
             disk_color = COLOR_OK if disk_percent < 70 else COLOR_WARNING if disk_percent < 90 else COLOR_ERROR
 
             disk_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
@@ -2059,24 +2297,21 @@ class IntegratedMonitorApp:
 
             # Temperature (Jetson specific)
             try:
-                with open('/sys/devices/virtual/thermal/thermal_zone0/temp', 'r') as f:
-                    temp_raw = int(f.read().strip())
-                    temp_celsius = temp_raw / 1000.0
-                    temp_color = COLOR_OK if temp_celsius < 70 else COLOR_WARNING if temp_celsius < 85 else COLOR_ERROR
-
-                    temp_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
-                    temp_frame.pack(pady=10, padx=20, fill=tk.X)
-                    tk.Label(temp_frame, text="CPU 온도:", font=MEDIUM_FONT,
-                            bg=COLOR_PANEL, fg=COLOR_TEXT, anchor="w").pack(side=tk.LEFT)
-                    tk.Label(temp_frame, text=f"{temp_celsius:.1f}°C", font=("Noto Sans CJK KR", 22, "bold"),
-                            bg=COLOR_PANEL, fg=temp_color, anchor="e").pack(side=tk.RIGHT)
+                temp_celsius = next(t for name, t in metrics['thermal'].items()
+                                    if name.split(':')[0] == 'thermal_zone0')
+                temp_color = COLOR_OK if temp_celsius < 70 else COLOR_WARNING if temp_celsius < 85 else COLOR_ERROR
+
+                temp_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
+                temp_frame.pack(pady=10, padx=20, fill=tk.X)
+                tk.Label(temp_frame, text="CPU 온도:", font=MEDIUM_FONT,
+                        bg=COLOR_PANEL, fg=COLOR_TEXT, anchor="w").pack(side=tk.LEFT)
+                tk.Label(temp_frame, text=f"{temp_celsius:.1f}°C", font=("Noto Sans CJK KR", 22, "bold"),
+                        bg=COLOR_PANEL, fg=temp_color, anchor="e").pack(side=tk.RIGHT)
             except:
                 pass
 
             # System uptime
-            uptime_seconds = int(psutil.boot_time())
-            boot_time = datetime.fromtimestamp(uptime_seconds)
-            uptime = datetime.now() - boot_time
+            uptime = timedelta(seconds=metrics['uptime_seconds'])
             uptime_str = f"{uptime.days}일 {uptime.seconds // 3600}시간"
 
             uptime_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
@@ -2291,12 +2526,25 @@ class IntegratedMonitorApp:
                 try:
                     # Stop ongoing recordings/data collection to save metadata
                     print("[종료] 녹화/수집 중지 및 메타데이터 저장 중...")
-                    if self.stirfry_recording:
+                    if getattr(self, 'stirfry_recording', False):
                         self.stop_stirfry_recording()
                     if hasattr(self, 'stirfry_pot1_recording') and self.stirfry_pot1_recording:
-                        self.stop_pot1_recording()
+                        self.stop_stirfry_pot1_recording()
                     if hasattr(self, 'stirfry_pot2_recording') and self.stirfry_pot2_recording:
-                        self.stop_pot2_recording()
+                        self.stop_stirfry_pot2_recording()
+
+                    if self.retention:
+                        self.retention.stop()
+
+                    # Write out frames still queued in the frame sink
+                    print(f"[종료] 저장 대기 프레임 기록 중... ({self.frame_sink.queue_depth()}장)")
+                    self.frame_sink.stop(drain=True, timeout=10.0)
+                    if self.motion_clips:
+                        self.motion_clips.finish()
+                    self.event_sink.stop(drain=True, timeout=5.0)
+                    print(f"[종료] 프레임 저장 통계: {self.frame_sink.get_stats()}")
+                    if self.catalog:
+                        self.catalog.close()
 
                     # Cleanup child processes (진동센서 등)
                     for proc in self.child_processes:
@@ -2353,6 +2601,7 @@ class IntegratedMonitorApp:
                             self.mqtt_client.disconnect()
                         except:
                             pass
+                    self.system_info.stop_sampler()
 
                     # Cleanup GPIO
                     try:
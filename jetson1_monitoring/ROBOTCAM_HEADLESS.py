@@ -87,6 +87,7 @@ print(f"[CONFIG] MQTT={MQTT_ENABLED} | broker={MQTT_BROKER}:{MQTT_PORT} | topic=
 # MQTT Setup
 # =========================
 system_info = SystemInfo(device_name="Jetson1", location="Kitchen")
+system_info.start_sampler(interval=config.get('system_metrics_interval', 2.0))
 mqtt_client = None
 
 if MQTT_ENABLED:
@@ -371,4 +372,5 @@ finally:
     if mqtt_client is not None:
         mqtt_client.disconnect()
         print("[MQTT] Disconnected")
+    system_info.stop_sampler()
     print("[EXIT] Done.")
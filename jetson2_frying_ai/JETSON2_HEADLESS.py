@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Jetson Orin #2 - Headless AI Monitoring System (no Tkinter GUI)
+- JETSON2_INTEGRATED.py 와 같은 튀김 AI / 바켓 감지 로직
+- 설정 / 데이터 수집 / MQTT 는 frying_station.py (FryingStation) 공유
+- 화면 대신 로컬 HTTP MJPEG 미리보기 제공 (mjpeg_server.py)
+  http://<jetson-ip>:<preview_port>/  (접속자가 없으면 미리보기 인코딩 안 함)
+
+Usage:
+    python3 JETSON2_HEADLESS.py
+    python3 JETSON2_HEADLESS.py --config config_jetson2.json --preview-port 8080
+    python3 JETSON2_HEADLESS.py --no-preview
+"""
+
+import cv2
+from ultralytics import YOLO
+from datetime import datetime
+import time
+import os
+import threading
+import signal
+import argparse
+import sys
+import numpy as np
+from collections import deque
+from queue import Queue, Empty
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import GStreamer camera wrapper (optimized for UYVY format)
+from gst_camera import GstCamera
+
+# Import Frying AI segmenter
+from frying_segmenter import FoodSegmenter
+
+# MJPEG preview server (replaces Tk display)
+from mjpeg_server import MJPEGPreviewServer
+
+# Config, MQTT and data collection shared with JETSON2_INTEGRATED.py
+from frying_station import FryingStation, StationConfig, load_config
+
+# =========================
+# Load Configuration
+# =========================
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Jetson #2 AI Monitoring System (Headless)')
+parser.add_argument('--config', default='config_jetson2.json', help='Path to config file')
+parser.add_argument('--preview-host', help='Override preview_host from config (0.0.0.0 = LAN access)')
+parser.add_argument('--preview-port', type=int, help='Override preview_port from config')
+parser.add_argument('--no-preview', action='store_true', help='Disable MJPEG preview server')
+parser.add_argument('--no-frying-ai', action='store_true', help='Do not start Frying AI automatically')
+parser.add_argument('--no-observe-ai', action='store_true', help='Do not start basket detection automatically')
+args = parser.parse_args()
+
+config = load_config(args.config)
+print(f"[CONFIG] Loaded from {args.config}")
+
+# Settings shared with the GUI version (MQTT, collection, storage, AI, cameras)
+settings = StationConfig(config)
+
+# Preview server settings
+PREVIEW_ENABLED = config.get('preview_enabled', True) and not args.no_preview
+# Local only unless LAN access is opted into (preview_host: "0.0.0.0" / --preview-host 0.0.0.0)
+PREVIEW_HOST = args.preview_host or config.get('preview_host', '127.0.0.1')
+PREVIEW_PORT = args.preview_port or config.get('preview_port', 8080)
+PREVIEW_WIDTH = config.get('preview_width', config.get('display_width', 600))
+PREVIEW_HEIGHT = config.get('preview_height', config.get('display_height', 450))
+PREVIEW_JPEG_QUALITY = config.get('preview_jpeg_quality', 70)
+PREVIEW_MAX_FPS = config.get('preview_max_fps', 10)
+
+print(f"[CONFIG] frying={settings.frying_enabled} | observe={settings.observe_enabled} | loop={settings.update_interval_ms}ms")
+print(f"[CONFIG] MQTT={settings.mqtt_enabled} | broker={settings.mqtt_broker}:{settings.mqtt_port}")
+print(f"[CONFIG] preview={PREVIEW_ENABLED} | {PREVIEW_HOST}:{PREVIEW_PORT} ({PREVIEW_WIDTH}x{PREVIEW_HEIGHT})")
+
+
+# =========================
+# Headless Application
+# =========================
+class HeadlessFryingStation(FryingStation):
+    """JetsonIntegratedApp 의 GUI 없는 버전 (단일 메인 루프)"""
+
+    STREAMS = ["frying_left", "frying_right", "observe_left", "observe_right"]
+
+    def __init__(self):
+        # MQTT 콜백(네트워크 스레드) -> 메인 루프 작업 전달 (root.after(0, ...) 대체)
+        self.pending_actions = Queue()
+
+        # Shared state, frame sink/catalog/retention/dedup and MQTT
+        super().__init__(settings)
+
+        # Load AI models with GPU (if available)
+        print("[모델] AI 모델 로딩 중...")
+        import torch
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        print(f"[GPU] device={self.device}")
+
+        self.frying_segmenter = FoodSegmenter(mode="auto")
+        print("[모델] Frying segmenter 로드 완료")
+
+        self.observe_seg_model = YOLO(self.cfg.observe_seg_model)
+        self.observe_cls_model = YOLO(self.cfg.observe_cls_model)
+        if self.device == 'cuda':
+            try:
+                self.observe_seg_model.to('cuda')
+                self.observe_cls_model.to('cuda')
+            except Exception as e:
+                print(f"[GPU] GPU 전환 실패, CPU 사용: {e}")
+                self.device = 'cpu'
+        print(f"[모델] Observe_add 모델 로드 완료 ({self.device})")
+
+        # AI results (per stream) and in-flight flags (스레드 중복 생성 방지)
+        self.ai_results = {name: None for name in self.STREAMS}
+        self.ai_busy = {name: False for name in self.STREAMS}
+
+        # Frame skip counters (CPU 절약)
+        self.frying_frame_skip = 0
+        self.observe_frame_skip = 0
+
+        # Voting queues (observe_add; last states live in observe_state)
+        self.observe_votes = {"left": deque(maxlen=self.cfg.vote_n), "right": deque(maxlen=self.cfg.vote_n)}
+
+        # Running flags
+        self.running = True
+        self.frying_running = self.cfg.frying_enabled and not args.no_frying_ai
+        self.observe_running = self.cfg.observe_enabled and not args.no_observe_ai
+
+        # Cameras
+        self.caps = {}
+        self.init_cameras()
+
+        # Preview server
+        self.preview = None
+        if PREVIEW_ENABLED:
+            self.preview = MJPEGPreviewServer(
+                host=PREVIEW_HOST,
+                port=PREVIEW_PORT,
+                streams=[name for name in self.STREAMS if self.caps.get(name) is not None],
+                width=PREVIEW_WIDTH,
+                height=PREVIEW_HEIGHT,
+                quality=PREVIEW_JPEG_QUALITY,
+                max_fps=PREVIEW_MAX_FPS
+            )
+            if not self.preview.start():
+                self.preview = None
+
+    # =========================
+    # MQTT
+    # =========================
+    def run_on_main(self, fn):
+        """MQTT callback -> main loop (executed at the start of the next tick)"""
+        self.pending_actions.put(fn)
+
+
+    # =========================
+    # Cameras
+    # =========================
+    def _open_camera(self, name, index):
+        cap = GstCamera(device_index=index, width=self.cfg.camera_width, height=self.cfg.camera_height, fps=self.cfg.camera_fps)
+        if cap.start():
+            print(f"[카메라] {name} (video{index}) 초기화 완료 ✓")
+            return cap
+        print(f"[카메라] {name} (video{index}) 초기화 실패 ✗")
+        return None
+
+    def init_cameras(self):
+        """Initialize GMSL cameras based on enabled settings"""
+        print("[카메라] 카메라 초기화 중...")
+        self.caps = {name: None for name in self.STREAMS}
+        if self.cfg.frying_enabled:
+            self.caps["frying_left"] = self._open_camera("frying_left", self.cfg.frying_left_camera_index)
+            self.caps["frying_right"] = self._open_camera("frying_right", self.cfg.frying_right_camera_index)
+        if self.cfg.observe_enabled:
+            self.caps["observe_left"] = self._open_camera("observe_left", self.cfg.observe_left_camera_index)
+            self.caps["observe_right"] = self._open_camera("observe_right", self.cfg.observe_right_camera_index)
+        print("[카메라] 카메라 초기화 완료!")
+
+    # =========================
+    # AI processing
+    # =========================
+    def _run_ai_async(self, name, fn, frame):
+        """Run fn(frame) in a background thread, one in flight per stream"""
+        if self.ai_busy[name]:
+            return
+        self.ai_busy[name] = True
+
+        def worker():
+            try:
+                self.ai_results[name] = fn(frame)
+            except Exception as e:
+                print(f"[{name}] AI 오류: {e}")
+            finally:
+                self.ai_busy[name] = False
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _segment_frying(self, frame):
+        return self.frying_segmenter.segment(frame, visualize=False)
+
+    def _detect_basket(self, frame):
+        """Segmentation + classification for one observe frame (worker thread)"""
+        H, W = frame.shape[:2]
+        r = self.observe_seg_model.predict(
+            frame, imgsz=self.cfg.img_size_seg, conf=self.cfg.conf_seg, verbose=False, device=self.device
+        )[0]
+
+        basket_mask = np.zeros((H, W), np.uint8)
+        if r.masks is not None:
+            for i, cls_idx in enumerate(r.boxes.cls.cpu().numpy().astype(int)):
+                if r.names[cls_idx] == "basket":
+                    m = (r.masks.data[i].cpu().numpy() > 0.5).astype(np.uint8) * 255
+                    m = cv2.resize(m, (W, H), interpolation=cv2.INTER_NEAREST)
+                    basket_mask = np.maximum(basket_mask, m)
+
+        result = {"detected": False, "is_filled": False, "contour": None, "box": None, "label": None}
+        if not basket_mask.any():
+            return result
+
+        basket_mask = cv2.morphologyEx(basket_mask, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8), iterations=1)
+        cnt = self.largest_contour(basket_mask)
+        if cnt is None:
+            return result
+
+        x, y, w, h = cv2.boundingRect(cnt)
+        x2, y2 = min(W, x + w), min(H, y + h)
+        x, y = max(0, x), max(0, y)
+        roi = frame[y:y2, x:x2]
+
+        cls_res = self.observe_cls_model.predict(
+            roi, imgsz=self.cfg.img_size_cls, conf=0.0, verbose=False, device=self.device
+        )[0]
+        top1_name = cls_res.names[int(cls_res.probs.top1)]
+        prob = float(cls_res.probs.top1conf)
+
+        result.update({
+            "detected": True,
+            "is_filled": top1_name.lower() == self.cfg.positive_label.lower(),
+            "contour": cnt,
+            "box": (x, y, x2, y2),
+            "label": f"{top1_name} ({prob:.2f})"
+        })
+        return result
+
+    def largest_contour(self, mask, min_area=2000):
+        """Find largest contour in mask"""
+        cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not cnts:
+            return None
+        cnt = max(cnts, key=cv2.contourArea)
+        if cv2.contourArea(cnt) < min_area:
+            return None
+        return cnt
+
+    def process_frying(self, name, frame, run_ai, draw):
+        """Frying AI for one camera; returns the preview image (or None)"""
+        if self.frying_running and run_ai:
+            self._run_ai_async(name, self._segment_frying, frame)
+
+        if not draw:
+            return None
+
+        vis = frame
+        result = self.ai_results[name]
+        if self.frying_running and result is not None and result.food_mask is not None:
+            try:
+                green_overlay = np.zeros_like(frame)
+                green_overlay[:, :] = (0, 255, 0)
+                mask_3ch = cv2.cvtColor(result.food_mask, cv2.COLOR_GRAY2BGR)
+                vis = cv2.addWeighted(frame, 0.7, cv2.bitwise_and(green_overlay, mask_3ch), 0.3, 0)
+            except:
+                pass
+        return vis
+
+    def process_observe(self, name, side, frame, run_ai, draw):
+        """Basket detection + voting for one camera; returns the preview image (or None)"""
+        if not self.observe_running:
+            return frame if draw else None
+
+        if run_ai:
+            self._run_ai_async(name, self._detect_basket, frame)
+
+        result = self.ai_results[name]
+        if result is None:
+            return frame if draw else None
+
+        vis = frame.copy() if draw else None
+        side_kr = "왼쪽" if side == "left" else "오른쪽"
+
+        if result["detected"]:
+            votes = self.observe_votes[side]
+            votes.append(result["is_filled"])
+            filled_stable = sum(votes) >= (len(votes) // 2 + 1)
+            state_txt = "FILLED" if filled_stable else "EMPTY"
+
+            if state_txt != self.observe_state[side]:
+                self.log_signal(side_kr, state_txt)
+                self.publish_observe_state(side, state_txt)
+                self.observe_state[side] = state_txt
+
+            if draw:
+                x, y, x2, y2 = result["box"]
+                cv2.drawContours(vis, [result["contour"]], -1, (0, 255, 255), 2)
+                cv2.rectangle(vis, (x, y), (x2, y2), (255, 128, 0), 2)
+                cv2.putText(vis, result["label"], (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+                color = (0, 0, 255) if filled_stable else (200, 200, 200)
+                cv2.putText(vis, f"STATUS: {state_txt}", (16, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, color, 3)
+        else:
+            self.observe_votes[side].clear()
+            if self.observe_state[side] is not None:
+                self.log_signal(side_kr, "NO_BASKET")
+                self.publish_observe_state(side, "NO_BASKET")
+                self.observe_state[side] = None
+            if draw:
+                cv2.putText(vis, "Basket Not Found", (16, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+        return vis
+
+    def log_signal(self, side, state):
+        """Log state change signal"""
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{ts}] 바켓 {side} -> {state}")
+
+    # =========================
+    # Main loop
+    # =========================
+    def tick(self, dt):
+        """One loop iteration: read cameras, AI, preview, collection timers"""
+        # MQTT에서 요청된 시작/종료 작업 실행 (메인 스레드)
+        while True:
+            try:
+                action = self.pending_actions.get_nowait()
+            except Empty:
+                break
+            try:
+                action()
+            except Exception as e:
+                print(f"[작업] 실행 오류: {e}")
+
+        # MQTT 온도 샘플 일괄 반영 (메인 스레드)
+        try:
+            self.apply_telemetry()
+        except Exception as e:
+            print(f"[MQTT 수신] 처리 오류: {e}")
+
+        # Shared frame-skip counters (left/right cameras run AI on the same tick)
+        run_frying_ai = False
+        if self.frying_running:
+            self.frying_frame_skip += 1
+            if self.frying_frame_skip >= self.cfg.frying_frame_skip:
+                self.frying_frame_skip = 0
+                run_frying_ai = True
+        run_observe_ai = False
+        if self.observe_running:
+            self.observe_frame_skip += 1
+            if self.observe_frame_skip >= self.cfg.observe_frame_skip:
+                self.observe_frame_skip = 0
+                run_observe_ai = True
+
+        for name in self.STREAMS:
+            cap = self.caps.get(name)
+            if cap is None:
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                continue
+
+            # 미리보기 접속자가 있을 때만 오버레이 그리기
+            draw = self.preview is not None and self.preview.has_clients(name)
+            if name.startswith("frying"):
+                vis = self.process_frying(name, frame, run_frying_ai, draw)
+            else:
+                vis = self.process_observe(name, name.split("_")[1], frame, run_observe_ai, draw)
+            if draw:
+                self.preview.update_frame(name, vis)
+
+            # GstCamera.read() already returns a private copy
+            self.latest_frames[name] = frame
+
+        # POT1/POT2 + LEGACY collection timers (save latest_frames when due)
+        self.advance_collection(dt)
+        self.publish_mqtt_periodic()
+
+    def run(self):
+        """Main loop (runs until stop() is called or a signal is received)"""
+        print("[INIT] 초기화 완료. 메인 루프 시작...")
+        loop_interval = self.cfg.update_interval_ms / 1000.0
+        last = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            dt = now - last
+            last = now
+            try:
+                self.tick(dt)
+            except Exception as e:
+                print(f"[메인루프] 오류: {e}")
+
+            remain = loop_interval - (time.monotonic() - now)
+            if remain > 0:
+                time.sleep(remain)
+
+    def stop(self, *_):
+        """Signal handler - request main loop exit"""
+        if self.running:
+            print("\n[종료] 종료 요청 수신")
+        self.running = False
+
+    # =========================
+    # Shutdown
+    # =========================
+    def cleanup(self):
+        """Stop collections (writes session_info.json), MQTT, preview and cameras"""
+        self.close_station()
+
+        if self.preview:
+            self.preview.stop()
+
+        print("[종료] 카메라 해제 중...")
+        for name, cap in self.caps.items():
+            if cap is not None:
+                try:
+                    cap.stop()
+                except Exception as e:
+                    print(f"[종료] {name} 해제 오류: {e}")
+        print("[종료] 프로그램 종료 완료")
+
+
+# =========================
+# Main Entry Point
+# =========================
+if __name__ == "__main__":
+    print("=" * 50)
+    print("Jetson #2 - AI Monitoring System (Headless)")
+    print("=" * 50)
+
+    app = HeadlessFryingStation()
+    signal.signal(signal.SIGINT, app.stop)
+    signal.signal(signal.SIGTERM, app.stop)
+    try:
+        app.run()
+    finally:
+        app.cleanup()
@@ -4,7 +4,7 @@
 Jetson Orin #2 - Integrated AI Monitoring System
 - Frying AI (튀김 AI - 2 cameras: video0 left, video1 right)
 - Observe_add (Bucket detection: video2 left, video3 right)
-- MQTT Communication
+- MQTT Communication / data collection (frying_station.py, shared with JETSON2_HEADLESS.py)
 - PC Status Check
 - Vibration Sensor Check
 
@@ -17,7 +17,6 @@ import cv2
 from PIL import Image, ImageTk
 from ultralytics import YOLO
 from datetime import datetime
-import time
 import os
 import json
 import threading
@@ -25,12 +24,9 @@ import sys
 import numpy as np
 from collections import deque
 from queue import Queue
-import socket
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.communication.mqtt_client import MQTTClient
-from src.core.system_info import SystemInfo
 
 # Import GStreamer camera wrapper (optimized for UYVY format)
 from gst_camera import GstCamera
@@ -38,6 +34,9 @@ from gst_camera import GstCamera
 # Import Frying AI segmenter
 from frying_segmenter import FoodSegmenter
 
+# Config, MQTT and data collection shared with JETSON2_HEADLESS.py
+from frying_station import FryingStation, StationConfig, load_config
+
 # Import psutil for system monitoring
 try:
     import psutil
@@ -45,29 +44,6 @@ except ImportError:
     print("[경고] psutil 미설치 - PC 상태 기능 제한됨")
     psutil = None
 
-# =========================
-# Load Configuration
-# =========================
-def load_config(config_path="config_jetson2.json"):
-    """Load configuration from JSON file"""
-    # Get script directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_full_path = os.path.join(script_dir, config_path)
-
-    with open(config_full_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def get_ip_address():
-    """Get local IP address"""
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except:
-        return "unknown"
-
 # =========================
 # Popup Helper Functions
 # =========================
@@ -104,65 +80,13 @@ def askokcancel_topmost(title, message):
 
 config = load_config()
 
-# Frying AI Configuration (video0, video1)
-FRYING_ENABLED = config.get('frying_enabled', True)
-FRYING_LEFT_CAMERA_INDEX = config.get('frying_left_camera_index', 0)
-FRYING_RIGHT_CAMERA_INDEX = config.get('frying_right_camera_index', 1)
+# Settings shared with JETSON2_HEADLESS.py (MQTT, collection, storage, AI, cameras)
+settings = StationConfig(config)
+
+# GUI-only settings
 FRYING_SEG_MODEL = config.get('frying_seg_model', 'frying_seg.pt')
 FRYING_CLS_MODEL = config.get('frying_cls_model', 'frying_cls.pt')
-
-# Observe_add Configuration (video2, video3)
-OBSERVE_ENABLED = config.get('observe_enabled', True)
-OBSERVE_LEFT_CAMERA_INDEX = config.get('observe_left_camera_index', 2)
-OBSERVE_RIGHT_CAMERA_INDEX = config.get('observe_right_camera_index', 3)
-OBSERVE_SEG_MODEL = config.get('observe_seg_model', '../observe_add/besta.pt')
-OBSERVE_CLS_MODEL = config.get('observe_cls_model', '../observe_add/bestb.pt')
-
-# Common AI settings
-IMG_SIZE_SEG = config.get('img_size_seg', 640)
-IMG_SIZE_CLS = config.get('img_size_cls', 224)
-CONF_SEG = config.get('conf_seg', 0.5)
-VOTE_N = config.get('vote_n', 7)  # Majority voting window
-POSITIVE_LABEL = config.get('positive_label', 'filled')
-
-# Device Identification
-DEVICE_ID = config.get('device_id', 'jetson2')
-DEVICE_NAME = config.get('device_name', 'Jetson2_Frying_Station')
-DEVICE_LOCATION = config.get('device_location', 'kitchen_frying')
-
-# MQTT Configuration
-MQTT_ENABLED = config.get('mqtt_enabled', False)
-MQTT_BROKER = config.get('mqtt_broker', 'localhost')
-MQTT_PORT = config.get('mqtt_port', 1883)
-# MQTT Topics (published by Jetson)
-MQTT_TOPIC_FRYING = f"{DEVICE_ID}/" + config.get('mqtt_topic_frying', 'frying/status')
-MQTT_TOPIC_OBSERVE = f"{DEVICE_ID}/" + config.get('mqtt_topic_observe', 'observe/status')
-MQTT_TOPIC_SYSTEM_AI_MODE = config.get('mqtt_topic_ai_mode', f"{DEVICE_ID}/system/ai_mode")
-MQTT_TOPIC_FRYING_COMPLETION = f"{DEVICE_ID}/frying/completion"
-# Subscribed topics (no prefix - shared from robot)
-MQTT_TOPIC_POT1_OIL_TEMP = config.get('mqtt_topic_pot1_oil_temp', 'frying/pot1/oil_temp')
-MQTT_TOPIC_POT1_PROBE_TEMP = config.get('mqtt_topic_pot1_probe_temp', 'frying/pot1/probe_temp')
-MQTT_TOPIC_POT2_OIL_TEMP = config.get('mqtt_topic_pot2_oil_temp', 'frying/pot2/oil_temp')
-MQTT_TOPIC_POT2_PROBE_TEMP = config.get('mqtt_topic_pot2_probe_temp', 'frying/pot2/probe_temp')
-MQTT_TOPIC_FOOD_TYPE = config.get('mqtt_topic_food_type', 'frying/food_type')
-MQTT_TOPIC_FRYING_CONTROL = config.get('mqtt_topic_frying_control', 'frying/control')
-# POT1/POT2 Separate Control Topics (subscribed by Jetson)
-MQTT_TOPIC_FRYING_POT1_FOOD_TYPE = config.get('mqtt_topic_frying_pot1_food_type', 'frying/pot1/food_type')
-MQTT_TOPIC_FRYING_POT1_CONTROL = config.get('mqtt_topic_frying_pot1_control', 'frying/pot1/control')
-MQTT_TOPIC_FRYING_POT2_FOOD_TYPE = config.get('mqtt_topic_frying_pot2_food_type', 'frying/pot2/food_type')
-MQTT_TOPIC_FRYING_POT2_CONTROL = config.get('mqtt_topic_frying_pot2_control', 'frying/pot2/control')
-MQTT_QOS = config.get('mqtt_qos', 1)
-MQTT_CLIENT_ID = config.get('mqtt_client_id', 'jetson2_ai')
-MQTT_PUBLISH_INTERVAL = config.get('mqtt_publish_interval', 5)  # seconds
-# AI Mode Setting
-AI_MODE_ENABLED = config.get('ai_mode_enabled', False)
-
-# Data Collection Configuration
-SAVE_RESOLUTION = config.get('save_resolution', {'width': 1280, 'height': 720})
-SAVE_WIDTH = SAVE_RESOLUTION['width']
-SAVE_HEIGHT = SAVE_RESOLUTION['height']
-TARGET_PROBE_TEMP = config.get('target_probe_temp', 75.0)
-JPEG_QUALITY = config.get('jpeg_quality', 85)
+MQTT_TOPIC_FRYING_COMPLETION = f"{settings.device_id}/frying/completion"
 FOOD_TYPES = config.get('food_types', ["chicken", "shrimp", "potato", "dumpling", "pork_cutlet", "fish"])
 
 # GUI Configuration - WHITE MODE (768x1024 세로 모드)
@@ -190,27 +114,19 @@ COLOR_ACCENT = "#6200EA"  # Purple accent
 COLOR_BUTTON = "#1976D2"  # Blue buttons
 COLOR_BUTTON_HOVER = "#1565C0"  # Darker blue on hover
 
-# Camera resolution (GMSL) - from config
-CAMERA_WIDTH = config.get('camera_width', 1920)
-CAMERA_HEIGHT = config.get('camera_height', 1536)
-CAMERA_FPS = config.get('camera_fps', 30)
-
 # Display resolution (최적화)
 DISPLAY_WIDTH = config.get('display_width', 600)
 DISPLAY_HEIGHT = config.get('display_height', 450)
 
 # GUI update interval
-GUI_UPDATE_INTERVAL = config.get('gui_update_interval_ms', 50)
-
-# Frame skip settings (CPU 절약)
-FRYING_FRAME_SKIP = config.get('frying_frame_skip', 3)
-OBSERVE_FRAME_SKIP = config.get('observe_frame_skip', 5)
+GUI_UPDATE_INTERVAL = settings.update_interval_ms
 
 
 # =========================
 # Main Application Class
 # =========================
-class JetsonIntegratedApp:
+class JetsonIntegratedApp(FryingStation):
+
     def __init__(self, root):
         self.root = root
         self.root.title("Jetson #2 - AI Monitoring System")
@@ -233,13 +149,8 @@ class JetsonIntegratedApp:
             self.root.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}+0+0")
             print(f"[디스플레이] 창 모드 ({WINDOW_WIDTH}x{WINDOW_HEIGHT})")
 
-        # System info
-        self.sys_info = SystemInfo(device_name="Jetson2", location="Kitchen")
-
-        # MQTT client
-        self.mqtt_client = None
-        if MQTT_ENABLED:
-            self.init_mqtt()
+        # Shared state, frame sink/catalog/retention/dedup and MQTT
+        super().__init__(settings)
 
         # Load AI models with GPU (if available)
         print("[모델] AI 모델 로딩 중...")
@@ -259,8 +170,8 @@ class JetsonIntegratedApp:
         print(f"[모델] Frying segmenter 로드 완료")
 
         # Observe_add models
-        self.observe_seg_model = YOLO(OBSERVE_SEG_MODEL)
-        self.observe_cls_model = YOLO(OBSERVE_CLS_MODEL)
+        self.observe_seg_model = YOLO(self.cfg.observe_seg_model)
+        self.observe_cls_model = YOLO(self.cfg.observe_cls_model)
 
         # Move to GPU if available
         if self.use_cuda:
@@ -309,69 +220,14 @@ class JetsonIntegratedApp:
         self.observe_right_cap = None
 
         # Voting queues for stability (observe_add)
-        self.observe_left_votes = deque(maxlen=VOTE_N)
-        self.observe_right_votes = deque(maxlen=VOTE_N)
-
-        # Last states for change detection
-        self.observe_left_state = None
-        self.observe_right_state = None
-
-        # Temperature data (from MQTT)
-        self.oil_temp_left = 0.0
-        self.oil_temp_right = 0.0
-        self.probe_temp_left = 0.0
-        self.probe_temp_right = 0.0
-
-        # Food type (from MQTT or manual selection)
-        self.current_food_type = "unknown"
+        self.observe_left_votes = deque(maxlen=self.cfg.vote_n)
+        self.observe_right_votes = deque(maxlen=self.cfg.vote_n)
 
         # Running flags
         self.running = True
         self.frying_running = False
         self.observe_running = False
 
-        # Data collection flags (LEGACY - for backward compatibility)
-        self.data_collection_active = False
-        self.collection_session_id = None
-        self.collection_start_time = None
-        self.collection_frame_counter = 0
-        self.collection_interval = config.get('data_collection_interval', 5)  # 5초마다 저장 (기본값)
-        self.collection_timer = 0
-        self.collection_metadata = []  # Store MQTT metadata during collection
-        self.collection_completion_marked = False  # 완료 시점 마킹 여부
-        self.collection_completion_time = None  # 완료 시점 타임스탬프
-        self.collection_completion_info = {}  # 완료 시점의 온도/시간 정보
-
-        # POT1 data collection (cameras 0, 1)
-        self.pot1_collecting = False
-        self.pot1_session_id = None
-        self.pot1_start_time = None
-        self.pot1_frame_counter = 0
-        self.pot1_timer = 0
-        self.pot1_food_type = "unknown"
-        self.pot1_metadata = []
-        self.pot1_completion_marked = False
-        self.pot1_completion_time = None
-        self.pot1_completion_info = {}
-
-        # POT2 data collection (cameras 2, 3)
-        self.pot2_collecting = False
-        self.pot2_session_id = None
-        self.pot2_start_time = None
-        self.pot2_frame_counter = 0
-        self.pot2_timer = 0
-        self.pot2_food_type = "unknown"
-        self.pot2_metadata = []
-        self.pot2_completion_marked = False
-        self.pot2_completion_time = None
-        self.pot2_completion_info = {}
-
-        # Latest frames for data collection
-        self.latest_frying_left_frame = None
-        self.latest_frying_right_frame = None
-        self.latest_observe_left_frame = None
-        self.latest_observe_right_frame = None
-
         # Build GUI
         self.build_gui()
 
@@ -379,16 +235,13 @@ class JetsonIntegratedApp:
         self.init_cameras()
 
         # Start update loops
+        self.poll_telemetry()
         self.update_frying_left()
         self.update_frying_right()
         self.update_observe_left()
         self.update_observe_right()
         self.update_clock()
 
-        # Start periodic MQTT publishing
-        if MQTT_ENABLED:
-            self.publish_mqtt_periodic()
-
         # Fullscreen toggle
         self.is_fullscreen = False
         self.root.bind('<F11>', lambda e: self.toggle_fullscreen())
@@ -398,358 +251,46 @@ class JetsonIntegratedApp:
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def init_mqtt(self):
-        """Initialize MQTT client"""
-        try:
-            self.mqtt_client = MQTTClient(
-                broker=MQTT_BROKER,
-                port=MQTT_PORT,
-                client_id=MQTT_CLIENT_ID
-            )
-
-            # Subscribe to temperature topics (POT1/POT2)
-            self.mqtt_client.subscribe(MQTT_TOPIC_POT1_OIL_TEMP, self.on_pot1_oil_temp)
-            self.mqtt_client.subscribe(MQTT_TOPIC_POT1_PROBE_TEMP, self.on_pot1_probe_temp)
-            self.mqtt_client.subscribe(MQTT_TOPIC_POT2_OIL_TEMP, self.on_pot2_oil_temp)
-            self.mqtt_client.subscribe(MQTT_TOPIC_POT2_PROBE_TEMP, self.on_pot2_probe_temp)
-
-            # Subscribe to food type topic (LEGACY)
-            self.mqtt_client.subscribe(MQTT_TOPIC_FOOD_TYPE, self.on_food_type)
-            self.mqtt_client.subscribe(MQTT_TOPIC_FRYING_CONTROL, self.on_frying_control)
-
-            # Subscribe to POT1/POT2 control topics
-            self.mqtt_client.subscribe(MQTT_TOPIC_FRYING_POT1_FOOD_TYPE, self.on_frying_pot1_food_type)
-            self.mqtt_client.subscribe(MQTT_TOPIC_FRYING_POT1_CONTROL, self.on_frying_pot1_control)
-            self.mqtt_client.subscribe(MQTT_TOPIC_FRYING_POT2_FOOD_TYPE, self.on_frying_pot2_food_type)
-            self.mqtt_client.subscribe(MQTT_TOPIC_FRYING_POT2_CONTROL, self.on_frying_pot2_control)
-
-            # Subscribe to vibration control topic
-            self.mqtt_client.subscribe("calibration/vibration/control", self.on_vibration_control)
-
-            self.mqtt_client.connect()
-            print(f"[MQTT] 연결 성공: {MQTT_BROKER}:{MQTT_PORT}")
-            print(f"[MQTT] Device: {DEVICE_ID} ({DEVICE_NAME}) @ {get_ip_address()}")
-            print(f"[MQTT] 구독 토픽 (로봇→Jetson):")
-            print(f"  - {MQTT_TOPIC_POT1_OIL_TEMP}")
-            print(f"  - {MQTT_TOPIC_POT1_PROBE_TEMP}")
-            print(f"  - {MQTT_TOPIC_POT2_OIL_TEMP}")
-            print(f"  - {MQTT_TOPIC_POT2_PROBE_TEMP}")
-            print(f"  - {MQTT_TOPIC_FRYING_POT1_FOOD_TYPE}")
-            print(f"  - {MQTT_TOPIC_FRYING_POT1_CONTROL}")
-            print(f"  - {MQTT_TOPIC_FRYING_POT2_FOOD_TYPE}")
-            print(f"  - {MQTT_TOPIC_FRYING_POT2_CONTROL}")
-            print(f"  - {MQTT_TOPIC_FOOD_TYPE} (LEGACY)")
-            print(f"  - calibration/vibration/control")
-            print(f"[MQTT] 발행 토픽 (Jetson→로봇):")
-            print(f"  - {MQTT_TOPIC_OBSERVE}")
-            print(f"  - {MQTT_TOPIC_FRYING}")
-            print(f"  - {MQTT_TOPIC_SYSTEM_AI_MODE}")
-            print(f"  - {MQTT_TOPIC_FRYING_COMPLETION}")
-
-            # Publish AI mode status from config
-            ai_mode_status = "ON" if AI_MODE_ENABLED else "OFF"
-            self.send_mqtt_message(MQTT_TOPIC_SYSTEM_AI_MODE, ai_mode_status)
-            print(f"[MQTT] AI 모드 발행: {ai_mode_status} (config: ai_mode_enabled={AI_MODE_ENABLED})")
-        except Exception as e:
-            print(f"[MQTT] 연결 실패: {e}")
-            self.mqtt_client = None
-
-    def on_pot1_oil_temp(self, client, userdata, message):
-        """MQTT callback for POT1 oil temperature"""
-        try:
-            self.oil_temp_left = float(message.payload.decode())
-
-            # Store metadata during POT1 data collection
-            if self.pot1_collecting:
-                from datetime import datetime
-                self.pot1_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "oil_temperature",
-                    "pot": "pot1",
-                    "value": self.oil_temp_left,
-                    "unit": "celsius"
-                })
-            # LEGACY: Also store in legacy collection
-            if self.data_collection_active:
-                from datetime import datetime
-                self.collection_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "oil_temperature",
-                    "position": "left",
-                    "value": self.oil_temp_left,
-                    "unit": "celsius"
-                })
-        except:
-            pass
-
-    def on_pot2_oil_temp(self, client, userdata, message):
-        """MQTT callback for POT2 oil temperature"""
-        try:
-            self.oil_temp_right = float(message.payload.decode())
-
-            # Store metadata during POT2 data collection
-            if self.pot2_collecting:
-                from datetime import datetime
-                self.pot2_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "oil_temperature",
-                    "pot": "pot2",
-                    "value": self.oil_temp_right,
-                    "unit": "celsius"
-                })
-            # LEGACY: Also store in legacy collection
-            if self.data_collection_active:
-                from datetime import datetime
-                self.collection_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "oil_temperature",
-                    "position": "right",
-                    "value": self.oil_temp_right,
-                    "unit": "celsius"
-                })
-        except:
-            pass
-
-    def on_pot1_probe_temp(self, client, userdata, message):
-        """MQTT callback for POT1 probe temperature"""
-        try:
-            self.probe_temp_left = float(message.payload.decode())
-
-            # Store metadata during POT1 data collection
-            if self.pot1_collecting:
-                from datetime import datetime
-                self.pot1_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "probe_temperature",
-                    "pot": "pot1",
-                    "value": self.probe_temp_left,
-                    "unit": "celsius"
-                })
-
-                # Auto-mark completion if target temperature reached
-                if not self.pot1_completion_marked and self.probe_temp_left >= TARGET_PROBE_TEMP:
-                    print(f"[POT1] 목표 온도 도달: {self.probe_temp_left}°C")
-                    self.pot1_completion_marked = True
-                    self.pot1_completion_time = datetime.now()
-                    self.pot1_completion_info = {
-                        "method": f"auto (probe_temp >= {TARGET_PROBE_TEMP}°C)",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "probe_temp": self.probe_temp_left,
-                        "oil_temp": self.oil_temp_left,
-                        "elapsed_time_sec": (datetime.now() - self.pot1_start_time).total_seconds() if self.pot1_start_time else 0
-                    }
-
-            # LEGACY: Also store in legacy collection
-            if self.data_collection_active:
-                from datetime import datetime
-                self.collection_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "probe_temperature",
-                    "position": "left",
-                    "value": self.probe_temp_left,
-                    "unit": "celsius"
-                })
-                if not self.collection_completion_marked and self.probe_temp_left >= TARGET_PROBE_TEMP:
-                    self.mark_completion_auto("left", self.probe_temp_left)
-        except:
-            pass
-
-    def on_pot2_probe_temp(self, client, userdata, message):
-        """MQTT callback for POT2 probe temperature"""
-        try:
-            self.probe_temp_right = float(message.payload.decode())
-
-            # Store metadata during POT2 data collection
-            if self.pot2_collecting:
-                from datetime import datetime
-                self.pot2_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "probe_temperature",
-                    "pot": "pot2",
-                    "value": self.probe_temp_right,
-                    "unit": "celsius"
-                })
-
-                # Auto-mark completion if target temperature reached
-                if not self.pot2_completion_marked and self.probe_temp_right >= TARGET_PROBE_TEMP:
-                    print(f"[POT2] 목표 온도 도달: {self.probe_temp_right}°C")
-                    self.pot2_completion_marked = True
-                    self.pot2_completion_time = datetime.now()
-                    self.pot2_completion_info = {
-                        "method": f"auto (probe_temp >= {TARGET_PROBE_TEMP}°C)",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "probe_temp": self.probe_temp_right,
-                        "oil_temp": self.oil_temp_right,
-                        "elapsed_time_sec": (datetime.now() - self.pot2_start_time).total_seconds() if self.pot2_start_time else 0
-                    }
-
-            # LEGACY: Also store in legacy collection
-            if self.data_collection_active:
-                from datetime import datetime
-                self.collection_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "probe_temperature",
-                    "position": "right",
-                    "value": self.probe_temp_right,
-                    "unit": "celsius"
-                })
-                if not self.collection_completion_marked and self.probe_temp_right >= TARGET_PROBE_TEMP:
-                    self.mark_completion_auto("right", self.probe_temp_right)
-        except:
-            pass
-
-    def on_food_type(self, client, userdata, message):
-        """MQTT callback for food type - AUTO START collection"""
-        try:
-            self.current_food_type = message.payload.decode()
-            print(f"[MQTT] 음식 종류 수신: {self.current_food_type}")
-
-            # AUTO START: If not collecting, start automatically
-            if not self.data_collection_active:
-                print(f"[MQTT] 자동 수집 시작 - 음식: {self.current_food_type}")
-                self.root.after(0, self.start_data_collection)
-            else:
-                # If already collecting, store as metadata event
-                from datetime import datetime
-                self.collection_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "food_type_change",
-                    "value": self.current_food_type
-                })
-                print(f"[MQTT] 수집 중 음식 종류 변경: {self.current_food_type}")
-        except Exception as e:
-            print(f"[MQTT] 음식 종류 수신 오류: {e}")
-
-    def on_frying_control(self, client, userdata, message):
-        """MQTT callback for frying control commands - AUTO STOP"""
-        try:
-            command = message.payload.decode().strip().lower()
-            print(f"[MQTT] 튀김 제어 명령 수신: {command}")
-
-            if command == "stop":
-                if self.data_collection_active:
-                    print(f"[MQTT] 자동 수집 중지")
-                    self.root.after(0, self.stop_data_collection)
-                else:
-                    print(f"[MQTT] 수집 중이 아님 - 무시")
-        except Exception as e:
-            print(f"[MQTT] 제어 명령 수신 오류: {e}")
-
-    # POT1/POT2 Separate Control MQTT Callbacks
-    def on_frying_pot1_food_type(self, client, userdata, message):
-        """MQTT callback for pot1 food type - AUTO START collection"""
-        try:
-            self.pot1_food_type = message.payload.decode()
-            print(f"[MQTT POT1] 음식 종류 수신: {self.pot1_food_type}")
-
-            if not self.pot1_collecting:
-                print(f"[MQTT POT1] 자동 수집 시작 - 음식: {self.pot1_food_type}")
-                self.root.after(0, self.start_pot1_collection)
-            else:
-                # Store metadata event
-                from datetime import datetime
-                self.pot1_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "food_type_change",
-                    "value": self.pot1_food_type
-                })
-        except Exception as e:
-            print(f"[MQTT POT1] 음식 종류 수신 오류: {e}")
-
-    def on_frying_pot1_control(self, client, userdata, message):
-        """MQTT callback for pot1 control commands"""
-        try:
-            command = message.payload.decode().strip().lower()
-            print(f"[MQTT POT1] 제어 명령 수신: {command}")
-
-            if command == "stop":
-                if self.pot1_collecting:
-                    print(f"[MQTT POT1] 자동 수집 중지")
-                    self.root.after(0, self.stop_pot1_collection)
-                else:
-                    print(f"[MQTT POT1] 수집 중이 아님 - 무시")
-        except Exception as e:
-            print(f"[MQTT POT1] 제어 명령 수신 오류: {e}")
-
-    def on_frying_pot2_food_type(self, client, userdata, message):
-        """MQTT callback for pot2 food type - AUTO START collection"""
-        try:
-            self.pot2_food_type = message.payload.decode()
-            print(f"[MQTT POT2] 음식 종류 수신: {self.pot2_food_type}")
-
-            if not self.pot2_collecting:
-                print(f"[MQTT POT2] 자동 수집 시작 - 음식: {self.pot2_food_type}")
-                self.root.after(0, self.start_pot2_collection)
-            else:
-                # Store metadata event
-                from datetime import datetime
-                self.pot2_metadata.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                    "type": "food_type_change",
-                    "value": self.pot2_food_type
-                })
-        except Exception as e:
-            print(f"[MQTT POT2] 음식 종류 수신 오류: {e}")
-
-    def on_frying_pot2_control(self, client, userdata, message):
-        """MQTT callback for pot2 control commands"""
+        """Initialize MQTT client (shared) and print the topic map"""
+        super().init_mqtt()
+        if self.mqtt_client is None:
+            return
+        cfg = self.cfg
+        print(f"[MQTT] 구독 토픽 (로봇→Jetson):")
+        print(f"  - {cfg.topic_pot1_oil_temp}")
+        print(f"  - {cfg.topic_pot1_probe_temp}")
+        print(f"  - {cfg.topic_pot2_oil_temp}")
+        print(f"  - {cfg.topic_pot2_probe_temp}")
+        print(f"  - {cfg.topic_pot1_food_type}")
+        print(f"  - {cfg.topic_pot1_control}")
+        print(f"  - {cfg.topic_pot2_food_type}")
+        print(f"  - {cfg.topic_pot2_control}")
+        print(f"  - {cfg.topic_food_type} (LEGACY)")
+        print(f"  - calibration/vibration/control")
+        print(f"[MQTT] 발행 토픽 (Jetson→로봇):")
+        print(f"  - {cfg.topic_observe}")
+        print(f"  - {cfg.topic_frying}")
+        print(f"  - {cfg.topic_ai_mode}")
+        print(f"  - {MQTT_TOPIC_FRYING_COMPLETION}")
+
+    def subscribe_topics(self):
+        """Robot PC topics (shared) + vibration sensor control"""
+        super().subscribe_topics()
+        self.mqtt_client.subscribe("calibration/vibration/control", self.on_vibration_control, decode="message")
+
+    def run_on_main(self, fn):
+        """MQTT callback -> Tk main thread"""
+        self.root.after(0, fn)
+
+    def poll_telemetry(self):
+        """Once per GUI tick: drain MQTT telemetry, collection timers, periodic MQTT publish"""
         try:
-            command = message.payload.decode().strip().lower()
-            print(f"[MQTT POT2] 제어 명령 수신: {command}")
-
-            if command == "stop":
-                if self.pot2_collecting:
-                    print(f"[MQTT POT2] 자동 수집 중지")
-                    self.root.after(0, self.stop_pot2_collection)
-                else:
-                    print(f"[MQTT POT2] 수집 중이 아님 - 무시")
+            self.apply_telemetry()
         except Exception as e:
-            print(f"[MQTT POT2] 제어 명령 수신 오류: {e}")
-
-    def publish_mqtt_periodic(self):
-        """Periodically publish current observe state to MQTT"""
-        if not self.running:
-            return
-
-        if self.mqtt_client and MQTT_ENABLED:
-            try:
-                # Publish left bucket status
-                if self.observe_left_state is not None:
-                    left_msg = f"LEFT:{self.observe_left_state}"
-                    self.send_mqtt_message(MQTT_TOPIC_OBSERVE, left_msg, include_device_info=True)
-
-                # Publish right bucket status
-                if self.observe_right_state is not None:
-                    right_msg = f"RIGHT:{self.observe_right_state}"
-                    self.send_mqtt_message(MQTT_TOPIC_OBSERVE, right_msg, include_device_info=True)
-
-            except Exception as e:
-                print(f"[MQTT 주기발행] 오류: {e}")
-
-        # Schedule next publish
-        interval_ms = int(MQTT_PUBLISH_INTERVAL * 1000)
-        self.root.after(interval_ms, self.publish_mqtt_periodic)
-
-    def send_mqtt_message(self, topic, message, include_device_info=True):
-        """Send MQTT message with optional device info"""
-        if self.mqtt_client and MQTT_ENABLED:
-            try:
-                if include_device_info:
-                    # Create JSON message with device info
-                    msg_data = {
-                        "device_id": DEVICE_ID,
-                        "device_name": DEVICE_NAME,
-                        "device_location": DEVICE_LOCATION,
-                        "ip_address": get_ip_address(),
-                        "message": message,
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    payload = json.dumps(msg_data, ensure_ascii=False)
-                else:
-                    payload = message
-
-                self.mqtt_client.publish(topic, payload, qos=MQTT_QOS)
-            except Exception as e:
-                print(f"[MQTT] 전송 실패: {e}")
+            print(f"[MQTT 수신] 처리 오류: {e}")
+        self.advance_collection(GUI_UPDATE_INTERVAL / 1000.0)
+        self.publish_mqtt_periodic()
+        self.root.after(GUI_UPDATE_INTERVAL, self.poll_telemetry)
 
     def build_gui(self):
         """Build the main GUI layout - WHITE MODE with Jetson #1 header"""
@@ -1145,59 +686,59 @@ class JetsonIntegratedApp:
         self.observe_right_cap = None
 
         # Frying AI cameras (video0, video1)
-        if FRYING_ENABLED:
+        if self.cfg.frying_enabled:
             print(f"[카메라] 튀김솥 카메라 초기화 중...")
             self.frying_left_cap = GstCamera(
-                device_index=FRYING_LEFT_CAMERA_INDEX,
-                width=CAMERA_WIDTH,
-                height=CAMERA_HEIGHT,
-                fps=CAMERA_FPS
+                device_index=self.cfg.frying_left_camera_index,
+                width=self.cfg.camera_width,
+                height=self.cfg.camera_height,
+                fps=self.cfg.camera_fps
             )
             if self.frying_left_cap.start():
-                print(f"[카메라] 튀김솥 왼쪽 (video{FRYING_LEFT_CAMERA_INDEX}) 초기화 완료 ✓")
+                print(f"[카메라] 튀김솥 왼쪽 (video{self.cfg.frying_left_camera_index}) 초기화 완료 ✓")
             else:
-                print(f"[카메라] 튀김솥 왼쪽 (video{FRYING_LEFT_CAMERA_INDEX}) 초기화 실패 ✗")
+                print(f"[카메라] 튀김솥 왼쪽 (video{self.cfg.frying_left_camera_index}) 초기화 실패 ✗")
                 self.frying_left_cap = None
 
             self.frying_right_cap = GstCamera(
-                device_index=FRYING_RIGHT_CAMERA_INDEX,
-                width=CAMERA_WIDTH,
-                height=CAMERA_HEIGHT,
-                fps=CAMERA_FPS
+                device_index=self.cfg.frying_right_camera_index,
+                width=self.cfg.camera_width,
+                height=self.cfg.camera_height,
+                fps=self.cfg.camera_fps
             )
             if self.frying_right_cap.start():
-                print(f"[카메라] 튀김솥 오른쪽 (video{FRYING_RIGHT_CAMERA_INDEX}) 초기화 완료 ✓")
+                print(f"[카메라] 튀김솥 오른쪽 (video{self.cfg.frying_right_camera_index}) 초기화 완료 ✓")
             else:
-                print(f"[카메라] 튀김솥 오른쪽 (video{FRYING_RIGHT_CAMERA_INDEX}) 초기화 실패 ✗")
+                print(f"[카메라] 튀김솥 오른쪽 (video{self.cfg.frying_right_camera_index}) 초기화 실패 ✗")
                 self.frying_right_cap = None
         else:
             print(f"[카메라] 튀김솥 카메라 비활성화됨 (frying_enabled=false)")
 
         # Observe_add cameras (video2, video3)
-        if OBSERVE_ENABLED:
+        if self.cfg.observe_enabled:
             print(f"[카메라] 바스켓 카메라 초기화 중...")
             self.observe_left_cap = GstCamera(
-                device_index=OBSERVE_LEFT_CAMERA_INDEX,
-                width=CAMERA_WIDTH,
-                height=CAMERA_HEIGHT,
-                fps=CAMERA_FPS
+                device_index=self.cfg.observe_left_camera_index,
+                width=self.cfg.camera_width,
+                height=self.cfg.camera_height,
+                fps=self.cfg.camera_fps
             )
             if self.observe_left_cap.start():
-                print(f"[카메라] 바스켓 왼쪽 (video{OBSERVE_LEFT_CAMERA_INDEX}) 초기화 완료 ✓")
+                print(f"[카메라] 바스켓 왼쪽 (video{self.cfg.observe_left_camera_index}) 초기화 완료 ✓")
             else:
-                print(f"[카메라] 바스켓 왼쪽 (video{OBSERVE_LEFT_CAMERA_INDEX}) 초기화 실패 ✗")
+                print(f"[카메라] 바스켓 왼쪽 (video{self.cfg.observe_left_camera_index}) 초기화 실패 ✗")
                 self.observe_left_cap = None
 
             self.observe_right_cap = GstCamera(
-                device_index=OBSERVE_RIGHT_CAMERA_INDEX,
-                width=CAMERA_WIDTH,
-                height=CAMERA_HEIGHT,
-                fps=CAMERA_FPS
+                device_index=self.cfg.observe_right_camera_index,
+                width=self.cfg.camera_width,
+                height=self.cfg.camera_height,
+                fps=self.cfg.camera_fps
             )
             if self.observe_right_cap.start():
-                print(f"[카메라] 바스켓 오른쪽 (video{OBSERVE_RIGHT_CAMERA_INDEX}) 초기화 완료 ✓")
+                print(f"[카메라] 바스켓 오른쪽 (video{self.cfg.observe_right_camera_index}) 초기화 완료 ✓")
             else:
-                print(f"[카메라] 바스켓 오른쪽 (video{OBSERVE_RIGHT_CAMERA_INDEX}) 초기화 실패 ✗")
+                print(f"[카메라] 바스켓 오른쪽 (video{self.cfg.observe_right_camera_index}) 초기화 실패 ✗")
                 self.observe_right_cap = None
         else:
             print(f"[카메라] 바스켓 카메라 비활성화됨 (observe_enabled=false)")
@@ -1252,7 +793,7 @@ class JetsonIntegratedApp:
             if self.frying_running:
                 # Frame skip: AI 처리는 N프레임마다 (CPU 절약)
                 self.frying_frame_skip += 1
-                if self.frying_frame_skip >= FRYING_FRAME_SKIP:
+                if self.frying_frame_skip >= self.cfg.frying_frame_skip:
                     self.frying_frame_skip = 0
 
                     # 백그라운드 스레드로 AI 처리 (non-blocking)
@@ -1302,7 +843,7 @@ class JetsonIntegratedApp:
 
                 # Probe temperature with color coding
                 probe_color = COLOR_INFO
-                if self.probe_temp_left >= TARGET_PROBE_TEMP:
+                if self.probe_temp_left >= self.cfg.target_probe_temp:
                     probe_color = COLOR_OK
                 elif self.probe_temp_left > 0:
                     probe_color = COLOR_WARNING
@@ -1321,32 +862,7 @@ class JetsonIntegratedApp:
             self.frying_left_label.configure(image=imgtk)
 
             # Store latest frame for data collection
-            self.latest_frying_left_frame = frame.copy()
-
-            # POT1 data collection timer
-            if self.pot1_collecting:
-                self.pot1_timer += GUI_UPDATE_INTERVAL / 1000.0
-                if self.pot1_timer >= self.collection_interval:
-                    self.pot1_timer = 0
-                    # Trigger POT1 data collection (cameras 0, 2, 3)
-                    self.save_pot1_data(
-                        self.latest_frying_left_frame,
-                        self.latest_observe_left_frame,
-                        self.latest_observe_right_frame
-                    )
-
-            # LEGACY: Data collection timer (shared across all active cameras)
-            if self.data_collection_active:
-                self.collection_timer += GUI_UPDATE_INTERVAL / 1000.0
-                if self.collection_timer >= self.collection_interval:
-                    self.collection_timer = 0
-                    # Trigger data collection from all cameras
-                    self.save_collection_data(
-                        self.latest_frying_left_frame,
-                        self.latest_frying_right_frame,
-                        self.latest_observe_left_frame,
-                        self.latest_observe_right_frame
-                    )
+            self.latest_frames["frying_left"] = frame.copy()
 
         self.root.after(GUI_UPDATE_INTERVAL, self.update_frying_left)
 
@@ -1412,7 +928,7 @@ class JetsonIntegratedApp:
 
                 # Probe temperature with color coding
                 probe_color = COLOR_INFO
-                if self.probe_temp_right >= TARGET_PROBE_TEMP:
+                if self.probe_temp_right >= self.cfg.target_probe_temp:
                     probe_color = COLOR_OK
                 elif self.probe_temp_right > 0:
                     probe_color = COLOR_WARNING
@@ -1431,20 +947,7 @@ class JetsonIntegratedApp:
             self.frying_right_label.configure(image=imgtk)
 
             # Store latest frame for data collection
-            self.latest_frying_right_frame = frame.copy()
-
-            # Data collection timer (only if frying_left is not active)
-            if self.data_collection_active and self.frying_left_cap is None:
-                self.collection_timer += GUI_UPDATE_INTERVAL / 1000.0
-                if self.collection_timer >= self.collection_interval:
-                    self.collection_timer = 0
-                    # Trigger data collection from all cameras
-                    self.save_collection_data(
-                        self.latest_frying_left_frame,
-                        self.latest_frying_right_frame,
-                        self.latest_observe_left_frame,
-                        self.latest_observe_right_frame
-                    )
+            self.latest_frames["frying_right"] = frame.copy()
 
         self.root.after(GUI_UPDATE_INTERVAL, self.update_frying_right)
 
@@ -1464,14 +967,14 @@ class JetsonIntegratedApp:
             if self.observe_running:
                 # Frame skip: YOLO는 매우 무거움 (config로 조정)
                 self.observe_frame_skip += 1
-                if self.observe_frame_skip >= OBSERVE_FRAME_SKIP:
+                if self.observe_frame_skip >= self.cfg.observe_frame_skip:
                     self.observe_frame_skip = 0
 
                     # 백그라운드 스레드로 YOLO 처리
                     def process_ai():
                         try:
                             r = self.observe_seg_model.predict(
-                                frame, imgsz=IMG_SIZE_SEG, conf=CONF_SEG, verbose=False, device=self.device
+                                frame, imgsz=self.cfg.img_size_seg, conf=self.cfg.conf_seg, verbose=False, device=self.device
                             )[0]
                             self.observe_left_result = r
                         except Exception as e:
@@ -1524,12 +1027,12 @@ class JetsonIntegratedApp:
 
                         # Classification
                         cls_res = self.observe_cls_model.predict(
-                            roi, imgsz=IMG_SIZE_CLS, conf=0.0, verbose=False, device=self.device
+                            roi, imgsz=self.cfg.img_size_cls, conf=0.0, verbose=False, device=self.device
                         )[0]
                         top1_idx = int(cls_res.probs.top1)
                         top1_name = cls_res.names[top1_idx]
                         prob = float(cls_res.probs.top1conf)
-                        is_filled = (top1_name.lower() == POSITIVE_LABEL.lower())
+                        is_filled = (top1_name.lower() == self.cfg.positive_label.lower())
 
                         # Draw results
                         cv2.rectangle(vis, (x, y), (x2, y2), (255, 128, 0), 2)
@@ -1547,19 +1050,19 @@ class JetsonIntegratedApp:
                                 cv2.FONT_HERSHEY_SIMPLEX, 1.2, color, 3)
 
                     # State change detection & MQTT
-                    if state_txt != self.observe_left_state:
+                    if state_txt != self.observe_state["left"]:
                         self.log_signal("왼쪽", state_txt)
-                        self.send_mqtt_message(MQTT_TOPIC_OBSERVE, f"LEFT:{state_txt}")
-                        self.observe_left_state = state_txt
+                        self.publish_observe_state("left", state_txt)
+                        self.observe_state["left"] = state_txt
                         self.observe_left_status.config(text=f"상태: {state_txt}")
                 else:
                     self.observe_left_votes.clear()
                     cv2.putText(vis, "Basket Not Found", (16, 50),
                                 cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    if self.observe_left_state is not None:
+                    if self.observe_state["left"] is not None:
                         self.log_signal("왼쪽", "NO_BASKET")
-                        self.send_mqtt_message(MQTT_TOPIC_OBSERVE, "LEFT:NO_BASKET")
-                        self.observe_left_state = None
+                        self.publish_observe_state("left", "NO_BASKET")
+                        self.observe_state["left"] = None
                         self.observe_left_status.config(text="바켓 없음")
 
             # Display
@@ -1572,32 +1075,7 @@ class JetsonIntegratedApp:
             self.observe_left_label.configure(image=imgtk)
 
             # Store latest frame for data collection
-            self.latest_observe_left_frame = frame.copy()
-
-            # POT2 data collection timer
-            if self.pot2_collecting:
-                self.pot2_timer += GUI_UPDATE_INTERVAL / 1000.0
-                if self.pot2_timer >= self.collection_interval:
-                    self.pot2_timer = 0
-                    # Trigger POT2 data collection (cameras 1, 2, 3)
-                    self.save_pot2_data(
-                        self.latest_frying_right_frame,
-                        self.latest_observe_left_frame,
-                        self.latest_observe_right_frame
-                    )
-
-            # LEGACY: Data collection timer (only if frying cameras are not active)
-            if self.data_collection_active and self.frying_left_cap is None and self.frying_right_cap is None:
-                self.collection_timer += GUI_UPDATE_INTERVAL / 1000.0
-                if self.collection_timer >= self.collection_interval:
-                    self.collection_timer = 0
-                    # Trigger data collection from all cameras
-                    self.save_collection_data(
-                        self.latest_frying_left_frame,
-                        self.latest_frying_right_frame,
-                        self.latest_observe_left_frame,
-                        self.latest_observe_right_frame
-                    )
+            self.latest_frames["observe_left"] = frame.copy()
 
         self.root.after(GUI_UPDATE_INTERVAL, self.update_observe_left)
 
@@ -1621,7 +1099,7 @@ class JetsonIntegratedApp:
                     def process_ai():
                         try:
                             r = self.observe_seg_model.predict(
-                                frame, imgsz=IMG_SIZE_SEG, conf=CONF_SEG, verbose=False, device=self.device
+                                frame, imgsz=self.cfg.img_size_seg, conf=self.cfg.conf_seg, verbose=False, device=self.device
                             )[0]
                             self.observe_right_result = r
                         except Exception as e:
@@ -1674,12 +1152,12 @@ class JetsonIntegratedApp:
 
                         # Classification
                         cls_res = self.observe_cls_model.predict(
-                            roi, imgsz=IMG_SIZE_CLS, conf=0.0, verbose=False, device=self.device
+                            roi, imgsz=self.cfg.img_size_cls, conf=0.0, verbose=False, device=self.device
                         )[0]
                         top1_idx = int(cls_res.probs.top1)
                         top1_name = cls_res.names[top1_idx]
                         prob = float(cls_res.probs.top1conf)
-                        is_filled = (top1_name.lower() == POSITIVE_LABEL.lower())
+                        is_filled = (top1_name.lower() == self.cfg.positive_label.lower())
 
                         # Draw results
                         cv2.rectangle(vis, (x, y), (x2, y2), (255, 128, 0), 2)
@@ -1697,19 +1175,19 @@ class JetsonIntegratedApp:
                                 cv2.FONT_HERSHEY_SIMPLEX, 1.2, color, 3)
 
                     # State change detection & MQTT
-                    if state_txt != self.observe_right_state:
+                    if state_txt != self.observe_state["right"]:
                         self.log_signal("오른쪽", state_txt)
-                        self.send_mqtt_message(MQTT_TOPIC_OBSERVE, f"RIGHT:{state_txt}")
-                        self.observe_right_state = state_txt
+                        self.publish_observe_state("right", state_txt)
+                        self.observe_state["right"] = state_txt
                         self.observe_right_status.config(text=f"상태: {state_txt}")
                 else:
                     self.observe_right_votes.clear()
                     cv2.putText(vis, "Basket Not Found", (16, 50),
                                 cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    if self.observe_right_state is not None:
+                    if self.observe_state["right"] is not None:
                         self.log_signal("오른쪽", "NO_BASKET")
-                        self.send_mqtt_message(MQTT_TOPIC_OBSERVE, "RIGHT:NO_BASKET")
-                        self.observe_right_state = None
+                        self.publish_observe_state("right", "NO_BASKET")
+                        self.observe_state["right"] = None
                         self.observe_right_status.config(text="바켓 없음")
 
             # Display
@@ -1722,23 +1200,7 @@ class JetsonIntegratedApp:
             self.observe_right_label.configure(image=imgtk)
 
             # Store latest frame for data collection
-            self.latest_observe_right_frame = frame.copy()
-
-            # Data collection timer (last fallback - only if all other cameras are not active)
-            if (self.data_collection_active and
-                self.frying_left_cap is None and
-                self.frying_right_cap is None and
-                self.observe_left_cap is None):
-                self.collection_timer += GUI_UPDATE_INTERVAL / 1000.0
-                if self.collection_timer >= self.collection_interval:
-                    self.collection_timer = 0
-                    # Trigger data collection from all cameras
-                    self.save_collection_data(
-                        self.latest_frying_left_frame,
-                        self.latest_frying_right_frame,
-                        self.latest_observe_left_frame,
-                        self.latest_observe_right_frame
-                    )
+            self.latest_frames["observe_right"] = frame.copy()
 
         self.root.after(GUI_UPDATE_INTERVAL, self.update_observe_right)
 
@@ -1861,6 +1323,18 @@ class JetsonIntegratedApp:
                 tk.Label(uptime_frame, text=uptime_str, font=MEDIUM_FONT,
                         bg=COLOR_PANEL, fg=COLOR_INFO, anchor="e").pack(side=tk.RIGHT)
 
+                # Frame sink (저장 대기열)
+                sink_stats = self.frame_sink.get_stats()
+                sink_color = COLOR_OK if sink_stats['dropped'] == 0 and sink_stats['failed'] == 0 else COLOR_WARNING
+                sink_frame = tk.Frame(info_frame, bg=COLOR_PANEL)
+                sink_frame.pack(pady=10, padx=20, fill=tk.X)
+                tk.Label(sink_frame, text="저장 대기열:", font=MEDIUM_FONT,
+                        bg=COLOR_PANEL, fg=COLOR_TEXT, anchor="w").pack(side=tk.LEFT)
+                tk.Label(sink_frame,
+                        text=f"{sink_stats['queue_depth']}장 | {sink_stats['avg_encode_ms']:.0f}ms | "
+                             f"{sink_stats['bytes_per_sec'] / 1e6:.1f}MB/s | 누락 {sink_stats['dropped']}",
+                        font=SMALL_FONT, bg=COLOR_PANEL, fg=sink_color, anchor="e").pack(side=tk.RIGHT)
+
             except Exception as e:
                 tk.Label(info_frame, text=f"시스템 정보 읽기 실패: {e}", font=NORMAL_FONT,
                         bg=COLOR_PANEL, fg=COLOR_ERROR).pack(pady=20)
@@ -2006,41 +1480,62 @@ class JetsonIntegratedApp:
         """Open settings dialog (placeholder)"""
         showinfo_topmost("설정", "설정 기능은 준비 중입니다.\nconfig_jetson2.json 파일을 직접 수정하세요.")
 
-    def mark_completion_auto(self, position, probe_temp):
-        """Automatically mark completion when probe temp reaches target"""
-        if not self.data_collection_active:
-            return
+    # =========================
+    # Collection UI hooks (FryingStation)
+    # =========================
+    def ui_food_type_missing(self):
+        """Production: food_type comes from MQTT only"""
+        showwarning_topmost(
+            "경고",
+            "음식 종류가 설정되지 않았습니다.\n\n"
+            "로봇 PC에서 MQTT로 음식 종류를 전송해주세요.\n"
+            f"Topic: {self.cfg.topic_food_type}"
+        )
+
+    def ui_collection_started(self):
+        self.btn_start_collection.config(state=tk.DISABLED)
+        self.btn_stop_collection.config(state=tk.NORMAL)
+        self.collection_status_label.config(
+            text=f"수집 중 [{self.current_food_type}]: {self.collection_session_id}",
+            fg="#9B59B6"
+        )
+
+    def ui_collection_progress(self):
+        self.collection_status_label.config(
+            text=f"수집 중: {self.collection_frame_counter}장 저장됨"
+        )
+
+    def ui_collection_stopped(self, session_info):
+        if not self.running:
+            return  # Closing: stopped from the cleanup thread, no widgets/popups
+
+        self.btn_start_collection.config(state=tk.NORMAL)
+        self.btn_stop_collection.config(state=tk.DISABLED)
+        self.collection_status_label.config(text="수집: 대기 중", fg=COLOR_TEXT)
 
+        # Show summary
+        completion_text = ""
         if self.collection_completion_marked:
-            return  # Already marked
-
-        from datetime import datetime
-        elapsed = (datetime.now() - self.collection_start_time).total_seconds()
-
-        self.collection_completion_marked = True
-        self.collection_completion_time = datetime.now()
-        self.collection_completion_info = {
-            "method": "auto",
-            "trigger": f"probe_temp_{position}",
-            "trigger_value": probe_temp,
-            "timestamp": self.collection_completion_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            "elapsed_time_sec": elapsed,
-            "frame_index": self.collection_frame_counter,
-            "oil_temp_left": self.oil_temp_left,
-            "oil_temp_right": self.oil_temp_right,
-            "probe_temp_left": self.probe_temp_left,
-            "probe_temp_right": self.probe_temp_right
-        }
-
-        # Update UI
+            elapsed = self.collection_completion_info.get("elapsed_time_sec", 0)
+            method = self.collection_completion_info.get("method", "unknown")
+            completion_text = f"\n완료 마킹: {method} ({elapsed:.1f}초)"
+
+        showinfo_topmost(
+            "데이터 수집 완료",
+            f"세션: {session_info['session_id']}\n"
+            f"음식: {session_info['food_type']}\n\n"
+            f"총 저장: {session_info['total_frames_saved']}장\n"
+            f"수집 시간: {session_info['duration_sec']:.1f}초{completion_text}\n"
+            f"MQTT 메타데이터: {session_info['metadata_count']}개\n\n"
+            f"저장 경로:\n{os.path.expanduser('~/AI_Data/')}"
+        )
+
+    def ui_completion_marked(self, elapsed):
         self.collection_status_label.config(
             text=f"수집 중 [{self.current_food_type}] - 자동 완료 ({elapsed:.0f}초)",
             fg="#27AE60"
         )
 
-        print(f"[완료마킹] 자동 마킹 ({position}): {elapsed:.1f}초")
-        print(f"[완료마킹] 탐침온도: {probe_temp}°C (목표: {TARGET_PROBE_TEMP}°C)")
-
     def start_frying_ai(self):
         """Start Frying AI processing"""
         self.frying_running = True
@@ -2077,387 +1572,10 @@ class JetsonIntegratedApp:
         self.observe_right_status.config(text="대기 중")
         self.observe_left_votes.clear()
         self.observe_right_votes.clear()
-        self.observe_left_state = None
-        self.observe_right_state = None
+        self.observe_state["left"] = None
+        self.observe_state["right"] = None
         print("[바켓 감지] 중지됨")
 
-    def start_data_collection(self):
-        """Start manual data collection (Production version - MQTT only)"""
-        from datetime import datetime
-        import os
-
-        # Production: food_type comes from MQTT only
-        if self.current_food_type == "unknown":
-            showwarning_topmost(
-                "경고",
-                "음식 종류가 설정되지 않았습니다.\n\n"
-                "로봇 PC에서 MQTT로 음식 종류를 전송해주세요.\n"
-                f"Topic: {MQTT_TOPIC_FOOD_TYPE}"
-            )
-            return
-
-        # Create session ID
-        self.collection_session_id = datetime.now().strftime("session_%Y%m%d_%H%M%S")
-        self.collection_start_time = datetime.now()
-        self.collection_frame_counter = 0
-
-        # Create session directories
-        base_dir = os.path.expanduser("~/AI_Data")
-        self.frying_session_dir = os.path.join(base_dir, "FryingData", self.collection_session_id)
-        self.bucket_session_dir = os.path.join(base_dir, "BucketData", self.collection_session_id)
-
-        for cam_idx in [0, 1]:
-            os.makedirs(os.path.join(self.frying_session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
-        for cam_idx in [2, 3]:
-            os.makedirs(os.path.join(self.bucket_session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
-
-        # Reset completion flags
-        self.collection_completion_marked = False
-        self.collection_completion_time = None
-        self.collection_completion_info = {}
-
-        # Update flags
-        self.data_collection_active = True
-        self.collection_metadata = []  # Reset metadata
-        self.btn_start_collection.config(state=tk.DISABLED)
-        self.btn_stop_collection.config(state=tk.NORMAL)
-        self.collection_status_label.config(
-            text=f"수집 중 [{self.current_food_type}]: {self.collection_session_id}",
-            fg="#9B59B6"
-        )
-
-        print(f"[데이터수집] 시작: {self.collection_session_id}")
-        print(f"[데이터수집] 음식 종류: {self.current_food_type} (MQTT)")
-        print(f"[데이터수집] 저장 경로: {base_dir}/AI_Data/")
-        print(f"[데이터수집] MQTT 메타데이터 수집 활성화")
-
-    def stop_data_collection(self):
-        """Stop manual data collection"""
-        from datetime import datetime
-        import json
-
-        if not self.data_collection_active:
-            return
-
-        self.data_collection_active = False
-        duration = (datetime.now() - self.collection_start_time).total_seconds()
-
-        # Organize temperature data by time
-        temperature_timeline = []
-        for item in self.collection_metadata:
-            if item["type"] in ["oil_temperature", "probe_temperature"]:
-                # Check if timestamp already exists
-                existing = next((x for x in temperature_timeline if x["timestamp"] == item["timestamp"]), None)
-                if existing:
-                    # Add to existing entry
-                    key = f"{item['type'].replace('_temperature', '_temp')}_{item['position']}"
-                    existing[key] = item["value"]
-                else:
-                    # Create new entry
-                    new_entry = {"timestamp": item["timestamp"]}
-                    key = f"{item['type'].replace('_temperature', '_temp')}_{item['position']}"
-                    new_entry[key] = item["value"]
-                    temperature_timeline.append(new_entry)
-
-        # Save session info with improved metadata
-        session_info = {
-            "session_id": self.collection_session_id,
-            "food_type": self.current_food_type,
-            "start_time": self.collection_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "duration_sec": duration,
-            "collection_interval": self.collection_interval,
-
-            "completion_info": self.collection_completion_info if self.collection_completion_marked else None,
-            "completion_marked": self.collection_completion_marked,
-
-            "cameras_used": [0, 1, 2, 3],
-            "total_frames_saved": self.collection_frame_counter,
-
-            "camera_config": {
-                "resolution": {
-                    "width": config.get("camera_width", 1280),
-                    "height": config.get("camera_height", 720)
-                },
-                "fps": config.get("camera_fps", 30)
-            },
-
-            "temperature_timeline": temperature_timeline,
-            "raw_metadata": self.collection_metadata,
-            "metadata_count": len(self.collection_metadata)
-        }
-
-        # Save to both directories
-        for dir_path in [self.frying_session_dir, self.bucket_session_dir]:
-            info_path = os.path.join(dir_path, "session_info.json")
-            with open(info_path, 'w', encoding='utf-8') as f:
-                json.dump(session_info, f, indent=2, ensure_ascii=False)
-
-        # Update GUI
-        self.btn_start_collection.config(state=tk.NORMAL)
-        self.btn_stop_collection.config(state=tk.DISABLED)
-        self.collection_status_label.config(text="수집: 대기 중", fg=COLOR_TEXT)
-
-        print(f"[데이터수집] 종료: {self.collection_frame_counter}장 저장, {duration:.1f}초")
-        print(f"[데이터수집] 음식 종류: {self.current_food_type}")
-        print(f"[데이터수집] 완료 마킹: {'예' if self.collection_completion_marked else '아니오'}")
-        print(f"[데이터수집] MQTT 메타데이터: {len(self.collection_metadata)}개 수집")
-
-        # Show summary
-        from tkinter import messagebox
-        completion_text = ""
-        if self.collection_completion_marked:
-            elapsed = self.collection_completion_info.get("elapsed_time_sec", 0)
-            method = self.collection_completion_info.get("method", "unknown")
-            completion_text = f"\n완료 마킹: {method} ({elapsed:.1f}초)"
-
-        showinfo_topmost(
-            "데이터 수집 완료",
-            f"세션: {self.collection_session_id}\n"
-            f"음식: {self.current_food_type}\n\n"
-            f"총 저장: {self.collection_frame_counter}장\n"
-            f"수집 시간: {duration:.1f}초{completion_text}\n"
-            f"MQTT 메타데이터: {len(self.collection_metadata)}개\n\n"
-            f"저장 경로:\n{os.path.expanduser('~/AI_Data/')}"
-        )
-
-        # Reset session
-        self.collection_session_id = None
-        self.collection_start_time = None
-        self.current_food_type = "unknown"
-
-    # POT1/POT2 Separate Collection Functions
-    def start_pot1_collection(self):
-        """Start POT1 data collection (cameras 0, 2, 3)"""
-        from datetime import datetime
-        import os
-
-        # Create session ID
-        self.pot1_session_id = datetime.now().strftime("session_%Y%m%d_%H%M%S")
-        self.pot1_start_time = datetime.now()
-        self.pot1_frame_counter = 0
-        self.pot1_timer = 0
-
-        # Create session directories - pot1/session_id/food_type/camera_X
-        base_dir = os.path.expanduser("~/AI_Data/FryingData")
-        self.pot1_session_dir = os.path.join(base_dir, "pot1", self.pot1_session_id, self.pot1_food_type)
-
-        for cam_idx in [0, 2, 3]:
-            os.makedirs(os.path.join(self.pot1_session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
-
-        # Reset completion flags
-        self.pot1_completion_marked = False
-        self.pot1_completion_time = None
-        self.pot1_completion_info = {}
-
-        # Update flags
-        self.pot1_collecting = True
-        self.pot1_metadata = []  # Reset metadata
-
-        print(f"[POT1 수집] 시작: {self.pot1_session_id}")
-        print(f"[POT1 수집] 음식 종류: {self.pot1_food_type}")
-        print(f"[POT1 수집] 저장 경로: {self.pot1_session_dir}")
-
-    def stop_pot1_collection(self):
-        """Stop POT1 data collection"""
-        from datetime import datetime
-        import json
-        import os
-
-        if not self.pot1_collecting:
-            return
-
-        self.pot1_collecting = False
-        duration = (datetime.now() - self.pot1_start_time).total_seconds()
-
-        # Save session info
-        session_info = {
-            "pot": "pot1",
-            "session_id": self.pot1_session_id,
-            "food_type": self.pot1_food_type,
-            "start_time": self.pot1_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "duration_sec": duration,
-            "collection_interval": self.collection_interval,
-            "completion_info": self.pot1_completion_info if self.pot1_completion_marked else None,
-            "completion_marked": self.pot1_completion_marked,
-            "cameras_used": [0, 2, 3],
-            "total_frames_saved": self.pot1_frame_counter,
-            "raw_metadata": self.pot1_metadata,
-            "metadata_count": len(self.pot1_metadata)
-        }
-
-        # Save metadata
-        info_path = os.path.join(self.pot1_session_dir, "session_info.json")
-        with open(info_path, 'w', encoding='utf-8') as f:
-            json.dump(session_info, f, indent=2, ensure_ascii=False)
-
-        print(f"[POT1 수집] 종료: {self.pot1_frame_counter}장 저장, {duration:.1f}초")
-        print(f"[POT1 수집] 음식 종류: {self.pot1_food_type}")
-
-        # Reset session
-        self.pot1_session_id = None
-        self.pot1_start_time = None
-
-    def start_pot2_collection(self):
-        """Start POT2 data collection (cameras 1, 2, 3)"""
-        from datetime import datetime
-        import os
-
-        # Create session ID
-        self.pot2_session_id = datetime.now().strftime("session_%Y%m%d_%H%M%S")
-        self.pot2_start_time = datetime.now()
-        self.pot2_frame_counter = 0
-        self.pot2_timer = 0
-
-        # Create session directories - pot2/session_id/food_type/camera_X
-        base_dir = os.path.expanduser("~/AI_Data/FryingData")
-        self.pot2_session_dir = os.path.join(base_dir, "pot2", self.pot2_session_id, self.pot2_food_type)
-
-        for cam_idx in [1, 2, 3]:
-            os.makedirs(os.path.join(self.pot2_session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
-
-        # Reset completion flags
-        self.pot2_completion_marked = False
-        self.pot2_completion_time = None
-        self.pot2_completion_info = {}
-
-        # Update flags
-        self.pot2_collecting = True
-        self.pot2_metadata = []  # Reset metadata
-
-        print(f"[POT2 수집] 시작: {self.pot2_session_id}")
-        print(f"[POT2 수집] 음식 종류: {self.pot2_food_type}")
-        print(f"[POT2 수집] 저장 경로: {self.pot2_session_dir}")
-
-    def stop_pot2_collection(self):
-        """Stop POT2 data collection"""
-        from datetime import datetime
-        import json
-        import os
-
-        if not self.pot2_collecting:
-            return
-
-        self.pot2_collecting = False
-        duration = (datetime.now() - self.pot2_start_time).total_seconds()
-
-        # Save session info
-        session_info = {
-            "pot": "pot2",
-            "session_id": self.pot2_session_id,
-            "food_type": self.pot2_food_type,
-            "start_time": self.pot2_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "duration_sec": duration,
-            "collection_interval": self.collection_interval,
-            "completion_info": self.pot2_completion_info if self.pot2_completion_marked else None,
-            "completion_marked": self.pot2_completion_marked,
-            "cameras_used": [1, 2, 3],
-            "total_frames_saved": self.pot2_frame_counter,
-            "raw_metadata": self.pot2_metadata,
-            "metadata_count": len(self.pot2_metadata)
-        }
-
-        # Save metadata
-        info_path = os.path.join(self.pot2_session_dir, "session_info.json")
-        with open(info_path, 'w', encoding='utf-8') as f:
-            json.dump(session_info, f, indent=2, ensure_ascii=False)
-
-        print(f"[POT2 수집] 종료: {self.pot2_frame_counter}장 저장, {duration:.1f}초")
-        print(f"[POT2 수집] 음식 종류: {self.pot2_food_type}")
-
-        # Reset session
-        self.pot2_session_id = None
-        self.pot2_start_time = None
-
-    def save_pot1_data(self, frying_left, observe_left, observe_right):
-        """Save POT1 frames (cameras 0, 2, 3)"""
-        if not self.pot1_collecting:
-            return
-
-        from datetime import datetime
-        import cv2
-
-        timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMss_mmm
-
-        # Save POT1 cameras: camera_0 (frying left), camera_2 (observe left), camera_3 (observe right)
-        for cam_idx, frame in [(0, frying_left), (2, observe_left), (3, observe_right)]:
-            if frame is not None:
-                # Resize to save resolution (1920x1536 -> 1280x720)
-                frame_resized = cv2.resize(frame, (SAVE_WIDTH, SAVE_HEIGHT), interpolation=cv2.INTER_LINEAR)
-                save_path = os.path.join(self.pot1_session_dir, f"camera_{cam_idx}", f"camera_{cam_idx}_{timestamp}.jpg")
-                cv2.imwrite(save_path, frame_resized, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
-                self.pot1_frame_counter += 1
-
-        if self.pot1_frame_counter % 10 == 0:
-            print(f"[POT1 수집] {self.pot1_frame_counter}장 저장됨")
-
-    def save_pot2_data(self, frying_right, observe_left, observe_right):
-        """Save POT2 frames (cameras 1, 2, 3)"""
-        if not self.pot2_collecting:
-            return
-
-        from datetime import datetime
-        import cv2
-
-        timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMss_mmm
-
-        # Save POT2 cameras: camera_1 (frying right), camera_2 (observe left), camera_3 (observe right)
-        for cam_idx, frame in [(1, frying_right), (2, observe_left), (3, observe_right)]:
-            if frame is not None:
-                # Resize to save resolution (1920x1536 -> 1280x720)
-                frame_resized = cv2.resize(frame, (SAVE_WIDTH, SAVE_HEIGHT), interpolation=cv2.INTER_LINEAR)
-                save_path = os.path.join(self.pot2_session_dir, f"camera_{cam_idx}", f"camera_{cam_idx}_{timestamp}.jpg")
-                cv2.imwrite(save_path, frame_resized, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
-                self.pot2_frame_counter += 1
-
-        if self.pot2_frame_counter % 10 == 0:
-            print(f"[POT2 수집] {self.pot2_frame_counter}장 저장됨")
-
-    def save_collection_data(self, frying_left, frying_right, observe_left, observe_right):
-        """Save frames from all 4 cameras during data collection (LEGACY)"""
-        if not self.data_collection_active:
-            return
-
-        from datetime import datetime
-        import cv2
-
-        timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMss_mmm
-
-        # Save frying cameras (camera 0, 1)
-        for cam_idx, frame in [(0, frying_left), (1, frying_right)]:
-            if frame is not None:
-                # Resize to save resolution (1920x1536 -> 1280x720)
-                frame_resized = cv2.resize(frame, (SAVE_WIDTH, SAVE_HEIGHT), interpolation=cv2.INTER_LINEAR)
-                save_path = os.path.join(
-                    self.frying_session_dir,
-                    f"camera_{cam_idx}",
-                    f"cam{cam_idx}_{timestamp}.jpg"
-                )
-                cv2.imwrite(save_path, frame_resized, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
-
-        # Save bucket cameras (camera 2, 3)
-        for cam_idx, frame in [(2, observe_left), (3, observe_right)]:
-            if frame is not None:
-                # Resize to save resolution (1920x1536 -> 1280x720)
-                frame_resized = cv2.resize(frame, (SAVE_WIDTH, SAVE_HEIGHT), interpolation=cv2.INTER_LINEAR)
-                save_path = os.path.join(
-                    self.bucket_session_dir,
-                    f"camera_{cam_idx}",
-                    f"cam{cam_idx}_{timestamp}.jpg"
-                )
-                cv2.imwrite(save_path, frame_resized, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
-
-        self.collection_frame_counter += 1
-
-        # Update status
-        if self.collection_frame_counter % 10 == 0:
-            self.collection_status_label.config(
-                text=f"수집 중: {self.collection_frame_counter}장 저장됨"
-            )
-            print(f"[데이터수집] {self.collection_frame_counter}장 저장됨")
-
     def toggle_fullscreen(self):
         """Toggle fullscreen mode"""
         self.is_fullscreen = not self.is_fullscreen
@@ -2478,14 +1596,8 @@ class JetsonIntegratedApp:
             # 백그라운드 스레드에서 정리 작업 수행 (UI 프리징 방지)
             def cleanup_and_exit():
                 try:
-                    # Stop ongoing data collection to save session_info.json
-                    print("[종료] 데이터 수집 중지 및 메타데이터 저장 중...")
-                    if self.pot1_collecting:
-                        self.stop_pot1_collection()
-                    if self.pot2_collecting:
-                        self.stop_pot2_collection()
-                    if self.data_collection_active:
-                        self.stop_data_collection()
+                    # Stop ongoing data collection (session_info.json), drain frame sink, disconnect MQTT
+                    self.close_station()
 
                     # Cleanup child processes (진동센서 등)
                     for proc in self.child_processes:
@@ -2539,13 +1651,6 @@ class JetsonIntegratedApp:
 
                     print("[종료] 카메라 해제 완료")
 
-                    # Disconnect MQTT
-                    if self.mqtt_client:
-                        try:
-                            self.mqtt_client.disconnect()
-                        except:
-                            pass
-
                 except Exception as e:
                     print(f"[종료] 정리 중 오류: {e}")
                 finally:
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+자동 라벨링 (세그멘테이션 마스크 -> YOLO 폴리곤 라벨)
+수집된 세션 이미지를 색상 분할기(FoodSegmenter) 또는 기존 YOLO 세그멘테이션 모델로
+프로세스 풀에서 분할하고, 마스크 외곽선을 단순화해 YOLO segment 라벨(.txt)과
+데이터셋 YAML을 만든다. 신뢰도가 낮은 프레임은 review/ 로 분리해 사람이 확인한다.
+
+출력 구조:
+    <out>/images/{train,val}/<name>.jpg     원본 하드링크 (다른 파일시스템이면 복사)
+    <out>/labels/{train,val}/<name>.txt     class x1 y1 x2 y2 ... (0~1 정규화)
+    <out>/review/{images,labels}/           확인 필요 프레임 (학습 split에서 제외)
+    <out>/review.csv                        확인 사유
+    <out>/progress.jsonl                    완료 프레임 체크포인트 (재실행 시 이어서)
+    <out>/data.yaml
+
+사용법:
+    python3 auto_label.py ~/AI_Data/FryingData/pot1 --out ~/AI_Data/frying_seg_dataset --cameras 0 1
+    python3 auto_label.py ~/AI_Data/FryingData --out ds --backend yolo --model frying_seg.pt --workers 1
+    yolo segment train data=ds/data.yaml model=yolov8n-seg.pt epochs=100
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from frying_segmenter import FoodSegmenter
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+PROGRESS_FILE = "progress.jsonl"
+REVIEW_FILE = "review.csv"
+
+
+# =========================
+# 마스크 -> 폴리곤
+# =========================
+def mask_to_polygons(mask, epsilon_ratio=0.002, min_area=500):
+    """
+    이진 마스크 -> 단순화된 정규화 폴리곤 목록
+
+    Args:
+        mask: uint8 마스크 (0/255)
+        epsilon_ratio: approxPolyDP 허용오차 (외곽선 길이 대비)
+        min_area: 이보다 작은 영역은 버림 (픽셀)
+
+    Returns:
+        [np.ndarray (N, 2) float32, 0~1 정규화] (점 3개 이상)
+    """
+    H, W = mask.shape[:2]
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    polygons = []
+    for cnt in contours:
+        if cv2.contourArea(cnt) < min_area:
+            continue
+        approx = cv2.approxPolyDP(cnt, epsilon_ratio * cv2.arcLength(cnt, True), True)
+        if len(approx) < 3:
+            continue
+        poly = approx.reshape(-1, 2).astype(np.float32)
+        poly[:, 0] /= W
+        poly[:, 1] /= H
+        polygons.append(np.clip(poly, 0.0, 1.0))
+    return polygons
+
+
+def format_label(polygons):
+    """[(class_id, polygon)] -> YOLO segment 라벨 텍스트"""
+    lines = []
+    for cls_id, poly in polygons:
+        coords = " ".join(f"{v:.5f}" for v in poly.reshape(-1))
+        lines.append(f"{cls_id} {coords}")
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+# =========================
+# 분할 백엔드 (워커 프로세스마다 하나)
+# =========================
+class ColorBackend:
+    """FoodSegmenter 색상 분할 -> 클래스 0 'food' 폴리곤"""
+
+    names = ["food"]
+
+    def __init__(self, args):
+        self.segmenter = FoodSegmenter(mode="auto")
+        self.epsilon = args.epsilon
+        self.min_area = args.min_area
+        self.min_ratio = args.min_ratio
+        self.max_ratio = args.max_ratio
+        self.max_polygons = args.max_polygons
+
+    def label(self, image):
+        """이미지 -> ([(class_id, polygon)], 확인 사유 목록, 점수)"""
+        result = self.segmenter.segment(image, visualize=False)
+        polygons = mask_to_polygons(result.food_mask, self.epsilon, self.min_area)
+
+        # 색상 분할은 신뢰도가 없으므로 면적/조각 수로 이상 프레임을 거른다
+        reasons = []
+        ratio = float(result.food_area_ratio)
+        if ratio < self.min_ratio:
+            reasons.append(f"area<{self.min_ratio}")
+        elif ratio > self.max_ratio:
+            reasons.append(f"area>{self.max_ratio}")
+        if len(polygons) > self.max_polygons:
+            reasons.append(f"fragments={len(polygons)}")
+        return [(0, p) for p in polygons], reasons, round(ratio, 4)
+
+
+class YoloBackend:
+    """기존 YOLO 세그멘테이션 모델 -> 모델 클래스 그대로 폴리곤"""
+
+    def __init__(self, args):
+        from ultralytics import YOLO
+        self.model = YOLO(args.model)
+        self.imgsz = args.imgsz
+        self.conf = args.conf
+        self.review_conf = args.review_conf
+        self.epsilon = args.epsilon
+        self.min_area = args.min_area
+        self.device = args.device
+
+    def label(self, image):
+        H, W = image.shape[:2]
+        r = self.model.predict(image, imgsz=self.imgsz, conf=self.conf, verbose=False, device=self.device)[0]
+        if r.masks is None or len(r.boxes) == 0:
+            return [], ["no_detection"], 0.0
+
+        labels = []
+        confs = r.boxes.conf.cpu().numpy()
+        for i, cls_id in enumerate(r.boxes.cls.cpu().numpy().astype(int)):
+            m = (r.masks.data[i].cpu().numpy() > 0.5).astype(np.uint8) * 255
+            m = cv2.resize(m, (W, H), interpolation=cv2.INTER_NEAREST)
+            labels.extend((int(cls_id), p) for p in mask_to_polygons(m, self.epsilon, self.min_area))
+
+        score = float(confs.min())
+        reasons = [f"conf<{self.review_conf}"] if score < self.review_conf else []
+        return labels, reasons, round(score, 4)
+
+
+_backend = None
+
+
+def _init_worker(args):
+    global _backend
+    cv2.setNumThreads(1)  # 프로세스 단위로 병렬화
+    _backend = YoloBackend(args) if args.backend == "yolo" else ColorBackend(args)
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _label_one(job):
+    """워커: 이미지 1장 라벨링 + 파일 기록 -> 진행 기록 dict"""
+    src, name, split, out_dir = job
+    image = cv2.imread(src)
+    if image is None:
+        return {"src": src, "error": "read_failed"}
+
+    labels, reasons, score = _backend.label(image)
+    if reasons:
+        img_dir = os.path.join(out_dir, "review", "images")
+        lbl_dir = os.path.join(out_dir, "review", "labels")
+    else:
+        img_dir = os.path.join(out_dir, "images", split)
+        lbl_dir = os.path.join(out_dir, "labels", split)
+
+    ext = os.path.splitext(src)[1].lower()
+    _link_or_copy(src, os.path.join(img_dir, name + ext))
+    tmp = os.path.join(lbl_dir, name + ".txt.tmp")
+    with open(tmp, "w") as f:
+        f.write(format_label(labels))
+    os.replace(tmp, os.path.join(lbl_dir, name + ".txt"))
+
+    return {"src": src, "name": name, "split": "review" if reasons else split,
+            "polygons": len(labels), "score": score, "reasons": reasons}
+
+
+# =========================
+# 데이터셋 구성
+# =========================
+def find_images(roots, cameras=None, exclude=None):
+    """세션 폴더 아래 이미지 (camera_N 폴더 또는 images 폴더) -> [(root, path)]"""
+    found = []
+    for root in roots:
+        root = os.path.abspath(os.path.expanduser(root))
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames
+                                 if d != "shards" and os.path.join(dirpath, d) != exclude)
+            folder = os.path.basename(dirpath)
+            if cameras is not None:
+                if not folder.startswith("camera_") or folder[len("camera_"):] not in cameras:
+                    continue
+            for fn in sorted(filenames):
+                if fn.lower().endswith(IMAGE_EXTENSIONS):
+                    found.append((root, os.path.join(dirpath, fn)))
+    return found
+
+
+def split_for(session_path, val_ratio):
+    """세션 단위 train/val 분할 (같은 세션 프레임이 양쪽에 섞이지 않게, 결정적)"""
+    bucket = zlib.crc32(session_path.encode("utf-8")) % 1000
+    return "val" if bucket < val_ratio * 1000 else "train"
+
+
+def load_progress(path):
+    """체크포인트에서 완료된 원본 경로 집합"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["src"])
+                except (ValueError, KeyError):
+                    continue  # 중단 시 잘린 마지막 줄
+    return done
+
+
+def write_dataset_yaml(out_dir, names):
+    """YOLO 데이터셋 YAML (ultralytics 형식)"""
+    path = os.path.join(out_dir, "data.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"path: {os.path.abspath(out_dir)}\n")
+        f.write("train: images/train\n")
+        f.write("val: images/val\n")
+        f.write("names:\n")
+        for i, name in enumerate(names):
+            f.write(f"  {i}: {name}\n")
+    return path
+
+
+def write_review_csv(out_dir, progress_path):
+    """progress.jsonl에서 확인 필요 프레임 목록 생성"""
+    path = os.path.join(out_dir, REVIEW_FILE)
+    count = 0
+    with open(progress_path, "r", encoding="utf-8") as f, open(path, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["name", "source", "score", "reasons"])
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("split") == "review":
+                writer.writerow([rec["name"], rec["src"], rec["score"], ";".join(rec["reasons"])])
+                count += 1
+    return path, count
+
+
+def backend_names(args):
+    """클래스 이름 목록 (YAML용)"""
+    if args.backend == "color":
+        return ColorBackend.names
+    from ultralytics import YOLO
+    model_names = YOLO(args.model).names
+    return [model_names[i] for i in sorted(model_names)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="세그멘테이션 마스크 -> YOLO 폴리곤 자동 라벨링")
+    parser.add_argument("roots", nargs="+", help="세션 폴더 (예: ~/AI_Data/FryingData/pot1)")
+    parser.add_argument("--out", required=True, help="데이터셋 출력 폴더")
+    parser.add_argument("--backend", choices=["color", "yolo"], default="color")
+    parser.add_argument("--model", help="YOLO 세그멘테이션 모델 (.pt, --backend yolo)")
+    parser.add_argument("--cameras", nargs="*", help="camera_N 폴더만 (예: 0 1)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수, yolo는 1)")
+    parser.add_argument("--val-ratio", type=float, default=0.2, help="검증 세트 비율 (세션 단위)")
+    parser.add_argument("--epsilon", type=float, default=0.002, help="폴리곤 단순화 (외곽선 길이 대비)")
+    parser.add_argument("--min-area", type=int, default=500, help="최소 폴리곤 면적 (픽셀)")
+    parser.add_argument("--min-ratio", type=float, default=0.01, help="[color] 음식 면적 비율 하한 (미만이면 확인)")
+    parser.add_argument("--max-ratio", type=float, default=0.8, help="[color] 음식 면적 비율 상한")
+    parser.add_argument("--max-polygons", type=int, default=20, help="[color] 조각 수 상한")
+    parser.add_argument("--imgsz", type=int, default=640, help="[yolo] 입력 크기")
+    parser.add_argument("--conf", type=float, default=0.25, help="[yolo] 검출 임계값")
+    parser.add_argument("--review-conf", type=float, default=0.5, help="[yolo] 이 신뢰도 미만이면 확인")
+    parser.add_argument("--device", default=None, help="[yolo] 디바이스 (예: 0, cpu)")
+    args = parser.parse_args()
+
+    if args.backend == "yolo" and not args.model:
+        parser.error("--backend yolo 에는 --model 이 필요합니다")
+    workers = args.workers or (1 if args.backend == "yolo" else (os.cpu_count() or 1))
+
+    out_dir = os.path.abspath(os.path.expanduser(args.out))
+    for sub in ("images/train", "images/val", "labels/train", "labels/val", "review/images", "review/labels"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+
+    cameras = set(args.cameras) if args.cameras else None
+    progress_path = os.path.join(out_dir, PROGRESS_FILE)
+    done = load_progress(progress_path)
+
+    jobs = []
+    for root, path in find_images(args.roots, cameras, exclude=out_dir):
+        if path in done:
+            continue
+        rel = os.path.relpath(path, root)
+        name = os.path.splitext(rel)[0].replace(os.sep, "__")
+        session = os.path.dirname(os.path.dirname(path))  # <session>/camera_N/<file>
+        jobs.append((path, name, split_for(session, args.val_ratio), out_dir))
+
+    print(f"[라벨링] 대상 {len(jobs)}장 (완료 {len(done)}장 건너뜀), 백엔드={args.backend}, 프로세스={workers}")
+    names = backend_names(args)
+    if not jobs:
+        write_dataset_yaml(out_dir, names)
+        return
+
+    start = time.time()
+    stats = {"labeled": 0, "review": 0, "failed": 0}
+    with open(progress_path, "a", encoding="utf-8") as progress, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(args,)) as pool:
+        for i, rec in enumerate(pool.map(_label_one, jobs, chunksize=4), 1):
+            if "error" in rec:
+                stats["failed"] += 1
+                continue
+            progress.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            progress.flush()
+            stats["review" if rec["split"] == "review" else "labeled"] += 1
+            if i % 50 == 0:
+                rate = i / max(time.time() - start, 1e-6)
+                print(f"[라벨링] {i}/{len(jobs)} ({rate:.1f}장/s)")
+
+    yaml_path = write_dataset_yaml(out_dir, names)
+    review_path, review_count = write_review_csv(out_dir, progress_path)
+
+    elapsed = time.time() - start
+    print(f"[라벨링] 완료: {stats['labeled']}장 라벨, {stats['review']}장 확인 필요, {stats['failed']}장 실패 "
+          f"({elapsed:.1f}초, {len(jobs) / max(elapsed, 1e-6):.1f}장/s)")
+    print(f"[라벨링] 데이터셋: {yaml_path}")
+    print(f"[라벨링] 확인 목록: {review_path} ({review_count}장)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+이미지 인코더 벤치마크
+인코더 백엔드별 인코딩 시간(ms), 파일 크기(bytes), 화질(PSNR)을 비교해서
+디스크 대역폭 vs CPU 사용량을 결정할 때 사용
+
+사용법:
+    python3 benchmark_encoders.py                           # 합성 프레임
+    python3 benchmark_encoders.py --images ~/AI_Data/.../camera_0 --limit 20
+    python3 benchmark_encoders.py --camera 0                # GMSL 카메라에서 캡처
+    python3 benchmark_encoders.py --encoders turbojpeg:90:420 webp:80 png:1
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.storage.encoders import create_encoder, TURBOJPEG_AVAILABLE
+
+DEFAULT_ENCODERS = [
+    "opencv_jpeg:100",
+    "opencv_jpeg:90",
+    "opencv_jpeg:80",
+    "turbojpeg:90:420",
+    "turbojpeg:90:444",
+    "webp:90",
+    "png:1",
+    "png:3",
+    "npy",
+]
+
+
+def parse_encoder(text):
+    """'backend[:quality[:subsampling]]' -> encoder spec dict"""
+    parts = text.split(":")
+    spec = {"backend": parts[0]}
+    if len(parts) > 1:
+        key = "compression" if parts[0] == "png" else "quality"
+        spec[key] = int(parts[1])
+    if len(parts) > 2:
+        spec["subsampling"] = parts[2]
+    return spec
+
+
+def psnr(original, decoded):
+    """PSNR (dB), 무손실이면 inf"""
+    if original.shape != decoded.shape:
+        decoded = cv2.resize(decoded, (original.shape[1], original.shape[0]))
+    mse = np.mean((original.astype(np.float32) - decoded.astype(np.float32)) ** 2)
+    if mse == 0:
+        return float("inf")
+    return 10.0 * np.log10((255.0 ** 2) / mse)
+
+
+def load_frames(args):
+    """샘플 프레임 준비 (이미지 폴더 / 카메라 / 합성)"""
+    size = (args.width, args.height)
+    frames = []
+
+    if args.images:
+        paths = []
+        for ext in ("*.jpg", "*.jpeg", "*.png"):
+            paths += glob.glob(os.path.join(os.path.expanduser(args.images), "**", ext), recursive=True)
+        for path in sorted(paths)[:args.limit]:
+            img = cv2.imread(path)
+            if img is not None:
+                frames.append(cv2.resize(img, size, interpolation=cv2.INTER_AREA))
+        print(f"[준비] 이미지 {len(frames)}장 로드: {args.images}")
+
+    elif args.camera is not None:
+        from gst_camera import GstCamera
+        cap = GstCamera(device_index=args.camera, width=1920, height=1536, fps=30)
+        cap.start()
+        time.sleep(2)  # 카메라 안정화
+        for _ in range(args.limit):
+            ret, frame = cap.read()
+            if ret and frame is not None:
+                frames.append(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+            time.sleep(0.2)
+        cap.stop()
+        print(f"[준비] 카메라 {args.camera}에서 {len(frames)}장 캡처")
+
+    if not frames:
+        # 합성 프레임: 그라디언트 + 노이즈 + 도형 (실제 주방 영상보다 압축이 쉬움에 주의)
+        rng = np.random.default_rng(0)
+        for i in range(max(1, min(args.limit, 5))):
+            x = np.linspace(0, 255, size[0], dtype=np.float32)
+            y = np.linspace(0, 255, size[1], dtype=np.float32)[:, None]
+            base = np.stack([np.broadcast_to(x, (size[1], size[0])),
+                             np.broadcast_to(y, (size[1], size[0])),
+                             (x + y) / 2], axis=2)
+            noise = rng.normal(0, 12, base.shape)
+            img = np.clip(base + noise, 0, 255).astype(np.uint8)
+            cv2.circle(img, (size[0] // 2 + i * 20, size[1] // 2), size[1] // 4, (40, 120, 200), -1)
+            frames.append(img)
+        print(f"[준비] 합성 프레임 {len(frames)}장 사용 ({size[0]}x{size[1]})")
+
+    return frames
+
+
+def benchmark(encoder, frames, repeat):
+    """인코더 1개 측정 -> 결과 dict"""
+    encode_ms, decode_ms, sizes, psnrs = [], [], [], []
+
+    for frame in frames:
+        data = encoder.encode(frame)  # warm-up
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            data = encoder.encode(frame)
+            encode_ms.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        decoded = encoder.decode(data)
+        decode_ms.append((time.perf_counter() - t0) * 1000.0)
+        sizes.append(len(data))
+        psnrs.append(psnr(frame, decoded))
+
+    finite = [p for p in psnrs if np.isfinite(p)]
+    return {
+        "encode_ms": float(np.mean(encode_ms)),
+        "encode_p95_ms": float(np.percentile(encode_ms, 95)),
+        "decode_ms": float(np.mean(decode_ms)),
+        "bytes": float(np.mean(sizes)),
+        "psnr": float(np.mean(finite)) if finite else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이미지 인코더 벤치마크 (ms / bytes / PSNR)")
+    parser.add_argument("--images", help="샘플 이미지 폴더 (하위 폴더 포함)")
+    parser.add_argument("--camera", type=int, help="카메라 인덱스에서 직접 캡처")
+    parser.add_argument("--limit", type=int, default=10, help="샘플 프레임 수")
+    parser.add_argument("--width", type=int, default=1280, help="저장 해상도 너비")
+    parser.add_argument("--height", type=int, default=720, help="저장 해상도 높이")
+    parser.add_argument("--repeat", type=int, default=3, help="프레임당 인코딩 반복 횟수")
+    parser.add_argument("--fps", type=float, default=1.0 / 3,
+                        help="카메라당 저장 FPS (디스크 대역폭 계산용, 기본 3초당 1장)")
+    parser.add_argument("--cameras", type=int, default=4, help="동시 저장 카메라 수")
+    parser.add_argument("--encoders", nargs="+", default=DEFAULT_ENCODERS,
+                        help="backend[:quality[:subsampling]] 목록")
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    if not TURBOJPEG_AVAILABLE:
+        print("[참고] PyTurboJPEG 미설치 - turbojpeg 항목은 건너뜀")
+
+    print("\n" + "=" * 96)
+    print(f"{'encoder':<22}{'enc ms':>9}{'p95 ms':>9}{'dec ms':>9}{'KB/장':>10}"
+          f"{'PSNR dB':>10}{'MB/시간':>11}{'CPU %':>9}")
+    print("=" * 96)
+
+    saves_per_sec = args.fps * args.cameras
+    for text in args.encoders:
+        spec = parse_encoder(text)
+        if spec["backend"] == "turbojpeg" and not TURBOJPEG_AVAILABLE:
+            continue
+        try:
+            encoder = create_encoder(spec, fallback=False)
+            r = benchmark(encoder, frames, args.repeat)
+        except Exception as e:
+            print(f"{text:<22} 실패: {e}")
+            continue
+
+        mb_per_hour = r["bytes"] * saves_per_sec * 3600 / 1e6
+        cpu_pct = r["encode_ms"] * saves_per_sec / 10.0  # 1코어 기준 (ms/s -> %)
+        psnr_text = "lossless" if not np.isfinite(r["psnr"]) else f"{r['psnr']:.2f}"
+        print(f"{text:<22}{r['encode_ms']:>9.2f}{r['encode_p95_ms']:>9.2f}{r['decode_ms']:>9.2f}"
+              f"{r['bytes'] / 1024:>10.1f}{psnr_text:>10}{mb_per_hour:>11.1f}{cpu_pct:>9.2f}")
+
+    print("=" * 96)
+    print(f"MB/시간, CPU % = 카메라 {args.cameras}대 x {args.fps:.2f} fps 저장 기준 (CPU %는 코어 1개 기준)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,20 @@
 튀김 음식 분할 및 색상 특징 추출
 - 음식 영역과 배경(기름/그릇) 분리
 - HSV 기반 색상 특징 추출
-- 시각화 및 분석
+- 시각화 및 분석 (프로세스 병렬 + 이미지별 특징 캐시로 재실행 시 새/변경 이미지만 처리)
 """
 
 import os
 import sys
+import time
 import cv2
 import numpy as np
 import json
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Tuple, Dict, List, Optional
+from typing import Tuple, Dict, List, Optional, Iterator, Any
 from dataclasses import dataclass, asdict
 
 # Matplotlib은 시각화 함수에서만 사용 (조건부 import)
@@ -51,6 +55,11 @@ class SegmentationResult:
     image_path: str
 
 
+# 특징 계산 방식이 바뀌면 올려서 캐시 무효화
+FEATURE_VERSION = 1
+FEATURE_CACHE_FILE = "feature_cache.db"
+
+
 class FoodSegmenter:
     """음식 영역 분할기"""
 
@@ -78,6 +87,21 @@ class FoodSegmenter:
             }
         }
 
+        # 노이즈 제거 커널 크기 / 최소 영역 (픽셀)
+        self.kernel_size = 5
+        self.min_area = 500
+
+    def params_key(self) -> str:
+        """분할 파라미터 해시 (특징 캐시 키 - 파라미터가 바뀌면 다시 계산)"""
+        params = {
+            'version': FEATURE_VERSION,
+            'ranges': {name: [r["lower"].tolist(), r["upper"].tolist()]
+                       for name, r in sorted(self.food_ranges.items())},
+            'kernel_size': self.kernel_size,
+            'min_area': self.min_area,
+        }
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
     def segment(self, image: np.ndarray, visualize: bool = False,
                 save_path: Optional[str] = None) -> SegmentationResult:
         """
@@ -109,12 +133,12 @@ class FoodSegmenter:
             food_mask = cv2.bitwise_or(food_mask, mask)
 
         # 노이즈 제거 (morphology)
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (self.kernel_size, self.kernel_size))
         food_mask = cv2.morphologyEx(food_mask, cv2.MORPH_CLOSE, kernel)
         food_mask = cv2.morphologyEx(food_mask, cv2.MORPH_OPEN, kernel)
 
         # 작은 영역 제거 (연결된 컴포넌트)
-        food_mask = self._remove_small_regions(food_mask, min_area=500)
+        food_mask = self._remove_small_regions(food_mask, min_area=self.min_area)
 
         # 색상 특징 추출
         color_features = self._extract_color_features(image, food_mask)
@@ -263,11 +287,126 @@ LAB Mean: ({features.mean_lab[0]:.1f}, {features.mean_lab[1]:.1f}, {features.mea
         plt.close(fig)  # Close to free memory
 
 
+def _features_from_dict(data: Dict[str, Any]) -> ColorFeatures:
+    """dict(JSON) -> ColorFeatures (튜플 필드 복원)"""
+    data = dict(data)
+    for key in ('mean_hsv', 'std_hsv', 'mean_lab'):
+        data[key] = tuple(data[key])
+    return ColorFeatures(**data)
+
+
+class FeatureCache:
+    """
+    이미지별 특징 캐시 (SQLite)
+
+    키: 이미지 절대 경로 + 분할 파라미터 해시, 파일 mtime/크기가 바뀌면 무효.
+    분석 결과를 받는 즉시 기록하므로 중단 후 다시 실행하면 이어서 처리합니다.
+    """
+
+    def __init__(self, db_path: Path, commit_every: int = 50):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(exist_ok=True, parents=True)
+        self.path = db_path
+        self.commit_every = commit_every
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS features (
+                path TEXT NOT NULL,
+                params TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                food_area_ratio REAL NOT NULL,
+                color_features TEXT NOT NULL,
+                PRIMARY KEY (path, params)
+            )""")
+        self.conn.commit()
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, stat: os.stat_result, params: str) -> Optional[Tuple[float, ColorFeatures]]:
+        """캐시된 (food_area_ratio, ColorFeatures) 또는 None"""
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, food_area_ratio, color_features FROM features WHERE path=? AND params=?",
+            (path, params)).fetchone()
+        if row is None or row[0] != stat.st_mtime_ns or row[1] != stat.st_size:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[2], _features_from_dict(json.loads(row[3]))
+
+    def put(self, path: str, stat: os.stat_result, params: str,
+            food_area_ratio: float, features: ColorFeatures):
+        """특징 저장 (commit_every 건마다 커밋)"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?)",
+            (path, params, stat.st_mtime_ns, stat.st_size, food_area_ratio, json.dumps(asdict(features))))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+# 워커 프로세스별 분할기 (initializer에서 설정)
+_worker_segmenter: Optional[FoodSegmenter] = None
+
+
+def _init_worker(segmenter: FoodSegmenter):
+    global _worker_segmenter
+    _worker_segmenter = segmenter
+    cv2.setNumThreads(1)  # 프로세스 단위로 병렬화하므로 OpenCV 내부 스레드는 끔
+
+
+def _segment_file(segmenter: FoodSegmenter, img_path: str,
+                  save_path: Optional[str]) -> Tuple[Optional[float], Optional[Dict[str, Any]]]:
+    """이미지 1장 분할 -> (food_area_ratio, color_features dict), 읽기 실패 시 (None, None)"""
+    image = cv2.imread(img_path)
+    if image is None:
+        return None, None
+    result = segmenter.segment(image, visualize=save_path is not None, save_path=save_path)
+    return float(result.food_area_ratio), asdict(result.color_features)
+
+
+def _pool_segment_file(img_path: str, save_path: Optional[str]):
+    return _segment_file(_worker_segmenter, img_path, save_path)
+
+
 class DatasetAnalyzer:
     """데이터셋 분석기"""
 
-    def __init__(self, segmenter: FoodSegmenter):
+    def __init__(self, segmenter: FoodSegmenter, workers: Optional[int] = None,
+                 cache: Optional[FeatureCache] = None):
+        """
+        Args:
+            segmenter: 분할기
+            workers: 분석 프로세스 수 (None = CPU 수, 1 = 현재 프로세스에서 순차 처리)
+            cache: 특징 캐시 (None = 캐시 없이 매번 계산)
+        """
         self.segmenter = segmenter
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.cache = cache
+
+    def _segment_files(self, jobs: List[Tuple[int, str, Optional[str]]]) -> Iterator[Tuple[int, Optional[float], Optional[Dict]]]:
+        """(index, path, save_path) 작업을 분할하고 끝나는 순서대로 (index, ratio, features) 반환"""
+        if self.workers <= 1 or len(jobs) <= 1:
+            for i, img_path, save_path in jobs:
+                yield (i,) + _segment_file(self.segmenter, img_path, save_path)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.segmenter,)) as pool:
+            futures = {pool.submit(_pool_segment_file, img_path, save_path): i
+                       for i, img_path, save_path in jobs}
+            for future in as_completed(futures):
+                yield (futures[future],) + future.result()
 
     def analyze_session(self, session_dir: Path,
                        output_dir: Optional[Path] = None,
@@ -276,6 +415,10 @@ class DatasetAnalyzer:
         """
         세션 데이터 분석
 
+        캐시에 있는 이미지(같은 mtime/크기/분할 파라미터)는 건너뛰고 나머지만
+        프로세스 풀에서 분석합니다. 결과 순서는 이미지 파일명 순서 그대로입니다.
+        메모리 절약을 위해 결과의 food_mask는 보관하지 않습니다 (None).
+
         Args:
             session_dir: 세션 디렉토리
             output_dir: 결과 저장 디렉토리
@@ -306,25 +449,58 @@ class DatasetAnalyzer:
             vis_dir.mkdir(exist_ok=True, parents=True)
 
         print(f"\n🔍 Analyzing {len(image_files)} images from {session_dir.name}...")
+        start = time.time()
 
+        # 캐시 조회 - 새 이미지/변경된 이미지/시각화 파일이 없는 샘플만 분석
+        params = self.segmenter.params_key()
+        entries: List[Optional[Tuple[float, ColorFeatures]]] = [None] * len(image_files)
+        stats = {}
+        jobs = []
         for i, img_path in enumerate(image_files):
-            image = cv2.imread(str(img_path))
-            if image is None:
-                continue
-
             # 시각화 저장 경로 (샘플만)
             save_path = None
             if save_visualizations and vis_dir and i < visualize_samples:
                 save_path = str(vis_dir / f"vis_{img_path.stem}.jpg")
 
-            # 분할 수행
-            result = self.segmenter.segment(image, visualize=(i < visualize_samples),
-                                           save_path=save_path)
-            result.image_path = str(img_path.relative_to(session_dir.parent))
-            results.append(result)
+            key = str(img_path.resolve())
+            stats[i] = (key, img_path.stat())
+            if self.cache and (save_path is None or os.path.exists(save_path)):
+                entries[i] = self.cache.get(key, stats[i][1], params)
+                if entries[i] is not None:
+                    continue
+            jobs.append((i, key, save_path))
 
-            if (i + 1) % 10 == 0:
-                print(f"  Processed {i + 1}/{len(image_files)} images...")
+        if len(jobs) < len(image_files):
+            print(f"  Cached: {len(image_files) - len(jobs)} images, analyzing {len(jobs)}")
+
+        # 분할 수행 (끝나는 순서대로 캐시에 기록)
+        try:
+            for done, (i, food_area_ratio, features) in enumerate(self._segment_files(jobs), 1):
+                if food_area_ratio is not None:
+                    entries[i] = (food_area_ratio, _features_from_dict(features))
+                    if self.cache:
+                        self.cache.put(*stats[i], params, *entries[i])
+
+                if done % 10 == 0:
+                    print(f"  Processed {done}/{len(jobs)} images...")
+        finally:
+            if self.cache:
+                self.cache.commit()
+
+        for img_path, entry in zip(image_files, entries):
+            if entry is None:
+                continue  # 읽기 실패
+            results.append(SegmentationResult(
+                food_mask=None,
+                food_area_ratio=entry[0],
+                color_features=entry[1],
+                image_path=str(img_path.relative_to(session_dir.parent))
+            ))
+
+        if jobs:
+            elapsed = time.time() - start
+            print(f"  Done: {len(jobs)} images in {elapsed:.1f}s ({len(jobs) / max(elapsed, 1e-6):.1f} img/s, "
+                  f"{self.workers} workers)")
 
         # 결과 저장
         if output_dir:
@@ -411,8 +587,8 @@ class DatasetAnalyzer:
         print("=" * 60)
 
 
-def analyze_existing_data(base_dir: str = "frying_dataset"):
-    """기존 수집 데이터 분석"""
+def analyze_existing_data(base_dir: str = "frying_dataset", workers: Optional[int] = None):
+    """기존 수집 데이터 분석 (workers: 분석 프로세스 수, None = CPU 수)"""
     base_path = Path(base_dir)
 
     if not base_path.exists():
@@ -436,25 +612,30 @@ def analyze_existing_data(base_dir: str = "frying_dataset"):
     print("\n" + "=" * 60)
     choice = input("Analyze which session? (number or 'all'): ").strip().lower()
 
-    # Segmenter 초기화
-    segmenter = FoodSegmenter(mode="auto")
-    analyzer = DatasetAnalyzer(segmenter)
-
     # 출력 디렉토리
     output_dir = base_path / "analysis_results"
 
-    if choice == 'all':
-        for session in sessions:
-            analyzer.analyze_session(session, output_dir, visualize_samples=2)
-    else:
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(sessions):
-                analyzer.analyze_session(sessions[idx], output_dir, visualize_samples=3)
-            else:
-                print("❌ Invalid choice")
-        except ValueError:
-            print("❌ Invalid input")
+    # Segmenter 초기화 (특징 캐시: 다시 실행하면 새/변경 이미지만 분석)
+    segmenter = FoodSegmenter(mode="auto")
+    cache = FeatureCache(output_dir / FEATURE_CACHE_FILE)
+    analyzer = DatasetAnalyzer(segmenter, workers=workers, cache=cache)
+
+    try:
+        if choice == 'all':
+            for session in sessions:
+                analyzer.analyze_session(session, output_dir, visualize_samples=2)
+        else:
+            try:
+                idx = int(choice) - 1
+                if 0 <= idx < len(sessions):
+                    analyzer.analyze_session(sessions[idx], output_dir, visualize_samples=3)
+                else:
+                    print("❌ Invalid choice")
+            except ValueError:
+                print("❌ Invalid input")
+    finally:
+        print(f"\n🗂  Feature cache: {cache.hits} hits, {cache.misses} misses ({cache.path})")
+        cache.close()
 
 
 def test_single_image(image_path: str):
@@ -481,8 +662,8 @@ if __name__ == "__main__":
             # 단일 이미지 테스트
             test_single_image(sys.argv[2])
         else:
-            # 특정 디렉토리 분석
-            analyze_existing_data(sys.argv[1])
+            # 특정 디렉토리 분석 (선택: 프로세스 수)
+            analyze_existing_data(sys.argv[1], workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
     else:
         # 기본 디렉토리 분석
         analyze_existing_data()
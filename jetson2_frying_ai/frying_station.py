@@ -0,0 +1,957 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Jetson #2 튀김 스테이션 공통 로직 (JETSON2_INTEGRATED.py / JETSON2_HEADLESS.py)
+
+- 설정 파일 로드 (StationConfig: 두 진입점이 공유하는 설정 키), IP 확인
+- MQTT 연결/구독/발행 (init_mqtt, send_mqtt_message, publish_mqtt_periodic)
+- MQTT 온도 수신 반영 (apply_telemetry) + POT별 목표 온도 자동 완료
+- 로봇 PC 명령 핸들러 (음식 종류 / 제어, POT1/POT2 + LEGACY)
+- 데이터 수집 (POT1/POT2 + LEGACY 세션 시작/종료/저장, 프레임 싱크,
+  카탈로그, 보관 정책, 중복 제거)
+
+각 진입점은 FryingStation 을 상속하고 run_on_main(fn) 을 구현합니다
+(Tk: root.after, headless: 메인 루프 작업 큐). MQTT 스레드에서는
+수집 시작/종료를 직접 실행하지 않고 항상 run_on_main 으로 넘깁니다.
+카메라/AI/화면은 진입점 몫이며, 메인 스레드에서 latest_frames 를 채우고
+apply_telemetry() / advance_collection(dt) / publish_mqtt_periodic() 을 호출합니다.
+화면 갱신이 필요한 시점은 ui_* 훅으로 알려줍니다 (기본: 아무것도 안 함).
+"""
+
+import os
+import json
+import time
+import shutil
+import socket
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from src.communication.mqtt_client import MQTTClient
+from src.communication.envelope import DeviceEnvelope
+from src.communication.outbox import Outbox, OutboxPolicy, parse_policies
+from src.communication.ingest import IngestQueue, format_timestamp
+from src.core.system_info import SystemInfo
+from src.storage.frame_sink import FrameSink
+from src.storage.encoders import create_stream_encoders
+from src.storage.shards import ShardWriter
+from src.storage.metadata_log import MetadataLog, read_metadata_log, build_temperature_timeline
+from src.storage.catalog import SessionCatalog
+from src.storage.retention import RetentionManager, GB
+from src.storage.dedup import FrameDeduplicator
+
+# MQTT temperature channel -> (metadata type, pot, legacy position)
+TEMP_CHANNELS = {
+    "pot1_oil": ("oil_temperature", "pot1", "left"),
+    "pot1_probe": ("probe_temperature", "pot1", "left"),
+    "pot2_oil": ("oil_temperature", "pot2", "right"),
+    "pot2_probe": ("probe_temperature", "pot2", "right"),
+}
+
+# Camera index -> stream name (save_encoders keys, latest_frames keys)
+CAMERA_STREAMS = {0: 'frying_left', 1: 'frying_right', 2: 'observe_left', 3: 'observe_right'}
+
+# Cameras saved by each POT collection: its frying camera + both observe cameras
+POT_CAMERAS = {"pot1": [0, 2, 3], "pot2": [1, 2, 3]}
+
+# Session metadata is streamed to <session>/metadata.jsonl
+METADATA_FILE = "metadata.jsonl"
+
+
+def load_config(config_path="config_jetson2.json"):
+    """Load configuration from JSON file (relative paths: jetson2_frying_ai/)"""
+    if not os.path.isabs(config_path):
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        config_path = os.path.join(script_dir, config_path)
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_ip_address():
+    """Get local IP address"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except OSError:
+        return "unknown"
+
+
+class StationConfig:
+    """Settings shared by the kiosk and headless apps (config_jetson2.json)"""
+
+    def __init__(self, config):
+        self.raw = config
+
+        # Frying AI (video0, video1) / Observe_add (video2, video3)
+        self.frying_enabled = config.get('frying_enabled', True)
+        self.frying_left_camera_index = config.get('frying_left_camera_index', 0)
+        self.frying_right_camera_index = config.get('frying_right_camera_index', 1)
+        self.observe_enabled = config.get('observe_enabled', True)
+        self.observe_left_camera_index = config.get('observe_left_camera_index', 2)
+        self.observe_right_camera_index = config.get('observe_right_camera_index', 3)
+        self.observe_seg_model = config.get('observe_seg_model', '../observe_add/besta.pt')
+        self.observe_cls_model = config.get('observe_cls_model', '../observe_add/bestb.pt')
+
+        # Common AI settings
+        self.img_size_seg = config.get('img_size_seg', 640)
+        self.img_size_cls = config.get('img_size_cls', 224)
+        self.conf_seg = config.get('conf_seg', 0.5)
+        self.vote_n = config.get('vote_n', 7)  # Majority voting window
+        self.positive_label = config.get('positive_label', 'filled')
+
+        # Camera (GMSL) / loop timing / frame skip (CPU 절약)
+        self.camera_width = config.get('camera_width', 1920)
+        self.camera_height = config.get('camera_height', 1536)
+        self.camera_fps = config.get('camera_fps', 30)
+        self.update_interval_ms = config.get('gui_update_interval_ms', 50)
+        self.frying_frame_skip = config.get('frying_frame_skip', 3)
+        self.observe_frame_skip = config.get('observe_frame_skip', 5)
+
+        # Device Identification
+        self.device_id = config.get('device_id', 'jetson2')
+        self.device_name = config.get('device_name', 'Jetson2_Frying_Station')
+        self.device_location = config.get('device_location', 'kitchen_frying')
+
+        # MQTT Configuration
+        self.mqtt_enabled = config.get('mqtt_enabled', False)
+        self.mqtt_broker = config.get('mqtt_broker', 'localhost')
+        self.mqtt_port = config.get('mqtt_port', 1883)
+        self.mqtt_qos = config.get('mqtt_qos', 1)
+        self.mqtt_client_id = config.get('mqtt_client_id', 'jetson2_ai')
+        self.mqtt_fast_json = config.get('mqtt_fast_json', False)  # orjson (compact) if installed
+        self.mqtt_codecs = config.get('mqtt_codecs', {})  # topic -> json|msgpack|cbor|struct
+        self.mqtt_publish_interval = config.get('mqtt_publish_interval', 5)  # seconds
+        self.mqtt_ingest_stats_interval = config.get('mqtt_ingest_stats_interval', 300)  # seconds (0 = off)
+        self.ai_mode_enabled = config.get('ai_mode_enabled', False)
+
+        # MQTT Topics (published by Jetson)
+        self.topic_frying = f"{self.device_id}/" + config.get('mqtt_topic_frying', 'frying/status')
+        self.topic_observe = f"{self.device_id}/" + config.get('mqtt_topic_observe', 'observe/status')
+        self.topic_ai_mode = config.get('mqtt_topic_ai_mode', f"{self.device_id}/system/ai_mode")
+        # Subscribed topics (no prefix - shared from robot)
+        self.topic_pot1_oil_temp = config.get('mqtt_topic_pot1_oil_temp', 'frying/pot1/oil_temp')
+        self.topic_pot1_probe_temp = config.get('mqtt_topic_pot1_probe_temp', 'frying/pot1/probe_temp')
+        self.topic_pot2_oil_temp = config.get('mqtt_topic_pot2_oil_temp', 'frying/pot2/oil_temp')
+        self.topic_pot2_probe_temp = config.get('mqtt_topic_pot2_probe_temp', 'frying/pot2/probe_temp')
+        self.topic_food_type = config.get('mqtt_topic_food_type', 'frying/food_type')
+        self.topic_frying_control = config.get('mqtt_topic_frying_control', 'frying/control')
+        self.topic_pot1_food_type = config.get('mqtt_topic_frying_pot1_food_type', 'frying/pot1/food_type')
+        self.topic_pot1_control = config.get('mqtt_topic_frying_pot1_control', 'frying/pot1/control')
+        self.topic_pot2_food_type = config.get('mqtt_topic_frying_pot2_food_type', 'frying/pot2/food_type')
+        self.topic_pot2_control = config.get('mqtt_topic_frying_pot2_control', 'frying/pot2/control')
+
+        # Store-and-forward while the broker is down
+        self.mqtt_outbox_enabled = config.get('mqtt_outbox_enabled', True)
+        self.mqtt_outbox_path = config.get('mqtt_outbox_path', '~/.cache/jetson_mqtt/outbox.db')
+        self.mqtt_outbox_max_messages = config.get('mqtt_outbox_max_messages', 10000)
+        self.mqtt_outbox_drain_rate = config.get('mqtt_outbox_drain_rate', 20)  # messages/sec after reconnect
+        self.mqtt_outbox_policies = parse_policies(config.get('mqtt_outbox_policies', {
+            "+/observe/status": {"mode": "all", "ttl_sec": 600},
+            "+/system/ai_mode": {"mode": "latest", "ttl_sec": 3600},
+        }))
+        # Periodic state: only the newest one per side is worth delivering after an outage
+        self.mqtt_periodic_policies = {
+            side: OutboxPolicy('latest', ttl_sec=max(60, self.mqtt_publish_interval * 10),
+                               key=f"{self.topic_observe}:periodic:{side}")
+            for side in ("LEFT", "RIGHT")}
+
+        # Data Collection
+        save_resolution = config.get('save_resolution', {'width': 1280, 'height': 720})
+        self.save_width = save_resolution['width']
+        self.save_height = save_resolution['height']
+        self.collection_interval = config.get('data_collection_interval', 5)  # seconds
+        self.target_probe_temp = config.get('target_probe_temp', 75.0)
+        self.jpeg_quality = config.get('jpeg_quality', 85)
+
+        # Frame sink (background resize/encode/write) + per-camera encoder backend
+        self.frame_sink_workers = config.get('frame_sink_workers', 2)
+        self.frame_sink_queue_size = config.get('frame_sink_queue_size', 24)
+        self.frame_sink_policy = config.get('frame_sink_policy', 'drop_oldest')
+        self.save_encoders = config.get('save_encoders', {})
+
+        # POT collection storage: 'files' (one file per frame) or 'shards' (chunked tar + index)
+        self.storage_format = config.get('storage_format', 'files')
+        self.shard_max_mb = config.get('shard_max_mb', 256)
+        self.metadata_flush_sec = config.get('metadata_flush_interval', 2.0)
+
+        # SQLite session/frame catalog
+        self.catalog_enabled = config.get('catalog_enabled', True)
+        self.catalog_path = config.get('catalog_path', '~/AI_Data/catalog.db')
+
+        # Disk retention: evict whole backed-up sessions (oldest, non-completed first)
+        self.retention_enabled = config.get('retention_enabled', False)
+        self.retention_dry_run = config.get('retention_dry_run', True)  # log what would be deleted only
+        self.retention_min_free_gb = config.get('retention_min_free_gb', 20)
+        self.retention_target_free_gb = config.get('retention_target_free_gb', 30)
+        self.retention_quota_gb = config.get('retention_quota_gb', 0)  # 0 = no quota
+        self.retention_check_interval = config.get('retention_check_interval', 60)
+
+        # Near-duplicate suppression in POT collection
+        self.dedup_enabled = config.get('dedup_enabled', True)
+        self.dedup_threshold = config.get('dedup_threshold', 1.5)  # mean abs luma diff (0-255)
+        self.dedup_max_gap_sec = config.get('dedup_max_gap_sec', 30)
+        self.dedup_share_observe = config.get('dedup_share_observe', True)
+
+
+class FryingStation(ABC):
+    """
+    MQTT + data collection shared by the kiosk and headless apps
+
+    Subclasses provide run_on_main(fn), cameras/AI (filling latest_frames and
+    observe_state) and optionally the ui_* hooks.
+    """
+
+    def __init__(self, cfg):
+        """
+        Initialize shared state, storage and (if enabled) MQTT
+
+        Args:
+            cfg: StationConfig
+        """
+        self.cfg = cfg
+        self.sys_info = SystemInfo(device_name="Jetson2", location="Kitchen")
+
+        # MQTT temperature samples: parsed on the network thread, applied on the main thread
+        self.telemetry = IngestQueue()
+        self.telemetry_stats_time = time.monotonic()
+        self.mqtt_client = None
+        self.mqtt_outbox = None
+        self.last_mqtt_publish = 0.0
+
+        # Temperature data (from MQTT)
+        self.oil_temp_left = 0.0
+        self.oil_temp_right = 0.0
+        self.probe_temp_left = 0.0
+        self.probe_temp_right = 0.0
+
+        # Food type (from MQTT)
+        self.current_food_type = "unknown"
+
+        # Basket state per side (FILLED / EMPTY / None), set by the observe AI
+        self.observe_state = {"left": None, "right": None}
+
+        # Latest camera frames for data collection (set on the main thread)
+        self.latest_frames = {name: None for name in CAMERA_STREAMS.values()}
+
+        # Data collection (LEGACY - all 4 cameras)
+        self.collection_interval = cfg.collection_interval
+        self.data_collection_active = False
+        self.collection_session_id = None
+        self.collection_start_time = None
+        self.collection_frame_counter = 0
+        self.collection_timer = 0
+        self.collection_metadata = None  # MetadataLog while collecting
+        self.collection_completion_marked = False
+        self.collection_completion_time = None
+        self.collection_completion_info = {}
+
+        # POT1 (cameras 0, 2, 3) / POT2 (cameras 1, 2, 3) data collection
+        for pot in POT_CAMERAS:
+            setattr(self, f"{pot}_collecting", False)
+            setattr(self, f"{pot}_session_id", None)
+            setattr(self, f"{pot}_session_dir", None)
+            setattr(self, f"{pot}_start_time", None)
+            setattr(self, f"{pot}_frame_counter", 0)
+            setattr(self, f"{pot}_timer", 0)
+            setattr(self, f"{pot}_food_type", "unknown")
+            setattr(self, f"{pot}_metadata", None)  # MetadataLog while collecting
+            setattr(self, f"{pot}_completion_marked", False)
+            setattr(self, f"{pot}_completion_time", None)
+            setattr(self, f"{pot}_completion_info", {})
+            setattr(self, f"{pot}_shard", None)
+
+        self.init_storage()
+        if cfg.mqtt_enabled:
+            self.init_mqtt()
+
+    @abstractmethod
+    def run_on_main(self, fn):
+        """Schedule fn on the main thread (Tk root.after / headless loop)"""
+
+    # =========================
+    # UI hooks (main thread; kiosk overrides, headless logs only)
+    # =========================
+    def ui_food_type_missing(self):
+        """LEGACY collection requested without a food type"""
+
+    def ui_collection_started(self):
+        """LEGACY collection started"""
+
+    def ui_collection_progress(self):
+        """LEGACY collection saved another 10 frame sets"""
+
+    def ui_collection_stopped(self, session_info):
+        """LEGACY collection stopped (session_info as written to session_info.json)"""
+
+    def ui_completion_marked(self, elapsed):
+        """LEGACY collection auto-marked complete after `elapsed` seconds"""
+
+    # =========================
+    # Storage
+    # =========================
+    def init_storage(self):
+        """Frame sink, encoders, catalog, retention and dedup"""
+        cfg = self.cfg
+
+        # Background frame writer (resize + encode off the main thread)
+        self.frame_sink = FrameSink(
+            workers=cfg.frame_sink_workers,
+            max_queue=cfg.frame_sink_queue_size,
+            policy=cfg.frame_sink_policy,
+            name="jetson2_sink"
+        )
+        self.frame_sink.start()
+        self.save_encoders = create_stream_encoders(
+            cfg.save_encoders,
+            CAMERA_STREAMS.values(),
+            default={'backend': 'opencv_jpeg', 'quality': cfg.jpeg_quality}
+        )
+
+        # Session catalog (indexes every written frame)
+        self.catalog = None
+        if cfg.catalog_enabled:
+            try:
+                self.catalog = SessionCatalog(cfg.catalog_path)
+                self.frame_sink.add_listener(self.catalog.on_frame_written)
+            except Exception as e:
+                print(f"[카탈로그] 초기화 실패: {e}")
+
+        # Disk retention (usage index fed by the frame sink, evicts in its own thread)
+        self.retention = None
+        if cfg.retention_enabled:
+            try:
+                action = '삭제 예정' if cfg.retention_dry_run else '삭제'
+                self.retention = RetentionManager(
+                    roots=[os.path.expanduser("~/AI_Data")],
+                    quota_bytes=int(cfg.retention_quota_gb * GB) if cfg.retention_quota_gb else None,
+                    min_free_bytes=int(cfg.retention_min_free_gb * GB),
+                    target_free_bytes=int(cfg.retention_target_free_gb * GB),
+                    check_interval=cfg.retention_check_interval,
+                    catalog=self.catalog,
+                    dry_run=cfg.retention_dry_run,
+                    on_evict=lambda u: print(f"[보관정책] {action}: {u.path} ({u.bytes / 1e6:.0f}MB, {u.priority_class})")
+                )
+                self.frame_sink.add_listener(self.retention.on_frame_written)
+                self.retention.start()
+            except Exception as e:
+                print(f"[보관정책] 초기화 실패: {e}")
+
+        # Near-duplicate suppression for POT collection
+        self.dedup = None
+        if cfg.dedup_enabled:
+            self.dedup = FrameDeduplicator(
+                threshold=cfg.dedup_threshold,
+                max_gap_sec=cfg.dedup_max_gap_sec,
+                share_window_sec=self.collection_interval if cfg.dedup_share_observe else 0
+            )
+            self.frame_sink.add_listener(self.dedup.on_frame_written)
+
+    def close_station(self):
+        """Stop collections (writes session_info.json), drain the frame sink, disconnect MQTT"""
+        print("[종료] 데이터 수집 중지 및 메타데이터 저장 중...")
+        try:
+            for pot in POT_CAMERAS:
+                if getattr(self, f"{pot}_collecting"):
+                    self._stop_pot_collection(pot)
+            if self.data_collection_active:
+                self.stop_data_collection()
+        except Exception as e:
+            print(f"[종료] 메타데이터 저장 오류: {e}")
+
+        if self.retention:
+            self.retention.stop()
+        print(f"[종료] 저장 대기 프레임 기록 중... ({self.frame_sink.queue_depth()}장)")
+        self.frame_sink.stop(drain=True, timeout=10.0)
+        print(f"[종료] 프레임 저장 통계: {self.frame_sink.get_stats()}")
+        if self.catalog:
+            self.catalog.close()
+
+        if self.mqtt_client:
+            try:
+                self.mqtt_client.disconnect()
+            except Exception:
+                pass
+
+    # =========================
+    # MQTT
+    # =========================
+    def init_mqtt(self):
+        """Initialize MQTT client, subscribe to robot PC topics and publish the AI mode"""
+        cfg = self.cfg
+        try:
+            # Offline publishes are stored on disk and forwarded after reconnect
+            self.mqtt_outbox = None
+            if cfg.mqtt_outbox_enabled:
+                self.mqtt_outbox = Outbox(cfg.mqtt_outbox_path, policies=cfg.mqtt_outbox_policies,
+                                          max_messages=cfg.mqtt_outbox_max_messages)
+                if self.mqtt_outbox.depth():
+                    print(f"[MQTT] 오프라인 큐: {self.mqtt_outbox.depth()}건 전송 대기")
+
+            self.mqtt_client = MQTTClient(
+                broker=cfg.mqtt_broker,
+                port=cfg.mqtt_port,
+                client_id=cfg.mqtt_client_id,
+                fast_json=cfg.mqtt_fast_json,
+                outbox=self.mqtt_outbox,
+                drain_rate=cfg.mqtt_outbox_drain_rate,
+                prefix_subscriptions=False,  # Robot PC topics are not prefixed
+                codecs=cfg.mqtt_codecs
+            )
+            # Device identity is serialized once; IP re-checked on reconnect
+            self.mqtt_envelope = DeviceEnvelope(cfg.device_id, cfg.device_name, cfg.device_location,
+                                                fast_json=cfg.mqtt_fast_json)
+            self.mqtt_client.add_connect_callback(self.mqtt_envelope.invalidate)
+            self.subscribe_topics()
+
+            self.mqtt_client.connect()
+            print(f"[MQTT] 연결 성공: {cfg.mqtt_broker}:{cfg.mqtt_port}")
+            print(f"[MQTT] Device: {cfg.device_id} ({cfg.device_name}) @ {get_ip_address()}")
+
+            # Publish AI mode status from config
+            ai_mode_status = "ON" if cfg.ai_mode_enabled else "OFF"
+            self.send_mqtt_message(cfg.topic_ai_mode, ai_mode_status)
+            print(f"[MQTT] AI 모드 발행: {ai_mode_status} (config: ai_mode_enabled={cfg.ai_mode_enabled})")
+        except Exception as e:
+            print(f"[MQTT] 연결 실패: {e}")
+            self.mqtt_client = None
+
+    def subscribe_topics(self):
+        """Subscribe to robot PC topics (temperatures, food type, control)"""
+        cfg = self.cfg
+        # Temperatures: parsed into the ingest queue, applied by apply_telemetry()
+        self.mqtt_client.subscribe(cfg.topic_pot1_oil_temp, self.telemetry.register("pot1_oil"))
+        self.mqtt_client.subscribe(cfg.topic_pot1_probe_temp, self.telemetry.register("pot1_probe"))
+        self.mqtt_client.subscribe(cfg.topic_pot2_oil_temp, self.telemetry.register("pot2_oil"))
+        self.mqtt_client.subscribe(cfg.topic_pot2_probe_temp, self.telemetry.register("pot2_probe"))
+
+        # Food type / control (LEGACY)
+        self.mqtt_client.subscribe(cfg.topic_food_type, self.on_food_type, decode="message")
+        self.mqtt_client.subscribe(cfg.topic_frying_control, self.on_frying_control, decode="message")
+
+        # POT1/POT2 food type / control
+        self.mqtt_client.subscribe(cfg.topic_pot1_food_type, self.on_frying_pot1_food_type, decode="message")
+        self.mqtt_client.subscribe(cfg.topic_pot1_control, self.on_frying_pot1_control, decode="message")
+        self.mqtt_client.subscribe(cfg.topic_pot2_food_type, self.on_frying_pot2_food_type, decode="message")
+        self.mqtt_client.subscribe(cfg.topic_pot2_control, self.on_frying_pot2_control, decode="message")
+
+    def send_mqtt_message(self, topic, message, include_device_info=True, outbox_policy=None):
+        """Send MQTT message with optional device info (queued while offline per outbox policy)"""
+        if self.mqtt_client and self.cfg.mqtt_enabled:
+            try:
+                if include_device_info:
+                    payload = self.mqtt_envelope.build(message)
+                else:
+                    payload = message
+
+                self.mqtt_client.publish(topic, payload, qos=self.cfg.mqtt_qos, outbox_policy=outbox_policy)
+            except Exception as e:
+                print(f"[MQTT] 전송 실패: {e}")
+
+    def publish_observe_state(self, side, state):
+        """Publish a basket state change (LEFT/RIGHT:FILLED|EMPTY|NO_BASKET)"""
+        self.send_mqtt_message(self.cfg.topic_observe, f"{side.upper()}:{state}")
+
+    def publish_mqtt_periodic(self):
+        """Publish current observe state every mqtt_publish_interval seconds (main loop tick)"""
+        if not self.mqtt_client or not self.cfg.mqtt_enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_mqtt_publish < self.cfg.mqtt_publish_interval:
+            return
+        self.last_mqtt_publish = now
+
+        try:
+            for side in ("left", "right"):
+                if self.observe_state[side] is not None:
+                    tag = side.upper()
+                    self.send_mqtt_message(self.cfg.topic_observe, f"{tag}:{self.observe_state[side]}",
+                                           outbox_policy=self.cfg.mqtt_periodic_policies[tag])
+        except Exception as e:
+            print(f"[MQTT 주기발행] 오류: {e}")
+
+    # =========================
+    # Temperature telemetry
+    # =========================
+    def _temp_entry(self, temp_type, key, value, timestamp):
+        """Build one temperature metadata entry"""
+        return {
+            "timestamp": timestamp,
+            "type": temp_type,
+            **key,
+            "value": value,
+            "unit": "celsius"
+        }
+
+    def apply_telemetry(self):
+        """Apply queued MQTT temperature samples in one batch (main thread)"""
+        target_probe_temp = self.cfg.target_probe_temp
+        records = self.telemetry.drain()
+        if records:
+            # UI/state: newest value per channel (coalesced)
+            self.oil_temp_left = self.telemetry.latest("pot1_oil", self.oil_temp_left)
+            self.probe_temp_left = self.telemetry.latest("pot1_probe", self.probe_temp_left)
+            self.oil_temp_right = self.telemetry.latest("pot2_oil", self.oil_temp_right)
+            self.probe_temp_right = self.telemetry.latest("pot2_probe", self.probe_temp_right)
+
+            # Session logs: every sample, stamped with its receive time
+            for rec in records:
+                temp_type, pot, position = TEMP_CHANNELS[rec.channel]
+                pot_collecting = self.pot1_collecting if pot == "pot1" else self.pot2_collecting
+                if not pot_collecting and not self.data_collection_active:
+                    continue
+                timestamp = format_timestamp(rec.ts)
+                if pot_collecting:
+                    pot_metadata = self.pot1_metadata if pot == "pot1" else self.pot2_metadata
+                    pot_metadata.append(self._temp_entry(temp_type, {"pot": pot}, rec.value, timestamp))
+                    if temp_type == "probe_temperature":
+                        self._check_pot_completion(pot, rec.value)
+                if self.data_collection_active:
+                    self.collection_metadata.append(self._temp_entry(temp_type, {"position": position}, rec.value, timestamp))
+                    if (temp_type == "probe_temperature" and not self.collection_completion_marked
+                            and rec.value >= target_probe_temp):
+                        self.mark_completion_auto(position, rec.value)
+
+        # Session logs reach disk every flush interval even when samples stop
+        for log in (self.pot1_metadata, self.pot2_metadata, self.collection_metadata):
+            if log is not None:
+                log.flush_if_due()
+
+        stats_interval = self.cfg.mqtt_ingest_stats_interval
+        if stats_interval > 0:
+            now = time.monotonic()
+            if now - self.telemetry_stats_time >= stats_interval:
+                self.telemetry_stats_time = now
+                summary = self.telemetry.format_stats()
+                if summary:
+                    print(f"[MQTT 수신] {summary}")
+
+    def _check_pot_completion(self, pot, probe_temp):
+        """Auto-mark POT completion when the probe reaches the target temperature"""
+        target_probe_temp = self.cfg.target_probe_temp
+        if getattr(self, f"{pot}_completion_marked") or probe_temp < target_probe_temp:
+            return
+        start_time = getattr(self, f"{pot}_start_time")
+        now = datetime.now()
+        print(f"[{pot.upper()}] 목표 온도 도달: {probe_temp}°C")
+        setattr(self, f"{pot}_completion_marked", True)
+        setattr(self, f"{pot}_completion_time", now)
+        setattr(self, f"{pot}_completion_info", {
+            "method": f"auto (probe_temp >= {target_probe_temp}°C)",
+            "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "probe_temp": probe_temp,
+            "oil_temp": self.oil_temp_left if pot == "pot1" else self.oil_temp_right,
+            "elapsed_time_sec": (now - start_time).total_seconds() if start_time else 0
+        })
+
+    def mark_completion_auto(self, position, probe_temp):
+        """Automatically mark LEGACY completion when probe temp reaches target"""
+        if not self.data_collection_active or self.collection_completion_marked:
+            return
+
+        elapsed = (datetime.now() - self.collection_start_time).total_seconds()
+        self.collection_completion_marked = True
+        self.collection_completion_time = datetime.now()
+        self.collection_completion_info = {
+            "method": "auto",
+            "trigger": f"probe_temp_{position}",
+            "trigger_value": probe_temp,
+            "timestamp": self.collection_completion_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "elapsed_time_sec": elapsed,
+            "frame_index": self.collection_frame_counter,
+            "oil_temp_left": self.oil_temp_left,
+            "oil_temp_right": self.oil_temp_right,
+            "probe_temp_left": self.probe_temp_left,
+            "probe_temp_right": self.probe_temp_right
+        }
+        self.ui_completion_marked(elapsed)
+
+        print(f"[완료마킹] 자동 마킹 ({position}): {elapsed:.1f}초")
+        print(f"[완료마킹] 탐침온도: {probe_temp}°C (목표: {self.cfg.target_probe_temp}°C)")
+
+    # =========================
+    # Robot PC commands
+    # =========================
+    def on_food_type(self, client, userdata, message):
+        """MQTT callback for food type - AUTO START collection (LEGACY)"""
+        try:
+            self.current_food_type = message.payload.decode()
+            print(f"[MQTT] 음식 종류 수신: {self.current_food_type}")
+
+            # AUTO START: If not collecting, start automatically
+            if not self.data_collection_active:
+                print(f"[MQTT] 자동 수집 시작 - 음식: {self.current_food_type}")
+                self.run_on_main(self.start_data_collection)
+            else:
+                # If already collecting, store as metadata event
+                self.collection_metadata.append({
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                    "type": "food_type_change",
+                    "value": self.current_food_type
+                })
+                print(f"[MQTT] 수집 중 음식 종류 변경: {self.current_food_type}")
+        except Exception as e:
+            print(f"[MQTT] 음식 종류 수신 오류: {e}")
+
+    def on_frying_control(self, client, userdata, message):
+        """MQTT callback for frying control commands - AUTO STOP (LEGACY)"""
+        try:
+            command = message.payload.decode().strip().lower()
+            print(f"[MQTT] 튀김 제어 명령 수신: {command}")
+
+            if command == "stop":
+                if self.data_collection_active:
+                    print("[MQTT] 자동 수집 중지")
+                    self.run_on_main(self.stop_data_collection)
+                else:
+                    print("[MQTT] 수집 중이 아님 - 무시")
+        except Exception as e:
+            print(f"[MQTT] 제어 명령 수신 오류: {e}")
+
+    def _on_pot_food_type(self, pot, message):
+        """POT food type - AUTO START collection, or log a change while collecting"""
+        tag = f"[MQTT {pot.upper()}]"
+        try:
+            food_type = message.payload.decode()
+            setattr(self, f"{pot}_food_type", food_type)
+            print(f"{tag} 음식 종류 수신: {food_type}")
+
+            if not getattr(self, f"{pot}_collecting"):
+                print(f"{tag} 자동 수집 시작 - 음식: {food_type}")
+                self.run_on_main(getattr(self, f"start_{pot}_collection"))
+            else:
+                # Store metadata event
+                getattr(self, f"{pot}_metadata").append({
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                    "type": "food_type_change",
+                    "value": food_type
+                })
+        except Exception as e:
+            print(f"{tag} 음식 종류 수신 오류: {e}")
+
+    def _on_pot_control(self, pot, message):
+        """POT control command - AUTO STOP collection"""
+        tag = f"[MQTT {pot.upper()}]"
+        try:
+            command = message.payload.decode().strip().lower()
+            print(f"{tag} 제어 명령 수신: {command}")
+
+            if command == "stop":
+                if getattr(self, f"{pot}_collecting"):
+                    print(f"{tag} 자동 수집 중지")
+                    self.run_on_main(getattr(self, f"stop_{pot}_collection"))
+                else:
+                    print(f"{tag} 수집 중이 아님 - 무시")
+        except Exception as e:
+            print(f"{tag} 제어 명령 수신 오류: {e}")
+
+    def on_frying_pot1_food_type(self, client, userdata, message):
+        """MQTT callback for pot1 food type - AUTO START collection"""
+        self._on_pot_food_type("pot1", message)
+
+    def on_frying_pot1_control(self, client, userdata, message):
+        """MQTT callback for pot1 control commands"""
+        self._on_pot_control("pot1", message)
+
+    def on_frying_pot2_food_type(self, client, userdata, message):
+        """MQTT callback for pot2 food type - AUTO START collection"""
+        self._on_pot_food_type("pot2", message)
+
+    def on_frying_pot2_control(self, client, userdata, message):
+        """MQTT callback for pot2 control commands"""
+        self._on_pot_control("pot2", message)
+
+    # =========================
+    # Data collection (main thread)
+    # =========================
+    def advance_collection(self, dt):
+        """Advance collection timers by dt seconds; save latest_frames when one is due"""
+        for pot in POT_CAMERAS:
+            if getattr(self, f"{pot}_collecting"):
+                timer = getattr(self, f"{pot}_timer") + dt
+                if timer >= self.collection_interval:
+                    timer = 0
+                    self.save_pot_data(pot)
+                setattr(self, f"{pot}_timer", timer)
+
+        # LEGACY: all cameras
+        if self.data_collection_active:
+            self.collection_timer += dt
+            if self.collection_timer >= self.collection_interval:
+                self.collection_timer = 0
+                self.save_collection_data()
+
+    def start_data_collection(self):
+        """Start LEGACY data collection (food_type from MQTT)"""
+        if self.current_food_type == "unknown":
+            print(f"[데이터수집] 음식 종류 미설정 - 시작 안 함 (Topic: {self.cfg.topic_food_type})")
+            self.ui_food_type_missing()
+            return
+
+        self.collection_session_id = datetime.now().strftime("session_%Y%m%d_%H%M%S")
+        self.collection_start_time = datetime.now()
+        self.collection_frame_counter = 0
+        self.collection_timer = 0
+
+        base_dir = os.path.expanduser("~/AI_Data")
+        self.frying_session_dir = os.path.join(base_dir, "FryingData", self.collection_session_id)
+        self.bucket_session_dir = os.path.join(base_dir, "BucketData", self.collection_session_id)
+        for cam_idx in [0, 1]:
+            os.makedirs(os.path.join(self.frying_session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
+        for cam_idx in [2, 3]:
+            os.makedirs(os.path.join(self.bucket_session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
+
+        # Reset completion flags
+        self.collection_completion_marked = False
+        self.collection_completion_time = None
+        self.collection_completion_info = {}
+
+        if self.catalog:
+            for dir_path in [self.frying_session_dir, self.bucket_session_dir]:
+                self.catalog.begin_session(dir_path, session_id=self.collection_session_id,
+                                           food_type=self.current_food_type, device_id=self.cfg.device_id)
+        if self.retention:
+            for dir_path in [self.frying_session_dir, self.bucket_session_dir]:
+                self.retention.begin_session(dir_path)
+
+        # Stream MQTT metadata to disk (open before setting the active flag)
+        self.collection_metadata = MetadataLog(os.path.join(self.frying_session_dir, METADATA_FILE),
+                                               flush_interval=self.cfg.metadata_flush_sec)
+        self.data_collection_active = True
+        self.ui_collection_started()
+
+        print(f"[데이터수집] 시작: {self.collection_session_id} ({self.current_food_type})")
+        print(f"[데이터수집] 저장 경로: {base_dir}/")
+
+    def stop_data_collection(self):
+        """Stop LEGACY data collection and write session_info.json"""
+        if not self.data_collection_active:
+            return
+
+        self.data_collection_active = False
+        duration = (datetime.now() - self.collection_start_time).total_seconds()
+
+        # Organize temperature data by time (streamed from the metadata log)
+        metadata = self.collection_metadata
+        metadata.close()
+        temperature_timeline = build_temperature_timeline(read_metadata_log(metadata.path))
+
+        session_info = {
+            "session_id": self.collection_session_id,
+            "food_type": self.current_food_type,
+            "start_time": self.collection_start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_sec": duration,
+            "collection_interval": self.collection_interval,
+            "completion_info": self.collection_completion_info if self.collection_completion_marked else None,
+            "completion_marked": self.collection_completion_marked,
+            "cameras_used": [0, 1, 2, 3],
+            "total_frames_saved": self.collection_frame_counter,
+            "camera_config": {
+                "resolution": {
+                    "width": self.cfg.raw.get("camera_width", 1280),
+                    "height": self.cfg.raw.get("camera_height", 720)
+                },
+                "fps": self.cfg.raw.get("camera_fps", 30)
+            },
+            "temperature_timeline": temperature_timeline,
+            "metadata_log": METADATA_FILE,
+            "metadata_count": len(metadata)
+        }
+
+        # Save to both directories (BucketData gets its own copy of the log)
+        shutil.copyfile(metadata.path, os.path.join(self.bucket_session_dir, METADATA_FILE))
+        for dir_path in [self.frying_session_dir, self.bucket_session_dir]:
+            info_path = os.path.join(dir_path, "session_info.json")
+            with open(info_path, 'w', encoding='utf-8') as f:
+                json.dump(session_info, f, indent=2, ensure_ascii=False)
+            if self.catalog:
+                self.catalog.ingest_session(dir_path)
+            if self.retention:
+                self.retention.end_session(dir_path, completed=self.collection_completion_marked)
+
+        print(f"[데이터수집] 종료: {self.collection_frame_counter}장 저장, {duration:.1f}초")
+        print(f"[데이터수집] 완료 마킹: {'예' if self.collection_completion_marked else '아니오'}")
+        print(f"[데이터수집] MQTT 메타데이터: {len(metadata)}개 수집")
+        self.ui_collection_stopped(session_info)
+
+        self.collection_session_id = None
+        self.collection_start_time = None
+        self.current_food_type = "unknown"
+
+    def _start_pot_collection(self, pot):
+        """Start POTn data collection - pot/session_id/food_type/camera_X"""
+        cfg = self.cfg
+        session_id = datetime.now().strftime("session_%Y%m%d_%H%M%S")
+        food_type = getattr(self, f"{pot}_food_type")
+        session_dir = os.path.join(os.path.expanduser("~/AI_Data/FryingData"), pot, session_id, food_type)
+        if cfg.storage_format == 'shards':
+            # Chunked tar shards + index instead of one file per frame
+            shard = ShardWriter(os.path.join(session_dir, "shards"), max_shard_bytes=cfg.shard_max_mb * 1024 * 1024)
+        else:
+            shard = None
+            for cam_idx in POT_CAMERAS[pot]:
+                os.makedirs(os.path.join(session_dir, f"camera_{cam_idx}"), mode=0o755, exist_ok=True)
+        setattr(self, f"{pot}_shard", shard)
+        if self.catalog:
+            self.catalog.begin_session(session_dir, session_id=session_id, food_type=food_type, pot=pot,
+                                       device_id=cfg.device_id, storage_format=cfg.storage_format)
+        if self.retention:
+            self.retention.begin_session(session_dir)
+        if self.dedup:
+            self.dedup.reset(pot)
+
+        setattr(self, f"{pot}_session_id", session_id)
+        setattr(self, f"{pot}_session_dir", session_dir)
+        setattr(self, f"{pot}_start_time", datetime.now())
+        setattr(self, f"{pot}_frame_counter", 0)
+        setattr(self, f"{pot}_timer", 0)
+        setattr(self, f"{pot}_completion_marked", False)
+        setattr(self, f"{pot}_completion_time", None)
+        setattr(self, f"{pot}_completion_info", {})
+        # Stream MQTT metadata to disk (open before setting the collecting flag)
+        setattr(self, f"{pot}_metadata", MetadataLog(os.path.join(session_dir, METADATA_FILE),
+                                                     flush_interval=cfg.metadata_flush_sec))
+        setattr(self, f"{pot}_collecting", True)
+
+        print(f"[{pot.upper()} 수집] 시작: {session_id} ({food_type}) -> {session_dir}")
+
+    def _stop_pot_collection(self, pot):
+        """Stop POTn data collection and write session_info.json"""
+        if not getattr(self, f"{pot}_collecting"):
+            return
+        setattr(self, f"{pot}_collecting", False)
+
+        session_dir = getattr(self, f"{pot}_session_dir")
+        start_time = getattr(self, f"{pot}_start_time")
+        duration = (datetime.now() - start_time).total_seconds()
+        metadata = getattr(self, f"{pot}_metadata")
+        metadata.close()
+        completion_marked = getattr(self, f"{pot}_completion_marked")
+        frame_counter = getattr(self, f"{pot}_frame_counter")
+
+        shard = getattr(self, f"{pot}_shard")
+        if shard is not None:
+            # Closed by the sink worker after this shard's queued frames are written (main thread never
+            # waits); the catalog re-reads the session then so late frames are counted
+            on_closed = None
+            if self.catalog:
+                on_closed = lambda: self.catalog.ingest_session(session_dir)
+            self.frame_sink.close_shard(shard, on_closed=on_closed)
+            setattr(self, f"{pot}_shard", None)
+
+        session_info = {
+            "pot": pot,
+            "session_id": getattr(self, f"{pot}_session_id"),
+            "food_type": getattr(self, f"{pot}_food_type"),
+            "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_sec": duration,
+            "collection_interval": self.collection_interval,
+            "completion_info": getattr(self, f"{pot}_completion_info") if completion_marked else None,
+            "completion_marked": completion_marked,
+            "cameras_used": POT_CAMERAS[pot],
+            "storage_format": "shards" if shard is not None else "files",
+            "total_frames_saved": frame_counter,
+            "dedup": self.dedup.get_stats(pot) if self.dedup else None,
+            "temperature_timeline": build_temperature_timeline(read_metadata_log(metadata.path), position_field=None),
+            "metadata_log": METADATA_FILE,
+            "metadata_count": len(metadata)
+        }
+
+        info_path = os.path.join(session_dir, "session_info.json")
+        with open(info_path, 'w', encoding='utf-8') as f:
+            json.dump(session_info, f, indent=2, ensure_ascii=False)
+        if self.catalog:
+            self.catalog.ingest_session(session_dir)
+        if self.retention:
+            self.retention.end_session(session_dir, completed=completion_marked)
+
+        print(f"[{pot.upper()} 수집] 종료: {frame_counter}장 저장, {duration:.1f}초")
+        if session_info["dedup"]:
+            d = session_info["dedup"]
+            print(f"[{pot.upper()} 수집] 중복제거: 건너뜀 {d['skipped']}장, 공유 {d['linked']}장, "
+                  f"약 {d['bytes_saved_est'] / 1e6:.1f}MB 절약")
+
+        setattr(self, f"{pot}_session_id", None)
+        setattr(self, f"{pot}_start_time", None)
+
+    def start_pot1_collection(self):
+        """Start POT1 data collection (cameras 0, 2, 3)"""
+        self._start_pot_collection("pot1")
+
+    def stop_pot1_collection(self):
+        """Stop POT1 data collection"""
+        self._stop_pot_collection("pot1")
+
+    def start_pot2_collection(self):
+        """Start POT2 data collection (cameras 1, 2, 3)"""
+        self._start_pot_collection("pot2")
+
+    def stop_pot2_collection(self):
+        """Stop POT2 data collection"""
+        self._stop_pot_collection("pot2")
+
+    def _submit_pot_frame(self, pot, cam_idx, frame, timestamp, session_dir, session_id, shard):
+        """Queue one POT frame (dedup: skip / hardlink shared observe frame / save). Returns True if stored"""
+        decision = self.dedup.check(cam_idx, frame, owner=pot, can_link=shard is None) if self.dedup else None
+        if decision is not None and decision.action == 'skip':
+            return False
+
+        # Resize (1920x1536 -> 1280x720) + encode in frame sink workers
+        encoder = self.save_encoders[CAMERA_STREAMS[cam_idx]]
+        name = f"camera_{cam_idx}/camera_{cam_idx}_{timestamp}{encoder.extension}"
+        # Shard mode: name is the member inside the session's shards
+        save_path = name if shard is not None else os.path.join(session_dir, name)
+        if decision is not None and decision.action == 'link':
+            # Observe frame already stored by the other pot: reference the same file
+            queued = self.frame_sink.submit_link(decision.link_path, save_path, session=session_id)
+        else:
+            queued = self.frame_sink.submit(save_path, frame, resize=(self.cfg.save_width, self.cfg.save_height),
+                                            encoder=encoder, session=session_id, shard=shard)
+        if queued and decision is not None:
+            self.dedup.saved(decision, save_path if shard is None else None)
+        return queued
+
+    def save_pot_data(self, pot):
+        """Save the latest POTn frames (its frying camera + both observe cameras)"""
+        if not getattr(self, f"{pot}_collecting"):
+            return
+
+        timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMss_mmm
+        session_dir = getattr(self, f"{pot}_session_dir")
+        session_id = getattr(self, f"{pot}_session_id")
+        shard = getattr(self, f"{pot}_shard")
+        counter = getattr(self, f"{pot}_frame_counter")
+        for cam_idx in POT_CAMERAS[pot]:
+            frame = self.latest_frames[CAMERA_STREAMS[cam_idx]]
+            if frame is not None and self._submit_pot_frame(pot, cam_idx, frame, timestamp,
+                                                            session_dir, session_id, shard):
+                counter += 1
+        setattr(self, f"{pot}_frame_counter", counter)
+
+        if counter % 10 == 0:
+            print(f"[{pot.upper()} 수집] {counter}장 저장됨")
+
+    def save_collection_data(self):
+        """Save the latest frames from all 4 cameras (LEGACY)"""
+        if not self.data_collection_active:
+            return
+
+        timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMss_mmm
+        for cam_idx, name in CAMERA_STREAMS.items():
+            frame = self.latest_frames[name]
+            if frame is not None:
+                # Frying cameras (0, 1) -> FryingData, bucket cameras (2, 3) -> BucketData
+                base_dir = self.frying_session_dir if cam_idx < 2 else self.bucket_session_dir
+                encoder = self.save_encoders[name]
+                save_path = os.path.join(base_dir, f"camera_{cam_idx}", f"cam{cam_idx}_{timestamp}{encoder.extension}")
+                self.frame_sink.submit(save_path, frame, resize=(self.cfg.save_width, self.cfg.save_height),
+                                       encoder=encoder, session=self.collection_session_id)
+
+        self.collection_frame_counter += 1
+        if self.collection_frame_counter % 10 == 0:
+            print(f"[데이터수집] {self.collection_frame_counter}장 저장됨")
+            self.ui_collection_progress()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MJPEG Preview Server (headless 모드용 카메라 미리보기)
+
+- 로컬 HTTP로 카메라별 MJPEG 스트림 제공 (브라우저에서 바로 확인)
+- 프레임당 카메라별 JPEG 인코딩은 최대 1회 (접속자 수와 무관하게 공유)
+- 접속자가 없으면 인코딩하지 않음 (update_frame 즉시 반환)
+
+Endpoints:
+    /                     스트림 목록 (HTML)
+    /stream/<name>        multipart/x-mixed-replace MJPEG 스트림
+    /snapshot/<name>      다음 프레임 1장 (image/jpeg)
+    /stats                스트림별 통계 (JSON)
+"""
+
+import cv2
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _PreviewStream:
+    """카메라 1대의 최신 프레임과 공유 JPEG 캐시"""
+
+    def __init__(self, name):
+        self.name = name
+        self.cond = threading.Condition()
+        self.encode_lock = threading.Lock()
+
+        # Latest raw frame (producer side)
+        self.frame = None
+        self.seq = 0
+
+        # Shared encoded JPEG (consumer side)
+        self.jpeg = None
+        self.jpeg_seq = 0
+
+        # Stats
+        self.clients = 0
+        self.frames_in = 0
+        self.frames_skipped = 0
+        self.encode_count = 0
+        self.encode_ms_total = 0.0
+
+    def add_client(self):
+        with self.cond:
+            self.clients += 1
+
+    def remove_client(self):
+        with self.cond:
+            self.clients = max(0, self.clients - 1)
+            if self.clients == 0:
+                # 접속자 없으면 프레임 참조 해제 (메모리 반환)
+                self.frame = None
+
+    def update(self, frame):
+        """Producer: 최신 프레임 참조만 교체 (인코딩 없음)"""
+        with self.cond:
+            if self.clients == 0:
+                self.frames_skipped += 1
+                return False
+            self.frame = frame
+            self.seq += 1
+            self.frames_in += 1
+            self.cond.notify_all()
+            return True
+
+    def wait_jpeg(self, after_seq, width, height, quality, timeout=2.0):
+        """
+        Consumer: after_seq 이후의 새 프레임을 JPEG로 받기
+
+        같은 프레임은 첫 번째로 요청한 클라이언트만 인코딩하고
+        나머지 클라이언트는 캐시된 바이트를 그대로 사용한다.
+
+        Returns:
+            (jpeg_bytes, seq) 또는 타임아웃 시 (None, after_seq)
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq and self.frame is not None, timeout):
+                return None, after_seq
+            frame = self.frame
+            seq = self.seq
+
+        with self.encode_lock:
+            if self.jpeg_seq < seq:
+                t0 = time.perf_counter()
+                if width and height and (frame.shape[1], frame.shape[0]) != (width, height):
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_NEAREST)
+                ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                if ok:
+                    self.jpeg = buf.tobytes()
+                    self.jpeg_seq = seq
+                    self.encode_count += 1
+                    self.encode_ms_total += (time.perf_counter() - t0) * 1000.0
+            return self.jpeg, self.jpeg_seq
+
+    def stats(self):
+        avg_ms = self.encode_ms_total / self.encode_count if self.encode_count else 0.0
+        return {
+            "clients": self.clients,
+            "frames_in": self.frames_in,
+            "frames_skipped_no_client": self.frames_skipped,
+            "encodes": self.encode_count,
+            "avg_encode_ms": round(avg_ms, 2),
+            "last_jpeg_bytes": len(self.jpeg) if self.jpeg else 0,
+        }
+
+
+class MJPEGPreviewServer:
+    """
+    카메라 미리보기용 MJPEG HTTP 서버
+
+    Example:
+        preview = MJPEGPreviewServer(port=8080, streams=["frying_left", "observe_left"])
+        preview.start()
+        ...
+        if preview.has_clients("frying_left"):
+            preview.update_frame("frying_left", vis)
+        ...
+        preview.stop()
+    """
+
+    BOUNDARY = "frame"
+
+    def __init__(self, host="127.0.0.1", port=8080, streams=None,
+                 width=None, height=None, quality=70, max_fps=15):
+        """
+        Args:
+            host: 바인드 주소 (기본 127.0.0.1 = 로컬 전용, LAN 공개는 "0.0.0.0")
+            port: HTTP 포트
+            streams: 스트림 이름 목록 (update_frame 시 자동 추가도 가능)
+            width, height: 미리보기 해상도 (None이면 원본 크기)
+            quality: 미리보기 JPEG 품질
+            max_fps: 클라이언트당 최대 전송 FPS
+        """
+        self.host = host
+        self.port = port
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+
+        self._streams = {}
+        self._streams_lock = threading.Lock()
+        for name in streams or []:
+            self._get_stream(name)
+
+        self._httpd = None
+        self._thread = None
+        self.running = False
+
+    def _get_stream(self, name, create=True):
+        with self._streams_lock:
+            stream = self._streams.get(name)
+            if stream is None and create:
+                stream = _PreviewStream(name)
+                self._streams[name] = stream
+            return stream
+
+    # =========================
+    # Producer API
+    # =========================
+    def has_clients(self, name):
+        """해당 스트림에 접속자가 있는지 (오버레이 그리기 생략 판단용)"""
+        stream = self._get_stream(name, create=False)
+        return stream is not None and stream.clients > 0
+
+    def update_frame(self, name, frame):
+        """
+        최신 프레임 전달 (BGR numpy array)
+
+        접속자가 없으면 아무 작업도 하지 않는다. 전달한 배열은
+        이후 수정하지 말 것 (복사 없이 참조만 보관).
+        """
+        if frame is None:
+            return False
+        return self._get_stream(name).update(frame)
+
+    def get_stats(self):
+        with self._streams_lock:
+            streams = list(self._streams.values())
+        return {s.name: s.stats() for s in streams}
+
+    # =========================
+    # Server lifecycle
+    # =========================
+    def start(self):
+        """백그라운드 스레드에서 HTTP 서버 시작"""
+        if self.running:
+            return True
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+            self._httpd.daemon_threads = True
+        except OSError as e:
+            print(f"[미리보기] 서버 시작 실패 ({self.host}:{self.port}): {e}")
+            return False
+
+        self.running = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"[미리보기] MJPEG 서버 시작: http://{self.host}:{self.port}/")
+        return True
+
+    def stop(self):
+        """서버 종료 (스트리밍 중인 클라이언트도 종료됨)"""
+        if not self.running:
+            return
+        self.running = False
+        with self._streams_lock:
+            streams = list(self._streams.values())
+        for stream in streams:
+            with stream.cond:
+                stream.cond.notify_all()
+        try:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        except Exception as e:
+            print(f"[미리보기] 서버 종료 오류: {e}")
+        print("[미리보기] MJPEG 서버 종료")
+
+    # =========================
+    # HTTP handler
+    # =========================
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # 요청마다 로그 출력하지 않음
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0].rstrip('/')
+                if path == "":
+                    self._send_index()
+                elif path == "/stats":
+                    self._send_bytes(json.dumps(server.get_stats(), indent=2).encode(), "application/json")
+                elif path.startswith("/stream/"):
+                    self._send_stream(path[len("/stream/"):])
+                elif path.startswith("/snapshot/"):
+                    self._send_snapshot(path[len("/snapshot/"):])
+                else:
+                    self.send_error(404)
+
+            def _send_bytes(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_index(self):
+                with server._streams_lock:
+                    names = sorted(server._streams)
+                items = "".join(
+                    f'<div style="display:inline-block;margin:4px"><div>{n}</div>'
+                    f'<img src="/stream/{n}"></div>' for n in names
+                )
+                body = f"<html><head><title>Jetson Preview</title></head><body>{items}</body></html>"
+                self._send_bytes(body.encode("utf-8"), "text/html; charset=utf-8")
+
+            def _send_snapshot(self, name):
+                stream = server._get_stream(name, create=False)
+                if stream is None:
+                    self.send_error(404)
+                    return
+                stream.add_client()
+                try:
+                    jpeg, _ = stream.wait_jpeg(stream.seq, server.width, server.height, server.quality)
+                finally:
+                    stream.remove_client()
+                if jpeg is None:
+                    self.send_error(503, "No frame available")
+                    return
+                self._send_bytes(jpeg, "image/jpeg")
+
+            def _send_stream(self, name):
+                stream = server._get_stream(name, create=False)
+                if stream is None:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={server.BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                stream.add_client()
+                last_seq = stream.seq
+                try:
+                    while server.running:
+                        t0 = time.monotonic()
+                        jpeg, seq = stream.wait_jpeg(last_seq, server.width, server.height, server.quality)
+                        if jpeg is None or seq <= last_seq:
+                            continue
+                        last_seq = seq
+                        self.wfile.write(
+                            f"--{server.BOUNDARY}\r\n"
+                            f"Content-Type: image/jpeg\r\n"
+                            f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                        )
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+
+                        # 클라이언트당 FPS 제한
+                        remain = server.min_interval - (time.monotonic() - t0)
+                        if remain > 0:
+                            time.sleep(remain)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    stream.remove_client()
+
+        return Handler
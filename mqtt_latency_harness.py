@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+MQTT 지연/처리량 측정 하네스 (네트워크/브로커/카메라 불필요)
+
+내장 브로커(src/communication/local_broker.py)를 localhost 에 띄우고,
+로봇 PC 의 명령/온도 메시지를 설정한 주기로 재생하면서
+Jetson1 (JETSON1_INTEGRATED.py), Jetson2 키오스크 (JETSON2_INTEGRATED.py),
+Jetson2 헤드리스 (JETSON2_HEADLESS.py) 의 실제 init_mqtt() / on_* 핸들러 /
+apply_telemetry() 를 GUI 없이 구동합니다.
+
+측정 항목:
+  - 발행 -> 핸들러 완료 지연 (p50/p95/p99/max, 토픽별)
+  - 누락 메시지 (발행 수 - 핸들러 처리 수)
+  - 프로세스 CPU 시간 / 1000 메시지
+
+사용법:
+  python3 mqtt_latency_harness.py                         # 기본 20초
+  python3 mqtt_latency_harness.py --duration 60 --temp-hz 50
+  python3 mqtt_latency_harness.py --max-p99-ms 50 --json result.json   # CI
+
+종료 코드: 누락 > 0 또는 p99 > --max-p99-ms 이면 1
+
+참고:
+  - 카메라/GPIO/GUI/AI 모듈(cv2, PIL, ultralytics, torch, gi, Jetson.GPIO,
+    tkinter)이 설치되어 있지 않으면 import 용 대체 모듈을 넣습니다.
+    MQTT 경로(src.communication)는 항상 실제 코드입니다.
+  - 녹화/수집 시작·종료, 진동 체크는 상태 플래그만 바꾸는 함수로 대체합니다
+    (카메라, 서브프로세스 없음). Jetson2 세션 메타데이터는 임시 디렉터리의
+    MetadataLog 에 기록하고 종료 시 삭제합니다.
+  - 앱 출력은 각 앱 모듈의 print 만 대체해서 숨깁니다 (sys.stdout 은 그대로,
+    --verbose 로 표시).
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import importlib.util
+from collections import defaultdict, deque
+from queue import Queue, Empty
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import paho.mqtt.client as mqtt
+
+from src.communication.local_broker import LocalBroker
+from src.communication.ingest import IngestQueue
+
+JETSON1_DIR = os.path.join(ROOT, "jetson1_monitoring")
+JETSON2_DIR = os.path.join(ROOT, "jetson2_frying_ai")
+
+# 설치되어 있지 않을 때만 대체하는 하드웨어/GUI/AI 모듈 (top-level -> submodules)
+PLACEHOLDER_MODULES = {
+    "cv2": [],
+    "PIL": ["Image", "ImageTk"],
+    "ultralytics": [],
+    "torch": [],
+    "gi": ["repository"],
+    "Jetson": ["GPIO"],
+    "tkinter": ["ttk", "messagebox"],
+}
+
+
+# =========================
+# Headless app import
+# =========================
+def install_placeholders():
+    """Insert placeholder modules for missing hardware/GUI/AI packages"""
+    installed = []
+    for name, subs in PLACEHOLDER_MODULES.items():
+        if name in sys.modules or importlib.util.find_spec(name) is not None:
+            continue
+        module = mock.MagicMock(name=name)
+        if name == "torch":
+            module.cuda.is_available.return_value = False
+        sys.modules[name] = module
+        for sub in subs:
+            sys.modules[f"{name}.{sub}"] = getattr(module, sub)
+        installed.append(name)
+    return installed
+
+
+def _discard(*args, **kwargs):
+    """print() replacement for silenced app modules"""
+
+
+def load_app_module(name, path, argv=None, cwd=None, silent=True):
+    """Import an app script as a module without running its main()
+
+    silent: shadow print() in the module globals, and in helper modules it
+    imports from its own directory (e.g. frying_station.py). Handlers print on
+    every message; sys.stdout is process-wide and shared with the MQTT/main
+    loop threads, so it is never swapped.
+    """
+    saved_argv, saved_cwd = sys.argv, os.getcwd()
+    app_dir = os.path.dirname(path)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    sys.argv = [path] + list(argv or [])
+    try:
+        if cwd:
+            os.chdir(cwd)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        if silent:
+            module.print = _discard
+        spec.loader.exec_module(module)
+        if silent:
+            for helper in list(sys.modules.values()):
+                helper_file = getattr(helper, "__file__", None) or ""
+                if os.path.dirname(os.path.abspath(helper_file)) == app_dir:
+                    helper.print = _discard
+        return module
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+
+
+def configure_mqtt(module, port, client_id):
+    """Point the app's MQTT settings at the local broker"""
+    settings = getattr(module, "settings", None)
+    if settings is not None:
+        # Jetson2: StationConfig read by the shared FryingStation
+        settings.mqtt_enabled = True
+        settings.mqtt_broker = "127.0.0.1"
+        settings.mqtt_port = port
+        settings.mqtt_client_id = client_id
+        settings.mqtt_outbox_enabled = False
+        settings.mqtt_ingest_stats_interval = 0  # no periodic [MQTT 수신] log
+        return
+    module.MQTT_ENABLED = True
+    module.MQTT_BROKER = "127.0.0.1"
+    module.MQTT_PORT = port
+    module.MQTT_CLIENT_ID = client_id
+    module.MQTT_OUTBOX_ENABLED = False
+
+
+class _TkRoot:
+    """root.after(0, fn) -> main loop queue (replaces the Tk event loop)"""
+
+    def __init__(self, actions):
+        self.actions = actions
+
+    def after(self, ms, fn=None, *args):
+        if fn is not None:
+            self.actions.put(lambda: fn(*args))
+
+
+def build_jetson1(module, actions):
+    """IntegratedMonitorApp with only the state its MQTT handlers touch"""
+    app = object.__new__(module.IntegratedMonitorApp)
+    app.root = _TkRoot(actions)
+    app.auto_mqtt_label = mock.MagicMock()
+    app.system_info = module.SystemInfo(device_name=module.DEVICE_NAME, location=module.DEVICE_LOCATION)
+    app.mqtt_client = None
+    app.mqtt_outbox = None
+    app.vibration_checking = False
+    for pot in ("pot1", "pot2"):
+        setattr(app, f"stirfry_{pot}_recording", False)
+        setattr(app, f"stirfry_{pot}_food_type", "unknown")
+        setattr(app, f"stirfry_{pot}_metadata", [])
+
+    def recorder(pot, active):
+        def action():
+            setattr(app, f"stirfry_{pot}_recording", active)
+            if active:
+                setattr(app, f"stirfry_{pot}_metadata", [])
+        return action
+
+    app.start_stirfry_pot1_recording = recorder("pot1", True)
+    app.stop_stirfry_pot1_recording = recorder("pot1", False)
+    app.start_stirfry_pot2_recording = recorder("pot2", True)
+    app.stop_stirfry_pot2_recording = recorder("pot2", False)
+    app.start_vibration_check = lambda: setattr(app, "vibration_checking", True)
+    app.stop_vibration_check = lambda: setattr(app, "vibration_checking", False)
+    return app
+
+
+def _init_frying_state(app, module, metadata_dir):
+    """Collection/temperature state shared by the Jetson2 kiosk and headless apps
+
+    Sessions write metadata to real MetadataLog files under metadata_dir.
+    """
+    station = sys.modules[module.FryingStation.__module__]  # frying_station.py (MetadataLog, datetime)
+    app.cfg = module.settings
+    app.telemetry = IngestQueue()
+    app.telemetry_stats_time = time.monotonic()
+    app.mqtt_client = None
+    app.mqtt_outbox = None
+    app.last_mqtt_publish = 0.0
+    app.oil_temp_left = app.oil_temp_right = 0.0
+    app.probe_temp_left = app.probe_temp_right = 0.0
+    app.current_food_type = "unknown"
+    app.data_collection_active = False
+    app.collection_metadata = None
+    app.collection_completion_marked = False
+    for pot in ("pot1", "pot2"):
+        setattr(app, f"{pot}_collecting", False)
+        setattr(app, f"{pot}_food_type", "unknown")
+        setattr(app, f"{pot}_metadata", None)
+        setattr(app, f"{pot}_start_time", None)
+        setattr(app, f"{pot}_completion_marked", False)
+        setattr(app, f"{pot}_completion_time", None)
+        setattr(app, f"{pot}_completion_info", {})
+
+    def collector(pot, active):
+        def action():
+            setattr(app, f"{pot}_collecting", active)
+            if active:
+                setattr(app, f"{pot}_metadata", station.MetadataLog(os.path.join(metadata_dir, f"{pot}.jsonl")))
+                setattr(app, f"{pot}_start_time", station.datetime.now())
+                setattr(app, f"{pot}_completion_marked", False)
+            elif getattr(app, f"{pot}_metadata") is not None:
+                getattr(app, f"{pot}_metadata").close()
+        return action
+
+    def legacy(active):
+        def action():
+            app.data_collection_active = active
+            if active:
+                app.collection_metadata = station.MetadataLog(os.path.join(metadata_dir, "collection.jsonl"))
+                app.collection_completion_marked = False
+            elif app.collection_metadata is not None:
+                app.collection_metadata.close()
+        return action
+
+    app.start_pot1_collection = collector("pot1", True)
+    app.stop_pot1_collection = collector("pot1", False)
+    app.start_pot2_collection = collector("pot2", True)
+    app.stop_pot2_collection = collector("pot2", False)
+    app.start_data_collection = legacy(True)
+    app.stop_data_collection = legacy(False)
+    app.mark_completion_auto = lambda position, probe_temp: setattr(app, "collection_completion_marked", True)
+    return app
+
+
+def build_jetson2_kiosk(module, actions, metadata_dir):
+    """JetsonIntegratedApp (Tk kiosk) with only the state its MQTT handlers touch"""
+    app = object.__new__(module.JetsonIntegratedApp)
+    app.root = _TkRoot(actions)
+    _init_frying_state(app, module, metadata_dir)
+    app.vibration_checking = False
+    app.start_vibration_check = lambda: setattr(app, "vibration_checking", True)
+    app.stop_vibration_check = lambda: setattr(app, "vibration_checking", False)
+    return app
+
+
+def build_jetson2_headless(module, metadata_dir):
+    """HeadlessFryingStation with only the state its MQTT handlers touch"""
+    app = object.__new__(module.HeadlessFryingStation)
+    app.pending_actions = Queue()
+    return _init_frying_state(app, module, metadata_dir)
+
+
+# =========================
+# Measurement
+# =========================
+class LatencyProbe:
+    """Publish timestamps per (app, topic) -> handler completion latency"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(deque)     # (app, topic) -> publish times (FIFO, QoS 1 keeps order)
+        self.latencies = defaultdict(list)    # (app, topic) -> seconds
+        self.published = defaultdict(int)
+        self.delivered = defaultdict(int)
+        self.routers = {}
+
+    def attach(self, name, mqtt_client):
+        """Wrap every route handler of an app's MQTTClient"""
+        router = mqtt_client.router
+        self.routers[name] = router
+        for routes in list(router._filters.values()):
+            for route in routes:
+                route.handler = self._wrap(name, route.handler)
+
+    def _wrap(self, name, handler):
+        def timed(*args):
+            try:
+                return handler(*args)
+            finally:
+                done = time.perf_counter()
+                topic = args[2].topic if len(args) == 3 else args[0]
+                key = (name, topic)
+                with self.lock:
+                    if self.pending[key]:
+                        self.latencies[key].append(done - self.pending[key].popleft())
+                        self.delivered[key] += 1
+        return timed
+
+    def before_publish(self, topic):
+        """Record a publish for every app subscribed to the topic"""
+        now = time.perf_counter()
+        with self.lock:
+            for name, router in self.routers.items():
+                if router.match(topic):
+                    self.pending[(name, topic)].append(now)
+                    self.published[(name, topic)] += 1
+
+    def outstanding(self):
+        with self.lock:
+            return sum(len(q) for q in self.pending.values())
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def robot_schedule(args):
+    """Robot PC traffic: [(offset_sec, topic, payload)] sorted by time"""
+    events = []
+    temps = ["frying/pot1/oil_temp", "frying/pot1/probe_temp",
+             "frying/pot2/oil_temp", "frying/pot2/probe_temp"]
+    if args.temp_hz > 0:
+        n = int(args.duration * args.temp_hz)
+        for k in range(n):
+            t = k / args.temp_hz
+            for i, topic in enumerate(temps):
+                base = 170.0 if "oil" in topic else 20.0 + 60.0 * t / args.duration
+                events.append((t + i * 0.001, topic, f"{base + (k % 7) * 0.1:.1f}"))
+
+    # Commands: start -> change food -> stop, alternating pots
+    commands = [
+        ("frying/pot1/food_type", "chicken"), ("frying/pot2/food_type", "potato"),
+        ("stirfry/pot1/food_type", "rice"), ("stirfry/pot2/food_type", "noodle"),
+        ("frying/food_type", "chicken"), ("calibration/vibration/control", '{"command": "start"}'),
+        ("frying/pot1/food_type", "shrimp"), ("stirfry/pot1/food_type", "kimchi"),
+        ("frying/pot1/control", "stop"), ("frying/pot2/control", "stop"),
+        ("stirfry/pot1/control", "stop"), ("stirfry/pot2/control", "stop"),
+        ("frying/control", "stop"), ("calibration/vibration/control", "STOP"),
+    ]
+    if args.command_interval > 0:
+        k = 0
+        t = args.command_interval / 2
+        while t < args.duration:
+            topic, payload = commands[k % len(commands)]
+            events.append((t, topic, payload))
+            k += 1
+            t += args.command_interval
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def run(args):
+    placeholders = install_placeholders()
+    if placeholders:
+        print(f"[하네스] 대체 모듈: {', '.join(placeholders)}")
+
+    broker = LocalBroker()
+    port = broker.start()
+    print(f"[하네스] 내장 브로커: 127.0.0.1:{port}")
+
+    # Main loop stand-in: Tk root.after() / HEADLESS tick()
+    silent = not args.verbose
+    jetson1_actions = Queue()
+    kiosk_actions = Queue()
+    jetson1_mod = load_app_module("jetson1_integrated_app", os.path.join(JETSON1_DIR, "JETSON1_INTEGRATED.py"),
+                                  cwd=JETSON1_DIR, silent=silent)
+    kiosk_mod = load_app_module("jetson2_integrated_app", os.path.join(JETSON2_DIR, "JETSON2_INTEGRATED.py"),
+                                silent=silent)
+    headless_mod = load_app_module("jetson2_headless_app", os.path.join(JETSON2_DIR, "JETSON2_HEADLESS.py"),
+                                   argv=["--no-preview"], silent=silent)
+    configure_mqtt(jetson1_mod, port, f"harness_jetson1_{os.getpid()}")
+    configure_mqtt(kiosk_mod, port, f"harness_jetson2_{os.getpid()}")
+    configure_mqtt(headless_mod, port, f"harness_headless_{os.getpid()}")
+
+    jetson1 = build_jetson1(jetson1_mod, jetson1_actions)
+    metadata_dir = tempfile.mkdtemp(prefix="mqtt_harness_")
+    kiosk = build_jetson2_kiosk(kiosk_mod, kiosk_actions, os.path.join(metadata_dir, "jetson2"))
+    headless = build_jetson2_headless(headless_mod, os.path.join(metadata_dir, "headless"))
+    apps = {"jetson1": jetson1, "jetson2": kiosk, "headless": headless}
+    for app in apps.values():
+        app.init_mqtt()
+    failed_apps = [name for name, app in apps.items() if app.mqtt_client is None]
+    if failed_apps:
+        print(f"[하네스] MQTT 초기화 실패: {', '.join(failed_apps)}")
+        broker.stop()
+        shutil.rmtree(metadata_dir, ignore_errors=True)
+        return 1
+    # Jetson2 connect() is non-blocking
+    deadline = time.monotonic() + 5.0
+    while (not all(app.mqtt_client.is_connected() for app in apps.values())
+           and time.monotonic() < deadline):
+        time.sleep(0.01)
+
+    probe = LatencyProbe()
+    for name, app in apps.items():
+        probe.attach(name, app.mqtt_client)
+
+    robot = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=f"harness_robot_{os.getpid()}")
+    robot.connect("127.0.0.1", port)
+    robot.loop_start()
+    time.sleep(0.3)  # SUBSCRIBE 완료 대기
+
+    stop = threading.Event()
+    tick_errors = []
+
+    def main_loop():
+        while not stop.is_set():
+            for actions in (jetson1_actions, kiosk_actions, headless.pending_actions):
+                while True:
+                    try:
+                        action = actions.get_nowait()
+                    except Empty:
+                        break
+                    try:
+                        action()
+                    except Exception as e:
+                        tick_errors.append(repr(e))
+            for app in (kiosk, headless):
+                try:
+                    app.apply_telemetry()
+                except Exception as e:
+                    tick_errors.append(repr(e))
+            time.sleep(args.tick_ms / 1000.0)
+
+    loop = threading.Thread(target=main_loop, name="HarnessMainLoop", daemon=True)
+    loop.start()
+
+    events = robot_schedule(args)
+    print(f"[하네스] 재생: {len(events)}건 / {args.duration:.0f}초 "
+          f"(온도 {args.temp_hz:g}Hz x4, 명령 {args.command_interval:g}초 간격)")
+
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    for offset, topic, payload in events:
+        delay = wall0 + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        probe.before_publish(topic)
+        robot.publish(topic, payload, qos=args.qos)
+
+    # Drain: wait for in-flight messages
+    deadline = time.monotonic() + args.drain_timeout
+    while probe.outstanding() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+
+    stop.set()
+    loop.join(timeout=2.0)
+    router_stats = {name: r.get_stats() for name, r in probe.routers.items()}
+    robot.loop_stop()
+    robot.disconnect()
+    for app in apps.values():
+        app.mqtt_client.disconnect()
+    broker.stop()
+    shutil.rmtree(metadata_dir, ignore_errors=True)
+
+    # Report
+    rows = []
+    for key in sorted(probe.published):
+        lat_ms = [v * 1000 for v in probe.latencies[key]]
+        rows.append({
+            "app": key[0], "topic": key[1],
+            "published": probe.published[key], "delivered": probe.delivered[key],
+            "dropped": probe.published[key] - probe.delivered[key],
+            "p50_ms": round(percentile(lat_ms, 50), 3), "p95_ms": round(percentile(lat_ms, 95), 3),
+            "p99_ms": round(percentile(lat_ms, 99), 3), "max_ms": round(max(lat_ms, default=0.0), 3),
+        })
+    all_ms = [v * 1000 for vals in probe.latencies.values() for v in vals]
+    total_pub = sum(probe.published.values())
+    total_drop = sum(r["dropped"] for r in rows)
+    summary = {
+        "messages": total_pub,
+        "delivered": total_pub - total_drop,
+        "dropped": total_drop,
+        "p50_ms": round(percentile(all_ms, 50), 3),
+        "p95_ms": round(percentile(all_ms, 95), 3),
+        "p99_ms": round(percentile(all_ms, 99), 3),
+        "max_ms": round(max(all_ms, default=0.0), 3),
+        "wall_sec": round(wall, 2),
+        "cpu_sec": round(cpu, 3),
+        "cpu_ms_per_1k": round(cpu / total_pub * 1e6, 1) if total_pub else 0.0,
+        "broker": {"received": broker.received, "delivered": broker.delivered, "failed": broker.failed},
+        "tick_errors": tick_errors[:10],
+        "state": {
+            "jetson1_pot1_recording": jetson1.stirfry_pot1_recording,
+            "jetson1_vibration": jetson1.vibration_checking,
+            "jetson2_pot1_collecting": kiosk.pot1_collecting,
+            "jetson2_vibration": kiosk.vibration_checking,
+            "jetson2_telemetry": kiosk.telemetry.get_stats(reset=False),
+            "headless_pot1_collecting": headless.pot1_collecting,
+            "headless_telemetry": headless.telemetry.get_stats(reset=False),
+        },
+    }
+
+    print()
+    print(f"{'app':8s} {'topic':32s} {'pub':>6s} {'drop':>5s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}  (ms)")
+    for r in rows:
+        print(f"{r['app']:8s} {r['topic']:32s} {r['published']:6d} {r['dropped']:5d} "
+              f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['max_ms']:8.2f}")
+    print()
+    print(f"[결과] 메시지 {total_pub}건, 누락 {total_drop}건, "
+          f"지연 p50 {summary['p50_ms']:.2f}ms / p95 {summary['p95_ms']:.2f}ms / p99 {summary['p99_ms']:.2f}ms")
+    print(f"[결과] CPU {summary['cpu_sec']:.2f}s / {summary['wall_sec']:.1f}s "
+          f"-> {summary['cpu_ms_per_1k']:.1f} ms CPU / 1000 메시지 (브로커+클라이언트+핸들러, 단일 프로세스)")
+    for name, stats in router_stats.items():
+        busy = sum(h["calls"] * h["avg_ms"] for h in stats["handlers"])
+        print(f"[결과] {name} 핸들러 실행 시간 합계: {busy:.1f} ms")
+    if tick_errors:
+        print(f"[경고] 메인 루프 오류 {len(tick_errors)}건: {tick_errors[0]}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "topics": rows, "router": router_stats}, f, indent=2, ensure_ascii=False)
+        print(f"[하네스] 결과 저장: {args.json}")
+
+    failed = total_drop > 0 or bool(tick_errors)
+    if args.max_p99_ms is not None and summary["p99_ms"] > args.max_p99_ms:
+        print(f"[실패] p99 {summary['p99_ms']:.2f}ms > {args.max_p99_ms}ms")
+        failed = True
+    if total_drop:
+        print(f"[실패] 누락 메시지 {total_drop}건")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MQTT publish->handler latency harness (local broker, headless apps)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Replay length (s)")
+    parser.add_argument("--temp-hz", type=float, default=10.0, help="Temperature rate per channel (Hz, 4 channels)")
+    parser.add_argument("--command-interval", type=float, default=0.5, help="Seconds between Robot PC commands (0 = none)")
+    parser.add_argument("--qos", type=int, default=1, choices=[0, 1], help="Robot PC publish QoS")
+    parser.add_argument("--tick-ms", type=float, default=33.0, help="Main loop tick (ms)")
+    parser.add_argument("--drain-timeout", type=float, default=5.0, help="Wait for in-flight messages (s)")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail if overall p99 exceeds this")
+    parser.add_argument("--json", default=None, help="Write results to a JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show app/handler output")
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
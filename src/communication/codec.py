@@ -0,0 +1,389 @@
+"""
+MQTT Payload Codecs
+Compact encodings for high-rate telemetry topics
+
+JSON stays the default for control/state topics. High-rate topics (vibration
+blocks, per-second temperature, inference stats) can use a binary codec:
+
+    json      JSON text (default, no topic suffix)
+    msgpack   MessagePack (requires `msgpack`)
+    cbor      CBOR (requires `cbor2`)
+    struct    Fixed little-endian layout for numeric sample arrays (SampleBlock)
+
+The codec is indicated by a topic suffix level, so any MQTT 3.1.1 client can
+tell the encodings apart and subscribe selectively:
+
+    frying_ai/jetson1/vibration/raw            JSON
+    frying_ai/jetson1/vibration/raw/@msgpack   MessagePack
+    frying_ai/jetson1/vibration/raw/@struct    SampleBlock
+
+Binary codecs carry slim metadata ({"timestamp": unix, "device": name,
+"data": ...}) instead of the full JSON device envelope; struct blocks carry
+their own t0 / sample rate and no device metadata (the topic prefix names the
+device).
+
+struct layout (little-endian):
+    header  '<2sBcHIdf'  magic b'SB', version 1, dtype ('f','d','h','i'),
+                         channels, frames, t0 (unix), rate_hz
+    body    frames x channels samples, interleaved
+
+Decoding in Python tools:
+    topic, codec, value = decode_message(msg.topic, msg.payload)
+
+Listen to a topic and print decoded messages:
+    python -m src.communication.codec listen --broker 192.168.1.10 "frying_ai/#"
+
+Benchmark (size and CPU per codec, no broker needed):
+    python -m src.communication.codec benchmark
+"""
+
+import sys
+import json
+import time
+import array
+import struct
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Sequence, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import cbor2
+    CBOR_AVAILABLE = True
+except ImportError:
+    CBOR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CODECS = ('json', 'msgpack', 'cbor', 'struct')
+SUFFIX_MARK = '@'
+
+STRUCT_MAGIC = b'SB'
+STRUCT_VERSION = 1
+STRUCT_HEADER = struct.Struct('<2sBcHIdf')
+STRUCT_DTYPES = {'f': 4, 'd': 8, 'h': 2, 'i': 4}
+
+
+@dataclass
+class SampleBlock:
+    """Block of evenly spaced numeric samples (one or more channels)"""
+    t0: float                   # Time of the first frame (unix)
+    rate_hz: float              # Frames per second
+    samples: Sequence[float]    # Flat, interleaved: f0c0, f0c1, ..., f1c0, ...
+    channels: int = 1
+    dtype: str = 'f'            # 'f' float32, 'd' float64, 'h' int16, 'i' int32
+
+    @property
+    def frames(self) -> int:
+        return len(self.samples) // self.channels if self.channels else 0
+
+    def channel(self, index: int) -> Sequence[float]:
+        """Samples of one channel"""
+        return self.samples[index::self.channels]
+
+
+# =========================
+# Codec lookup
+# =========================
+def available(codec: str) -> bool:
+    """Check whether a codec's library is installed"""
+    if codec == 'msgpack':
+        return MSGPACK_AVAILABLE
+    if codec == 'cbor':
+        return CBOR_AVAILABLE
+    return codec in CODECS
+
+
+def check_codec(codec: str) -> str:
+    """
+    Validate a codec name
+
+    Raises:
+        ValueError: Unknown codec or its library is not installed
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+    if not available(codec):
+        raise ValueError(f"Codec '{codec}' requires the {'msgpack' if codec == 'msgpack' else 'cbor2'} package")
+    return codec
+
+
+def topic_with_codec(topic: str, codec: str) -> str:
+    """Append the codec suffix level to a topic (JSON topics have none)"""
+    return topic if codec == 'json' else f"{topic}/{SUFFIX_MARK}{codec}"
+
+
+def split_codec(topic: str) -> Tuple[str, str]:
+    """
+    Split the codec suffix off a topic
+
+    Args:
+        topic: Received topic
+
+    Returns:
+        (base topic, codec); codec is 'json' without a known suffix
+    """
+    base, _, last = topic.rpartition('/')
+    if last[:1] == SUFFIX_MARK and last[1:] in CODECS:
+        return base, last[1:]
+    return topic, 'json'
+
+
+# =========================
+# struct layout
+# =========================
+def pack_samples(block: SampleBlock) -> bytes:
+    """Encode a SampleBlock (numpy arrays are packed without a Python loop)"""
+    if block.dtype not in STRUCT_DTYPES:
+        raise ValueError(f"Unsupported sample dtype: {block.dtype}")
+    samples = block.samples
+    if hasattr(samples, 'astype'):  # numpy array
+        body = samples.astype('<' + block.dtype, copy=False).tobytes()
+        count = samples.size
+    else:
+        arr = array.array(block.dtype, samples)
+        if sys.byteorder == 'big':
+            arr.byteswap()
+        body = arr.tobytes()
+        count = len(arr)
+    if block.channels < 1 or count % block.channels:
+        raise ValueError(f"{count} samples do not fill {block.channels} channel(s)")
+    header = STRUCT_HEADER.pack(STRUCT_MAGIC, STRUCT_VERSION, block.dtype.encode(),
+                                block.channels, count // block.channels, block.t0, block.rate_hz)
+    return header + body
+
+
+def unpack_samples(data: bytes) -> SampleBlock:
+    """
+    Decode a struct payload
+
+    Raises:
+        ValueError: Bad magic/version or truncated payload
+    """
+    if len(data) < STRUCT_HEADER.size:
+        raise ValueError("Truncated sample block header")
+    magic, version, dtype, channels, frames, t0, rate_hz = STRUCT_HEADER.unpack_from(data)
+    dtype = dtype.decode()
+    if magic != STRUCT_MAGIC or version != STRUCT_VERSION or dtype not in STRUCT_DTYPES:
+        raise ValueError(f"Not a sample block (magic={magic!r}, version={version}, dtype={dtype})")
+    expected = STRUCT_HEADER.size + frames * channels * STRUCT_DTYPES[dtype]
+    if len(data) != expected:
+        raise ValueError(f"Sample block size mismatch: {len(data)} != {expected}")
+    samples = array.array(dtype)
+    samples.frombytes(memoryview(data)[STRUCT_HEADER.size:])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return SampleBlock(t0=t0, rate_hz=rate_hz, samples=samples, channels=channels, dtype=dtype)
+
+
+# =========================
+# Encode / decode
+# =========================
+def encode(value: Any, codec: str = 'json') -> bytes:
+    """
+    Encode a value
+
+    Args:
+        value: Payload (SampleBlock for 'struct')
+        codec: Codec name
+
+    Returns:
+        Encoded bytes
+    """
+    if codec == 'json':
+        return json.dumps(value).encode('utf-8')
+    if codec == 'msgpack':
+        return msgpack.packb(value, use_bin_type=True, default=_default)
+    if codec == 'cbor':
+        return cbor2.dumps(value, default=_cbor_default)
+    if codec == 'struct':
+        if not isinstance(value, SampleBlock):
+            raise TypeError(f"struct codec needs a SampleBlock, got {type(value).__name__}")
+        return pack_samples(value)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decode(data: bytes, codec: str = 'json') -> Any:
+    """
+    Decode a payload
+
+    Args:
+        data: Payload bytes
+        codec: Codec name
+
+    Returns:
+        Decoded value (SampleBlock for 'struct'; plain-text JSON payloads as str)
+    """
+    if codec == 'json':
+        text = bytes(data).decode('utf-8')
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+    if codec == 'msgpack':
+        return msgpack.unpackb(data, raw=False)
+    if codec == 'cbor':
+        return cbor2.loads(data)
+    if codec == 'struct':
+        return unpack_samples(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decode_message(topic: str, payload: bytes) -> Tuple[str, str, Any]:
+    """
+    Decode a received message using its topic suffix
+
+    Args:
+        topic: Received topic
+        payload: Payload bytes
+
+    Returns:
+        (base topic, codec, decoded value)
+    """
+    base, codec = split_codec(topic)
+    return base, codec, decode(payload, codec)
+
+
+def _default(obj: Any) -> Any:
+    """msgpack fallback for SampleBlock / numpy values"""
+    if isinstance(obj, SampleBlock):
+        return {'t0': obj.t0, 'rate_hz': obj.rate_hz, 'channels': obj.channels,
+                'samples': list(obj.samples)}
+    if hasattr(obj, 'tolist'):  # numpy array / scalar
+        return obj.tolist()
+    raise TypeError(f"Cannot encode {type(obj).__name__}")
+
+
+def _cbor_default(encoder, obj: Any) -> None:
+    encoder.encode(_default(obj))
+
+
+# =========================
+# Benchmark
+# =========================
+def benchmark(count: int = 5000) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Compare payload size and encode/decode CPU per codec (no broker)
+
+    Payloads:
+        vibration    3-axis block, 100 frames (struct: float32 SampleBlock)
+        temperature  per-second oil/probe temperature stats dict
+
+    The 'json_envelope' row is the current publish path (full device envelope).
+
+    Args:
+        count: Iterations per codec
+
+    Returns:
+        {payload: {codec: {"bytes", "encode_us", "decode_us"}}}
+    """
+    from .envelope import dumps, encode_envelope
+
+    device = {
+        "hostname": "jetson2", "device_name": "Jetson2", "location": "Kitchen",
+        "ip_addresses": [{"interface": "eth0", "address": "192.168.1.12"}],
+        "mac_address": "00:00:00:00:00:00", "platform": "Linux",
+        "platform_release": "5.15.148-tegra", "architecture": "aarch64",
+        "python_version": "3.10.12", "cpu_count": 6,
+    }
+    device_json = dumps(device)
+    now = time.time()
+    vib = [round(((i * 37) % 200 - 100) / 100.0, 4) for i in range(300)]
+    payloads = {
+        'vibration': {'t0': now, 'rate_hz': 100.0, 'channels': 3, 'samples': vib},
+        'temperature': {'pot1_oil': 165.5, 'pot1_probe': 72.25, 'pot2_oil': 171.0,
+                        'pot2_probe': 68.5, 'fps': 29.7, 'inference_ms': 18.4},
+    }
+    codecs = [c for c in CODECS if available(c)]
+    results = {}
+
+    for name, value in payloads.items():
+        rows = {}
+
+        start = time.perf_counter()
+        for _ in range(count):
+            data = encode_envelope(device_json, value).encode('utf-8')
+        enc = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(count):
+            json.loads(data)
+        rows['json_envelope'] = {'bytes': len(data), 'encode_us': enc / count * 1e6,
+                                 'decode_us': (time.perf_counter() - start) / count * 1e6}
+
+        for codec in codecs:
+            if codec == 'struct':
+                if name != 'vibration':
+                    continue
+                item = SampleBlock(t0=value['t0'], rate_hz=value['rate_hz'],
+                                   samples=value['samples'], channels=value['channels'])
+            else:
+                item = {'timestamp': now, 'device': 'jetson2', 'data': value}
+            start = time.perf_counter()
+            for _ in range(count):
+                data = encode(item, codec)
+            enc = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(count):
+                decode(data, codec)
+            rows[codec] = {'bytes': len(data), 'encode_us': enc / count * 1e6,
+                           'decode_us': (time.perf_counter() - start) / count * 1e6}
+        results[name] = rows
+    return results
+
+
+def listen(broker: str, topics: Sequence[str], port: int = 1883) -> None:
+    """Subscribe and print decoded messages (Ctrl+C to stop)"""
+    import paho.mqtt.client as mqtt
+
+    def on_connect(client, userdata, flags, reason_code, properties):
+        client.subscribe([(t, 0) for t in topics])
+
+    def on_message(client, userdata, msg):
+        try:
+            base, codec, value = decode_message(msg.topic, msg.payload)
+        except Exception as e:
+            print(f"{msg.topic}: <undecodable, {len(msg.payload)} bytes: {e}>")
+            return
+        if isinstance(value, SampleBlock):
+            value = (f"SampleBlock t0={value.t0:.3f} rate={value.rate_hz:g}Hz "
+                     f"{value.channels}ch x {value.frames} frames")
+        print(f"{base} [{codec}, {len(msg.payload)} B]: {value}")
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect(broker, port, 60)
+    try:
+        client.loop_forever()
+    except KeyboardInterrupt:
+        client.disconnect()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MQTT payload codecs")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_bench = sub.add_parser('benchmark', help='Compare size and CPU per codec')
+    p_bench.add_argument('--count', type=int, default=5000, help='Iterations per codec')
+    p_listen = sub.add_parser('listen', help='Print decoded messages')
+    p_listen.add_argument('--broker', default='localhost')
+    p_listen.add_argument('--port', type=int, default=1883)
+    p_listen.add_argument('topics', nargs='+', help='Topic filters')
+    args = parser.parse_args()
+
+    if args.command == 'listen':
+        listen(args.broker, args.topics, args.port)
+    else:
+        print(f"msgpack: {'available' if MSGPACK_AVAILABLE else 'not installed'}, "
+              f"cbor2: {'available' if CBOR_AVAILABLE else 'not installed'}")
+        for name, rows in benchmark(args.count).items():
+            print(f"\n{name}")
+            for codec, r in rows.items():
+                print(f"  {codec:14s} {r['bytes']:6d} bytes  encode {r['encode_us']:7.1f} us"
+                      f"  decode {r['decode_us']:7.1f} us")
@@ -0,0 +1,271 @@
+"""
+Pre-built MQTT Envelopes
+Serializes the static parts of outgoing messages once
+
+Every message carries the same device identity (device id/name/location,
+IP address, system info). Instead of rebuilding and re-encoding those dicts
+per publish, the static part is serialized once into a JSON prefix and only
+the variable fields (message, timestamp, payload) are spliced in.
+The output is byte-identical to the previous json.dumps() envelopes unless
+the optional fast encoder (orjson) is enabled. orjson is an optional
+dependency (commented in jetson*/requirements.txt); without it fast mode
+falls back to compact json.dumps() output.
+
+Example:
+    envelope = DeviceEnvelope("jetson2", "Jetson2_Frying_Station", "Kitchen")
+    mqtt_client.add_connect_callback(envelope.invalidate)  # Re-check IP on reconnect
+    mqtt_client.publish(topic, envelope.build("LEFT:FRYING"))
+
+Benchmark (legacy vs pre-built, no broker needed):
+    python -m src.communication.envelope --count 20000
+"""
+
+import json
+import time
+import socket
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def get_ip_address() -> str:
+    """Get local IP address (routing lookup, no packet is sent)"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+        finally:
+            s.close()
+    except OSError:
+        return "unknown"
+
+
+def dumps(obj: Any, fast: bool = False, ensure_ascii: bool = True) -> str:
+    """
+    Serialize to JSON
+
+    Args:
+        obj: Object to encode
+        fast: Use orjson when available (compact, UTF-8 output)
+        ensure_ascii: Escape non-ASCII characters (json module only)
+
+    Returns:
+        JSON string
+    """
+    if fast and ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            pass  # e.g. non-str keys: fall back to json
+    if fast:
+        return json.dumps(obj, ensure_ascii=ensure_ascii, separators=(',', ':'))
+    return json.dumps(obj, ensure_ascii=ensure_ascii)
+
+
+def json_prefix(static: Dict[str, Any], fast: bool = False, ensure_ascii: bool = True) -> str:
+    """
+    Serialize a dict without its closing brace, so more fields can be appended
+
+    Args:
+        static: Fields that never change between messages
+        fast: Compact separators / orjson
+        ensure_ascii: Escape non-ASCII characters
+
+    Returns:
+        '{"a": 1, "b": 2' (or '{' for an empty dict)
+    """
+    if not static:
+        return '{'
+    return dumps(static, fast=fast, ensure_ascii=ensure_ascii)[:-1]
+
+
+def encode_envelope(device_json: str, payload: Any, timestamp: Optional[str] = None,
+                    fast: bool = False) -> str:
+    """
+    Encode {"timestamp", "device", "data"} with a pre-serialized device part
+
+    Equivalent to json.dumps({"timestamp": ..., "device": ..., "data": payload}).
+
+    Args:
+        device_json: dumps() of the device/system info dict
+        payload: Message payload (dict, str, ...)
+        timestamp: ISO timestamp (default: now)
+        fast: Use the fast encoder for the payload
+
+    Returns:
+        JSON string
+    """
+    ts = timestamp if timestamp is not None else datetime.now().isoformat()
+    if fast:
+        return '{"timestamp":"%s","device":%s,"data":%s}' % (ts, device_json, dumps(payload, fast=True))
+    return '{"timestamp": "%s", "device": %s, "data": %s}' % (ts, device_json, json.dumps(payload))
+
+
+class DeviceEnvelope:
+    """
+    Cached device-info message envelope for send_mqtt_message()
+
+    Produces the same JSON as
+        json.dumps({"device_id", "device_name", "device_location",
+                    "ip_address", "message", "timestamp"}, ensure_ascii=False)
+    with the device part serialized once. The IP address is re-checked at
+    most every `refresh_sec` seconds (or after invalidate(), e.g. on MQTT
+    reconnect) and the prefix is rebuilt only if it changed.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        device_name: str,
+        device_location: str,
+        refresh_sec: float = 60.0,
+        fast_json: bool = False
+    ):
+        """
+        Initialize envelope
+
+        Args:
+            device_id: Device ID (e.g. "jetson1")
+            device_name: Human readable device name
+            device_location: Physical location
+            refresh_sec: Interval for re-checking the IP address (0 = every message)
+            fast_json: Use the fast encoder (compact output)
+        """
+        self.device_id = device_id
+        self.device_name = device_name
+        self.device_location = device_location
+        self.refresh_sec = refresh_sec
+        self.fast_json = fast_json
+
+        self._lock = threading.Lock()
+        self._ip_address = None
+        self._prefix = ''
+        self._checked_at = float('-inf')
+        self._ts_second = None
+        self._ts_text = ''
+        self._refresh_ip()
+
+    @property
+    def ip_address(self) -> str:
+        """Cached IP address"""
+        return self._ip_address
+
+    def invalidate(self) -> None:
+        """Force an IP re-check on the next message (network may have changed)"""
+        self._checked_at = float('-inf')
+
+    def _refresh_ip(self) -> None:
+        ip = get_ip_address()
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if ip == self._ip_address:
+                return
+            if self._ip_address is not None:
+                logger.info(f"IP address changed: {self._ip_address} -> {ip}")
+            self._ip_address = ip
+            self._prefix = json_prefix({
+                "device_id": self.device_id,
+                "device_name": self.device_name,
+                "device_location": self.device_location,
+                "ip_address": ip,
+            }, fast=self.fast_json, ensure_ascii=False)
+
+    def _timestamp(self) -> str:
+        # "%Y-%m-%d %H:%M:%S" only changes once per second
+        second = int(time.time())
+        if second != self._ts_second:
+            self._ts_text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            self._ts_second = second
+        return self._ts_text
+
+    def build(self, message: Any) -> str:
+        """
+        Build the JSON message
+
+        Args:
+            message: Message value (usually a status string)
+
+        Returns:
+            JSON string
+        """
+        if time.monotonic() - self._checked_at >= self.refresh_sec:
+            self._refresh_ip()
+        body = dumps(message, fast=self.fast_json, ensure_ascii=False)
+        if self.fast_json:
+            return '%s,"message":%s,"timestamp":"%s"}' % (self._prefix, body, self._timestamp())
+        return '%s, "message": %s, "timestamp": "%s"}' % (self._prefix, body, self._timestamp())
+
+
+# =========================
+# Benchmark
+# =========================
+def benchmark(count: int = 20000, fast_json: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Measure publish-path encoding cost and payload size (no broker)
+
+    Compares the legacy path (IP lookup, strftime, dict rebuild and two
+    json.dumps per message) with pre-built envelopes.
+
+    Args:
+        count: Messages per variant
+        fast_json: Use the fast encoder for the pre-built variant
+
+    Returns:
+        {variant: {"us_per_msg", "bytes"}}
+    """
+    system_info = {
+        "hostname": socket.gethostname(), "device_name": "Jetson2", "location": "Kitchen",
+        "ip_addresses": [{"interface": "eth0", "address": get_ip_address()}],
+        "mac_address": "00:00:00:00:00:00", "platform": "Linux",
+        "platform_release": "5.15.148-tegra", "architecture": "aarch64",
+        "python_version": "3.10.12", "cpu_count": 6,
+    }
+    message = "LEFT:FRYING"
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(count):
+        msg_data = {
+            "device_id": "jetson2",
+            "device_name": "Jetson2_Frying_Station",
+            "device_location": "Kitchen",
+            "ip_address": get_ip_address(),
+            "message": message,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        payload = json.dumps(msg_data, ensure_ascii=False)
+        wire = json.dumps({"timestamp": datetime.now().isoformat(), "device": system_info, "data": payload})
+    results['legacy'] = {"us_per_msg": (time.perf_counter() - start) / count * 1e6, "bytes": len(wire.encode('utf-8'))}
+
+    envelope = DeviceEnvelope("jetson2", "Jetson2_Frying_Station", "Kitchen", fast_json=fast_json)
+    device_json = dumps(system_info, fast=fast_json)
+    start = time.perf_counter()
+    for _ in range(count):
+        wire = encode_envelope(device_json, envelope.build(message), fast=fast_json)
+    name = 'prebuilt_fast' if fast_json else 'prebuilt'
+    results[name] = {"us_per_msg": (time.perf_counter() - start) / count * 1e6, "bytes": len(wire.encode('utf-8'))}
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MQTT envelope encoding benchmark")
+    parser.add_argument('--count', type=int, default=20000, help='Messages per variant')
+    args = parser.parse_args()
+
+    rows = benchmark(args.count)
+    rows.update(benchmark(args.count, fast_json=True))
+    print(f"orjson: {'available' if ORJSON_AVAILABLE else 'not installed (compact json fallback)'}")
+    for variant, r in rows.items():
+        print(f"{variant:14s} {r['us_per_msg']:8.1f} us/msg  {r['bytes']:5d} bytes")
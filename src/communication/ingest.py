@@ -0,0 +1,208 @@
+"""
+MQTT Telemetry Ingestion
+Decouples high-rate MQTT topics from application state
+
+Temperature topics arrive on the paho network thread. Instead of updating
+app state, formatting timestamps and touching Tk widgets there, each message
+is parsed into a compact TelemetryRecord and appended to a deque (append /
+popleft are atomic, no lock is taken on either side).
+
+The main thread drains the queue once per GUI tick:
+- drain() returns every record since the last tick (full rate -> session log)
+- latest() returns the newest value per channel (coalesced -> UI)
+
+Example:
+    ingest = IngestQueue()
+    mqtt_client.subscribe("frying/pot1/oil_temp", ingest.register("pot1_oil"))
+
+    # Main thread, every GUI tick
+    for rec in ingest.drain():
+        metadata_log.append({"timestamp": format_timestamp(rec.ts), "value": rec.value})
+    label.config(text=f"{ingest.latest('pot1_oil', 0.0):.1f} °C")
+"""
+
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryRecord(NamedTuple):
+    """One parsed telemetry sample"""
+    channel: str
+    value: Any
+    ts: float      # Receive time (unix)
+    mono: float    # Receive time (monotonic, for lag)
+
+
+def parse_float(payload: Any) -> float:
+    """Parse a numeric payload (bytes, str or already-decoded JSON number)"""
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode()
+    return float(payload)
+
+
+_ts_cache = [None, '']
+
+
+def format_timestamp(ts: float) -> str:
+    """
+    Format a unix time as "%Y-%m-%d %H:%M:%S.mmm" (session log format)
+
+    The second part is cached, so formatting a batch of samples costs one
+    strftime per distinct second.
+    """
+    second = int(ts)
+    if second != _ts_cache[0]:
+        _ts_cache[1] = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        _ts_cache[0] = second
+    return f"{_ts_cache[1]}.{int((ts - second) * 1000):03d}"
+
+
+class _ChannelStats:
+    __slots__ = ('count', 'errors', 'dropped', 'lag_sum', 'lag_max', 'lag_n', 'mark_mono', 'mark_count')
+
+    def __init__(self):
+        self.count = 0          # Written by the network thread only
+        self.errors = 0
+        self.dropped = 0
+        self.lag_sum = 0.0      # Written by the draining thread only
+        self.lag_max = 0.0
+        self.lag_n = 0
+        self.mark_mono = time.monotonic()
+        self.mark_count = 0
+
+
+class IngestQueue:
+    """Single-producer/single-consumer telemetry queue with per-channel latest values"""
+
+    def __init__(self, maxlen: int = 10000):
+        """
+        Initialize ingestion queue
+
+        Args:
+            maxlen: Max queued records (oldest dropped if the consumer stalls)
+        """
+        self.maxlen = maxlen
+        self._queue = deque(maxlen=maxlen)
+        self._latest: Dict[str, TelemetryRecord] = {}
+        self._stats: Dict[str, _ChannelStats] = {}
+
+    def register(self, channel: str, parser: Callable[[Any], Any] = parse_float) -> Callable[[str, Any], None]:
+        """
+        Register a channel and get its MQTT handler
+
+        Args:
+            channel: Channel name (e.g. "pot1_oil")
+            parser: Payload -> value (runs on the network thread)
+
+        Returns:
+            Handler(topic, payload) for MQTTClient.subscribe()
+        """
+        stats = self._stats.setdefault(channel, _ChannelStats())
+        queue = self._queue
+        latest = self._latest
+
+        def handler(topic, payload):
+            try:
+                value = parser(payload)
+            except (TypeError, ValueError) as e:
+                stats.errors += 1
+                logger.debug(f"Unparseable payload on {topic}: {e}")
+                return
+            rec = TelemetryRecord(channel, value, time.time(), time.monotonic())
+            if len(queue) >= self.maxlen:
+                stats.dropped += 1
+            queue.append(rec)
+            latest[channel] = rec
+            stats.count += 1
+
+        return handler
+
+    def drain(self, limit: Optional[int] = None) -> List[TelemetryRecord]:
+        """
+        Take all queued records in arrival order (call from the consumer thread)
+
+        Args:
+            limit: Max records to take (None = all)
+
+        Returns:
+            List of TelemetryRecord
+        """
+        records = []
+        popleft = self._queue.popleft
+        try:
+            while limit is None or len(records) < limit:
+                records.append(popleft())
+        except IndexError:
+            pass
+        if records:
+            now = time.monotonic()
+            for rec in records:
+                stats = self._stats[rec.channel]
+                lag = now - rec.mono
+                stats.lag_sum += lag
+                stats.lag_n += 1
+                if lag > stats.lag_max:
+                    stats.lag_max = lag
+        return records
+
+    def latest(self, channel: str, default: Any = None) -> Any:
+        """Newest value of a channel (coalesced)"""
+        rec = self._latest.get(channel)
+        return rec.value if rec is not None else default
+
+    def latest_record(self, channel: str) -> Optional[TelemetryRecord]:
+        """Newest record of a channel"""
+        return self._latest.get(channel)
+
+    def depth(self) -> int:
+        """Number of queued records"""
+        return len(self._queue)
+
+    def get_stats(self, reset: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-channel message rate and lag
+
+        Args:
+            reset: Start a new rate/lag window (rates are measured since the
+                   previous call)
+
+        Returns:
+            {channel: {"count", "rate_hz", "lag_ms_avg", "lag_ms_max", "errors", "dropped", "age_sec"}}
+        """
+        now = time.monotonic()
+        result = {}
+        for channel, stats in self._stats.items():
+            elapsed = now - stats.mark_mono
+            count = stats.count
+            rec = self._latest.get(channel)
+            result[channel] = {
+                'count': count,
+                'rate_hz': round((count - stats.mark_count) / elapsed, 2) if elapsed > 0 else 0.0,
+                'lag_ms_avg': round(stats.lag_sum / stats.lag_n * 1000, 1) if stats.lag_n else 0.0,
+                'lag_ms_max': round(stats.lag_max * 1000, 1),
+                'errors': stats.errors,
+                'dropped': stats.dropped,
+                'age_sec': round(now - rec.mono, 1) if rec is not None else None,
+            }
+            if reset:
+                stats.mark_mono = now
+                stats.mark_count = count
+                stats.lag_sum = 0.0
+                stats.lag_max = 0.0
+                stats.lag_n = 0
+        return result
+
+    def format_stats(self, reset: bool = True) -> str:
+        """One-line summary, e.g. "pot1_oil 1.0Hz 2ms(max 5ms)" """
+        parts = []
+        for channel, s in self.get_stats(reset).items():
+            part = f"{channel} {s['rate_hz']:.1f}Hz {s['lag_ms_avg']:.0f}ms(max {s['lag_ms_max']:.0f}ms)"
+            if s['errors'] or s['dropped']:
+                part += f" err={s['errors']} drop={s['dropped']}"
+            parts.append(part)
+        return ", ".join(parts)
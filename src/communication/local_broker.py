@@ -0,0 +1,295 @@
+"""
+Embedded MQTT Broker (test stand-in)
+Minimal pure-Python MQTT 3.1.1 broker for local tests and benchmarks
+
+Listens on localhost only and supports what the Jetson apps and the Robot PC
+use: CONNECT, SUBSCRIBE/UNSUBSCRIBE with '+'/'#' filters, PUBLISH QoS 0/1
+(QoS 2 is accepted from publishers and delivered as QoS 1), retained
+messages and PINGREQ. No authentication, persistence or will messages.
+Not meant for production traffic.
+
+Example:
+    broker = LocalBroker()
+    broker.start()
+    client = MQTTClient(broker="127.0.0.1", port=broker.port)
+    ...
+    broker.stop()
+"""
+
+import socket
+import struct
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .outbox import topic_matches
+
+logger = logging.getLogger(__name__)
+
+# Packet types
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+
+def _encode_length(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n % 128
+        n //= 128
+        if n:
+            byte |= 0x80
+        out.append(byte)
+        if not n:
+            return bytes(out)
+
+
+def _encode_str(s: str) -> bytes:
+    data = s.encode('utf-8')
+    return struct.pack('!H', len(data)) + data
+
+
+class _Session:
+    """One connected client"""
+
+    def __init__(self, broker: 'LocalBroker', sock: socket.socket, addr):
+        self.broker = broker
+        self.sock = sock
+        self.addr = addr
+        self.client_id = ''
+        self.subscriptions: Dict[str, int] = {}
+        self._send_lock = threading.Lock()
+        self._next_mid = 0
+        self.alive = True
+
+    # ---- I/O ----
+    def _recv_exact(self, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("client closed")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _read_packet(self) -> Tuple[int, int, bytes]:
+        header = self._recv_exact(1)[0]
+        length, mult = 0, 1
+        while True:
+            byte = self._recv_exact(1)[0]
+            length += (byte & 0x7F) * mult
+            if not byte & 0x80:
+                break
+            mult *= 128
+        body = self._recv_exact(length) if length else b''
+        return header >> 4, header & 0x0F, body
+
+    def send(self, packet_type: int, flags: int, body: bytes) -> bool:
+        data = bytes([(packet_type << 4) | flags]) + _encode_length(len(body)) + body
+        with self._send_lock:
+            try:
+                self.sock.sendall(data)
+                return True
+            except OSError:
+                self.alive = False
+                return False
+
+    def deliver(self, topic: str, payload: bytes, qos: int, retain: bool = False) -> bool:
+        body = _encode_str(topic)
+        if qos:
+            with self._send_lock:
+                self._next_mid = self._next_mid % 65535 + 1
+                mid = self._next_mid
+            body += struct.pack('!H', mid)
+        return self.send(PUBLISH, (qos << 1) | int(retain), body + payload)
+
+    # ---- Protocol ----
+    def run(self) -> None:
+        try:
+            while self.alive and self.broker.running:
+                ptype, flags, body = self._read_packet()
+                if ptype == CONNECT:
+                    self._on_connect(body)
+                elif ptype == PUBLISH:
+                    self._on_publish(flags, body)
+                elif ptype == PUBREL:
+                    self.send(PUBCOMP, 0, body[:2])
+                elif ptype == SUBSCRIBE:
+                    self._on_subscribe(body)
+                elif ptype == UNSUBSCRIBE:
+                    self._on_unsubscribe(body)
+                elif ptype == PINGREQ:
+                    self.send(PINGRESP, 0, b'')
+                elif ptype == DISCONNECT:
+                    break
+                # PUBACK/PUBREC/PUBCOMP from subscribers need no action
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.alive = False
+            self.broker._remove(self)
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def _on_connect(self, body: bytes) -> None:
+        pos = 2 + struct.unpack('!H', body[:2])[0]     # Protocol name
+        pos += 1 + 1 + 2                               # Level, flags, keepalive
+        n = struct.unpack('!H', body[pos:pos + 2])[0]
+        self.client_id = body[pos + 2:pos + 2 + n].decode('utf-8', 'replace')
+        self.send(CONNACK, 0, b'\x00\x00')
+        logger.debug(f"Broker: client connected {self.client_id} {self.addr}")
+
+    def _on_publish(self, flags: int, body: bytes) -> None:
+        qos = (flags >> 1) & 0x03
+        retain = bool(flags & 0x01)
+        n = struct.unpack('!H', body[:2])[0]
+        topic = body[2:2 + n].decode('utf-8')
+        pos = 2 + n
+        if qos:
+            mid = body[pos:pos + 2]
+            pos += 2
+            self.send(PUBACK if qos == 1 else PUBREC, 0, mid)
+        self.broker.route(topic, body[pos:], qos, retain)
+
+    def _on_subscribe(self, body: bytes) -> None:
+        mid, pos = body[:2], 2
+        granted = bytearray()
+        new = []
+        while pos < len(body):
+            n = struct.unpack('!H', body[pos:pos + 2])[0]
+            topic_filter = body[pos + 2:pos + 2 + n].decode('utf-8')
+            qos = min(body[pos + 2 + n] & 0x03, 1)
+            pos += 3 + n
+            self.subscriptions[topic_filter] = qos
+            granted.append(qos)
+            new.append(topic_filter)
+        self.send(SUBACK, 0, mid + bytes(granted))
+        self.broker.send_retained(self, new)
+
+    def _on_unsubscribe(self, body: bytes) -> None:
+        mid, pos = body[:2], 2
+        while pos < len(body):
+            n = struct.unpack('!H', body[pos:pos + 2])[0]
+            self.subscriptions.pop(body[pos + 2:pos + 2 + n].decode('utf-8'), None)
+            pos += 2 + n
+        self.send(UNSUBACK, 0, mid)
+
+
+class LocalBroker:
+    """Threaded MQTT 3.1.1 broker on localhost (one thread per client)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        Initialize broker
+
+        Args:
+            host: Listen address (keep on loopback)
+            port: Listen port (0 = pick a free port, see .port after start())
+        """
+        self.host = host
+        self.port = port
+        self.running = False
+        self._sock: Optional[socket.socket] = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._sessions: List[_Session] = []
+        self._retained: Dict[str, Tuple[bytes, int]] = {}
+
+        # Statistics
+        self.received = 0
+        self.delivered = 0
+        self.failed = 0
+
+    def start(self) -> int:
+        """
+        Start listening
+
+        Returns:
+            Bound port
+        """
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(16)
+        self.port = self._sock.getsockname()[1]
+        self.running = True
+        self._thread = threading.Thread(target=self._accept_loop, name="LocalBroker", daemon=True)
+        self._thread.start()
+        logger.info(f"Local MQTT broker listening on {self.host}:{self.port}")
+        return self.port
+
+    def stop(self) -> None:
+        """Stop the broker and close all client connections"""
+        self.running = False
+        try:
+            self._sock.close()
+        except (OSError, AttributeError):
+            pass
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            try:
+                session.sock.shutdown(socket.SHUT_RDWR)
+                session.sock.close()
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def _accept_loop(self) -> None:
+        while self.running:
+            try:
+                sock, addr = self._sock.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = _Session(self, sock, addr)
+            with self._lock:
+                self._sessions.append(session)
+            threading.Thread(target=session.run, name=f"LocalBroker-{addr[1]}", daemon=True).start()
+
+    def _remove(self, session: _Session) -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def route(self, topic: str, payload: bytes, qos: int, retain: bool) -> None:
+        """Deliver a published message to all matching subscribers"""
+        self.received += 1
+        if retain:
+            with self._lock:
+                if payload:
+                    self._retained[topic] = (payload, qos)
+                else:
+                    self._retained.pop(topic, None)
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            granted = [q for f, q in list(session.subscriptions.items()) if topic_matches(f, topic)]
+            if not granted:
+                continue
+            if session.deliver(topic, payload, min(qos, max(granted))):
+                self.delivered += 1
+            else:
+                self.failed += 1
+
+    def send_retained(self, session: _Session, filters: List[str]) -> None:
+        """Send retained messages matching new subscriptions"""
+        with self._lock:
+            retained = list(self._retained.items())
+        for topic, (payload, qos) in retained:
+            if any(topic_matches(f, topic) for f in filters):
+                session.deliver(topic, payload, min(qos, 1), retain=True)
+
+    def client_count(self) -> int:
+        """Number of connected clients"""
+        with self._lock:
+            return len(self._sessions)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -1,15 +1,32 @@
 """
 Centralized MQTT Client for Frying AI System
 Handles all MQTT communication with automatic metadata injection
+
+With an Outbox attached, publishes made while the broker is unreachable are
+stored on disk and re-published in order (paced, at-least-once) after
+reconnect; live publishes queue behind the backlog until it is drained.
+
+Incoming messages are dispatched through a TopicRouter: any number of
+subscriptions (with '+'/'#' wildcards) share the single paho on_message
+callback, and all subscriptions are renewed on every (re)connect.
+
+High-rate topics can be published with a compact codec (MessagePack, CBOR
+or a fixed struct layout for sample arrays, see codec.py); the codec is
+named by a topic suffix level and decoded transparently by the router.
 """
 
 import paho.mqtt.client as mqtt
-import json
 import logging
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any, Callable
 import time
 
+from .codec import CODECS, SampleBlock, available, encode, topic_with_codec
+from .envelope import dumps, encode_envelope
+from .outbox import Outbox, OutboxPolicy, topic_matches
+from .router import TopicRouter, Route
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,7 +39,13 @@ class MQTTClient:
         port: int = 1883,
         client_id: Optional[str] = None,
         topic_prefix: str = "frying_ai",
-        system_info: Optional[Dict[str, Any]] = None
+        system_info: Optional[Dict[str, Any]] = None,
+        fast_json: bool = False,
+        outbox: Optional[Outbox] = None,
+        drain_rate: float = 20.0,
+        prefix_subscriptions: bool = True,
+        handler_workers: int = 4,
+        codecs: Optional[Dict[str, str]] = None
     ):
         """
         Initialize MQTT client
@@ -33,11 +56,53 @@ class MQTTClient:
             client_id: Unique client ID (auto-generated if None)
             topic_prefix: Prefix for all topics
             system_info: System information dictionary (from SystemInfo class)
+            fast_json: Use the fast JSON encoder (orjson, compact output)
+            outbox: Store-and-forward queue for offline publishes (None = drop)
+            drain_rate: Max backlog messages per second after reconnect
+            prefix_subscriptions: Prefix subscribed topics with topic_prefix
+                                  (False for topics published by other
+                                  devices, e.g. "frying/pot1/food_type")
+            handler_workers: Worker threads for threaded subscription handlers
+            codecs: Topic filter -> payload codec for publish() ('json',
+                    'msgpack', 'cbor', 'struct'; default 'json')
         """
         self.broker = broker
         self.port = port
         self.topic_prefix = topic_prefix
-        self.system_info = system_info or {}
+        self.fast_json = fast_json
+        self.set_system_info(system_info or {})
+        self._connect_callbacks = []
+
+        # Per-topic payload codecs (unavailable codecs fall back to JSON)
+        self.codecs: Dict[str, str] = {}
+        for topic_filter, codec in (codecs or {}).items():
+            if codec not in CODECS or not available(codec):
+                logger.warning(f"Codec '{codec}' for {topic_filter} unavailable, using json")
+                codec = 'json'
+            self.codecs[topic_filter] = codec
+
+        # Publish-path statistics
+        self._stats_lock = threading.Lock()
+        self._published = 0
+        self._published_bytes = 0
+        self._encode_sec = 0.0
+
+        # Store-and-forward
+        self.outbox = outbox
+        self.drain_rate = drain_rate
+        self.drain_window = 20  # Max unacknowledged backlog messages
+        self._drain_lock = threading.Lock()
+        self._draining = False
+        self._drain_stop = threading.Event()
+        self._drain_thread = None
+        self._inflight_lock = threading.RLock()
+        self._inflight: Dict[int, int] = {}  # mid -> outbox row id
+        self._drained = 0
+        self._drain_rate_measured = 0.0
+
+        # Subscriptions
+        self.prefix_subscriptions = prefix_subscriptions
+        self.router = TopicRouter(max_workers=handler_workers)
 
         # Create MQTT client
         if client_id is None:
@@ -47,6 +112,7 @@ class MQTTClient:
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self.client.on_publish = self._on_publish
+        self.client.on_message = self._on_message
 
         self.connected = False
         self.connect_retry_delay = 5  # seconds
@@ -56,10 +122,40 @@ class MQTTClient:
         if reason_code == 0:
             self.connected = True
             logger.info(f"Connected to MQTT broker at {self.broker}:{self.port}")
+            self._resubscribe()
+            for callback in self._connect_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Connect callback error: {e}")
+            if self.outbox is not None and self.outbox.depth() > 0:
+                self._start_drain()
         else:
             self.connected = False
             logger.error(f"Failed to connect to MQTT broker: {reason_code}")
 
+    def set_system_info(self, system_info: Dict[str, Any]) -> None:
+        """
+        Replace the device info attached to messages (serialized once here)
+
+        Args:
+            system_info: System information dictionary
+        """
+        self.system_info = dict(system_info)
+        self._device_json = dumps(self.system_info, fast=self.fast_json)
+        # Binary codecs carry the device name only
+        self._device_name = self.system_info.get('device_name') or self.system_info.get('hostname', '')
+
+    def add_connect_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback run on every (re)connect, e.g. to refresh cached
+        network identity
+
+        Args:
+            callback: Function without arguments (runs on the MQTT thread)
+        """
+        self._connect_callbacks.append(callback)
+
     def _on_disconnect(self, client, userdata, flags, reason_code, properties):
         """Callback when disconnected from broker"""
         self.connected = False
@@ -68,6 +164,11 @@ class MQTTClient:
     def _on_publish(self, client, userdata, mid, reason_code, properties):
         """Callback when message is published"""
         logger.debug(f"Message published: mid={mid}")
+        if self.outbox is not None:
+            with self._inflight_lock:
+                row_id = self._inflight.pop(mid, None)
+            if row_id is not None:
+                self.outbox.ack(row_id)
 
     def connect(self, blocking: bool = False, timeout: float = 5.0) -> bool:
         """
@@ -98,12 +199,23 @@ class MQTTClient:
 
         except Exception as e:
             logger.error(f"Error connecting to MQTT broker: {e}")
+            if self.outbox is not None:
+                # Keep retrying in the background; publishes go to the outbox meanwhile
+                try:
+                    self.client.connect_async(self.broker, self.port, 60)
+                    self.client.loop_start()
+                except Exception as e2:
+                    logger.error(f"Error scheduling MQTT reconnect: {e2}")
             return False
 
     def disconnect(self):
         """Disconnect from MQTT broker"""
+        self._drain_stop.set()
+        if self._drain_thread is not None:
+            self._drain_thread.join(timeout=2.0)
         self.client.loop_stop()
         self.client.disconnect()
+        self.router.close()
         self.connected = False
         logger.info("Disconnected from MQTT broker")
 
@@ -113,7 +225,9 @@ class MQTTClient:
         payload: Dict[str, Any],
         qos: int = 1,
         retain: bool = False,
-        include_metadata: bool = True
+        include_metadata: bool = True,
+        outbox_policy: Optional[OutboxPolicy] = None,
+        codec: Optional[str] = None
     ) -> bool:
         """
         Publish message with automatic metadata injection
@@ -124,62 +238,263 @@ class MQTTClient:
             qos: Quality of Service (0, 1, or 2)
             retain: Retain message flag
             include_metadata: Include timestamp and device info
+            outbox_policy: Queueing policy while offline (default: outbox
+                           policy of topic_suffix)
+            codec: Payload codec (default: codecs entry of topic_suffix, else
+                   'json'); non-JSON codecs add a "/@<codec>" topic level and
+                   slim metadata ({"timestamp": unix, "device": name, "data"});
+                   'struct' takes a SampleBlock and adds no metadata
 
         Returns:
-            True if published successfully
+            True if published successfully or queued in the outbox
         """
         try:
             # Build full topic
-            full_topic = f"{self.topic_prefix}/{topic_suffix}"
-
-            # Add metadata if requested
-            if include_metadata:
-                message = {
-                    "timestamp": datetime.now().isoformat(),
-                    "device": self.system_info,
-                    "data": payload
-                }
+            codec = codec or self.codec_for(topic_suffix)
+            full_topic = topic_with_codec(f"{self.topic_prefix}/{topic_suffix}", codec)
+
+            # Add metadata if requested (device part is pre-serialized)
+            start = time.perf_counter()
+            if codec == 'json':
+                if include_metadata:
+                    json_payload = encode_envelope(self._device_json, payload,
+                                                   datetime.now().isoformat(), fast=self.fast_json)
+                else:
+                    json_payload = dumps(payload, fast=self.fast_json)
+                data = json_payload.encode('utf-8')
+            elif include_metadata and not isinstance(payload, SampleBlock):
+                data = encode({"timestamp": time.time(), "device": self._device_name, "data": payload}, codec)
             else:
-                message = payload
+                data = encode(payload, codec)
+            encode_sec = time.perf_counter() - start
 
-            # Convert to JSON
-            json_payload = json.dumps(message)
+            # Offline or behind an undelivered backlog -> store and forward
+            policy = None
+            if self.outbox is not None:
+                policy = outbox_policy or self.outbox.policy_for(topic_suffix)
+                with self._drain_lock:
+                    if not self.connected or self._draining:
+                        return self._enqueue(full_topic, data, qos, retain, policy)
 
             # Publish
-            result = self.client.publish(full_topic, json_payload, qos=qos, retain=retain)
+            result = self.client.publish(full_topic, data, qos=qos, retain=retain)
 
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.debug(f"Published to {full_topic}: {len(json_payload)} bytes")
+                with self._stats_lock:
+                    self._published += 1
+                    self._published_bytes += len(data)
+                    self._encode_sec += encode_sec
+                logger.debug(f"Published to {full_topic}: {len(data)} bytes")
                 return True
             else:
                 logger.error(f"Failed to publish to {full_topic}: {result.rc}")
+                if policy is not None:
+                    with self._drain_lock:
+                        return self._enqueue(full_topic, data, qos, retain, policy)
                 return False
 
         except Exception as e:
             logger.error(f"Error publishing message: {e}")
             return False
 
-    def subscribe(self, topic_suffix: str, callback: Callable, qos: int = 1):
+    def codec_for(self, topic_suffix: str) -> str:
         """
-        Subscribe to topic
+        Resolve the payload codec of a topic (exact match before wildcards)
 
         Args:
-            topic_suffix: Topic suffix (will be prefixed with topic_prefix)
-            callback: Callback function(topic, payload_dict)
-            qos: Quality of Service
+            topic_suffix: Topic suffix as passed to publish()
+
+        Returns:
+            Codec name
         """
-        full_topic = f"{self.topic_prefix}/{topic_suffix}"
+        if not self.codecs:
+            return 'json'
+        codec = self.codecs.get(topic_suffix)
+        if codec is not None:
+            return codec
+        for pattern, codec in self.codecs.items():
+            if ('+' in pattern or '#' in pattern) and topic_matches(pattern, topic_suffix):
+                return codec
+        return 'json'
+
+    # =========================
+    # Store-and-forward
+    # =========================
+    def _enqueue(self, full_topic: str, data: bytes, qos: int, retain: bool,
+                 policy: OutboxPolicy) -> bool:
+        """Queue a message in the outbox (caller holds _drain_lock)"""
+        if not self.outbox.put(full_topic, data, qos=qos, retain=retain, policy=policy):
+            return False
+        logger.debug(f"Queued {full_topic} (backlog: {self.outbox.depth()})")
+        return True
+
+    def _start_drain(self) -> None:
+        """Start re-publishing the outbox backlog (no-op if already running)"""
+        with self._drain_lock:
+            if self._draining:
+                return
+            self._draining = True
+        self._drain_stop.clear()
+        self._drain_thread = threading.Thread(target=self._drain_loop, name="MQTTOutboxDrain", daemon=True)
+        self._drain_thread.start()
+
+    def _drain_loop(self) -> None:
+        """Publish queued messages in order, paced, until the backlog is empty"""
+        interval = 1.0 / self.drain_rate if self.drain_rate > 0 else 0.0
+        last_id = 0
+        sent = 0
+        start = time.monotonic()
+        with self._inflight_lock:
+            self._inflight.clear()  # Unacked rows are re-sent (at-least-once)
+        logger.info(f"Draining MQTT outbox: {self.outbox.depth()} message(s)")
 
-        def on_message(client, userdata, msg):
-            try:
-                payload = json.loads(msg.payload.decode())
-                callback(msg.topic, payload)
-            except Exception as e:
-                logger.error(f"Error processing message from {msg.topic}: {e}")
+        try:
+            while self.connected and not self._drain_stop.is_set():
+                batch = self.outbox.peek(after_id=last_id, limit=50)
+                if not batch:
+                    with self._drain_lock:
+                        # Re-check under the lock so no publish slips in between
+                        if not self.outbox.peek(after_id=last_id, limit=1):
+                            self._draining = False
+                            break
+                    continue
+
+                for msg in batch:
+                    # Bound unacknowledged messages
+                    while (len(self._inflight) >= self.drain_window and self.connected
+                           and not self._drain_stop.wait(0.01)):
+                        pass
+                    if not self.connected or self._drain_stop.is_set():
+                        break
+                    with self._inflight_lock:
+                        result = self.client.publish(msg.topic, msg.payload, qos=msg.qos, retain=msg.retain)
+                        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                            logger.warning(f"Outbox drain interrupted: {result.rc}")
+                            return
+                        self._inflight[result.mid] = msg.id
+                    last_id = msg.id
+                    sent += 1
+                    if interval:
+                        self._drain_stop.wait(interval)
+        except Exception as e:
+            logger.error(f"Error draining MQTT outbox: {e}")
+        finally:
+            with self._drain_lock:
+                self._draining = False
+            elapsed = time.monotonic() - start
+            self._drained += sent
+            if sent:
+                self._drain_rate_measured = sent / elapsed if elapsed > 0 else float(sent)
+                logger.info(f"MQTT outbox drained {sent} message(s) in {elapsed:.1f}s "
+                            f"({self._drain_rate_measured:.1f} msg/s, backlog: {self.outbox.depth()})")
+
+    # =========================
+    # Subscriptions
+    # =========================
+    def subscribe(
+        self,
+        topic_suffix: str,
+        callback: Callable,
+        qos: int = 1,
+        decode: str = 'json',
+        threaded: bool = False,
+        codec: Optional[str] = None
+    ) -> Route:
+        """
+        Subscribe to topic (may be called before connect)
 
-        self.client.subscribe(full_topic, qos=qos)
-        self.client.on_message = on_message
+        Args:
+            topic_suffix: Topic filter, '+'/'#' allowed (prefixed with
+                          topic_prefix if prefix_subscriptions)
+            callback: Callback function(topic, payload), or
+                      function(client, userdata, message) for decode='message'
+            qos: Quality of Service
+            decode: Payload mode: 'json' (decoded value; plain text passed as
+                    str, binary codecs decoded by topic suffix), 'text',
+                    'bytes' or 'message' (paho message, decoded by the callback)
+            threaded: Run the callback on the handler worker pool (for slow
+                      callbacks; order per callback is kept)
+            codec: Subscribe to the "/@<codec>" variant of the topic
+
+        Returns:
+            Route (pass to unsubscribe())
+        """
+        full_topic = f"{self.topic_prefix}/{topic_suffix}" if self.prefix_subscriptions else topic_suffix
+        if codec:
+            full_topic = topic_with_codec(full_topic, codec)
+        route = self.router.add(full_topic, callback, decode=decode, qos=qos, threaded=threaded)
+        if self.connected:
+            # Otherwise subscribed in _on_connect
+            self.client.subscribe(full_topic, qos=self.router.qos_for(full_topic))
         logger.info(f"Subscribed to {full_topic}")
+        return route
+
+    def unsubscribe(self, route: Route) -> None:
+        """
+        Remove a subscription
+
+        Args:
+            route: Route returned by subscribe()
+        """
+        if self.router.remove(route) and self.connected:
+            self.client.unsubscribe(route.topic_filter)
+        logger.info(f"Unsubscribed from {route.topic_filter}")
+
+    def _resubscribe(self) -> None:
+        """Subscribe all filters (broker session may be new after reconnect)"""
+        filters = self.router.filters()
+        if not filters:
+            return
+        try:
+            self.client.subscribe(list(filters.items()))
+            logger.info(f"Subscribed {len(filters)} topic filter(s)")
+        except Exception as e:
+            logger.error(f"Error subscribing topics: {e}")
+
+    def _on_message(self, client, userdata, msg):
+        """Callback for every received message (network thread)"""
+        try:
+            self.router.dispatch(msg.topic, msg.payload, msg, client, userdata)
+        except Exception as e:
+            logger.error(f"Error processing message from {msg.topic}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get publish-path statistics
+
+        Returns:
+            Dictionary with message count, average payload size and
+            average encoding time
+        """
+        with self._stats_lock:
+            n = self._published
+            return {
+                'published': n,
+                'bytes': self._published_bytes,
+                'avg_bytes': round(self._published_bytes / n, 1) if n else 0.0,
+                'avg_encode_us': round(self._encode_sec / n * 1e6, 1) if n else 0.0,
+                'fast_json': self.fast_json,
+                'outbox': self.get_outbox_stats(),
+                'router': self.router.get_stats(),
+            }
+
+    def get_outbox_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get store-and-forward statistics
+
+        Returns:
+            Outbox stats plus drain state/rate, or None without an outbox
+        """
+        if self.outbox is None:
+            return None
+        stats = self.outbox.get_stats()
+        stats.update({
+            'draining': self._draining,
+            'drained': self._drained,
+            'drain_rate_msg_s': round(self._drain_rate_measured, 1),
+            'inflight': len(self._inflight),
+        })
+        return stats
 
     def is_connected(self) -> bool:
         """Check if connected to broker"""
@@ -0,0 +1,369 @@
+"""
+Store-and-Forward Outbox
+Disk-backed queue for MQTT publishes while the broker is unreachable
+
+Messages that cannot be published (not connected, or queued behind an
+undelivered backlog) are stored in SQLite and re-published in order after
+reconnect. Per-topic policies decide what is worth keeping:
+
+    all      keep every message (state transitions: ON/OFF, FILLED/EMPTY)
+    latest   keep only the newest message per collapse key (periodic state)
+    drop     do not queue (previous behaviour)
+
+Each policy may carry a TTL; expired messages are never delivered. The
+queue is bounded by message count and bytes (oldest evicted first).
+
+Example:
+    outbox = Outbox("~/.cache/jetson_mqtt/outbox.db", policies={
+        "robot/control": OutboxPolicy("all", ttl_sec=600),
+        "jetson1/system/#": OutboxPolicy("latest", ttl_sec=3600),
+    })
+    client = MQTTClient(broker, outbox=outbox)
+    client.publish("robot/control", payload,
+                   outbox_policy=OutboxPolicy("latest", ttl_sec=60, key="robot/control:periodic"))
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTBOX_PATH = '~/.cache/jetson_mqtt/outbox.db'
+POLICY_MODES = ('all', 'latest', 'drop')
+
+
+@dataclass(frozen=True)
+class OutboxPolicy:
+    """Queueing policy for one topic"""
+    mode: str = 'all'                # 'all' | 'latest' | 'drop'
+    ttl_sec: Optional[float] = None  # None = never expires
+    key: Optional[str] = None        # Collapse key for 'latest' (default: topic)
+
+    def __post_init__(self):
+        if self.mode not in POLICY_MODES:
+            raise ValueError(f"Unknown outbox policy mode: {self.mode}")
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> 'OutboxPolicy':
+        """Create from config, e.g. {"mode": "latest", "ttl_sec": 60}"""
+        return cls(mode=d.get('mode', 'all'), ttl_sec=d.get('ttl_sec'), key=d.get('key'))
+
+
+@dataclass
+class OutboxMessage:
+    """Queued message"""
+    id: int
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+    created: float
+
+
+def parse_policies(specs: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, OutboxPolicy]:
+    """
+    Build topic policies from config
+
+    Args:
+        specs: {topic_filter: {"mode": ..., "ttl_sec": ..., "key": ...}}
+
+    Returns:
+        {topic_filter: OutboxPolicy}
+    """
+    return {topic: OutboxPolicy.from_dict(spec) for topic, spec in (specs or {}).items()}
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """
+    MQTT-style topic filter match ('+' = one level, '#' = remaining levels)
+
+    Args:
+        pattern: Topic filter
+        topic: Concrete topic
+
+    Returns:
+        True if topic matches the filter
+    """
+    p_levels = pattern.split('/')
+    t_levels = topic.split('/')
+    for i, p in enumerate(p_levels):
+        if p == '#':
+            return True
+        if i >= len(t_levels):
+            return False
+        if p != '+' and p != t_levels[i]:
+            return False
+    return len(p_levels) == len(t_levels)
+
+
+class Outbox:
+    """SQLite-backed, bounded, ordered outbound message queue"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_OUTBOX_PATH,
+        policies: Optional[Dict[str, OutboxPolicy]] = None,
+        default_policy: Optional[OutboxPolicy] = None,
+        max_messages: int = 10000,
+        max_bytes: int = 50 * 1024 * 1024
+    ):
+        """
+        Initialize outbox
+
+        Args:
+            path: SQLite database path (':memory:' for a non-persistent queue)
+            policies: Topic filter -> policy (matched against the topic
+                      passed to MQTTClient.publish(); first match wins,
+                      exact topics before wildcards)
+            default_policy: Policy for topics without a match
+                            (default: keep all, 1 hour TTL)
+            max_messages: Max queued messages
+            max_bytes: Max queued payload bytes
+        """
+        self.path = path if path == ':memory:' else os.path.expanduser(path)
+        self.policies = dict(policies or {})
+        self.default_policy = default_policy or OutboxPolicy('all', ttl_sec=3600)
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                qos INTEGER NOT NULL,
+                retain INTEGER NOT NULL,
+                created REAL NOT NULL,
+                expires REAL,
+                collapse_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_outbox_key ON outbox(collapse_key);
+        """)
+        self._conn.commit()
+
+        # Statistics
+        self._depth = 0
+        self._bytes = 0
+        self._enqueued = 0
+        self._replaced = 0
+        self._expired = 0
+        self._evicted = 0
+        self._acked = 0
+        self._evict_logged_at = float('-inf')
+
+        self.purge_expired()
+        self._depth, self._bytes = self._totals()
+        if self._depth:
+            logger.info(f"Outbox: {self._depth} message(s) pending from previous run ({self._bytes} bytes)")
+
+    # =========================
+    # Policies
+    # =========================
+    def policy_for(self, topic: str) -> OutboxPolicy:
+        """
+        Resolve the policy of a topic
+
+        Args:
+            topic: Topic (suffix) as passed to publish()
+
+        Returns:
+            OutboxPolicy
+        """
+        policy = self.policies.get(topic)
+        if policy is not None:
+            return policy
+        for pattern, policy in self.policies.items():
+            if ('+' in pattern or '#' in pattern) and topic_matches(pattern, topic):
+                return policy
+        return self.default_policy
+
+    # =========================
+    # Queue
+    # =========================
+    def put(
+        self,
+        topic: str,
+        payload: bytes,
+        qos: int = 1,
+        retain: bool = False,
+        policy: Optional[OutboxPolicy] = None,
+        created: Optional[float] = None
+    ) -> bool:
+        """
+        Queue a message
+
+        Args:
+            topic: Full MQTT topic
+            payload: Encoded payload
+            qos: Quality of Service to publish with
+            retain: Retain flag
+            policy: Queueing policy (default: default_policy)
+            created: Creation time (unix, default: now)
+
+        Returns:
+            True if queued (False for 'drop' policy)
+        """
+        policy = policy or self.default_policy
+        if policy.mode == 'drop':
+            return False
+        now = created if created is not None else time.time()
+        expires = now + policy.ttl_sec if policy.ttl_sec is not None else None
+        key = (policy.key or topic) if policy.mode == 'latest' else None
+
+        with self._lock:
+            if key is not None:
+                cur = self._conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM outbox WHERE collapse_key = ?', (key,))
+                n, size = cur.fetchone()
+                if n:
+                    self._conn.execute('DELETE FROM outbox WHERE collapse_key = ?', (key,))
+                    self._depth -= n
+                    self._bytes -= size
+                    self._replaced += n
+            self._conn.execute(
+                'INSERT INTO outbox (topic, payload, qos, retain, created, expires, collapse_key) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (topic, sqlite3.Binary(payload), qos, int(retain), now, expires, key))
+            self._depth += 1
+            self._bytes += len(payload)
+            self._enqueued += 1
+            if self._depth > self.max_messages or self._bytes > self.max_bytes:
+                self._enforce_bounds_locked()
+            self._conn.commit()
+        return True
+
+    def peek(self, after_id: int = 0, limit: int = 50) -> List[OutboxMessage]:
+        """
+        Get the oldest unexpired messages, in order
+
+        Args:
+            after_id: Only messages with id greater than this (already sent)
+            limit: Max messages
+
+        Returns:
+            List of OutboxMessage
+        """
+        self.purge_expired()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, topic, payload, qos, retain, created FROM outbox '
+                'WHERE id > ? ORDER BY id LIMIT ?', (after_id, limit)).fetchall()
+        return [OutboxMessage(r[0], r[1], bytes(r[2]), r[3], bool(r[4]), r[5]) for r in rows]
+
+    def ack(self, message_id: int) -> None:
+        """
+        Remove a delivered message
+
+        Args:
+            message_id: OutboxMessage.id
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT LENGTH(payload) FROM outbox WHERE id = ?',
+                                     (message_id,)).fetchone()
+            if row is None:
+                return  # Replaced by a newer 'latest' message or evicted meanwhile
+            self._conn.execute('DELETE FROM outbox WHERE id = ?', (message_id,))
+            self._conn.commit()
+            self._depth -= 1
+            self._bytes -= row[0]
+            self._acked += 1
+
+    def purge_expired(self) -> int:
+        """
+        Delete messages past their TTL
+
+        Returns:
+            Number of messages deleted
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM outbox '
+                'WHERE expires IS NOT NULL AND expires < ?', (now,)).fetchone()
+            if not row[0]:
+                return 0
+            self._conn.execute('DELETE FROM outbox WHERE expires IS NOT NULL AND expires < ?', (now,))
+            self._conn.commit()
+            self._depth -= row[0]
+            self._bytes -= row[1]
+            self._expired += row[0]
+        logger.debug(f"Outbox: {row[0]} expired message(s) dropped")
+        return row[0]
+
+    def _enforce_bounds_locked(self) -> None:
+        """Evict oldest messages until within max_messages/max_bytes"""
+        now = time.time()
+        expired = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM outbox '
+            'WHERE expires IS NOT NULL AND expires < ?', (now,)).fetchone()
+        if expired[0]:
+            self._conn.execute('DELETE FROM outbox WHERE expires IS NOT NULL AND expires < ?', (now,))
+            self._depth -= expired[0]
+            self._bytes -= expired[1]
+            self._expired += expired[0]
+
+        evicted = 0
+        limit = max(0, self._depth - self.max_messages) + 64
+        rows = self._conn.execute('SELECT id, LENGTH(payload) FROM outbox ORDER BY id LIMIT ?', (limit,))
+        for msg_id, size in rows.fetchall():
+            if self._depth <= self.max_messages and self._bytes <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM outbox WHERE id = ?', (msg_id,))
+            self._depth -= 1
+            self._bytes -= size
+            evicted += 1
+        if evicted:
+            self._evicted += evicted
+            now = time.monotonic()
+            if now - self._evict_logged_at >= 60.0:  # Once a minute during long outages
+                self._evict_logged_at = now
+                logger.warning(f"Outbox full: evicting oldest messages ({self._evicted} total)")
+
+    def _totals(self) -> Tuple[int, int]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM outbox').fetchone()
+        return row[0], row[1]
+
+    # =========================
+    # Stats
+    # =========================
+    def depth(self) -> int:
+        """Number of queued messages"""
+        return self._depth
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get outbox statistics
+
+        Returns:
+            Dictionary with backlog depth/bytes and lifetime counters
+        """
+        with self._lock:
+            oldest = self._conn.execute('SELECT MIN(created) FROM outbox').fetchone()[0]
+            return {
+                'depth': self._depth,
+                'bytes': self._bytes,
+                'oldest_age_sec': round(time.time() - oldest, 1) if oldest else 0.0,
+                'enqueued': self._enqueued,
+                'replaced': self._replaced,
+                'expired': self._expired,
+                'evicted': self._evicted,
+                'delivered': self._acked,
+            }
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
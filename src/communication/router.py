@@ -0,0 +1,515 @@
+"""
+MQTT Topic Router
+Dispatches incoming messages to handlers through a topic-filter trie
+
+paho has a single on_message callback per client. The router keeps every
+subscription in a prefix trie keyed by topic level, so a message is matched
+against all filters ('+' = one level, '#' = remaining levels) in time
+proportional to the topic depth rather than the number of subscriptions.
+Match results are cached per concrete topic.
+
+Each payload is decoded at most once per message and representation, no
+matter how many handlers match; handlers receive the shared decoded value
+and must not mutate it.
+
+Payload modes (per handler):
+    json      handler(topic, value)   Decoded value: JSON (plain text as str),
+                                      or the codec named by a "/@<codec>"
+                                      topic suffix (see codec.py)
+    text      handler(topic, str)
+    bytes     handler(topic, bytes)
+    message   handler(client, userdata, message)   paho-style callback
+
+Slow handlers can be registered with threaded=True: they run on a shared
+worker pool, in arrival order per handler, so they never block the network
+thread or each other.
+
+Example:
+    router = TopicRouter()
+    router.add("frying/+/oil_temp", on_oil_temp)
+    router.add("frying/#", log_everything, decode='bytes', threaded=True)
+    router.dispatch("frying/pot1/oil_temp", b"165.5")
+
+Benchmark (trie vs linear filter scan, no broker needed):
+    python -m src.communication.router --subscriptions 1000
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .codec import decode as codec_decode, split_codec
+
+logger = logging.getLogger(__name__)
+
+DECODE_MODES = ('json', 'text', 'bytes', 'message')
+_UNDECODABLE = object()
+
+
+def validate_filter(topic_filter: str) -> None:
+    """
+    Check MQTT topic filter syntax
+
+    Raises:
+        ValueError: Empty filter, or a wildcard that does not occupy a whole
+                    level ('#' must also be the last level)
+    """
+    if not topic_filter:
+        raise ValueError("Empty topic filter")
+    levels = topic_filter.split('/')
+    for i, level in enumerate(levels):
+        if level == '#':
+            if i != len(levels) - 1:
+                raise ValueError(f"'#' must be the last level: {topic_filter}")
+        elif '#' in level or ('+' in level and level != '+'):
+            raise ValueError(f"Wildcard must occupy a whole level: {topic_filter}")
+
+
+@dataclass(eq=False)
+class Route:
+    """One subscription (returned by TopicRouter.add, used to remove it)"""
+    topic_filter: str
+    handler: Callable
+    decode: str = 'json'
+    qos: int = 1
+    threaded: bool = False
+    seq: int = 0
+    calls: int = 0
+    errors: int = 0
+    busy_sec: float = 0.0
+    _serial: Optional['_SerialQueue'] = field(default=None, repr=False)
+
+
+class _Node:
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.routes: List[Route] = []
+
+
+class _SerialQueue:
+    """Runs one route's calls on the pool, one at a time, in arrival order"""
+
+    def __init__(self, router: 'TopicRouter'):
+        self._router = router
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._running = False
+
+    def submit(self, route: Route, args: tuple) -> None:
+        with self._lock:
+            self._pending.append(args)
+            if self._running:
+                return
+            self._running = True
+        self._router._pool_submit(self._run, route)
+
+    def _run(self, route: Route) -> None:
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                args = self._pending.popleft()
+            self._router._invoke(route, args)
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+
+class TopicRouter:
+    """Topic-filter trie with single-decode fan-out and optional worker pool"""
+
+    def __init__(self, max_workers: int = 4, cache_size: int = 1024):
+        """
+        Initialize router
+
+        Args:
+            max_workers: Worker threads for threaded handlers (pool is
+                         created on first use)
+            cache_size: Max concrete topics with cached match results
+                        (0 = no cache)
+        """
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+
+        self._lock = threading.RLock()
+        self._root = _Node()
+        self._filters: Dict[str, List[Route]] = {}
+        self._cache: Dict[str, Tuple[Route, ...]] = {}
+        self._seq = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        # Statistics
+        self._messages = 0
+        self._unmatched = 0
+        self._decodes = 0
+        self._decode_errors = 0
+        self._dispatch_sec = 0.0
+
+    # =========================
+    # Subscriptions
+    # =========================
+    def add(
+        self,
+        topic_filter: str,
+        handler: Callable,
+        decode: str = 'json',
+        qos: int = 1,
+        threaded: bool = False
+    ) -> Route:
+        """
+        Register a handler for a topic filter
+
+        Args:
+            topic_filter: MQTT topic filter (may contain '+' and '#')
+            handler: Callback (signature depends on decode)
+            decode: Payload mode: 'json', 'text', 'bytes' or 'message'
+            qos: Requested QoS (the broker subscription uses the max per filter)
+            threaded: Run the handler on the worker pool
+
+        Returns:
+            Route
+        """
+        validate_filter(topic_filter)
+        if decode not in DECODE_MODES:
+            raise ValueError(f"Unknown decode mode: {decode}")
+
+        with self._lock:
+            self._seq += 1
+            route = Route(topic_filter, handler, decode=decode, qos=qos, threaded=threaded, seq=self._seq)
+            if threaded:
+                route._serial = _SerialQueue(self)
+            node = self._root
+            for level in topic_filter.split('/'):
+                node = node.children.setdefault(level, _Node())
+            node.routes.append(route)
+            self._filters.setdefault(topic_filter, []).append(route)
+            self._cache = {}
+        return route
+
+    def remove(self, route: Route) -> bool:
+        """
+        Unregister a handler
+
+        Args:
+            route: Route returned by add()
+
+        Returns:
+            True if no other handler uses the same filter (caller may
+            unsubscribe it at the broker)
+        """
+        with self._lock:
+            routes = self._filters.get(route.topic_filter)
+            if not routes or route not in routes:
+                return False
+            routes.remove(route)
+
+            # Remove from the trie, pruning empty nodes
+            path = [self._root]
+            levels = route.topic_filter.split('/')
+            for level in levels:
+                path.append(path[-1].children[level])
+            path[-1].routes.remove(route)
+            for depth in range(len(levels), 0, -1):
+                node = path[depth]
+                if node.routes or node.children:
+                    break
+                del path[depth - 1].children[levels[depth - 1]]
+
+            self._cache = {}
+            if routes:
+                return False
+            del self._filters[route.topic_filter]
+            return True
+
+    def filters(self) -> Dict[str, int]:
+        """
+        Get subscribed filters
+
+        Returns:
+            {topic_filter: max requested qos}
+        """
+        with self._lock:
+            return {f: max(r.qos for r in routes) for f, routes in self._filters.items()}
+
+    def qos_for(self, topic_filter: str) -> int:
+        """Max requested QoS of a filter (0 if not subscribed)"""
+        with self._lock:
+            return max((r.qos for r in self._filters.get(topic_filter, ())), default=0)
+
+    # =========================
+    # Matching
+    # =========================
+    def match(self, topic: str) -> Tuple[Route, ...]:
+        """
+        Find all routes matching a concrete topic
+
+        Args:
+            topic: Topic of a received message
+
+        Returns:
+            Matching routes in registration order
+        """
+        cached = self._cache.get(topic)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            found = []
+            nodes = [self._root]
+            # Topics starting with '$' are not matched by a leading wildcard
+            wildcards = not topic.startswith('$')
+            for level in topic.split('/'):
+                next_nodes = []
+                for node in nodes:
+                    children = node.children
+                    if wildcards:
+                        multi = children.get('#')
+                        if multi is not None:
+                            found.extend(multi.routes)
+                        single = children.get('+')
+                        if single is not None:
+                            next_nodes.append(single)
+                    exact = children.get(level)
+                    if exact is not None:
+                        next_nodes.append(exact)
+                nodes = next_nodes
+                wildcards = True
+                if not nodes:
+                    break
+            for node in nodes:
+                found.extend(node.routes)
+                multi = node.children.get('#')  # "a/#" also matches "a"
+                if multi is not None:
+                    found.extend(multi.routes)
+
+            if len(found) > 1:
+                found.sort(key=lambda r: r.seq)
+            result = tuple(found)
+            if self.cache_size:
+                if len(self._cache) >= self.cache_size:
+                    self._cache = {}
+                self._cache[topic] = result
+        return result
+
+    # =========================
+    # Dispatch
+    # =========================
+    def dispatch(self, topic: str, payload: bytes, message: Any = None,
+                 client: Any = None, userdata: Any = None) -> int:
+        """
+        Deliver a message to every matching handler
+
+        Args:
+            topic: Message topic
+            payload: Raw payload
+            message: Original paho message (for 'message' handlers)
+            client: paho client (for 'message' handlers)
+            userdata: paho userdata (for 'message' handlers)
+
+        Returns:
+            Number of handlers the message was delivered to
+        """
+        start = time.perf_counter()
+        self._messages += 1
+        routes = self.match(topic)
+        if not routes:
+            self._unmatched += 1
+            logger.debug(f"No handler for {topic}")
+            return 0
+
+        decoded: Dict[str, Any] = {}
+        codec = None
+        delivered = 0
+        for route in routes:
+            mode = route.decode
+            if mode == 'message':
+                args = (client, userdata, message)
+            else:
+                if mode not in decoded:
+                    if codec is None:
+                        codec = split_codec(topic)[1]
+                    decoded[mode] = self._decode(mode, payload, decoded, topic, codec)
+                value = decoded[mode]
+                if value is _UNDECODABLE:
+                    continue
+                args = (topic, value)
+
+            if route.threaded:
+                route._serial.submit(route, args)
+            else:
+                self._invoke(route, args)
+            delivered += 1
+
+        self._dispatch_sec += time.perf_counter() - start
+        return delivered
+
+    def _decode(self, mode: str, payload: bytes, decoded: Dict[str, Any], topic: str, codec: str) -> Any:
+        """Decode a payload once per mode (json reuses the decoded text)"""
+        self._decodes += 1
+        try:
+            if mode == 'bytes':
+                return bytes(payload)
+            if codec != 'json':
+                if mode == 'text':
+                    logger.debug(f"Text handler skipped for binary payload on {topic}")
+                    return _UNDECODABLE
+                try:
+                    return codec_decode(payload, codec)
+                except Exception as e:
+                    self._decode_errors += 1
+                    logger.error(f"Undecodable {codec} payload on {topic}: {e}")
+                    return _UNDECODABLE
+            if 'text' not in decoded:
+                decoded['text'] = bytes(payload).decode('utf-8')
+            text = decoded['text']
+            if mode == 'text' or text is _UNDECODABLE:
+                return text
+            try:
+                return json.loads(text)
+            except ValueError:
+                return text  # Plain-text payloads, e.g. "chicken" / "START"
+        except UnicodeDecodeError as e:
+            self._decode_errors += 1
+            logger.error(f"Undecodable payload on {topic}: {e}")
+            decoded['text'] = _UNDECODABLE
+            return _UNDECODABLE
+
+    def _invoke(self, route: Route, args: tuple) -> None:
+        start = time.perf_counter()
+        try:
+            route.handler(*args)
+        except Exception as e:
+            route.errors += 1
+            logger.error(f"Error in handler for {route.topic_filter}: {e}")
+        finally:
+            route.calls += 1
+            route.busy_sec += time.perf_counter() - start
+
+    def _pool_submit(self, fn: Callable, *args) -> None:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="MQTTHandler")
+            pool = self._pool
+        pool.submit(fn, *args)
+
+    # =========================
+    # Stats / lifecycle
+    # =========================
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get dispatch statistics
+
+        Returns:
+            Dictionary with message/decode counters, average dispatch time
+            and per-filter handler stats
+        """
+        n = self._messages
+        with self._lock:
+            routes = [r for rs in self._filters.values() for r in rs]
+        return {
+            'subscriptions': len(routes),
+            'filters': len(self._filters),
+            'messages': n,
+            'unmatched': self._unmatched,
+            'decodes': self._decodes,
+            'decode_errors': self._decode_errors,
+            'avg_dispatch_us': round(self._dispatch_sec / n * 1e6, 1) if n else 0.0,
+            'handlers': [{
+                'filter': r.topic_filter,
+                'calls': r.calls,
+                'errors': r.errors,
+                'avg_ms': round(r.busy_sec / r.calls * 1000, 2) if r.calls else 0.0,
+                'threaded': r.threaded,
+                'pending': r._serial.depth() if r._serial is not None else 0,
+            } for r in routes],
+        }
+
+    def close(self, wait: bool = False) -> None:
+        """Shut down the worker pool (recreated on next threaded dispatch)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+# =========================
+# Benchmark
+# =========================
+def benchmark(subscriptions: int = 1000, messages: int = 20000) -> Dict[str, float]:
+    """
+    Measure dispatch latency with many subscriptions (no broker)
+
+    Subscriptions are a mix of exact topics, '+' and '#' filters over
+    "site/<line>/pot<n>/<sensor>". Compares a linear scan over all filters
+    (one json.loads per matching handler) with the trie, with and without
+    the match cache.
+
+    Args:
+        subscriptions: Number of subscriptions
+        messages: Messages per variant
+
+    Returns:
+        {variant: us_per_msg}
+    """
+    from .outbox import topic_matches
+
+    sensors = ('oil_temp', 'probe_temp', 'food_type', 'control')
+    filters = []
+    for i in range(subscriptions):
+        line, pot, sensor = i % 8, i // 8, sensors[i % len(sensors)]
+        kind = i % 10
+        if kind == 8:
+            filters.append(f"site/+/pot{pot}/{sensor}")
+        elif kind == 9:
+            filters.append(f"site/{line}/pot{pot}/#")
+        else:
+            filters.append(f"site/{line}/pot{pot}/{sensor}")
+    topics = [f"site/{i % 8}/pot{i // 8}/{sensors[i % len(sensors)]}"
+              for i in range(0, subscriptions, max(1, subscriptions // 64))]
+    payload = b'{"value": 165.5, "unit": "C"}'
+
+    def noop(topic, value):
+        pass
+
+    results = {}
+
+    start = time.perf_counter()
+    for k in range(messages):
+        topic = topics[k % len(topics)]
+        for f in filters:
+            if topic_matches(f, topic):
+                noop(topic, json.loads(payload.decode()))
+    results['linear'] = (time.perf_counter() - start) / messages * 1e6
+
+    for name, cache_size in (('trie', 0), ('trie_cached', 1024)):
+        router = TopicRouter(cache_size=cache_size)
+        for f in filters:
+            router.add(f, noop)
+        start = time.perf_counter()
+        for k in range(messages):
+            router.dispatch(topics[k % len(topics)], payload)
+        results[name] = (time.perf_counter() - start) / messages * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MQTT topic router benchmark")
+    parser.add_argument('--subscriptions', type=int, default=1000, help='Number of subscriptions')
+    parser.add_argument('--count', type=int, default=20000, help='Messages per variant')
+    args = parser.parse_args()
+
+    for n in sorted({10, 100, args.subscriptions}):
+        rows = benchmark(n, args.count if n <= 100 else max(1000, args.count // 10))
+        print(f"{n:5d} subscriptions: " +
+              "  ".join(f"{variant} {us:8.2f} us/msg" for variant, us in rows.items()))
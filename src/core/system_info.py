@@ -1,18 +1,54 @@
 """
 System Information Collector
 Gathers comprehensive system information for MQTT metadata
+
+Dynamic metrics (CPU, memory, disk, thermal zones, GPU load) are refreshed
+by a background sampler thread into an immutable snapshot, so
+get_dynamic_info() never sleeps or touches sysfs on the caller's thread
+(e.g. the Tk main loop publishing MQTT).
+
+Example:
+    sys_info = SystemInfo(device_name="Jetson1", location="Kitchen")
+    sys_info.start_sampler(interval=2.0)
+    payload["system_metrics"] = sys_info.get_dynamic_info()  # non-blocking
+    ...
+    sys_info.stop_sampler()
 """
 
+import copy
+import glob
 import socket
 import platform
+import threading
+import time
 import psutil
 import os
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Mapping, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+THERMAL_ZONE_GLOB = '/sys/devices/virtual/thermal/thermal_zone*'
+GPU_TEMP_ZONES = ('thermal_zone0', 'thermal_zone1')
+GPU_LOAD_FILE = '/sys/devices/gpu.0/load'
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """Immutable result of one sampler pass"""
+    timestamp: float          # time.time() of the sample
+    monotonic: float          # time.monotonic() of the sample (for age)
+    data: Mapping[str, Any]   # Read-only view of the dynamic info
+
+    @property
+    def age(self) -> float:
+        """Seconds since the sample was taken"""
+        return max(0.0, time.monotonic() - self.monotonic)
+
+
 class SystemInfo:
     """Collects and caches system information"""
 
@@ -28,6 +64,21 @@ class SystemInfo:
         self._location = location
         self._static_info = self._collect_static_info()
 
+        # Background sampler state
+        self._snapshot: Optional[MetricsSnapshot] = None
+        self._sample_lock = threading.Lock()
+        self._sampler_thread: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        self._sampler_interval = 2.0
+        self._boot_time: Optional[float] = None
+        self._thermal_zones: Optional[List[Tuple[str, str, str]]] = None
+
+        # Prime psutil so later cpu_percent(interval=None) calls are meaningful
+        try:
+            psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+
     def _collect_static_info(self) -> Dict[str, Any]:
         """Collect static system information (doesn't change during runtime)"""
         hostname = socket.gethostname()
@@ -78,73 +129,177 @@ class SystemInfo:
         """Get static system information"""
         return self._static_info.copy()
 
-    def get_dynamic_info(self) -> Dict[str, Any]:
-        """Get dynamic system information (changes during runtime)"""
-        try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-
-            # Memory usage
-            memory = psutil.virtual_memory()
-            memory_info = {
-                "total_mb": round(memory.total / (1024 * 1024), 2),
-                "used_mb": round(memory.used / (1024 * 1024), 2),
-                "percent": memory.percent
-            }
-
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            disk_info = {
-                "total_gb": round(disk.total / (1024 ** 3), 2),
-                "used_gb": round(disk.used / (1024 ** 3), 2),
-                "percent": disk.percent
-            }
-
-            # System uptime
-            boot_time = psutil.boot_time()
-            uptime_seconds = int(psutil.time.time() - boot_time)
-
-            # GPU info (for Jetson)
-            gpu_info = self._get_gpu_info()
-
-            return {
-                "cpu_percent": cpu_percent,
-                "memory": memory_info,
-                "disk": disk_info,
-                "uptime_seconds": uptime_seconds,
-                "gpu": gpu_info
-            }
+    # =========================
+    # Background sampler
+    # =========================
+    def start_sampler(self, interval: float = 2.0) -> None:
+        """
+        Start the background metrics sampler (idempotent)
 
+        Args:
+            interval: Seconds between samples
+        """
+        self._sampler_interval = max(0.2, float(interval))
+        if self._sampler_thread is not None and self._sampler_thread.is_alive():
+            return
+        self._sampler_stop.clear()
+        try:
+            self._refresh()  # First snapshot is available immediately
         except Exception as e:
             logger.error(f"Error collecting dynamic info: {e}")
+        self._sampler_thread = threading.Thread(
+            target=self._sampler_loop, name="SystemInfoSampler", daemon=True)
+        self._sampler_thread.start()
+        logger.info(f"System metrics sampler started (interval={self._sampler_interval}s)")
+
+    def stop_sampler(self, timeout: float = 2.0) -> None:
+        """Stop the background metrics sampler"""
+        self._sampler_stop.set()
+        thread = self._sampler_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        self._sampler_thread = None
+
+    @property
+    def sampler_running(self) -> bool:
+        """True while the background sampler thread is alive"""
+        return self._sampler_thread is not None and self._sampler_thread.is_alive()
+
+    def _sampler_loop(self) -> None:
+        while not self._sampler_stop.wait(self._sampler_interval):
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.error(f"Error collecting dynamic info: {e}")
+
+    def _refresh(self) -> MetricsSnapshot:
+        """Take one sample and publish it as the current snapshot"""
+        with self._sample_lock:
+            data = self._sample()
+            snapshot = MetricsSnapshot(time.time(), time.monotonic(), MappingProxyType(data))
+            self._snapshot = snapshot  # Atomic reference swap
+        return snapshot
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> Optional[MetricsSnapshot]:
+        """
+        Get the latest metrics snapshot
+
+        Args:
+            max_age: If the sampler is not running and the snapshot is older
+                     than this (or missing), sample synchronously
+                     (None = sampler interval)
+
+        Returns:
+            MetricsSnapshot, or None if sampling failed
+        """
+        snapshot = self._snapshot
+        if self.sampler_running and snapshot is not None:
+            return snapshot
+        limit = self._sampler_interval if max_age is None else max_age
+        if snapshot is None or snapshot.age > limit:
+            try:
+                snapshot = self._refresh()
+            except Exception as e:
+                logger.error(f"Error collecting dynamic info: {e}")
+        return snapshot
+
+    # =========================
+    # Collection
+    # =========================
+    def _sample(self) -> Dict[str, Any]:
+        """Collect dynamic system information (runs on the sampler thread)"""
+        # CPU usage since the previous sample (non-blocking)
+        cpu_percent = psutil.cpu_percent(interval=None)
+
+        # Memory usage
+        memory = psutil.virtual_memory()
+        memory_info = {
+            "total_mb": round(memory.total / (1024 * 1024), 2),
+            "used_mb": round(memory.used / (1024 * 1024), 2),
+            "percent": memory.percent
+        }
+
+        # Disk usage
+        disk = psutil.disk_usage('/')
+        disk_info = {
+            "total_gb": round(disk.total / (1024 ** 3), 2),
+            "used_gb": round(disk.used / (1024 ** 3), 2),
+            "percent": disk.percent
+        }
+
+        # System uptime (boot time never changes)
+        if self._boot_time is None:
+            self._boot_time = psutil.boot_time()
+        uptime_seconds = int(time.time() - self._boot_time)
+
+        # Thermal zones + GPU info (for Jetson)
+        thermal = self._read_thermal_zones()
+        gpu_info = self._get_gpu_info(thermal)
+
+        return {
+            "cpu_percent": cpu_percent,
+            "memory": memory_info,
+            "disk": disk_info,
+            "uptime_seconds": uptime_seconds,
+            "thermal": thermal,
+            "gpu": gpu_info
+        }
+
+    def get_dynamic_info(self) -> Dict[str, Any]:
+        """
+        Get dynamic system information (changes during runtime)
+
+        Non-blocking when the sampler is running: returns a copy of the
+        latest snapshot plus its age (`sample_age_sec`).
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is None:
             return {}
+        info = copy.deepcopy(dict(snapshot.data))
+        info["sample_age_sec"] = round(snapshot.age, 2)
+        info["sampled_at"] = snapshot.timestamp
+        return info
+
+    def _read_thermal_zones(self) -> Dict[str, float]:
+        """Read all thermal zones (zone name -> Celsius)"""
+        if self._thermal_zones is None:
+            zones = []
+            for zone_dir in sorted(glob.glob(THERMAL_ZONE_GLOB)):
+                zone = os.path.basename(zone_dir)
+                try:
+                    with open(os.path.join(zone_dir, 'type'), 'r') as f:
+                        zone_type = f.read().strip()
+                except OSError:
+                    zone_type = zone
+                zones.append((zone, zone_type, os.path.join(zone_dir, 'temp')))
+            self._thermal_zones = zones
 
-    def _get_gpu_info(self) -> Dict[str, Any]:
+        temps = {}
+        for zone, zone_type, temp_file in self._thermal_zones:
+            try:
+                with open(temp_file, 'r') as f:
+                    temps[f"{zone}:{zone_type}" if zone_type != zone else zone] = \
+                        round(float(f.read().strip()) / 1000.0, 1)  # Convert to Celsius
+            except (OSError, ValueError):
+                continue
+        return temps
+
+    def _get_gpu_info(self, thermal: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
         """Get GPU information (Jetson-specific)"""
         gpu_info = {}
 
         try:
-            # Try to read Jetson GPU stats
-            # Temperature
-            temp_files = [
-                '/sys/devices/virtual/thermal/thermal_zone0/temp',
-                '/sys/devices/virtual/thermal/thermal_zone1/temp',
-            ]
-
-            temps = []
-            for temp_file in temp_files:
-                if os.path.exists(temp_file):
-                    with open(temp_file, 'r') as f:
-                        temp = float(f.read().strip()) / 1000.0  # Convert to Celsius
-                        temps.append(round(temp, 1))
-
+            # Temperature (max of the first two zones)
+            if thermal is None:
+                thermal = self._read_thermal_zones()
+            temps = [t for name, t in thermal.items() if name.split(':')[0] in GPU_TEMP_ZONES]
             if temps:
                 gpu_info['temperature_c'] = max(temps)
 
             # GPU usage (if available via tegrastats or other means)
             # This is platform-specific and might need adjustment
-            if os.path.exists('/sys/devices/gpu.0/load'):
-                with open('/sys/devices/gpu.0/load', 'r') as f:
+            if os.path.exists(GPU_LOAD_FILE):
+                with open(GPU_LOAD_FILE, 'r') as f:
                     load = int(f.read().strip())
                     gpu_info['load_percent'] = load
 
@@ -5,14 +5,46 @@
 
 import cv2
 import os
+import json
+import time
+import bisect
 import datetime
+import threading
 import numpy as np
-from typing import Optional
-from camera_monitor.camera_base import CameraBase
-from utils import get_timestamp  # ← 추가
+from collections import deque
+from typing import Optional, Tuple, List, Dict, Any, Callable
 
+try:
+    from camera_monitor.camera_base import CameraBase
+    from utils import get_timestamp  # ← 추가
+except ImportError:  # src.monitoring.camera.recorder 로 import 된 경우
+    from .camera_base import CameraBase
+    try:
+        from ...core.utils import get_timestamp
+    except ImportError:  # pytz 미설치
+        def get_timestamp(format_str: str = "%Y%m%d_%H%M%S") -> str:
+            return datetime.datetime.now().strftime(format_str)
 
 
+# 세그먼트 녹화 코덱 프리셋
+# - fourcc: OpenCV VideoWriter (소프트웨어 인코딩)
+# - gst: GStreamer 파이프라인 (OpenCV가 GStreamer 지원으로 빌드된 경우, Jetson 기본)
+VIDEO_CODECS = {
+    'mjpeg': {'fourcc': 'MJPG', 'ext': '.avi'},
+    'mp4v': {'fourcc': 'mp4v', 'ext': '.mp4'},
+    'x264': {
+        'gst': ('appsrc ! videoconvert ! x264enc speed-preset=ultrafast tune=zerolatency '
+                'bitrate={bitrate} key-int-max={gop} ! h264parse ! matroskamux ! filesink location={path}'),
+        'ext': '.mkv',
+    },
+    'gst_mjpeg': {
+        'gst': 'appsrc ! videoconvert ! jpegenc quality={quality} ! avimux ! filesink location={path}',
+        'ext': '.avi',
+    },
+}
+
+INDEX_FILE = "index.jsonl"
+
 
 def create_directories(*dirs) -> None:
     """디렉토리들 생성"""
@@ -20,6 +52,38 @@ def create_directories(*dirs) -> None:
         os.makedirs(directory, exist_ok=True)
 
 
+def open_video_writer(path: str, codec: str, fps: float, resolution: Tuple[int, int],
+                      quality: int = 90, bitrate_kbps: int = 4000) -> Optional[cv2.VideoWriter]:
+    """
+    코덱 프리셋(VIDEO_CODECS) 또는 fourcc 문자열로 VideoWriter 생성
+
+    Args:
+        path: 출력 파일 경로
+        codec: 'mjpeg' / 'mp4v' / 'x264' / 'gst_mjpeg' 또는 fourcc ('XVID' 등)
+        fps: 재생 FPS
+        resolution: (width, height)
+        quality: MJPEG 품질 (0-100)
+        bitrate_kbps: x264 비트레이트
+
+    Returns:
+        cv2.VideoWriter (열기 실패시 None)
+    """
+    preset = VIDEO_CODECS.get(codec, {'fourcc': codec})
+    if 'gst' in preset:
+        pipeline = preset['gst'].format(path=path, quality=quality, bitrate=bitrate_kbps,
+                                        gop=max(1, int(round(fps * 2))))
+        writer = cv2.VideoWriter(pipeline, cv2.CAP_GSTREAMER, 0, fps, resolution, True)
+    else:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*preset['fourcc']), fps, resolution)
+        if writer.isOpened() and preset['fourcc'] == 'MJPG':
+            writer.set(cv2.VIDEOWRITER_PROP_QUALITY, quality)
+
+    if not writer.isOpened():
+        writer.release()
+        return None
+    return writer
+
+
 class MediaRecorder:
     """비디오 녹화 및 스크린샷 관리 클래스"""
     
@@ -266,4 +330,400 @@ class MediaRecorder:
     def __del__(self):
         """소멸자 - 녹화 중이면 정리"""
         if self.is_recording:
-            self.stop_recording()
\ No newline at end of file
+            self.stop_recording()
+
+
+class SegmentedRecorder(MediaRecorder):
+    """
+    고정 길이 세그먼트 비디오 녹화 (프레임별 JPEG 저장 대체)
+
+    - write_frame()은 큐에 넣기만 함 (인코딩/파일 쓰기는 전용 스레드)
+    - segment_sec마다 새 파일: <prefix>_<YYYYmmdd_HHMMSS>_<번호><ext>
+    - index.jsonl: 프레임별 {"segment", "frame", "ts"} (벽시계 시간 -> 세그먼트/프레임 번호)
+
+    예시:
+        rec = SegmentedRecorder("~/AI_Data/StirFryData/pot1/<세션>/<음식>/camera_0",
+                                codec='mjpeg', segment_sec=60, fps=10, resolution=(1280, 720))
+        rec.start_recording()
+        rec.write_frame(frame)
+        rec.stop_recording()
+        frame, entry = SegmentIndex(rec.recording_dir).extract_frame(time.time() - 30)
+    """
+
+    def __init__(self, recording_dir: str,
+                 codec: str = 'mjpeg',
+                 segment_sec: float = 60.0,
+                 fps: float = 10.0,
+                 resolution: Optional[Tuple[int, int]] = None,
+                 quality: int = 90,
+                 bitrate_kbps: int = 4000,
+                 prefix: str = "segment",
+                 max_queue: int = 32,
+                 on_segment_closed: Optional[Callable[[str, int], None]] = None,
+                 camera: Optional[CameraBase] = None):
+        """
+        세그먼트 레코더 초기화
+
+        Args:
+            recording_dir: 세그먼트/인덱스 저장 디렉토리
+            codec: VIDEO_CODECS 프리셋 이름 또는 fourcc
+            segment_sec: 세그먼트 길이 (초, 벽시계 기준)
+            fps: 비디오 재생 FPS (실제 입력 간격은 index.jsonl의 ts 사용)
+            resolution: 저장 해상도 (None이면 첫 프레임 크기)
+            quality: MJPEG 품질
+            bitrate_kbps: x264 비트레이트
+            prefix: 세그먼트 파일명 접두사
+            max_queue: 대기 프레임 최대 개수 (가득 차면 가장 오래된 프레임 버림)
+            on_segment_closed: callback(경로, 바이트) - 세그먼트 파일 완성 시
+            camera: 카메라 객체 (프레임을 직접 넣는 경우 None)
+        """
+        recording_dir = os.path.expanduser(recording_dir)
+        super().__init__(camera, recording_dir=recording_dir, screenshot_dir=recording_dir)
+        self.codec = codec
+        self.segment_sec = segment_sec
+        self.fps = fps
+        self.resolution = tuple(resolution) if resolution else None
+        self.quality = quality
+        self.bitrate_kbps = bitrate_kbps
+        self.prefix = prefix
+        self.max_queue = max(1, int(max_queue))
+        self.on_segment_closed = on_segment_closed
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._index_file = None
+
+        # 현재 세그먼트
+        self._segment_path = ""
+        self._segment_no = 0
+        self._segment_start = 0.0
+        self._segment_frames = 0
+        self._last_ts = 0.0
+
+        # 통계
+        self.segments: List[Dict[str, Any]] = []
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.recording_dir, INDEX_FILE)
+
+    def start_recording(self, filename: Optional[str] = None,
+                        codec: Optional[str] = None, fps: Optional[int] = None) -> bool:
+        """
+        세그먼트 녹화 시작 (filename은 세그먼트 접두사로 사용)
+
+        Returns:
+            bool: 녹화 시작 성공 여부
+        """
+        if self.is_recording:
+            print("이미 녹화 중입니다.")
+            return False
+
+        if filename:
+            self.prefix = os.path.splitext(filename)[0]
+        if codec:
+            self.codec = codec
+        if fps:
+            self.fps = fps
+
+        self._index_file = open(self.index_path, 'a', encoding='utf-8')
+        self.is_recording = True
+        self.current_filename = self.recording_dir
+        self._thread = threading.Thread(target=self._writer_loop, name=f"segments-{self.prefix}", daemon=True)
+        self._thread.start()
+        print(f"세그먼트 녹화 시작: {self.recording_dir} ({self.codec}, {self.segment_sec:.0f}초 단위)")
+        return True
+
+    def write_frame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """
+        프레임을 녹화 큐에 추가 (블로킹 없음)
+
+        Args:
+            frame: BGR 프레임 (넣은 뒤 수정하지 말 것)
+            timestamp: 캡처 시각 (unix time, 기본: 현재)
+
+        Returns:
+            bool: 큐 추가 여부
+        """
+        if not self.is_recording or frame is None:
+            return False
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.frames_dropped += 1
+            self._queue.append((timestamp if timestamp is not None else time.time(), frame))
+            self._cond.notify()
+        return True
+
+    def stop_recording(self, timeout: float = 10.0) -> Optional[str]:
+        """
+        대기 프레임을 모두 기록하고 녹화 중지
+
+        Returns:
+            str: 인덱스 파일 경로 (녹화 중이 아니면 None)
+        """
+        if not self.is_recording:
+            return None
+
+        with self._cond:
+            self.is_recording = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+        if self._index_file:
+            self._index_file.close()
+            self._index_file = None
+        self.current_filename = ""
+
+        print(f"세그먼트 녹화 중지: {self.frames_written}프레임, 세그먼트 {len(self.segments)}개"
+              + (f", 버림 {self.frames_dropped}" if self.frames_dropped else ""))
+        return self.index_path
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and self.is_recording:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                ts, frame = self._queue.popleft()
+            try:
+                self._write(ts, frame)
+            except Exception as e:
+                print(f"프레임 기록 실패: {e}")
+        self._close_segment()
+
+    def _write(self, ts: float, frame: np.ndarray) -> None:
+        if self.resolution is None:
+            self.resolution = (frame.shape[1], frame.shape[0])
+        if (frame.shape[1], frame.shape[0]) != self.resolution:
+            frame = cv2.resize(frame, self.resolution, interpolation=cv2.INTER_AREA)
+
+        if self.video_writer is None or ts - self._segment_start >= self.segment_sec:
+            self._close_segment()
+            self._open_segment(ts)
+
+        self.video_writer.write(frame)
+        self._index_file.write(json.dumps({
+            'segment': os.path.basename(self._segment_path),
+            'frame': self._segment_frames,
+            'ts': round(ts, 3),
+        }) + '\n')
+        self._segment_frames += 1
+        self._last_ts = ts
+        self.frames_written += 1
+
+    def _open_segment(self, ts: float) -> None:
+        self._segment_no += 1
+        stamp = datetime.datetime.fromtimestamp(ts).strftime("%Y%m%d_%H%M%S")
+
+        for codec in (self.codec, 'mjpeg'):
+            ext = VIDEO_CODECS.get(codec, {}).get('ext', '.avi')
+            path = os.path.join(self.recording_dir, f"{self.prefix}_{stamp}_{self._segment_no:04d}{ext}")
+            writer = open_video_writer(path, codec, self.fps, self.resolution,
+                                       quality=self.quality, bitrate_kbps=self.bitrate_kbps)
+            if writer is not None:
+                break
+            if codec != 'mjpeg':
+                print(f"비디오 인코더 열기 실패: {codec} -> mjpeg 사용")
+                self.codec = 'mjpeg'
+        else:
+            raise RuntimeError(f"VideoWriter를 열 수 없습니다: {path}")
+
+        self.video_writer = writer
+        self._segment_path = path
+        self._segment_start = ts
+        self._segment_frames = 0
+
+    def _close_segment(self) -> None:
+        if self.video_writer is None:
+            return
+        self.video_writer.release()
+        self.video_writer = None
+        self._index_file.flush()
+
+        size = os.path.getsize(self._segment_path) if os.path.exists(self._segment_path) else 0
+        self.segments.append({
+            'file': os.path.basename(self._segment_path),
+            'frames': self._segment_frames,
+            'start_ts': round(self._segment_start, 3),
+            'end_ts': round(self._last_ts, 3),
+            'bytes': size,
+        })
+        if self.on_segment_closed:
+            try:
+                self.on_segment_closed(self._segment_path, size)
+            except Exception as e:
+                print(f"세그먼트 콜백 오류: {e}")
+
+    def get_recording_info(self) -> dict:
+        """현재 녹화 정보 반환 (세그먼트 목록 포함)"""
+        info = super().get_recording_info()
+        info.update({
+            'codec': self.codec,
+            'segment_sec': self.segment_sec,
+            'fps': self.fps,
+            'resolution': list(self.resolution) if self.resolution else None,
+            'index': INDEX_FILE,
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'segments': list(self.segments),
+        })
+        return info
+
+
+def _parse_time(value: Any) -> Optional[float]:
+    """'YYYY-mm-dd HH:MM:SS[.fff]' (로컬 시간) 또는 숫자 -> unix time"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.datetime.strptime(value, fmt).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class SegmentIndex:
+    """
+    세그먼트 녹화 인덱스 (index.jsonl) 조회
+
+    벽시계 시간 -> (세그먼트, 프레임 번호) 변환, 가장 가까운 프레임 추출
+    """
+
+    def __init__(self, recording_dir: str):
+        """
+        Args:
+            recording_dir: SegmentedRecorder 저장 디렉토리 (index.jsonl 위치)
+        """
+        self.recording_dir = os.path.expanduser(recording_dir)
+        self.entries: List[Dict[str, Any]] = []
+        path = os.path.join(self.recording_dir, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # 중단된 마지막 줄
+        self.entries.sort(key=lambda e: e['ts'])
+        self._ts = [e['ts'] for e in self.entries]
+        self._cap = None
+        self._cap_segment = None
+        self._cap_pos = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def locate(self, timestamp: Any) -> Optional[Dict[str, Any]]:
+        """
+        가장 가까운 프레임의 인덱스 항목
+
+        Args:
+            timestamp: unix time 또는 'YYYY-mm-dd HH:MM:SS[.fff]'
+
+        Returns:
+            {"segment", "frame", "ts"} (인덱스가 비었으면 None)
+        """
+        ts = _parse_time(timestamp)
+        if ts is None or not self.entries:
+            return None
+        i = bisect.bisect_left(self._ts, ts)
+        if i == len(self._ts) or (i > 0 and ts - self._ts[i - 1] <= self._ts[i] - ts):
+            i -= 1
+        return self.entries[i]
+
+    def map_events(self, events: List[Dict[str, Any]], time_field: str = 'timestamp') -> List[Dict[str, Any]]:
+        """
+        metadata.json 이벤트에 세그먼트/프레임 번호 추가
+
+        Returns:
+            이벤트 복사본 (segment, frame, frame_ts 필드 추가)
+        """
+        mapped = []
+        for event in events:
+            event = dict(event)
+            entry = self.locate(event.get(time_field))
+            if entry is not None:
+                event.update(segment=entry['segment'], frame=entry['frame'], frame_ts=entry['ts'])
+            mapped.append(event)
+        return mapped
+
+    def read_frame(self, entry: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        인덱스 항목의 프레임 디코딩
+
+        같은 세그먼트에서 앞으로 진행하는 조회는 열린 파일을 재사용 (순차 추출이 빠름)
+        """
+        segment, target = entry['segment'], entry['frame']
+        if self._cap is None or self._cap_segment != segment or target < self._cap_pos:
+            self.close()
+            self._cap = cv2.VideoCapture(os.path.join(self.recording_dir, segment))
+            self._cap_segment = segment
+            self._cap_pos = 0
+            if not self._cap.isOpened():
+                self.close()
+                return None
+            # 탐색 지원 코덱(MJPEG)은 바로 이동, 아니면 순차 grab
+            if target and self._cap.set(cv2.CAP_PROP_POS_FRAMES, target) and \
+                    int(self._cap.get(cv2.CAP_PROP_POS_FRAMES)) == target:
+                self._cap_pos = target
+
+        while self._cap_pos < target:
+            if not self._cap.grab():
+                return None
+            self._cap_pos += 1
+
+        ret, frame = self._cap.read()
+        if not ret:
+            return None
+        self._cap_pos += 1
+        return frame
+
+    def extract_frame(self, timestamp: Any) -> Tuple[Optional[np.ndarray], Optional[Dict[str, Any]]]:
+        """
+        시간에 가장 가까운 프레임 추출
+
+        Returns:
+            (프레임, 인덱스 항목) - 없으면 (None, None)
+        """
+        entry = self.locate(timestamp)
+        if entry is None:
+            return None, None
+        return self.read_frame(entry), entry
+
+    def close(self) -> None:
+        if self._cap is not None:
+            self._cap.release()
+        self._cap = None
+        self._cap_segment = None
+        self._cap_pos = 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="세그먼트 녹화에서 시간에 가장 가까운 프레임 추출")
+    parser.add_argument("recording_dir", help="index.jsonl이 있는 디렉토리 (예: .../camera_0)")
+    parser.add_argument("times", nargs="+", help="unix time 또는 'YYYY-mm-dd HH:MM:SS[.fff]'")
+    parser.add_argument("-o", "--output-dir", default=".", help="JPEG 저장 디렉토리")
+    args = parser.parse_args()
+
+    index = SegmentIndex(args.recording_dir)
+    print(f"인덱스: {len(index)}프레임")
+    os.makedirs(args.output_dir, exist_ok=True)
+    for value in args.times:
+        frame, entry = index.extract_frame(float(value) if value.replace('.', '', 1).isdigit() else value)
+        if frame is None:
+            print(f"{value}: 프레임 없음")
+            continue
+        out = os.path.join(args.output_dir, f"{os.path.splitext(entry['segment'])[0]}_f{entry['frame']:05d}.jpg")
+        cv2.imwrite(out, frame)
+        print(f"{value} -> {entry['segment']} #{entry['frame']} "
+              f"({datetime.datetime.fromtimestamp(entry['ts']):%H:%M:%S.%f}) -> {out}")
+    index.close()
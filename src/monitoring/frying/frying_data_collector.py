@@ -11,7 +11,6 @@ import os
 import sys
 import json
 import time
-import cv2
 import numpy as np
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
@@ -29,6 +28,13 @@ except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from monitoring.camera import CameraBase
 
+# 백그라운드 이미지 저장 (캡처 루프에서 인코딩/쓰기 분리)
+try:
+    from ...storage import FrameSink, create_encoder
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from storage import FrameSink, create_encoder
+
 # Utility function for timestamps
 def get_timestamp(fmt: str = "%Y%m%d_%H%M%S") -> str:
     """Get formatted timestamp"""
@@ -118,13 +124,20 @@ class FryingDataCollector:
                  base_dir: str = "frying_dataset",
                  camera_index: int = 0,
                  resolution: Tuple[int, int] = None,
-                 fps: int = 1):  # 1초에 1장 (데이터 수집용)
+                 fps: int = 1,  # 1초에 1장 (데이터 수집용)
+                 writer_workers: int = 2,
+                 writer_queue_size: int = 64,
+                 encoder=None):
         """
         Args:
             base_dir: 데이터 저장 기본 디렉토리
             camera_index: 카메라 인덱스
             resolution: 해상도 (None이면 config에서 읽음)
             fps: 초당 수집 프레임 수 (데이터 저장 간격)
+            writer_workers: 이미지 저장 스레드 수
+            writer_queue_size: 저장 대기열 크기 (가득 차면 캡처 루프가 잠시 대기)
+            encoder: 이미지 인코더 설정 ("png", {"backend": "turbojpeg", "quality": 90} 등,
+                     None이면 OpenCV JPEG 95)
         """
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(exist_ok=True)
@@ -152,6 +165,16 @@ class FryingDataCollector:
         
         # 센서 인터페이스
         self.sensors = SensorInterface(simulate=True)
+
+        # 이미지 저장기 (학습 데이터는 버리지 않도록 block 정책)
+        self.frame_sink = FrameSink(
+            workers=writer_workers,
+            max_queue=writer_queue_size,
+            policy='block',
+            name='frying_collector'
+        )
+        self.frame_sink.start()
+        self.encoder = create_encoder(encoder or {'backend': 'opencv_jpeg', 'quality': 95})  # cv2.imwrite 기본 품질
         
         # 현재 세션
         self.current_session: Optional[SessionData] = None
@@ -233,6 +256,7 @@ class FryingDataCollector:
         """데이터 수집 루프 (별도 스레드)"""
         frame_interval = 1.0 / self.fps
         frame_count = 0
+        queue_full = False  # 대기열 가득 참 경고는 연속 구간마다 한 번만
         
         while not self.stop_event.is_set():
             start_time = time.time()
@@ -245,27 +269,35 @@ class FryingDataCollector:
                 
                 # 이미지 저장
                 timestamp_str = f"t{frame_count:04d}"
-                image_filename = f"{timestamp_str}.jpg"
+                image_filename = f"{timestamp_str}{self.encoder.extension}"
                 image_path = self.current_session.session_id + f"/images/{image_filename}"
                 full_path = self.base_dir / image_path
                 
-                cv2.imwrite(str(full_path), frame)
-                
-                # 프레임 데이터 추가
-                frame_data = FrameData(
-                    timestamp=time.time(),
-                    image_path=image_path,
-                    sensor_data=sensor_data,
-                    is_complete=False  # 나중에 라벨링
-                )
-                
-                self.current_session.frames.append(frame_data)
-                frame_count += 1
-                self.stats['total_frames'] += 1
-                
-                # 상태 출력 (5초마다)
-                if frame_count % (self.fps * 5) == 0:
-                    self._print_status(frame_count, sensor_data)
+                if not self.frame_sink.submit(str(full_path), frame,
+                                              encoder=self.encoder,
+                                              session=self.current_session.session_id):
+                    # 건너뛰어도 아래 FPS 유지 대기는 그대로 (busy loop 방지)
+                    if not queue_full:
+                        print(f"⚠️ 프레임 저장 대기열 가득 참 - 건너뜀: {image_filename}")
+                    queue_full = True
+                else:
+                    queue_full = False
+                    
+                    # 프레임 데이터 추가
+                    frame_data = FrameData(
+                        timestamp=time.time(),
+                        image_path=image_path,
+                        sensor_data=sensor_data,
+                        is_complete=False  # 나중에 라벨링
+                    )
+                    
+                    self.current_session.frames.append(frame_data)
+                    frame_count += 1
+                    self.stats['total_frames'] += 1
+                    
+                    # 상태 출력 (5초마다)
+                    if frame_count % (self.fps * 5) == 0:
+                        self._print_status(frame_count, sensor_data)
                     
             # FPS 유지
             elapsed = time.time() - start_time
@@ -333,6 +365,9 @@ class FryingDataCollector:
         
         if self.collect_thread:
             self.collect_thread.join()
+
+        # 대기 중인 이미지 저장 완료까지 대기
+        self.frame_sink.flush(timeout=30.0)
             
         self.current_session.end_time = time.time()
         
@@ -419,6 +454,7 @@ class FryingDataCollector:
         """리소스 정리"""
         if self.is_collecting:
             self.stop_session()
+        self.frame_sink.stop(drain=True)
         self.camera.release()
         
 
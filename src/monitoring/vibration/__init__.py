@@ -9,4 +9,26 @@ from .vibration_detector import VibrationDetector
 from .rs485_sensor import RS485VibrationSensor
 from .vibration_analyzer import VibrationAnalyzer
 
-__all__ = ['VibrationDetector', 'RS485VibrationSensor', 'VibrationAnalyzer']
+# Imported on first access: these modules also run as
+# `python -m src.monitoring.vibration.<module>`, which must not find them
+# already imported by the package (runpy RuntimeWarning)
+_LAZY_EXPORTS = {
+    'TelemetryWindow': '.telemetry_window',
+    'PollScheduler': '.poll_scheduler',
+    'SampleRing': '.spectrum',
+    'PeakTracker': '.spectrum',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['VibrationDetector', 'RS485VibrationSensor', 'VibrationAnalyzer', 'TelemetryWindow', 'PollScheduler',
+           'SampleRing', 'PeakTracker']
@@ -0,0 +1,380 @@
+"""
+Adaptive Modbus Poll Scheduler
+Per-unit polling on a shared RS-485 bus
+
+A half-duplex RS-485 bus carries one request/response at a time, so units
+cannot be read in parallel. Instead of a fixed sequential round, each unit
+gets its own target rate and next-due time, and the scheduler always serves
+the most overdue unit:
+
+- Healthy units are polled at their own target rate (earliest deadline first;
+  if the bus cannot keep up, all healthy units slow down evenly)
+- A failing unit is retried with exponential backoff and only costs bus time
+  when its retry is due, so it never stalls the others
+- A unit silent for `restart_after_sec` is flagged for a sensor restart and
+  then held off for `restart_settle_sec` (instead of sleeping the whole loop)
+- Consecutive frames are separated by the Modbus RTU 3.5-character gap
+
+Per-unit response time (EWMA), error rate and achieved Hz are tracked for logs.
+
+Example:
+    scheduler = PollScheduler([0x50, 0x51, 0x52], target_hz=15.0,
+                              frame_gap_sec=modbus_frame_gap(115200))
+    while running:
+        uid, wait = scheduler.next_unit()
+        if wait > 0:
+            time.sleep(wait)
+            continue
+        t0 = time.time()
+        try:
+            regs = read(uid)
+            scheduler.record_success(uid, t0, time.time())
+        except ModbusIOException:
+            scheduler.record_failure(uid, t0, time.time())
+
+Sequential loop vs scheduler with one dead unit (simulated bus, no hardware):
+    python -m src.monitoring.vibration.poll_scheduler --duration 60
+"""
+
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def modbus_frame_gap(baud: int, bytesize: int = 8, parity: str = 'N', stopbits: int = 1) -> float:
+    """
+    Modbus RTU inter-frame gap (3.5 character times)
+
+    Above 19200 baud the Modbus serial line spec fixes the gap at 1.75 ms,
+    since 3.5 characters would be shorter than typical UART/USB latency.
+
+    Args:
+        baud: Baud rate
+        bytesize: Data bits
+        parity: 'N', 'E' or 'O'
+        stopbits: Stop bits
+
+    Returns:
+        Gap in seconds
+    """
+    if baud > 19200:
+        return 0.00175
+    bits_per_char = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+    return 3.5 * bits_per_char / float(baud)
+
+
+@dataclass
+class UnitState:
+    """Polling state of one Modbus unit"""
+    uid: int
+    target_hz: float
+    next_due: float = 0.0
+    ok: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    backoff_sec: float = 0.0
+    rtt_ewma: float = 0.0       # Request -> response (seconds)
+    error_ewma: float = 0.0     # Share of failed reads
+    last_ok: float = 0.0
+    last_restart: float = float('-inf')
+    restarts: int = 0
+    ok_times: deque = field(default_factory=lambda: deque(maxlen=512))
+
+    @property
+    def period(self) -> float:
+        return 1.0 / self.target_hz if self.target_hz > 0 else float('inf')
+
+
+class PollScheduler:
+    """Earliest-deadline-first Modbus polling with per-unit backoff"""
+
+    def __init__(
+        self,
+        unit_ids: Iterable[int],
+        target_hz: Union[float, Dict[int, float]] = 15.0,
+        frame_gap_sec: float = 0.00175,
+        backoff_min_sec: float = 0.2,
+        backoff_max_sec: float = 5.0,
+        restart_after_sec: float = 3.0,
+        restart_settle_sec: float = 1.0,
+        rate_window_sec: float = 5.0,
+        smoothing: float = 0.1,
+        now: Optional[float] = None
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            unit_ids: Modbus unit IDs on the bus
+            target_hz: Poll rate per unit (one value for all, or {uid: hz})
+            frame_gap_sec: Minimum silence between frames (modbus_frame_gap())
+            backoff_min_sec: First retry delay after a failed read
+            backoff_max_sec: Max retry delay (doubles per consecutive failure)
+            restart_after_sec: Silence before a unit is flagged for restart
+            restart_settle_sec: Hold-off after a restart command
+            rate_window_sec: Window for achieved Hz
+            smoothing: EWMA factor for response time / error rate
+            now: Start time (default: time.time())
+        """
+        now = time.time() if now is None else now
+        self.frame_gap_sec = frame_gap_sec
+        self.backoff_min_sec = backoff_min_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.restart_after_sec = restart_after_sec
+        self.restart_settle_sec = restart_settle_sec
+        self.rate_window_sec = rate_window_sec
+        self.smoothing = smoothing
+        self.bus_free_at = now
+        self.units: Dict[int, UnitState] = {}
+        for uid in unit_ids:
+            hz = target_hz.get(uid, 0.0) if isinstance(target_hz, dict) else target_hz
+            self.units[uid] = UnitState(uid, float(hz), next_due=now, last_ok=now)
+
+    # =========================
+    # Scheduling
+    # =========================
+    def next_unit(self, now: Optional[float] = None) -> Tuple[int, float]:
+        """
+        Pick the unit to poll next
+
+        Args:
+            now: Current time (default: time.time())
+
+        Returns:
+            (uid, wait_sec) - poll the unit once wait_sec <= 0; otherwise
+            sleep (at most) wait_sec and ask again
+        """
+        now = time.time() if now is None else now
+        unit = min(self.units.values(), key=lambda u: u.next_due)
+        return unit.uid, max(unit.next_due, self.bus_free_at) - now
+
+    def is_failing(self, uid: int) -> bool:
+        """True while the unit's last read failed (probe with a single try)"""
+        return self.units[uid].consecutive_errors > 0
+
+    def record_success(self, uid: int, t_request: float, t_response: float) -> None:
+        """
+        Record a good read
+
+        Args:
+            uid: Unit ID
+            t_request: Time the request was sent
+            t_response: Time the response was parsed
+        """
+        u = self.units[uid]
+        self.bus_free_at = t_response + self.frame_gap_sec
+        rtt = t_response - t_request
+        a = self.smoothing
+        u.rtt_ewma = rtt if u.ok == 0 else (1 - a) * u.rtt_ewma + a * rtt
+        u.error_ewma *= (1 - a)
+        u.ok += 1
+        u.ok_times.append(t_response)
+        u.last_ok = t_response
+        if u.consecutive_errors:
+            logger.info(f"Unit 0x{uid:02X} recovered after {u.consecutive_errors} failed reads")
+        u.consecutive_errors = 0
+        u.backoff_sec = 0.0
+        # Fixed cadence; after a stall, skip missed slots instead of bursting to catch up
+        u.next_due += u.period
+        if u.next_due < t_response - u.period:
+            u.next_due = t_response
+
+    def record_failure(self, uid: int, t_request: float, t_response: float) -> float:
+        """
+        Record a failed read and schedule the retry with exponential backoff
+
+        Args:
+            uid: Unit ID
+            t_request: Time the request was sent
+            t_response: Time the failure was detected (timeout end)
+
+        Returns:
+            Backoff before the next attempt (seconds)
+        """
+        u = self.units[uid]
+        self.bus_free_at = t_response + self.frame_gap_sec
+        a = self.smoothing
+        u.error_ewma = (1 - a) * u.error_ewma + a
+        u.errors += 1
+        u.consecutive_errors += 1
+        u.backoff_sec = min(self.backoff_max_sec,
+                            self.backoff_min_sec * (2 ** (u.consecutive_errors - 1)))
+        u.next_due = t_response + u.backoff_sec
+        return u.backoff_sec
+
+    def needs_restart(self, uid: int, now: Optional[float] = None) -> bool:
+        """True if the unit has been silent long enough for a restart command"""
+        now = time.time() if now is None else now
+        u = self.units[uid]
+        return (now - u.last_ok > self.restart_after_sec
+                and now - u.last_restart > max(self.restart_after_sec, u.backoff_sec))
+
+    def mark_restarted(self, uid: int, now: Optional[float] = None) -> None:
+        """Hold the unit off while it reboots (other units keep polling)"""
+        now = time.time() if now is None else now
+        u = self.units[uid]
+        u.last_restart = now
+        u.restarts += 1
+        u.next_due = max(u.next_due, now + self.restart_settle_sec)
+
+    # =========================
+    # Statistics
+    # =========================
+    def achieved_hz(self, uid: int, now: Optional[float] = None) -> float:
+        """Good reads per second over the last rate_window_sec"""
+        now = time.time() if now is None else now
+        times = self.units[uid].ok_times
+        start = now - self.rate_window_sec
+        count = sum(1 for t in times if t >= start)
+        return count / self.rate_window_sec
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-unit statistics
+
+        Returns:
+            {"0x50": {"target_hz", "achieved_hz", "rtt_ms", "error_rate",
+                      "ok", "errors", "backoff_sec", "restarts"}}
+        """
+        now = time.time() if now is None else now
+        return {f"0x{u.uid:02X}": {
+            'target_hz': u.target_hz,
+            'achieved_hz': round(self.achieved_hz(u.uid, now), 2),
+            'rtt_ms': round(u.rtt_ewma * 1000, 1),
+            'error_rate': round(u.error_ewma, 3),
+            'ok': u.ok,
+            'errors': u.errors,
+            'backoff_sec': round(u.backoff_sec, 2),
+            'restarts': u.restarts,
+        } for u in self.units.values()}
+
+    def format_stats(self, now: Optional[float] = None) -> str:
+        """One-line summary, e.g. "0x50 15.0/15Hz 6ms, 0x51 0.0/15Hz err 100% backoff 5.0s" """
+        parts = []
+        for key, s in self.get_stats(now).items():
+            part = f"{key} {s['achieved_hz']:.1f}/{s['target_hz']:g}Hz {s['rtt_ms']:.0f}ms"
+            if s['error_rate'] >= 0.01:
+                part += f" err {s['error_rate'] * 100:.0f}%"
+            if s['backoff_sec']:
+                part += f" backoff {s['backoff_sec']:.1f}s"
+            parts.append(part)
+        return ", ".join(parts)
+
+
+def parse_poll_rates(value: Union[float, Dict[str, float]], unit_ids: Iterable[int]) -> Dict[int, float]:
+    """
+    Parse a poll-rate config value
+
+    Args:
+        value: Hz for every unit, or {"0x50": hz, ...} (missing units use
+               the "default" key or 15 Hz)
+        unit_ids: Unit IDs
+
+    Returns:
+        {uid: hz}
+    """
+    if not isinstance(value, dict):
+        return {uid: float(value) for uid in unit_ids}
+    rates = {}
+    for key, hz in value.items():
+        if key == 'default':
+            continue
+        rates[int(key, 16) if isinstance(key, str) else int(key)] = float(hz)
+    default = float(value.get('default', 15.0))
+    return {uid: rates.get(uid, default) for uid in unit_ids}
+
+
+# =========================
+# Simulation
+# =========================
+def simulate(duration_sec: float = 60.0, units: int = 3, target_hz: float = 15.0,
+             rtt_sec: float = 0.008, timeout_sec: float = 0.15, retry_read: int = 2,
+             dead_units: int = 1, baud: int = 115200) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the sequential loop with the scheduler on a simulated bus
+
+    The sequential model follows the original collector_loop: at most
+    units * target_hz (POLL_HZ_TOTAL) cycles per second, each reading every
+    unit in turn (RETRY_READ tries with a 10 ms pause), reopening the port
+    after a failed unit (0.2 s) and, while a unit has been silent for 3 s,
+    sending a restart and sleeping 1.2 s.
+
+    Args:
+        duration_sec: Simulated run length
+        units: Units on the bus
+        target_hz: Poll rate per unit (sequential: units * target_hz cycles/s)
+        rtt_sec: Response time of a healthy unit
+        timeout_sec: Read timeout (dead units)
+        retry_read: Tries per read in the sequential loop
+        dead_units: Units that never answer (the last ones)
+        baud: Baud rate (frame gap)
+
+    Returns:
+        {"sequential": {"0x50": hz, ...}, "scheduler": {...}}
+    """
+    uids = [0x50 + i for i in range(units)]
+    dead = set(uids[units - dead_units:]) if dead_units else set()
+    gap = modbus_frame_gap(baud)
+    write_cost = timeout_sec  # Restart command to a dead unit times out too
+
+    # Sequential loop
+    t = 0.0
+    ok = {uid: 0 for uid in uids}
+    last_ok = {uid: 0.0 for uid in uids}
+    poll_dt = 1.0 / (target_hz * units)
+    while t < duration_sec:
+        t_cycle = t
+        for uid in uids:
+            if uid in dead:
+                t += retry_read * (timeout_sec + 0.01) + 0.2
+            else:
+                t += rtt_sec
+                ok[uid] += 1
+                last_ok[uid] = t
+            if t - last_ok[uid] > 3.0:
+                t += write_cost + 0.05 + 1.0 + 0.2
+        t = max(t, t_cycle + poll_dt)
+    sequential = {f"0x{uid:02X}": round(ok[uid] / duration_sec, 2) for uid in uids}
+
+    # Scheduler
+    scheduler = PollScheduler(uids, target_hz=target_hz, frame_gap_sec=gap, now=0.0)
+    t = 0.0
+    while t < duration_sec:
+        uid, wait = scheduler.next_unit(t)
+        if wait > 0:
+            t += wait
+            continue
+        t0 = t
+        if uid in dead:
+            tries = 1 if scheduler.is_failing(uid) else retry_read
+            t += tries * timeout_sec
+            scheduler.record_failure(uid, t0, t)
+            if scheduler.needs_restart(uid, t):
+                t += write_cost
+                scheduler.mark_restarted(uid, t)
+        else:
+            t += rtt_sec
+            scheduler.record_success(uid, t0, t)
+    counts = {u.uid: u.ok for u in scheduler.units.values()}
+    return {'sequential': sequential,
+            'scheduler': {f"0x{uid:02X}": round(counts[uid] / duration_sec, 2) for uid in uids}}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sequential vs scheduled Modbus polling (simulated bus)")
+    parser.add_argument('--duration', type=float, default=60.0, help='Simulated seconds')
+    parser.add_argument('--target-hz', type=float, default=15.0, help='Poll rate per unit')
+    parser.add_argument('--dead', type=int, default=1, help='Units that never answer')
+    parser.add_argument('--rtt-ms', type=float, default=8.0, help='Healthy response time (ms)')
+    args = parser.parse_args()
+
+    result = simulate(args.duration, target_hz=args.target_hz, dead_units=args.dead,
+                      rtt_sec=args.rtt_ms / 1000.0)
+    for name, rates in result.items():
+        print(f"{name:10s} " + "  ".join(f"{uid} {hz:5.2f} Hz" for uid, hz in rates.items()))
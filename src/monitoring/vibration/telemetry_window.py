@@ -0,0 +1,289 @@
+"""
+Windowed Vibration Telemetry
+
+Turns per-sample sensor readings (~15 Hz per WitMotion unit) into fixed
+time windows before they are published over MQTT. Each closed window carries
+per-channel min / max / mean / RMS / peak frequency and the sample count, so
+the robot PC receives one small message per unit per window instead of every
+sample.
+
+Raw samples are only forwarded while a unit is flagged (fault or anomaly,
+from check_fault()/check_anomaly()) and for `raw_hold_sec` after the flag
+clears, so the event itself is still available at full rate.
+
+Example:
+    windows = TelemetryWindow(["acc_x", "acc_y", "acc_z", "disp_x", "disp_y", "disp_z"],
+                              window_sec=2.0)
+    for summary in windows.add("0x50", t, values, fault=is_fault, anomaly=is_anomaly):
+        mqtt_client.publish("vibration/0x50/window", summary)
+    if windows.raw_active("0x50"):
+        mqtt_client.publish("vibration/0x50/raw", windows.raw_sample("0x50", t, values))
+
+Message rate / bandwidth comparison (raw vs windowed, no broker needed):
+    python -m src.monitoring.vibration.telemetry_window --duration 600
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .spectrum import hann_window, unit_bins
+
+logger = logging.getLogger(__name__)
+
+VIBRATION_CHANNELS = ['acc_x', 'acc_y', 'acc_z',
+                      'vel_x', 'vel_y', 'vel_z',
+                      'disp_x', 'disp_y', 'disp_z']
+
+
+class _UnitWindow:
+    __slots__ = ('start', 'times', 'rows', 'faults', 'anomalies', 'reasons', 'raw_until')
+
+    def __init__(self):
+        self.start = None
+        self.times: List[float] = []
+        self.rows: List[Sequence[float]] = []
+        self.faults = 0
+        self.anomalies = 0
+        self.reasons: List[str] = []
+        self.raw_until = float('-inf')
+
+
+class TelemetryWindow:
+    """Tumbling-window aggregation per unit with raw passthrough while flagged"""
+
+    def __init__(
+        self,
+        channels: Sequence[str] = VIBRATION_CHANNELS,
+        window_sec: float = 2.0,
+        raw_hold_sec: float = 3.0,
+        spectrum_channels: Optional[Sequence[str]] = None,
+        min_spectrum_samples: int = 8,
+        precision: int = 4
+    ):
+        """
+        Initialize aggregator
+
+        Args:
+            channels: Channel names, in the order of the values passed to add()
+            window_sec: Window length = publish cadence per unit (seconds)
+            raw_hold_sec: Keep forwarding raw samples this long after a flag clears
+            spectrum_channels: Channels with a peak frequency (default: disp_*
+                               if present, else all)
+            min_spectrum_samples: Min samples in a window for a peak frequency
+            precision: Decimal places in summaries
+        """
+        self.channels = list(channels)
+        self.window_sec = window_sec
+        self.raw_hold_sec = raw_hold_sec
+        self.min_spectrum_samples = min_spectrum_samples
+        self.precision = precision
+        if spectrum_channels is None:
+            spectrum_channels = [c for c in self.channels if c.startswith('disp_')] or self.channels
+        self._spectrum_idx = [self.channels.index(c) for c in spectrum_channels]
+        self._units: Dict[str, _UnitWindow] = {}
+
+        # Statistics
+        self.samples = 0
+        self.windows = 0
+        self.raw_samples = 0
+
+    def add(self, unit: str, t: float, values: Sequence[float], fault: bool = False,
+            anomaly: bool = False, reasons: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Add one sample
+
+        Args:
+            unit: Unit key (e.g. "0x50")
+            t: Sample time (unix)
+            values: One value per channel
+            fault: check_fault() result for this sample
+            anomaly: Anomaly flag of the unit (check_anomaly())
+            reasons: Fault reasons (kept in the window summary)
+
+        Returns:
+            Summaries of windows closed by this sample (usually empty or one)
+        """
+        w = self._units.get(unit)
+        if w is None:
+            w = self._units[unit] = _UnitWindow()
+
+        closed = []
+        if w.start is not None and t - w.start >= self.window_sec:
+            closed.append(self._close(unit, w))
+        if w.start is None:
+            # Align to the window grid so units close windows at the same time
+            w.start = t - (t % self.window_sec) if self.window_sec > 0 else t
+
+        w.times.append(t)
+        w.rows.append(values)
+        if fault:
+            w.faults += 1
+        if anomaly:
+            w.anomalies += 1
+        if reasons:
+            for reason in reasons:
+                if reason not in w.reasons and len(w.reasons) < 5:
+                    w.reasons.append(reason)
+        if fault or anomaly:
+            w.raw_until = t + self.raw_hold_sec
+        self.samples += 1
+        return closed
+
+    def raw_active(self, unit: str) -> bool:
+        """True while raw samples of the unit should be published"""
+        w = self._units.get(unit)
+        return w is not None and bool(w.times) and w.times[-1] <= w.raw_until
+
+    def raw_sample(self, unit: str, t: float, values: Sequence[float]) -> Dict[str, Any]:
+        """Build a raw sample message (counted in the stats)"""
+        self.raw_samples += 1
+        return {'unit': unit, 't': round(t, 3),
+                **{c: round(float(v), self.precision) for c, v in zip(self.channels, values)}}
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Close all open windows (e.g. on shutdown)"""
+        return [self._close(unit, w) for unit, w in self._units.items() if w.times]
+
+    def _close(self, unit: str, w: _UnitWindow) -> Dict[str, Any]:
+        """Summarize and reset a unit's window"""
+        data = np.asarray(w.rows, dtype=float)
+        times = np.asarray(w.times)
+        count = len(times)
+        p = self.precision
+
+        mins = data.min(axis=0)
+        maxs = data.max(axis=0)
+        means = data.mean(axis=0)
+        rms = np.sqrt(np.mean(data * data, axis=0))
+        peaks = self._peak_frequencies(data, times)
+
+        summary = {
+            'unit': unit,
+            't_start': round(w.start, 3),
+            't_end': round(w.start + self.window_sec, 3),
+            'count': count,
+            'rate_hz': round(count / self.window_sec, 2) if self.window_sec > 0 else 0.0,
+            'fault': w.faults,
+            'anomaly': w.anomalies,
+            'channels': {},
+        }
+        for i, c in enumerate(self.channels):
+            stats = {
+                'min': round(float(mins[i]), p),
+                'max': round(float(maxs[i]), p),
+                'mean': round(float(means[i]), p),
+                'rms': round(float(rms[i]), p),
+            }
+            if i in peaks:
+                stats['peak_hz'] = peaks[i]
+            summary['channels'][c] = stats
+        if w.reasons:
+            summary['reasons'] = list(w.reasons)
+
+        w.start = None
+        w.times = []
+        w.rows = []
+        w.faults = 0
+        w.anomalies = 0
+        w.reasons = []
+        self.windows += 1
+        return summary
+
+    def _peak_frequencies(self, data: np.ndarray, times: np.ndarray) -> Dict[int, float]:
+        """Dominant frequency per spectrum channel (same method as fft_peak())"""
+        n = len(times)
+        if n < self.min_spectrum_samples or times[-1] <= times[0]:
+            return {}
+        fs = (n - 1) / (times[-1] - times[0])
+        y = data[:, self._spectrum_idx]
+        y = y - y.mean(axis=0)
+        mag = np.abs(np.fft.rfft(hann_window(n) * y, axis=0))
+        freqs = unit_bins(n)
+        if len(freqs) < 2:
+            return {}
+        idx = np.argmax(mag[1:], axis=0) + 1
+        return {ch: round(float(freqs[k] * fs), 2) for ch, k in zip(self._spectrum_idx, idx)}
+
+    def get_stats(self) -> Dict[str, int]:
+        """Sample / window / raw message counters"""
+        return {'samples': self.samples, 'windows': self.windows, 'raw_samples': self.raw_samples}
+
+
+# =========================
+# Comparison
+# =========================
+def compare(duration_sec: float = 600.0, units: int = 3, rate_hz: float = 15.0,
+            window_sec: float = 2.0, flagged_fraction: float = 0.02) -> Dict[str, Dict[str, float]]:
+    """
+    Compare MQTT message rate and bandwidth: every sample vs windows
+
+    Samples are synthetic (noise + 3 Hz displacement); one flagged burst per
+    unit covers `flagged_fraction` of the run. Sizes are measured with the
+    JSON envelope used by MQTTClient.publish().
+
+    Args:
+        duration_sec: Simulated run length
+        units: Number of sensor units
+        rate_hz: Samples per second per unit
+        window_sec: Window length
+        flagged_fraction: Share of time with a fault/anomaly flag
+
+    Returns:
+        {"raw": {...}, "windowed": {...}} with msg_per_sec, bytes_per_sec
+    """
+    from ...communication.envelope import encode_envelope
+
+    device_json = json.dumps({"device_name": "Jetson1_Vibration", "location": "Kitchen"})
+    rng = np.random.default_rng(0)
+    n = int(duration_sec * rate_hz)
+    agg = TelemetryWindow(window_sec=window_sec)
+    baseline = TelemetryWindow(window_sec=window_sec)  # Formats the every-sample messages
+    flag_start = duration_sec * 0.5
+    flag_end = flag_start + duration_sec * flagged_fraction
+
+    raw = {'messages': 0, 'bytes': 0}
+    windowed = {'messages': 0, 'bytes': 0}
+    for k in range(n):
+        t = 1_700_000_000.0 + k / rate_hz
+        for u in range(units):
+            unit = f"0x{0x50 + u:02X}"
+            values = rng.normal(0, 0.05, len(VIBRATION_CHANNELS))
+            values[6:9] += 100 * np.sin(2 * np.pi * 3.0 * (t + u))
+            flagged = flag_start <= t - 1_700_000_000.0 < flag_end
+
+            raw['messages'] += 1
+            raw['bytes'] += len(encode_envelope(device_json, baseline.raw_sample(unit, t, values)))
+
+            for summary in agg.add(unit, t, values, fault=flagged):
+                windowed['messages'] += 1
+                windowed['bytes'] += len(encode_envelope(device_json, summary))
+            if agg.raw_active(unit):
+                windowed['messages'] += 1
+                windowed['bytes'] += len(encode_envelope(device_json, agg.raw_sample(unit, t, values)))
+    for summary in agg.flush():
+        windowed['messages'] += 1
+        windowed['bytes'] += len(encode_envelope(device_json, summary))
+
+    return {name: {'messages': r['messages'],
+                   'msg_per_sec': round(r['messages'] / duration_sec, 2),
+                   'bytes_per_sec': round(r['bytes'] / duration_sec, 1)}
+            for name, r in (('raw', raw), ('windowed', windowed))}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Raw vs windowed vibration telemetry")
+    parser.add_argument('--duration', type=float, default=600.0, help='Simulated seconds')
+    parser.add_argument('--window', type=float, default=2.0, help='Window length (s)')
+    parser.add_argument('--flagged', type=float, default=0.02, help='Flagged time fraction')
+    args = parser.parse_args()
+
+    rows = compare(args.duration, window_sec=args.window, flagged_fraction=args.flagged)
+    for name, r in rows.items():
+        print(f"{name:9s} {r['msg_per_sec']:7.2f} msg/s  {r['bytes_per_sec']:9.1f} B/s  ({r['messages']} messages)")
+    print(f"reduction: {rows['raw']['msg_per_sec'] / max(rows['windowed']['msg_per_sec'], 1e-9):.1f}x messages, "
+          f"{rows['raw']['bytes_per_sec'] / max(rows['windowed']['bytes_per_sec'], 1e-9):.1f}x bytes")
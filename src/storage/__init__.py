@@ -0,0 +1,10 @@
+"""Storage module for captured frames (write-behind sink, encoders, shards, ...)"""
+from .frame_sink import FrameSink, FrameWriteResult
+from .encoders import ImageEncoder, create_encoder, create_stream_encoders
+from .shards import ShardWriter, ShardReader, ShardRecord, directory_to_shards, shards_to_directory
+
+__all__ = [
+    'FrameSink', 'FrameWriteResult',
+    'ImageEncoder', 'create_encoder', 'create_stream_encoders',
+    'ShardWriter', 'ShardReader', 'ShardRecord', 'directory_to_shards', 'shards_to_directory',
+]
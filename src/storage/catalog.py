@@ -0,0 +1,737 @@
+"""
+Session Catalog
+
+SQLite index of collected sessions, frames, temperature samples and
+completion markers across ~/AI_Data (FryingData, BucketData, StirFryData)
+and ~/StirFry_Data.
+
+The catalog is updated incrementally:
+- FrameSink listener (on_frame_written) adds every written frame
+- begin_session() at session start, ingest_session() at stop
+- scan() picks up anything written without the catalog (old sessions,
+  copies from other devices); only directories/files whose mtime changed
+  since the last scan are re-read
+
+Example:
+    catalog = SessionCatalog()
+    sessions = catalog.find_sessions(food_type="chicken", probe_reached=75.0, within_sec=360)
+
+CLI:
+    python3 -m src.storage.catalog scan
+    python3 -m src.storage.catalog sessions --food chicken --probe-reached 75 --within 360
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .metadata_log import read_metadata_log
+from .shards import ShardReader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = '~/AI_Data/catalog.db'
+DEFAULT_ROOTS = ('~/AI_Data', '~/StirFry_Data')
+SESSION_INFO_FILES = ('session_info.json', 'metadata.json')
+METADATA_LOG_FILE = 'metadata.jsonl'
+FRAME_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.npy')
+
+# Written into a session directory once all its files are copied off the
+# device (sync / USB export); retention only evicts sessions that have one
+SYNCED_MARKER = '.synced'
+EXPORTED_MARKER = '.exported'
+BACKUP_MARKERS = (SYNCED_MARKER, EXPORTED_MARKER)
+
+_CAMERA_DIR = re.compile(r'^camera_(\d+)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key TEXT PRIMARY KEY,       -- absolute session directory
+    session_id TEXT,
+    kind TEXT,                          -- frying / bucket / stirfry
+    pot TEXT,
+    food_type TEXT,
+    start_ts REAL,
+    end_ts REAL,
+    duration_sec REAL,
+    frame_count INTEGER,
+    completion_marked INTEGER DEFAULT 0,
+    storage_format TEXT,
+    device_id TEXT,
+    info_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_food ON sessions(food_type, start_ts);
+
+CREATE TABLE IF NOT EXISTS frames (
+    path TEXT PRIMARY KEY,
+    session_key TEXT NOT NULL,
+    camera INTEGER,
+    ts REAL,
+    size INTEGER,
+    shard TEXT,
+    offset INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_frames_session ON frames(session_key, camera, ts);
+
+CREATE TABLE IF NOT EXISTS temperatures (
+    session_key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    sensor TEXT NOT NULL,               -- oil / probe
+    position TEXT NOT NULL DEFAULT '',  -- left / right / pot1 / ...
+    value REAL,
+    PRIMARY KEY (session_key, ts, sensor, position)
+);
+
+CREATE TABLE IF NOT EXISTS markers (
+    session_key TEXT NOT NULL,
+    type TEXT NOT NULL,                 -- completion
+    ts REAL,
+    method TEXT,
+    probe_temp REAL,
+    oil_temp REAL,
+    elapsed_sec REAL,
+    PRIMARY KEY (session_key, type)
+);
+
+CREATE TABLE IF NOT EXISTS scan_state (
+    path TEXT PRIMARY KEY,
+    mtime REAL
+);
+"""
+
+
+def _parse_time(value: Any) -> Optional[float]:
+    """'YYYY-mm-dd HH:MM:SS[.fff]' (local time) or number -> unix time"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def _camera_of(directory: str) -> Optional[int]:
+    match = _CAMERA_DIR.match(os.path.basename(directory))
+    return int(match.group(1)) if match else None
+
+
+def session_dir_for_frame(path: str) -> Tuple[str, Optional[int]]:
+    """
+    Session directory and camera index for a frame path
+
+    <session>/camera_N/<file> and <session>/shards/camera_N/<file> both
+    map to <session>.
+    """
+    camera_dir = os.path.dirname(os.path.abspath(path))
+    session_dir = os.path.dirname(camera_dir)
+    if os.path.basename(session_dir) == 'shards':
+        session_dir = os.path.dirname(session_dir)
+    return session_dir, _camera_of(camera_dir)
+
+
+def write_backup_marker(session_dir: str, marker: str, target: str) -> None:
+    """
+    Record that a session has been copied to `target`
+
+    Args:
+        session_dir: Session directory
+        marker: SYNCED_MARKER or EXPORTED_MARKER
+        target: Destination (sync target / USB directory)
+    """
+    path = os.path.join(session_dir, marker)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'target': target, 'time': round(time.time(), 3)}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def backup_time(session_dir: str) -> Optional[float]:
+    """Newest backup marker mtime of a session (None = never copied off the device)"""
+    newest = None
+    for marker in BACKUP_MARKERS:
+        try:
+            mtime = os.stat(os.path.join(session_dir, marker)).st_mtime
+        except OSError:
+            continue
+        newest = mtime if newest is None else max(newest, mtime)
+    return newest
+
+
+def infer_session(session_dir: str) -> Dict[str, Any]:
+    """
+    Session fields derivable from the directory layout
+
+    Layouts:
+        FryingData/<session_id>                       (legacy, 4 cameras split)
+        BucketData/<session_id>
+        FryingData/pot1/<session_id>/<food_type>
+        StirFryData/pot1/<session_id>/<food_type>     (Jetson1)
+    """
+    parts = os.path.abspath(session_dir).split(os.sep)
+    info: Dict[str, Any] = {'session_id': parts[-1], 'pot': None, 'food_type': None, 'kind': None}
+    if len(parts) >= 3 and re.match(r'^pot\d+$', parts[-3]):
+        info.update(pot=parts[-3], session_id=parts[-2], food_type=parts[-1])
+
+    joined = '/'.join(parts).lower()
+    if 'bucketdata' in joined:
+        info['kind'] = 'bucket'
+    elif 'stirfry' in joined:
+        info['kind'] = 'stirfry'
+    elif 'fryingdata' in joined:
+        info['kind'] = 'frying'
+    return info
+
+
+class SessionCatalog:
+    """
+    SQLite catalog of sessions and frames (thread-safe)
+
+    Frame rows from FrameSink workers are batched and committed every
+    `commit_interval` seconds (or on flush()/close()).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, commit_interval: float = 2.0):
+        """
+        Open (or create) the catalog database
+
+        Args:
+            db_path: SQLite file path
+            commit_interval: Max seconds frame inserts stay uncommitted
+        """
+        self.db_path = os.path.expanduser(db_path)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, mode=0o755, exist_ok=True)
+
+        self.commit_interval = commit_interval
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._pending: List[tuple] = []
+        self._last_commit = time.monotonic()
+
+    # =========================
+    # Incremental updates (called from collection code)
+    # =========================
+    def begin_session(
+        self,
+        session_dir: str,
+        session_id: Optional[str] = None,
+        food_type: Optional[str] = None,
+        pot: Optional[str] = None,
+        kind: Optional[str] = None,
+        start_time: Optional[float] = None,
+        device_id: Optional[str] = None,
+        storage_format: str = 'files'
+    ) -> None:
+        """
+        Register a session at start (errors are logged, never raised)
+
+        Args:
+            session_dir: Directory frames are saved under
+            session_id: Session ID (default: inferred from path)
+            food_type: Food type
+            pot: "pot1"/"pot2" or None
+            kind: frying / bucket / stirfry (default: inferred from path)
+            start_time: Unix time (default: now)
+            device_id: Device identifier
+            storage_format: 'files' or 'shards'
+        """
+        key = os.path.abspath(os.path.expanduser(session_dir))
+        inferred = infer_session(key)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    """INSERT INTO sessions (session_key, session_id, kind, pot, food_type, start_ts,
+                                             storage_format, device_id, frame_count)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+                       ON CONFLICT(session_key) DO UPDATE SET
+                           session_id=excluded.session_id, kind=excluded.kind, pot=excluded.pot,
+                           food_type=excluded.food_type, start_ts=excluded.start_ts,
+                           storage_format=excluded.storage_format, device_id=excluded.device_id""",
+                    (key, session_id or inferred['session_id'], kind or inferred['kind'],
+                     pot or inferred['pot'], food_type or inferred['food_type'],
+                     start_time if start_time is not None else time.time(), storage_format, device_id)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Catalog begin_session failed ({key}): {e}")
+
+    def on_frame_written(self, result) -> None:
+        """FrameSink listener: record one written frame"""
+        if not result.success:
+            return
+        session_dir, camera = session_dir_for_frame(result.path)
+        ts = result.captured_at if result.captured_at is not None else result.timestamp
+        try:
+            with self._lock:
+                self._pending.append((result.path, session_dir, camera, ts, result.bytes_written,
+                                      result.shard, result.offset))
+                if time.monotonic() - self._last_commit >= self.commit_interval:
+                    self._commit_frames()
+        except sqlite3.Error as e:
+            logger.error(f"Catalog frame insert failed: {e}")
+
+    def _commit_frames(self) -> None:
+        if self._pending:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO frames (path, session_key, camera, ts, size, shard, offset) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+            self._pending = []
+        self._conn.commit()
+        self._last_commit = time.monotonic()
+
+    def flush(self) -> None:
+        """Commit batched frame rows"""
+        with self._lock:
+            self._commit_frames()
+
+    def ingest_session(self, session_dir: str) -> bool:
+        """
+        (Re)read a session's info file and metadata log into the catalog
+
+        Called at session stop, and by scan() for changed sessions.
+        Errors are logged, never raised.
+
+        Returns:
+            True if an info file was found and ingested
+        """
+        key = os.path.abspath(os.path.expanduser(session_dir))
+        info_path = next((os.path.join(key, f) for f in SESSION_INFO_FILES
+                          if os.path.exists(os.path.join(key, f))), None)
+        try:
+            with self._lock:
+                self._commit_frames()
+                if info_path is None:
+                    self._upsert_session(key, {}, None)
+                    return False
+                with open(info_path, 'r', encoding='utf-8') as f:
+                    info = json.load(f)
+                self._upsert_session(key, info, info_path)
+                self._ingest_temperatures(key, info)
+                self._ingest_completion(key, info)
+                self._conn.commit()
+                return True
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logger.error(f"Catalog ingest failed ({key}): {e}")
+            return False
+
+    def _upsert_session(self, key: str, info: Dict[str, Any], info_path: Optional[str]) -> None:
+        inferred = infer_session(key)
+        frame_count = self._conn.execute(
+            "SELECT COUNT(*) FROM frames WHERE session_key = ?", (key,)).fetchone()[0]
+        self._conn.execute(
+            """INSERT INTO sessions (session_key, session_id, kind, pot, food_type, start_ts, end_ts,
+                                     duration_sec, frame_count, completion_marked, storage_format,
+                                     device_id, info_path)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(session_key) DO UPDATE SET
+                   session_id=COALESCE(excluded.session_id, session_id),
+                   kind=COALESCE(excluded.kind, kind),
+                   pot=COALESCE(excluded.pot, pot),
+                   food_type=COALESCE(excluded.food_type, food_type),
+                   start_ts=COALESCE(excluded.start_ts, start_ts),
+                   end_ts=excluded.end_ts,
+                   duration_sec=excluded.duration_sec,
+                   frame_count=excluded.frame_count,
+                   completion_marked=excluded.completion_marked,
+                   storage_format=COALESCE(excluded.storage_format, storage_format),
+                   device_id=COALESCE(excluded.device_id, device_id),
+                   info_path=excluded.info_path""",
+            (
+                key,
+                info.get('session_id') or inferred['session_id'],
+                inferred['kind'],
+                info.get('pot') or inferred['pot'],
+                info.get('food_type') or inferred['food_type'],
+                _parse_time(info.get('start_time')),
+                _parse_time(info.get('end_time')),
+                info.get('duration_sec', info.get('duration_seconds')),
+                max(frame_count, info.get('total_frames_saved', info.get('frame_count')) or 0),
+                1 if info.get('completion_marked') else 0,
+                info.get('storage_format'),
+                info.get('device_id'),
+                info_path,
+            )
+        )
+
+    def _ingest_temperatures(self, key: str, info: Dict[str, Any]) -> None:
+        """Temperature samples from metadata.jsonl, else raw_metadata, else temperature_timeline"""
+        log_path = os.path.join(key, info.get('metadata_log') or METADATA_LOG_FILE)
+        if os.path.exists(log_path):
+            entries: Iterable[Dict[str, Any]] = read_metadata_log(log_path)
+        else:
+            entries = info.get('raw_metadata') or []
+
+        rows = []
+        for item in entries:
+            kind = item.get('type', '')
+            if kind.endswith('_temperature'):
+                position = item.get('position') or item.get('pot') or ''
+                rows.append((key, _parse_time(item.get('timestamp')), kind[:-len('_temperature')],
+                             position, item.get('value')))
+
+        if not rows:
+            # Old sessions: only the grouped timeline exists
+            for row in info.get('temperature_timeline') or []:
+                ts = _parse_time(row.get('timestamp'))
+                for field, value in row.items():
+                    if field == 'timestamp':
+                        continue
+                    sensor, _, position = field.partition('_temp')
+                    rows.append((key, ts, sensor, position.lstrip('_'), value))
+
+        rows = [r for r in rows if r[1] is not None]
+        self._conn.execute("DELETE FROM temperatures WHERE session_key = ?", (key,))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO temperatures (session_key, ts, sensor, position, value) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def _ingest_completion(self, key: str, info: Dict[str, Any]) -> None:
+        completion = info.get('completion_info')
+        self._conn.execute("DELETE FROM markers WHERE session_key = ? AND type = 'completion'", (key,))
+        if info.get('completion_marked') and completion:
+            self._conn.execute(
+                "INSERT INTO markers (session_key, type, ts, method, probe_temp, oil_temp, elapsed_sec) "
+                "VALUES (?, 'completion', ?, ?, ?, ?, ?)",
+                (key, _parse_time(completion.get('timestamp')), completion.get('method'),
+                 completion.get('probe_temp'), completion.get('oil_temp'), completion.get('elapsed_time_sec'))
+            )
+
+    def remove_session(self, session_dir: str) -> None:
+        """Drop a session and its frames/temperatures/markers (e.g. after retention deleted it)"""
+        key = os.path.abspath(os.path.expanduser(session_dir))
+        with self._lock:
+            self._commit_frames()
+            for table in ('frames', 'temperatures', 'markers', 'sessions'):
+                self._conn.execute(f"DELETE FROM {table} WHERE session_key = ?", (key,))
+            self._conn.execute("DELETE FROM scan_state WHERE path LIKE ?", (key + os.sep + '%',))
+            self._conn.commit()
+
+    # =========================
+    # Rescan
+    # =========================
+    def _changed(self, path: str, mtime: float) -> bool:
+        row = self._conn.execute("SELECT mtime FROM scan_state WHERE path = ?", (path,)).fetchone()
+        return row is None or row[0] != mtime
+
+    def _mark(self, path: str, mtime: float) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO scan_state (path, mtime) VALUES (?, ?)", (path, mtime))
+
+    def scan(self, roots: Iterable[str] = DEFAULT_ROOTS, force: bool = False) -> Dict[str, int]:
+        """
+        Index sessions on disk that are missing or changed
+
+        Small directories (roots, pot, session levels) are always listed;
+        camera/shard directories and info files are only re-read when their
+        mtime changed since the last scan.
+
+        Args:
+            roots: Top-level data directories
+            force: Ignore stored mtimes and re-read everything
+
+        Returns:
+            Counts: sessions seen, sessions ingested, frame dirs read, frames added
+        """
+        stats = {'sessions': 0, 'sessions_ingested': 0, 'frame_dirs_read': 0, 'frames_added': 0}
+        with self._lock:
+            self._commit_frames()
+            for root in roots:
+                root = os.path.abspath(os.path.expanduser(root))
+                if os.path.isdir(root):
+                    self._scan_dir(root, force, stats, depth=0)
+            self._conn.commit()
+        logger.info(f"Catalog scan: {stats}")
+        return stats
+
+    def _scan_dir(self, directory: str, force: bool, stats: Dict[str, int], depth: int) -> None:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Cannot list {directory}: {e}")
+            return
+
+        subdirs = [e for e in entries if e.is_dir(follow_symlinks=False)]
+        frame_dirs = [e for e in subdirs if _CAMERA_DIR.match(e.name) or e.name == 'shards']
+        info_files = [e for e in entries if e.is_file() and e.name in SESSION_INFO_FILES + (METADATA_LOG_FILE,)]
+
+        if frame_dirs or info_files:
+            stats['sessions'] += 1
+            session_changed = force
+            for frame_dir in frame_dirs:
+                mtime = self._frame_dir_mtime(frame_dir)
+                if force or self._changed(frame_dir.path, mtime):
+                    stats['frames_added'] += self._index_frame_dir(directory, frame_dir.path)
+                    stats['frame_dirs_read'] += 1
+                    self._mark(frame_dir.path, mtime)
+                    session_changed = True
+            for info_file in info_files:
+                mtime = info_file.stat().st_mtime
+                if force or self._changed(info_file.path, mtime):
+                    self._mark(info_file.path, mtime)
+                    session_changed = True
+            if session_changed:
+                self.ingest_session(directory)
+                stats['sessions_ingested'] += 1
+            return
+
+        if depth < 6:
+            for sub in subdirs:
+                self._scan_dir(sub.path, force, stats, depth + 1)
+
+    @staticmethod
+    def _frame_dir_mtime(entry: os.DirEntry) -> float:
+        # Appending to a shard index does not touch the directory mtime
+        mtime = entry.stat().st_mtime
+        if entry.name == 'shards':
+            for f in os.scandir(entry.path):
+                mtime = max(mtime, f.stat().st_mtime)
+        return mtime
+
+    def _index_frame_dir(self, session_dir: str, frame_dir: str) -> int:
+        rows = []
+        if os.path.basename(frame_dir) == 'shards':
+            with ShardReader(frame_dir) as reader:
+                for record in reader:
+                    camera_dir = record.name.split('/')[0]
+                    rows.append((os.path.join(frame_dir, record.name), session_dir, _camera_of(camera_dir),
+                                 record.timestamp, record.size,
+                                 os.path.join(frame_dir, record.shard), record.offset))
+        else:
+            camera = _camera_of(frame_dir)
+            for entry in os.scandir(frame_dir):
+                if entry.is_file() and entry.name.lower().endswith(FRAME_EXTENSIONS):
+                    st = entry.stat()
+                    rows.append((entry.path, session_dir, camera, st.st_mtime, st.st_size, None, None))
+
+            # Drop rows for files deleted outside the catalog
+            on_disk = {row[0] for row in rows}
+            known = self._conn.execute(
+                "SELECT path FROM frames WHERE session_key = ? AND camera IS ? AND shard IS NULL",
+                (session_dir, camera)).fetchall()
+            self._conn.executemany("DELETE FROM frames WHERE path = ?",
+                                   [(r[0],) for r in known if r[0] not in on_disk])
+
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO frames (path, session_key, camera, ts, size, shard, offset) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        return self._conn.total_changes - before
+
+    # =========================
+    # Queries
+    # =========================
+    def find_sessions(
+        self,
+        food_type: Optional[str] = None,
+        kind: Optional[str] = None,
+        pot: Optional[str] = None,
+        completed: Optional[bool] = None,
+        probe_reached: Optional[float] = None,
+        within_sec: Optional[float] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Query sessions
+
+        Args:
+            food_type: Exact food type
+            kind: frying / bucket / stirfry
+            pot: "pot1" / "pot2"
+            completed: Filter on the completion marker
+            probe_reached: Probe temperature (°C) the session must reach ...
+            within_sec: ... within this many seconds of session start
+            since, until: Session start time range (unix time)
+            limit: Max rows
+
+        Returns:
+            Session dicts (newest first); with probe_reached, includes
+            'probe_reached_sec' (first time the threshold was reached)
+        """
+        where, params = [], []
+        for column, value in (('food_type', food_type), ('kind', kind), ('pot', pot)):
+            if value is not None:
+                where.append(f"s.{column} = ?")
+                params.append(value)
+        if completed is not None:
+            where.append("s.completion_marked = ?")
+            params.append(1 if completed else 0)
+        if since is not None:
+            where.append("s.start_ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("s.start_ts < ?")
+            params.append(until)
+
+        select = "SELECT s.*"
+        join = ""
+        if probe_reached is not None:
+            select += ", r.first_ts - s.start_ts AS probe_reached_sec"
+            join = """JOIN (SELECT session_key, MIN(ts) AS first_ts FROM temperatures
+                            WHERE sensor = 'probe' AND value >= ? GROUP BY session_key) r
+                      ON r.session_key = s.session_key"""
+            params.insert(0, probe_reached)
+            if within_sec is not None:
+                where.append("r.first_ts - s.start_ts <= ?")
+                params.append(within_sec)
+
+        sql = f"{select} FROM sessions s {join}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY s.start_ts DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            self._commit_frames()
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def frames(self, session_key: str, camera: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Frames of a session in time order"""
+        sql = "SELECT * FROM frames WHERE session_key = ?"
+        params: List[Any] = [os.path.abspath(os.path.expanduser(session_key))]
+        if camera is not None:
+            sql += " AND camera = ?"
+            params.append(camera)
+        with self._lock:
+            self._commit_frames()
+            return [dict(row) for row in self._conn.execute(sql + " ORDER BY ts", params)]
+
+    def temperatures(self, session_key: str, sensor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Temperature samples of a session in time order"""
+        sql = "SELECT ts, sensor, position, value FROM temperatures WHERE session_key = ?"
+        params: List[Any] = [os.path.abspath(os.path.expanduser(session_key))]
+        if sensor is not None:
+            sql += " AND sensor = ?"
+            params.append(sensor)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql + " ORDER BY ts", params)]
+
+    def completion(self, session_key: str) -> Optional[Dict[str, Any]]:
+        """Completion marker of a session (None if not marked)"""
+        key = os.path.abspath(os.path.expanduser(session_key))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM markers WHERE session_key = ? AND type = 'completion'", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def revision(self, session_key: str) -> Tuple[Any, ...]:
+        """
+        Change signature of a session's indexed data
+
+        Returns:
+            (frame count, last frame ts, temperature count, last temperature ts, completion ts)
+        """
+        key = os.path.abspath(os.path.expanduser(session_key))
+        with self._lock:
+            self._commit_frames()
+            c = self._conn
+            frames = c.execute("SELECT COUNT(*), MAX(ts) FROM frames WHERE session_key = ?", (key,)).fetchone()
+            temps = c.execute("SELECT COUNT(*), MAX(ts) FROM temperatures WHERE session_key = ?", (key,)).fetchone()
+            marker = c.execute("SELECT ts FROM markers WHERE session_key = ? AND type = 'completion'",
+                               (key,)).fetchone()
+        return frames[0], frames[1], temps[0], temps[1], marker[0] if marker else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Catalog totals"""
+        with self._lock:
+            self._commit_frames()
+            c = self._conn
+            return {
+                'sessions': c.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+                'frames': c.execute("SELECT COUNT(*) FROM frames").fetchone()[0],
+                'frame_bytes': c.execute("SELECT COALESCE(SUM(size), 0) FROM frames").fetchone()[0],
+                'temperature_samples': c.execute("SELECT COUNT(*) FROM temperatures").fetchone()[0],
+                'completion_markers': c.execute("SELECT COUNT(*) FROM markers").fetchone()[0],
+                'by_food_type': {r[0]: r[1] for r in c.execute(
+                    "SELECT COALESCE(food_type, '?'), COUNT(*) FROM sessions GROUP BY food_type")},
+            }
+
+    def close(self) -> None:
+        """Commit pending rows and close the database"""
+        with self._lock:
+            try:
+                self._commit_frames()
+            finally:
+                self._conn.close()
+
+
+def _format_ts(ts: Optional[float]) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S') if ts else '-'
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Session catalog (SQLite) for collected data")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Catalog database path")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_scan = sub.add_parser('scan', help="index new/changed sessions on disk")
+    p_scan.add_argument('roots', nargs='*', default=list(DEFAULT_ROOTS))
+    p_scan.add_argument('--force', action='store_true', help="re-read everything")
+
+    p_sessions = sub.add_parser('sessions', help="query sessions")
+    p_sessions.add_argument('--food')
+    p_sessions.add_argument('--kind', choices=['frying', 'bucket', 'stirfry'])
+    p_sessions.add_argument('--pot')
+    p_sessions.add_argument('--completed', action='store_true')
+    p_sessions.add_argument('--probe-reached', type=float, help="probe temp threshold (°C)")
+    p_sessions.add_argument('--within', type=float, help="seconds from session start")
+    p_sessions.add_argument('--limit', type=int)
+    p_sessions.add_argument('--json', action='store_true')
+
+    p_frames = sub.add_parser('frames', help="list frames of a session")
+    p_frames.add_argument('session_dir')
+    p_frames.add_argument('--camera', type=int)
+
+    sub.add_parser('stats', help="catalog totals")
+
+    args = parser.parse_args()
+    catalog = SessionCatalog(args.db)
+    try:
+        if args.command == 'scan':
+            print(json.dumps(catalog.scan(args.roots, force=args.force), indent=2))
+        elif args.command == 'sessions':
+            rows = catalog.find_sessions(
+                food_type=args.food, kind=args.kind, pot=args.pot,
+                completed=True if args.completed else None,
+                probe_reached=args.probe_reached, within_sec=args.within, limit=args.limit
+            )
+            if args.json:
+                print(json.dumps(rows, indent=2, ensure_ascii=False))
+            else:
+                for r in rows:
+                    reached = f"  probe@{r['probe_reached_sec']:.0f}s" if r.get('probe_reached_sec') is not None else ''
+                    print(f"{_format_ts(r['start_ts'])}  {r['kind'] or '-':8} {r['pot'] or '-':5} "
+                          f"{r['food_type'] or '-':12} {r['frame_count'] or 0:6}장{reached}  {r['session_key']}")
+                print(f"{len(rows)} sessions")
+        elif args.command == 'frames':
+            for r in catalog.frames(args.session_dir, args.camera):
+                print(f"{_format_ts(r['ts'])}  cam{r['camera']}  {r['size']:>9}  {r['path']}")
+        else:
+            print(json.dumps(catalog.stats(), indent=2, ensure_ascii=False))
+    finally:
+        catalog.close()
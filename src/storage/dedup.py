@@ -0,0 +1,263 @@
+"""
+Near-Duplicate Frame Suppression
+
+Data collection saves every camera every few seconds even when nothing in
+the pot changes (oil heating up, waiting for the next batch). Each frame gets
+a cheap perceptual signature: a strided, downscaled luma thumbnail of
+32x24 pixels (~0.1 ms). The signature is compared with the last saved
+frame of the same camera:
+
+    skip   difference below threshold and the owner (session) saved this
+           camera less than `max_gap_sec` ago -> nothing is written
+    link   another owner saved a matching frame of this camera within
+           `share_window_sec` (observe cameras shared by POT1/POT2)
+           -> the caller references that file (FrameSink.submit_link)
+    save   otherwise
+
+`max_gap_sec` keeps at least one frame per interval, so static scenes are
+down-sampled rather than dropped.
+
+Example:
+    dedup = FrameDeduplicator(threshold=1.5, max_gap_sec=30)
+    sink.add_listener(dedup.on_frame_written)
+
+    decision = dedup.check(cam_idx, frame, owner="pot1")
+    if decision.action == 'save':
+        sink.submit(path, frame, ...)
+        dedup.saved(decision, path)
+    elif decision.action == 'link':
+        sink.submit_link(decision.link_path, path)
+        dedup.saved(decision, path)
+"""
+
+import re
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Dict, Any, Hashable
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CAMERA_NAME = re.compile(r'camera_(\d+)')
+
+
+@dataclass
+class DedupDecision:
+    """Result of FrameDeduplicator.check()"""
+    action: str                     # 'save' | 'skip' | 'link'
+    key: Hashable                   # Camera key
+    owner: Hashable                 # Session / pot that asked
+    timestamp: float
+    diff: Optional[float] = None    # Mean abs luma difference (None = no reference)
+    link_path: Optional[str] = None  # File to reference when action == 'link'
+    signature: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+@dataclass
+class _Saved:
+    signature: np.ndarray
+    timestamp: float
+    path: Optional[str]
+    owner: Hashable
+
+
+def frame_signature(frame: np.ndarray, size: Tuple[int, int] = (32, 24)) -> np.ndarray:
+    """
+    Compute a perceptual signature (downscaled luma thumbnail)
+
+    Args:
+        frame: BGR or grayscale frame
+        size: Thumbnail (width, height)
+
+    Returns:
+        uint8 array of shape (height, width)
+    """
+    # Stride first so the resize only touches ~1/64 of the pixels
+    step = max(1, min(frame.shape[1] // (size[0] * 4), frame.shape[0] // (size[1] * 4)))
+    small = frame[::step, ::step]
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(small, size, interpolation=cv2.INTER_AREA)
+
+
+def signature_diff(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute difference of two signatures (0-255)"""
+    return float(np.mean(np.abs(a.astype(np.int16) - b.astype(np.int16))))
+
+
+class FrameDeduplicator:
+    """
+    Per-camera near-duplicate detector for the data collection save path
+
+    check()/saved() run on the caller's thread; on_frame_written() may be
+    registered as a FrameSink listener to account bytes saved.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 1.5,
+        max_gap_sec: float = 30.0,
+        share_window_sec: float = 10.0,
+        size: Tuple[int, int] = (32, 24)
+    ):
+        """
+        Initialize deduplicator
+
+        Args:
+            threshold: Mean abs luma difference (0-255) below which frames
+                       count as duplicates (0 = only exact duplicates)
+            max_gap_sec: Keep at least one frame per camera/owner this often
+                         (0 = never skip, only link)
+            share_window_sec: Max age of another owner's frame to link to
+                              (0 = never link)
+            size: Signature thumbnail (width, height)
+        """
+        self.threshold = threshold
+        self.max_gap_sec = max_gap_sec
+        self.share_window_sec = share_window_sec
+        self.size = tuple(size)
+
+        self._lock = threading.Lock()
+        self._last_by_key: Dict[Hashable, _Saved] = {}
+        self._last_by_owner: Dict[Tuple[Hashable, Hashable], _Saved] = {}
+
+        # Statistics
+        self._owner_stats: Dict[Hashable, Dict[str, int]] = {}
+        self._avg_bytes: Dict[str, float] = {}  # camera dir name -> avg written size
+
+    # =========================
+    # Decisions
+    # =========================
+    def check(
+        self,
+        key: Hashable,
+        frame: np.ndarray,
+        owner: Hashable = None,
+        timestamp: Optional[float] = None,
+        can_link: bool = True
+    ) -> DedupDecision:
+        """
+        Decide whether a frame should be saved, skipped or linked
+
+        Args:
+            key: Camera key (e.g. camera index)
+            frame: BGR frame
+            owner: Session / pot saving the frame
+            timestamp: Capture time (unix, default: now)
+            can_link: False if the caller cannot reference existing files
+                      (e.g. shard mode)
+
+        Returns:
+            DedupDecision (pass to saved() after a save or link)
+        """
+        ts = timestamp if timestamp is not None else time.time()
+        sig = frame_signature(frame, self.size)
+
+        with self._lock:
+            stats = self._owner_stats.setdefault(owner, {'saved': 0, 'skipped': 0, 'linked': 0})
+            shared = self._last_by_key.get(key)
+            own = self._last_by_owner.get((key, owner))
+
+            if (can_link and shared is not None and shared.owner != owner and shared.path
+                    and 0 <= ts - shared.timestamp <= self.share_window_sec):
+                diff = signature_diff(sig, shared.signature)
+                if diff <= self.threshold:
+                    stats['linked'] += 1
+                    self._count_avoided_locked(stats, key)
+                    return DedupDecision('link', key, owner, ts, diff, shared.path, sig)
+
+            diff = None
+            if own is not None:
+                diff = signature_diff(sig, own.signature)
+                if diff <= self.threshold and ts - own.timestamp < self.max_gap_sec:
+                    stats['skipped'] += 1
+                    self._count_avoided_locked(stats, key)
+                    return DedupDecision('skip', key, owner, ts, diff, None, sig)
+
+            stats['saved'] += 1
+            return DedupDecision('save', key, owner, ts, diff, None, sig)
+
+    @staticmethod
+    def _count_avoided_locked(stats: Dict[str, Any], key: Hashable) -> None:
+        by_key = stats.setdefault('avoided_by_key', {})
+        by_key[key] = by_key.get(key, 0) + 1
+
+    def saved(self, decision: DedupDecision, path: Optional[str] = None) -> None:
+        """
+        Record that a 'save' or 'link' decision was written
+
+        Args:
+            decision: Decision returned by check()
+            path: Written file path (None if it cannot be linked to, e.g. shard)
+        """
+        entry = _Saved(decision.signature, decision.timestamp, path, decision.owner)
+        with self._lock:
+            self._last_by_owner[(decision.key, decision.owner)] = entry
+            if decision.action == 'save':
+                self._last_by_key[decision.key] = entry
+
+    def reset(self, owner: Hashable = None) -> None:
+        """
+        Forget reference frames (and stats) of one owner, e.g. at session start
+
+        Args:
+            owner: Owner to reset
+        """
+        with self._lock:
+            for k in [k for k in self._last_by_owner if k[1] == owner]:
+                del self._last_by_owner[k]
+            for k in [k for k, v in self._last_by_key.items() if v.owner == owner]:
+                del self._last_by_key[k]
+            self._owner_stats.pop(owner, None)
+
+    # =========================
+    # Stats
+    # =========================
+    def on_frame_written(self, result) -> None:
+        """FrameSink listener: tracks average written frame size per camera"""
+        if not result.success or getattr(result, 'linked_from', None):
+            return
+        m = _CAMERA_NAME.search(result.path)
+        with self._lock:
+            if m:
+                name = m.group(0)
+                prev = self._avg_bytes.get(name)
+                self._avg_bytes[name] = result.bytes_written if prev is None else prev * 0.9 + result.bytes_written * 0.1
+
+    def get_stats(self, owner: Hashable = None) -> Dict[str, Any]:
+        """
+        Get dedup statistics
+
+        Args:
+            owner: Owner to report (None = totals over all owners)
+
+        Returns:
+            Dictionary with saved/skipped/linked counts and estimated bytes saved
+        """
+        with self._lock:
+            owners = [owner] if owner is not None else list(self._owner_stats)
+            saved = skipped = linked = 0
+            avoided_bytes = 0.0
+            for o in owners:
+                s = self._owner_stats.get(o)
+                if not s:
+                    continue
+                saved += s['saved']
+                skipped += s['skipped']
+                linked += s['linked']
+                for key, count in s.get('avoided_by_key', {}).items():
+                    avoided_bytes += count * self._avg_bytes.get(f"camera_{key}", 0.0)
+            total = saved + skipped + linked
+            return {
+                'threshold': self.threshold,
+                'max_gap_sec': self.max_gap_sec,
+                'saved': saved,
+                'skipped': skipped,
+                'linked': linked,
+                'skip_ratio': round((skipped + linked) / total, 3) if total else 0.0,
+                'bytes_saved_est': int(avoided_bytes),
+            }
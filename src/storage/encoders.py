@@ -0,0 +1,315 @@
+"""
+Image Encoder Backends
+
+Pluggable encoders used by FrameSink to turn a BGR frame into file bytes.
+Each backend trades CPU time against bytes on disk differently:
+
+- opencv_jpeg: cv2.imencode JPEG (default, always available)
+- turbojpeg:   libjpeg-turbo via PyTurboJPEG (faster, chroma subsampling control)
+- png:         lossless, slow, large
+- webp:        lossy or lossless (quality > 100), smaller than JPEG, slower
+- npy:         raw numpy array, lossless, no encode cost (largest on disk)
+"""
+
+import io
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Union, Iterable
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Optional: libjpeg-turbo bindings
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_444, TJSAMP_422, TJSAMP_420, TJSAMP_GRAY, TJFLAG_FASTDCT
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
+
+class ImageEncoder(ABC):
+    """
+    Base class for image encoders
+
+    Subclasses set `name` and `extension` and implement encode()
+    (decode() defaults to cv2.imdecode).
+    """
+
+    name = 'base'
+    extension = '.bin'
+    lossless = False
+
+    @abstractmethod
+    def encode(self, frame: np.ndarray) -> bytes:
+        """
+        Encode a BGR frame
+
+        Args:
+            frame: BGR image (H, W, 3) uint8
+
+        Returns:
+            Encoded file bytes
+        """
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """
+        Decode bytes produced by encode() back to a BGR frame
+
+        Args:
+            data: Encoded bytes
+
+        Returns:
+            BGR image
+        """
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if frame is None:
+            raise ValueError(f"{self.name}: failed to decode {len(data)} bytes")
+        return frame
+
+    def describe(self) -> Dict[str, Any]:
+        """Settings summary (for metadata/benchmark output)"""
+        return {'backend': self.name, 'extension': self.extension}
+
+    def __repr__(self) -> str:
+        params = ', '.join(f"{k}={v}" for k, v in self.describe().items() if k != 'backend')
+        return f"{self.__class__.__name__}({params})"
+
+
+class OpenCVJpegEncoder(ImageEncoder):
+    """JPEG via cv2.imencode"""
+
+    name = 'opencv_jpeg'
+    extension = '.jpg'
+
+    def __init__(self, quality: int = 90, optimize: bool = False, progressive: bool = False):
+        """
+        Args:
+            quality: JPEG quality (1-100)
+            optimize: Optimize Huffman tables (smaller, slightly slower)
+            progressive: Progressive JPEG
+        """
+        self.quality = int(quality)
+        self.optimize = optimize
+        self.progressive = progressive
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if optimize:
+            self._params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        if progressive:
+            self._params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        ok, buf = cv2.imencode('.jpg', frame, self._params)
+        if not ok:
+            raise RuntimeError("cv2.imencode(.jpg) failed")
+        return buf.tobytes()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'extension': self.extension,
+            'quality': self.quality,
+            'optimize': self.optimize,
+            'progressive': self.progressive,
+        }
+
+
+class TurboJpegEncoder(ImageEncoder):
+    """JPEG via libjpeg-turbo (PyTurboJPEG)"""
+
+    name = 'turbojpeg'
+    extension = '.jpg'
+
+    SUBSAMPLING = ('444', '422', '420', 'gray')
+
+    def __init__(
+        self,
+        quality: int = 90,
+        subsampling: str = '420',
+        fast_dct: bool = True,
+        lib_path: Optional[str] = None
+    ):
+        """
+        Args:
+            quality: JPEG quality (1-100)
+            subsampling: Chroma subsampling - '444', '422', '420' or 'gray'
+            fast_dct: Use the fast (less accurate) DCT
+            lib_path: Explicit libturbojpeg.so path (None = auto-detect)
+
+        Raises:
+            ImportError: PyTurboJPEG is not installed
+        """
+        if not TURBOJPEG_AVAILABLE:
+            raise ImportError("PyTurboJPEG not installed (pip install PyTurboJPEG)")
+        if subsampling not in self.SUBSAMPLING:
+            raise ValueError(f"Unknown subsampling: {subsampling} (use one of {self.SUBSAMPLING})")
+
+        self.quality = int(quality)
+        self.subsampling = subsampling
+        self.fast_dct = fast_dct
+        self._jpeg = TurboJPEG(lib_path) if lib_path else TurboJPEG()
+        self._subsample = {
+            '444': TJSAMP_444,
+            '422': TJSAMP_422,
+            '420': TJSAMP_420,
+            'gray': TJSAMP_GRAY,
+        }[subsampling]
+        self._flags = TJFLAG_FASTDCT if fast_dct else 0
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        return self._jpeg.encode(
+            frame,
+            quality=self.quality,
+            jpeg_subsample=self._subsample,
+            flags=self._flags
+        )
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return self._jpeg.decode(data)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'extension': self.extension,
+            'quality': self.quality,
+            'subsampling': self.subsampling,
+            'fast_dct': self.fast_dct,
+        }
+
+
+class PngEncoder(ImageEncoder):
+    """Lossless PNG via cv2.imencode"""
+
+    name = 'png'
+    extension = '.png'
+    lossless = True
+
+    def __init__(self, compression: int = 3):
+        """
+        Args:
+            compression: zlib level 0-9 (0 = fastest/largest)
+        """
+        self.compression = int(compression)
+        self._params = [cv2.IMWRITE_PNG_COMPRESSION, self.compression]
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        ok, buf = cv2.imencode('.png', frame, self._params)
+        if not ok:
+            raise RuntimeError("cv2.imencode(.png) failed")
+        return buf.tobytes()
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'extension': self.extension, 'compression': self.compression}
+
+
+class WebPEncoder(ImageEncoder):
+    """WebP via cv2.imencode (quality > 100 = lossless)"""
+
+    name = 'webp'
+    extension = '.webp'
+
+    def __init__(self, quality: int = 90):
+        """
+        Args:
+            quality: 1-100 lossy, 101 lossless
+        """
+        self.quality = int(quality)
+        self.lossless = self.quality > 100
+        self._params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        ok, buf = cv2.imencode('.webp', frame, self._params)
+        if not ok:
+            raise RuntimeError("cv2.imencode(.webp) failed")
+        return buf.tobytes()
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'extension': self.extension, 'quality': self.quality}
+
+
+class NpyEncoder(ImageEncoder):
+    """Raw numpy array (.npy) - lossless, no compression"""
+
+    name = 'npy'
+    extension = '.npy'
+    lossless = True
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        buf = io.BytesIO()
+        np.save(buf, np.ascontiguousarray(frame), allow_pickle=False)
+        return buf.getvalue()
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+ENCODERS = {
+    'opencv_jpeg': OpenCVJpegEncoder,
+    'jpeg': OpenCVJpegEncoder,
+    'turbojpeg': TurboJpegEncoder,
+    'png': PngEncoder,
+    'webp': WebPEncoder,
+    'npy': NpyEncoder,
+}
+
+
+def create_encoder(spec: Union[str, Dict[str, Any], ImageEncoder, None] = None,
+                   fallback: bool = True) -> ImageEncoder:
+    """
+    Build an encoder from a config value
+
+    Args:
+        spec: Backend name ("png"), dict ({"backend": "turbojpeg", "quality": 90,
+              "subsampling": "420"}), an existing encoder, or None (OpenCV JPEG 90)
+        fallback: If the backend's library is missing, fall back to OpenCV JPEG
+                  (keeps quality) instead of raising
+
+    Returns:
+        ImageEncoder instance
+    """
+    if isinstance(spec, ImageEncoder):
+        return spec
+    if spec is None:
+        return OpenCVJpegEncoder()
+    if isinstance(spec, str):
+        spec = {'backend': spec}
+
+    options = {k: v for k, v in spec.items() if not k.startswith('_')}
+    backend = options.pop('backend', 'opencv_jpeg')
+    cls = ENCODERS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown encoder backend: {backend} (use one of {sorted(ENCODERS)})")
+
+    try:
+        return cls(**options)
+    except ImportError as e:
+        if not fallback:
+            raise
+        logger.warning(f"{backend} unavailable ({e}), falling back to opencv_jpeg")
+        quality = options.get('quality', 90)
+        return OpenCVJpegEncoder(quality=quality)
+
+
+def create_stream_encoders(specs: Optional[Dict[str, Any]],
+                           streams: Iterable[str],
+                           default: Union[str, Dict[str, Any], None] = None) -> Dict[str, ImageEncoder]:
+    """
+    Resolve one encoder per save stream from config
+
+    Args:
+        specs: Config mapping {stream_name: spec}; a "default" entry applies to
+               streams without their own entry
+        streams: Stream names the caller saves to
+        default: Spec used when specs has neither the stream nor "default"
+
+    Returns:
+        {stream_name: ImageEncoder}
+    """
+    specs = specs or {}
+    base_spec = specs.get('default', default)
+    encoders = {}
+    for stream in streams:
+        encoders[stream] = create_encoder(specs.get(stream, base_spec))
+        logger.info(f"Encoder for {stream}: {encoders[stream]!r}")
+    return encoders
@@ -0,0 +1,213 @@
+"""
+Pre/Post-Event Clip Buffer
+
+Keeps the last `pre_sec` seconds of a camera in memory as small JPEGs
+(downscaled, rate-limited to `fps`, capped at `max_bytes`). When an event
+fires (e.g. night-mode motion), the buffered pre-roll and the next
+`post_sec` seconds are written through a FrameSink, so the caller's loop
+never waits on disk.
+
+Clip layout:
+    <clip_dir>/HHMMSS_mmm.jpg ...   pre-roll + post-roll frames
+    <clip_dir>/event.json           trigger time, frame list, settings
+
+Example:
+    clips = EventClipBuffer(sink, pre_sec=5, post_sec=5, fps=2, size=(640, 512))
+    clips.push(frame)                       # every camera frame
+    if motion:
+        clips.trigger("~/Detection/20250105/231502", info={"areas": [1800]})
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional, Tuple, Dict, Any, List
+
+import cv2
+import numpy as np
+
+from .encoders import ImageEncoder, create_encoder
+from .frame_sink import FrameSink
+
+logger = logging.getLogger(__name__)
+
+
+class EventClipBuffer:
+    """
+    Bounded in-memory ring of compressed frames with pre/post-roll clip export
+
+    push()/trigger() run on the capture thread: push() costs one resize +
+    small JPEG encode at most `fps` times per second; writes go to the sink.
+    """
+
+    def __init__(
+        self,
+        sink: FrameSink,
+        pre_sec: float = 5.0,
+        post_sec: float = 5.0,
+        fps: float = 2.0,
+        size: Optional[Tuple[int, int]] = (640, 512),
+        quality: int = 70,
+        max_bytes: int = 16 * 1024 * 1024,
+        encoder: Optional[ImageEncoder] = None
+    ):
+        """
+        Initialize clip buffer
+
+        Args:
+            sink: Started FrameSink used for all clip writes
+            pre_sec: Seconds kept before an event
+            post_sec: Seconds recorded after the (last) event
+            fps: Max frames per second stored in the ring / clip
+            size: Downscale to (width, height) before encoding (None = full size)
+            quality: JPEG quality for buffered frames
+            max_bytes: Memory cap for buffered JPEG bytes (oldest dropped first)
+            encoder: ImageEncoder override (default: OpenCV JPEG at quality)
+        """
+        self.sink = sink
+        self.pre_sec = pre_sec
+        self.post_sec = post_sec
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.size = tuple(size) if size else None
+        self.max_bytes = int(max_bytes)
+        self.encoder = encoder or create_encoder({'backend': 'opencv_jpeg', 'quality': quality})
+
+        self._lock = threading.Lock()
+        self._ring: deque = deque()  # (timestamp, jpeg bytes)
+        self._ring_bytes = 0
+        self._last_push = 0.0
+
+        # Active clip
+        self._clip_dir: Optional[str] = None
+        self._clip_deadline = 0.0
+        self._clip_frames: List[Dict[str, Any]] = []
+        self._clip_info: Dict[str, Any] = {}
+
+        # Statistics
+        self.clips_written = 0
+        self.frames_written = 0
+
+    @property
+    def active(self) -> bool:
+        """True while a post-roll is being recorded"""
+        return self._clip_dir is not None
+
+    def push(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """
+        Offer a camera frame (rate-limited to fps)
+
+        Args:
+            frame: BGR frame (not kept - encoded immediately)
+            timestamp: Capture time (unix, default: now)
+
+        Returns:
+            True if the frame was stored
+        """
+        ts = timestamp if timestamp is not None else time.time()
+        if self._clip_dir is not None and ts > self._clip_deadline:
+            self.finish()
+        if frame is None or ts - self._last_push < self.interval:
+            return False
+        self._last_push = ts
+
+        small = frame
+        if self.size and (frame.shape[1], frame.shape[0]) != self.size:
+            small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        data = self.encoder.encode(small)
+
+        with self._lock:
+            self._ring.append((ts, data))
+            self._ring_bytes += len(data)
+            cutoff = ts - self.pre_sec
+            while self._ring and (self._ring[0][0] < cutoff or self._ring_bytes > self.max_bytes):
+                _, old = self._ring.popleft()
+                self._ring_bytes -= len(old)
+
+        if self._clip_dir is not None:
+            self._write_frame(ts, data)
+        return True
+
+    def trigger(self, clip_dir: str, info: Optional[Dict[str, Any]] = None,
+                timestamp: Optional[float] = None) -> bool:
+        """
+        Start a clip (pre-roll written now, post-roll as frames arrive)
+
+        A trigger during an active post-roll extends the same clip.
+
+        Args:
+            clip_dir: Output directory for this clip
+            info: Extra fields stored in event.json (e.g. motion areas)
+            timestamp: Event time (unix, default: now)
+
+        Returns:
+            True if a new clip was started, False if an active clip was extended
+        """
+        ts = timestamp if timestamp is not None else time.time()
+        if self._clip_dir is not None:
+            self._clip_deadline = ts + self.post_sec
+            self._clip_info.setdefault('extra_triggers', []).append(round(ts, 3))
+            return False
+
+        self._clip_dir = os.path.expanduser(clip_dir)
+        self._clip_deadline = ts + self.post_sec
+        self._clip_frames = []
+        self._clip_info = dict(info or {}, trigger_ts=round(ts, 3),
+                               trigger_time=datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3])
+
+        with self._lock:
+            pre_roll = list(self._ring)
+        for frame_ts, data in pre_roll:
+            self._write_frame(frame_ts, data)
+        return True
+
+    def _write_frame(self, ts: float, data: bytes) -> None:
+        name = datetime.fromtimestamp(ts).strftime("%H%M%S_%f")[:-3] + self.encoder.extension
+        if self.sink.submit_encoded(os.path.join(self._clip_dir, name), data, captured_at=ts):
+            self._clip_frames.append({'file': name, 'ts': round(ts, 3),
+                                      'offset_sec': round(ts - self._clip_info['trigger_ts'], 3)})
+
+    def finish(self) -> Optional[str]:
+        """
+        Close the active clip and queue its event.json
+
+        Returns:
+            Clip directory (None if no clip was active)
+        """
+        clip_dir = self._clip_dir
+        if clip_dir is None:
+            return None
+        event = dict(self._clip_info,
+                     pre_sec=self.pre_sec,
+                     post_sec=self.post_sec,
+                     frame_count=len(self._clip_frames),
+                     size=list(self.size) if self.size else None,
+                     encoder=self.encoder.describe(),
+                     frames=self._clip_frames)
+        self.sink.submit_encoded(os.path.join(clip_dir, "event.json"),
+                                 json.dumps(event, ensure_ascii=False, indent=2).encode('utf-8'))
+        self.clips_written += 1
+        self.frames_written += len(self._clip_frames)
+        self._clip_dir = None
+        self._clip_frames = []
+        self._clip_info = {}
+        return clip_dir
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get buffer statistics
+
+        Returns:
+            Dictionary with buffered frames/bytes and written clip counts
+        """
+        with self._lock:
+            return {
+                'buffered_frames': len(self._ring),
+                'buffered_bytes': self._ring_bytes,
+                'active': self.active,
+                'clips_written': self.clips_written,
+                'frames_written': self.frames_written,
+            }
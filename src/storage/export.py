@@ -0,0 +1,472 @@
+"""
+Columnar Training Export
+
+Builds one column table per session from the SessionCatalog: every frame
+row carries its camera, capture time, the oil/probe temperature in effect
+at that time (backward as-of join on the temperature samples), elapsed time
+and time to the completion marker, plus optional ColorFeatures from the
+DatasetAnalyzer feature cache.
+
+Formats:
+    npy      <out>/<name>/<column>.npy + meta.json (np.load(mmap_mode='r'))
+    npz      <out>/<name>.npz (single file, loaded into memory)
+    parquet  <out>/<name>.parquet (requires pyarrow)
+
+Export is incremental: <out>/manifest.json records a signature per session
+(frame count, last frame time, temperature count, completion marker), and
+only new or changed sessions are rewritten.
+
+Example:
+    catalog = SessionCatalog()
+    exporter = TrainingExporter(catalog, "~/AI_Data/export")
+    exporter.export(food_type="chicken", completed=True)
+    table = load_dataset("~/AI_Data/export")    # dict of column arrays
+
+CLI:
+    python3 -m src.storage.export ~/AI_Data/export --food chicken --completed --scan
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+from .catalog import SessionCatalog, DEFAULT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = ('npy', 'npz', 'parquet')
+MANIFEST_FILE = 'manifest.json'
+SENSORS = ('oil', 'probe')
+
+# Legacy 4-camera sessions log temperatures per side
+CAMERA_POSITIONS = {0: 'left', 1: 'right'}
+
+# Same columns as DatasetAnalyzer's <session>_features.csv
+FEATURE_COLUMNS = ('food_area_ratio', 'hue_mean', 'saturation_mean', 'value_mean',
+                   'brown_ratio', 'golden_ratio', 'lab_l', 'lab_a', 'lab_b')
+
+
+# =========================
+# Joins
+# =========================
+def asof_join(
+    frame_ts: np.ndarray,
+    sample_ts: np.ndarray,
+    values: np.ndarray,
+    max_age_sec: Optional[float] = None
+) -> np.ndarray:
+    """
+    Value of the latest sample at or before each frame time
+
+    Args:
+        frame_ts: Frame times (any order)
+        sample_ts: Sample times, sorted ascending
+        values: Sample values (same length as sample_ts)
+        max_age_sec: Samples older than this count as missing (None = no limit)
+
+    Returns:
+        float32 array (NaN where no sample applies)
+    """
+    out = np.full(len(frame_ts), np.nan, dtype=np.float32)
+    if len(sample_ts) == 0 or len(frame_ts) == 0:
+        return out
+    idx = np.searchsorted(sample_ts, frame_ts, side='right') - 1
+    valid = idx >= 0
+    if max_age_sec is not None:
+        valid &= (frame_ts - sample_ts[np.clip(idx, 0, None)]) <= max_age_sec
+    out[valid] = values[idx[valid]]
+    return out
+
+
+def _select_position(positions: Iterable[str], pot: Optional[str], camera: int) -> Optional[str]:
+    """Temperature position matching a frame (None = use all samples of the sensor)"""
+    positions = set(positions)
+    for candidate in (pot, CAMERA_POSITIONS.get(camera)):
+        if candidate and candidate in positions:
+            return candidate
+    return None
+
+
+class FeatureLookup:
+    """
+    Read-only view of the DatasetAnalyzer feature cache (feature_cache.db)
+
+    Entries are used only if the image's mtime/size still match.
+    """
+
+    def __init__(self, db_path: str, params: Optional[str] = None):
+        """
+        Args:
+            db_path: FeatureCache database path
+            params: Segmenter params key (default: the one with the most entries)
+        """
+        self.conn = sqlite3.connect(f"file:{os.path.expanduser(db_path)}?mode=ro", uri=True)
+        if params is None:
+            row = self.conn.execute(
+                "SELECT params FROM features GROUP BY params ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+            params = row[0] if row else ''
+        self.params = params
+
+    def get(self, path: str) -> Optional[Tuple[float, ...]]:
+        """FEATURE_COLUMNS values for an image, or None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        row = self.conn.execute(
+            "SELECT food_area_ratio, color_features FROM features "
+            "WHERE path = ? AND params = ? AND mtime_ns = ? AND size = ?",
+            (os.path.realpath(path), self.params, st.st_mtime_ns, st.st_size)).fetchone()
+        if row is None:
+            return None
+        f = json.loads(row[1])
+        return (row[0], f['mean_hsv'][0], f['saturation_mean'], f['value_mean'],
+                f['brown_ratio'], f['golden_ratio'], *f['mean_lab'])
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def build_session_table(
+    catalog: SessionCatalog,
+    session: Dict[str, Any],
+    max_age_sec: Optional[float] = 30.0,
+    features: Optional[FeatureLookup] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Column table for one catalog session
+
+    Args:
+        catalog: Session catalog
+        session: Session row (SessionCatalog.find_sessions())
+        max_age_sec: Max age of a temperature sample for the as-of join
+        features: Optional feature cache lookup (adds FEATURE_COLUMNS)
+
+    Returns:
+        Dict of equal-length column arrays (empty dict if the session has no frames)
+    """
+    key = session['session_key']
+    frames = catalog.frames(key)
+    if not frames:
+        return {}
+
+    ts = np.array([f['ts'] if f['ts'] is not None else np.nan for f in frames], dtype=np.float64)
+    camera = np.array([f['camera'] if f['camera'] is not None else -1 for f in frames], dtype=np.int16)
+    n = len(frames)
+    start_ts = session.get('start_ts')
+    completion = catalog.completion(key)
+    completion_ts = completion['ts'] if completion else None
+
+    table: Dict[str, np.ndarray] = {
+        'path': np.array([f['path'] for f in frames]),
+        'session_id': np.array([session.get('session_id') or ''] * n),
+        'food_type': np.array([session.get('food_type') or ''] * n),
+        'camera': camera,
+        'ts': ts,
+        'elapsed_sec': (ts - start_ts).astype(np.float32) if start_ts else np.full(n, np.nan, np.float32),
+        'time_to_completion': ((completion_ts - ts).astype(np.float32) if completion_ts is not None
+                               else np.full(n, np.nan, np.float32)),
+        'shard': np.array([f['shard'] or '' for f in frames]),
+        'offset': np.array([f['offset'] if f['offset'] is not None else -1 for f in frames], dtype=np.int64),
+    }
+
+    # Temperatures: as-of join per sensor (and per position where the session logs several)
+    samples = catalog.temperatures(key)
+    for sensor in SENSORS:
+        rows = [s for s in samples if s['sensor'] == sensor and s['value'] is not None]
+        column = np.full(n, np.nan, dtype=np.float32)
+        positions = {s['position'] for s in rows}
+        for cam in np.unique(camera):
+            position = _select_position(positions, session.get('pot'), int(cam))
+            picked = [s for s in rows if position is None or s['position'] == position]
+            mask = camera == cam
+            column[mask] = asof_join(ts[mask],
+                                     np.array([s['ts'] for s in picked], dtype=np.float64),
+                                     np.array([s['value'] for s in picked], dtype=np.float32),
+                                     max_age_sec)
+        table[f'{sensor}_temp'] = column
+
+    if features is not None:
+        values = np.full((n, len(FEATURE_COLUMNS)), np.nan, dtype=np.float32)
+        for i, f in enumerate(frames):
+            if not f['shard']:
+                row = features.get(f['path'])
+                if row is not None:
+                    values[i] = row
+        for j, name in enumerate(FEATURE_COLUMNS):
+            table[name] = values[:, j]
+
+    return table
+
+
+# =========================
+# Storage
+# =========================
+def write_table(table: Dict[str, np.ndarray], base_path: str, fmt: str = 'npy',
+                meta: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write a column table
+
+    Args:
+        table: Column arrays
+        base_path: Output path without extension
+        fmt: 'npy' (directory of .npy, memory-mappable), 'npz' or 'parquet'
+        meta: Extra session fields (npy: meta.json, parquet: schema metadata)
+
+    Returns:
+        Written file/directory path
+    """
+    if fmt == 'npy':
+        os.makedirs(base_path, mode=0o755, exist_ok=True)
+        for name, column in table.items():
+            np.save(os.path.join(base_path, f"{name}.npy"), column)
+        with open(os.path.join(base_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(dict(meta or {}, columns=list(table), rows=_rows(table)), f, indent=2, ensure_ascii=False)
+        return base_path
+    if fmt == 'npz':
+        path = base_path + '.npz'
+        np.savez(path, **table)
+        return path
+    if fmt == 'parquet':
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("parquet export requires pyarrow (pip install pyarrow)")
+        path = base_path + '.parquet'
+        arrow = pa.table({name: column.tolist() if column.dtype.kind == 'U' else column
+                          for name, column in table.items()})
+        if meta:
+            arrow = arrow.replace_schema_metadata({'session': json.dumps(meta, ensure_ascii=False)})
+        pq.write_table(arrow, path)
+        return path
+    raise ValueError(f"Unknown export format: {fmt} (expected one of {EXPORT_FORMATS})")
+
+
+def load_table(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Load a column table written by write_table()
+
+    Args:
+        path: .npy directory, .npz or .parquet
+        mmap: Memory-map columns (npy directories; parquet uses a memory-mapped read)
+
+    Returns:
+        Dict of column arrays
+    """
+    path = os.path.expanduser(path)
+    if os.path.isdir(path):
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            columns = json.load(f)['columns']
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+                for name in columns}
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    if path.endswith('.parquet'):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("parquet export requires pyarrow (pip install pyarrow)")
+        arrow = pq.read_table(path, memory_map=mmap)
+        return {name: arrow.column(name).to_numpy() for name in arrow.column_names}
+    raise ValueError(f"Unknown table format: {path}")
+
+
+def _rows(table: Dict[str, np.ndarray]) -> int:
+    return len(next(iter(table.values()))) if table else 0
+
+
+# =========================
+# Exporter
+# =========================
+class TrainingExporter:
+    """
+    Incremental per-session export of catalog sessions to column tables
+    """
+
+    def __init__(
+        self,
+        catalog: SessionCatalog,
+        out_dir: str,
+        fmt: str = 'npy',
+        max_age_sec: Optional[float] = 30.0,
+        feature_cache: Optional[str] = None,
+        feature_params: Optional[str] = None
+    ):
+        """
+        Initialize exporter
+
+        Args:
+            catalog: Session catalog (call scan() first for data written without it)
+            out_dir: Output directory (tables + manifest.json)
+            fmt: 'npy', 'npz' or 'parquet'
+            max_age_sec: Max temperature sample age for the as-of join (None = no limit)
+            feature_cache: DatasetAnalyzer feature_cache.db to add ColorFeatures columns
+            feature_params: Segmenter params key in the feature cache (default: most common)
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt} (expected one of {EXPORT_FORMATS})")
+        self.catalog = catalog
+        self.out_dir = os.path.expanduser(out_dir)
+        self.fmt = fmt
+        self.max_age_sec = max_age_sec
+        self.features = FeatureLookup(feature_cache, feature_params) if feature_cache else None
+        os.makedirs(self.out_dir, mode=0o755, exist_ok=True)
+        self.manifest_path = os.path.join(self.out_dir, MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return {'format': self.fmt, 'sessions': {}}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != self.fmt:
+            logger.info(f"Export format changed ({manifest.get('format')} -> {self.fmt}), re-exporting all")
+            manifest = {'format': self.fmt, 'sessions': {}}
+        return manifest
+
+    def _save_manifest(self) -> None:
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def _signature(self, key: str) -> List[Any]:
+        return list(self.catalog.revision(key)) + [self.max_age_sec, self.features.params if self.features else None]
+
+    @staticmethod
+    def _table_name(session: Dict[str, Any]) -> str:
+        parts = [session.get('kind'), session.get('pot'), session.get('session_id'), session.get('food_type')]
+        name = '_'.join(p for p in parts if p) or os.path.basename(session['session_key'])
+        return name.replace(os.sep, '_')
+
+    def export_session(self, session: Dict[str, Any], force: bool = False) -> Optional[str]:
+        """
+        Export one session if it is new or changed
+
+        Args:
+            session: Session row (SessionCatalog.find_sessions())
+            force: Rewrite even if unchanged
+
+        Returns:
+            Written table path, or None if unchanged / no frames
+        """
+        key = session['session_key']
+        signature = self._signature(key)
+        entry = self.manifest['sessions'].get(key)
+        if not force and entry and entry['signature'] == signature:
+            return None
+
+        table = build_session_table(self.catalog, session, self.max_age_sec, self.features)
+        if not table:
+            return None
+        meta = {k: session.get(k) for k in ('session_key', 'session_id', 'kind', 'pot', 'food_type',
+                                             'start_ts', 'completion_marked', 'device_id')}
+        path = write_table(table, os.path.join(self.out_dir, self._table_name(session)), self.fmt, meta)
+        self.manifest['sessions'][key] = {
+            'table': os.path.relpath(path, self.out_dir),
+            'rows': _rows(table),
+            'signature': signature,
+        }
+        return path
+
+    def export(self, sessions: Optional[List[Dict[str, Any]]] = None, force: bool = False,
+               **filters) -> Dict[str, int]:
+        """
+        Export sessions (new/changed only)
+
+        Args:
+            sessions: Session rows (default: catalog.find_sessions(**filters))
+            force: Rewrite all
+            **filters: find_sessions() filters (food_type, pot, completed, ...)
+
+        Returns:
+            Counts: sessions, exported, unchanged, rows
+        """
+        if sessions is None:
+            sessions = self.catalog.find_sessions(**filters)
+        stats = {'sessions': len(sessions), 'exported': 0, 'unchanged': 0, 'rows': 0}
+        try:
+            for session in sessions:
+                try:
+                    path = self.export_session(session, force=force)
+                except (OSError, ValueError, RuntimeError) as e:
+                    logger.error(f"Export failed ({session['session_key']}): {e}")
+                    continue
+                if path is None:
+                    stats['unchanged'] += 1
+                else:
+                    stats['exported'] += 1
+                    logger.info(f"Exported {self.manifest['sessions'][session['session_key']]['rows']} rows -> {path}")
+                entry = self.manifest['sessions'].get(session['session_key'])
+                stats['rows'] += entry['rows'] if entry else 0
+        finally:
+            self._save_manifest()
+        return stats
+
+    def close(self) -> None:
+        if self.features:
+            self.features.close()
+
+
+def load_dataset(out_dir: str, session_keys: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Concatenate exported session tables (listed in manifest.json)
+
+    Args:
+        out_dir: Export directory
+        session_keys: Subset of sessions (default: all)
+
+    Returns:
+        Dict of column arrays (columns missing in some tables are dropped)
+    """
+    out_dir = os.path.expanduser(out_dir)
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        entries = json.load(f)['sessions']
+    keys = list(session_keys) if session_keys is not None else sorted(entries)
+    tables = [load_table(os.path.join(out_dir, entries[k]['table'])) for k in keys if k in entries]
+    if not tables:
+        return {}
+    columns = [c for c in tables[0] if all(c in t for t in tables)]
+    return {c: np.concatenate([t[c] for t in tables]) for c in columns}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Export catalog sessions as columnar training tables")
+    parser.add_argument('out_dir')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Catalog database path")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='npy')
+    parser.add_argument('--scan', action='store_true', help="scan data roots before exporting")
+    parser.add_argument('--food')
+    parser.add_argument('--kind', choices=['frying', 'bucket', 'stirfry'])
+    parser.add_argument('--pot')
+    parser.add_argument('--completed', action='store_true')
+    parser.add_argument('--max-age', type=float, default=30.0, help="max temperature sample age (s)")
+    parser.add_argument('--features', help="DatasetAnalyzer feature_cache.db for ColorFeatures columns")
+    parser.add_argument('--force', action='store_true', help="rewrite unchanged sessions")
+    args = parser.parse_args()
+
+    catalog = SessionCatalog(args.db)
+    try:
+        if args.scan:
+            print(json.dumps(catalog.scan(), indent=2))
+        exporter = TrainingExporter(catalog, args.out_dir, fmt=args.format,
+                                    max_age_sec=args.max_age, feature_cache=args.features)
+        try:
+            print(json.dumps(exporter.export(force=args.force, food_type=args.food, kind=args.kind,
+                                             pot=args.pot, completed=True if args.completed else None),
+                             indent=2))
+        finally:
+            exporter.close()
+    finally:
+        catalog.close()
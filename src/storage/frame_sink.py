@@ -0,0 +1,586 @@
+"""
+Async Write-Behind Frame Sink
+
+Moves resize + image encoding + file writes off capture/GUI threads.
+Frames are queued (bounded) and written by a small worker pool.
+"""
+
+import os
+import time
+import shutil
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, List, Callable, Dict, Any
+
+import cv2
+import numpy as np
+
+from .encoders import ImageEncoder
+from .shards import ShardWriter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FrameJob:
+    """One frame waiting to be written"""
+    path: str
+    frame: Optional[np.ndarray]
+    resize: Optional[Tuple[int, int]] = None
+    interpolation: int = cv2.INTER_LINEAR
+    params: List[int] = field(default_factory=list)
+    session: Optional[str] = None
+    encoder: Optional[ImageEncoder] = None
+    shard: Optional[ShardWriter] = None
+    captured_at: float = 0.0
+    enqueued_at: float = 0.0
+    data: Optional[bytes] = None    # Already-encoded bytes (skips resize/encode)
+    link_from: Optional[str] = None  # Hardlink this written file instead of encoding
+
+
+@dataclass
+class FrameWriteResult:
+    """Outcome of one write, passed to listeners"""
+    path: str
+    session: Optional[str]
+    success: bool
+    bytes_written: int
+    encode_ms: float
+    write_ms: float
+    queue_wait_ms: float
+    timestamp: float
+    error: Optional[str] = None
+    shard: Optional[str] = None     # Shard file when written into a ShardWriter
+    offset: Optional[int] = None    # Byte offset inside the shard
+    captured_at: Optional[float] = None  # Unix time the frame was submitted
+    linked_from: Optional[str] = None    # Source file when written as a hardlink
+
+
+class FrameSink:
+    """
+    Bounded write-behind queue for captured frames
+
+    Features:
+    - submit() never blocks with the 'drop_oldest' policy (capture threads stay real-time)
+    - Configurable encoder worker pool
+    - Directory creation cached per output directory (one makedirs per session/camera)
+    - Stats: queue depth, encode ms, bytes/s, dropped/failed counts
+    - Listeners notified after every write (catalog, retention, ...)
+    - close_shard(): shards close after their last queued job, off the caller's thread
+
+    Example:
+        sink = FrameSink(workers=2, max_queue=32)
+        sink.start()
+        sink.submit("/data/s1/camera_0/0001.jpg", frame, resize=(1280, 720), quality=90)
+        ...
+        sink.stop()
+    """
+
+    POLICIES = ('drop_oldest', 'block')
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 32,
+        policy: str = 'drop_oldest',
+        block_timeout: float = 1.0,
+        name: str = 'frame_sink'
+    ):
+        """
+        Initialize frame sink
+
+        Args:
+            workers: Number of encoder/writer threads
+            max_queue: Maximum queued frames (memory bound)
+            policy: Backpressure when full - 'drop_oldest' or 'block'
+            block_timeout: Max seconds submit() waits with the 'block' policy
+            name: Thread name prefix (for logs)
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy} (use one of {self.POLICIES})")
+
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.name = name
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._in_flight = 0
+        self._writing_paths = set()  # File paths currently being written (link sources)
+
+        # Shards: queued + in-flight job count, and closes waiting for it to reach 0
+        self._shard_pending: Dict[ShardWriter, int] = {}
+        self._shard_closers: Dict[ShardWriter, Optional[Callable[[], None]]] = {}
+
+        # Directory cache
+        self._known_dirs = set()
+        self._dirs_lock = threading.Lock()
+
+        # Listeners: callback(FrameWriteResult)
+        self._listeners: List[Callable[[FrameWriteResult], None]] = []
+
+        # Statistics
+        self._stats_lock = threading.Lock()
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._linked = 0
+        self._total_bytes = 0
+        self._encode_ms_total = 0.0
+        self._max_depth = 0
+        self._recent = deque()  # (timestamp, bytes) for bytes/s window
+        self._rate_window = 10.0
+
+    # =========================
+    # Lifecycle
+    # =========================
+    def start(self) -> None:
+        """Start worker threads"""
+        if self._running:
+            return
+        self._running = True
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        logger.info(f"{self.name}: started ({self.workers} workers, queue={self.max_queue}, policy={self.policy})")
+
+    def stop(self, drain: bool = True, timeout: float = 10.0) -> None:
+        """
+        Stop worker threads
+
+        Args:
+            drain: Write all queued frames before stopping
+            timeout: Max seconds to wait for draining
+        """
+        if not self._running:
+            return
+        if drain:
+            self.flush(timeout)
+        closers = []
+        with self._cond:
+            self._running = False
+            if not drain:
+                self._dropped_locked(len(self._queue))
+                for job in self._queue:
+                    closers.append(self._release_shard_locked(job))
+                self._queue.clear()
+            self._cond.notify_all()
+        for closer in closers:
+            self._run_shard_closer(closer)
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads = []
+        logger.info(f"{self.name}: stopped ({self.get_stats()})")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until queue is empty and no write is in progress
+
+        Returns:
+            True if fully flushed within timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remain = None if deadline is None else deadline - time.monotonic()
+                if remain is not None and remain <= 0:
+                    return False
+                self._cond.wait(remain)
+        return True
+
+    def close_shard(self, shard: ShardWriter, on_closed: Optional[Callable[[], None]] = None) -> None:
+        """
+        Close a ShardWriter once every job queued for it has been written
+
+        Returns immediately: the shard is closed by the worker that finishes its
+        last pending job (or right away if nothing is pending), so GUI/capture
+        threads do not wait for the whole queue like flush().
+
+        Args:
+            shard: ShardWriter passed to submit()/submit_encoded()
+            on_closed: Optional callback() run after the shard is closed
+                       (worker thread when jobs were pending)
+        """
+        with self._cond:
+            if self._shard_pending.get(shard):
+                self._shard_closers[shard] = on_closed
+                return
+        self._run_shard_closer((shard, on_closed))
+
+    def _release_shard_locked(self, job: FrameJob):
+        """Count a finished/dropped shard job; returns (shard, on_closed) when its close is due"""
+        shard = job.shard
+        if shard is None:
+            return None
+        remaining = self._shard_pending.get(shard, 0) - 1
+        if remaining > 0:
+            self._shard_pending[shard] = remaining
+            return None
+        self._shard_pending.pop(shard, None)
+        if shard in self._shard_closers:
+            return shard, self._shard_closers.pop(shard)
+        return None
+
+    def _run_shard_closer(self, closer) -> None:
+        if closer is None:
+            return
+        shard, on_closed = closer
+        try:
+            shard.close()
+            if on_closed is not None:
+                on_closed()
+        except Exception as e:
+            logger.error(f"{self.name}: failed to close shard {shard.directory}: {e}")
+
+    def add_listener(self, callback: Callable[[FrameWriteResult], None]) -> None:
+        """Register callback(FrameWriteResult) called from worker threads after each write"""
+        self._listeners.append(callback)
+
+    # =========================
+    # Producer API
+    # =========================
+    def submit(
+        self,
+        path: str,
+        frame: np.ndarray,
+        resize: Optional[Tuple[int, int]] = None,
+        interpolation: int = cv2.INTER_LINEAR,
+        quality: Optional[int] = None,
+        params: Optional[List[int]] = None,
+        session: Optional[str] = None,
+        encoder: Optional[ImageEncoder] = None,
+        shard: Optional[ShardWriter] = None
+    ) -> bool:
+        """
+        Queue a frame for writing
+
+        The frame array is kept by reference - do not modify it after submitting
+        (pass a copy if the caller keeps drawing on it).
+
+        Args:
+            path: Output file path (extension decides the format unless encoder is given;
+                  callers should use encoder.extension)
+            frame: BGR image
+            resize: Optional (width, height) applied on the worker thread
+            interpolation: cv2 interpolation flag for resize
+            quality: JPEG quality shortcut (ignored when params is given)
+            params: Raw cv2.imencode params
+            session: Session key for stats/listeners
+            encoder: ImageEncoder backend (overrides quality/params)
+            shard: Append into this ShardWriter instead of writing a file;
+                   path is then the member name inside the shard
+
+        Returns:
+            True if queued, False if rejected (sink stopped / block timeout)
+        """
+        if frame is None:
+            return False
+        if params is None:
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if quality is not None else []
+
+        job = FrameJob(
+            path=path,
+            frame=frame,
+            resize=resize,
+            interpolation=interpolation,
+            params=params,
+            session=session,
+            encoder=encoder,
+            shard=shard,
+            captured_at=time.time(),
+            enqueued_at=time.monotonic()
+        )
+        return self._enqueue(job)
+
+    def submit_encoded(
+        self,
+        path: str,
+        data: bytes,
+        session: Optional[str] = None,
+        shard: Optional[ShardWriter] = None,
+        captured_at: Optional[float] = None
+    ) -> bool:
+        """
+        Queue already-encoded bytes for writing (no resize/encode on the worker)
+
+        Args:
+            path: Output file path (member name when shard is given)
+            data: File bytes (e.g. a JPEG encoded earlier, JSON sidecar)
+            session: Session key for stats/listeners
+            shard: Append into this ShardWriter instead of writing a file
+            captured_at: Unix time the data was captured (default: now)
+
+        Returns:
+            True if queued, False if rejected (sink stopped / block timeout)
+        """
+        job = FrameJob(
+            path=path,
+            frame=None,
+            session=session,
+            shard=shard,
+            captured_at=captured_at if captured_at is not None else time.time(),
+            enqueued_at=time.monotonic(),
+            data=data
+        )
+        return self._enqueue(job)
+
+    def submit_link(
+        self,
+        src_path: str,
+        path: str,
+        session: Optional[str] = None
+    ) -> bool:
+        """
+        Queue a hardlink to a file submitted earlier (same frame stored once,
+        referenced from another session directory)
+
+        Falls back to a copy if hardlinks are not possible (other filesystem).
+
+        Args:
+            src_path: Path of a file already submitted to this sink
+            path: New path referencing the same data
+            session: Session key for stats/listeners
+
+        Returns:
+            True if queued, False if rejected (sink stopped / block timeout)
+        """
+        job = FrameJob(
+            path=path,
+            frame=None,
+            session=session,
+            captured_at=time.time(),
+            enqueued_at=time.monotonic(),
+            link_from=src_path
+        )
+        return self._enqueue(job)
+
+    def _enqueue(self, job: FrameJob) -> bool:
+        closer = None
+        with self._cond:
+            if not self._running:
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                if self.policy == 'drop_oldest':
+                    closer = self._release_shard_locked(self._queue.popleft())
+                    self._dropped_locked(1)
+                else:
+                    ok = self._cond.wait_for(
+                        lambda: len(self._queue) < self.max_queue or not self._running,
+                        self.block_timeout
+                    )
+                    if not ok or not self._running:
+                        self._dropped_locked(1)
+                        return False
+
+            self._queue.append(job)
+            self._submitted += 1
+            if job.shard is not None:
+                self._shard_pending[job.shard] = self._shard_pending.get(job.shard, 0) + 1
+            if len(self._queue) > self._max_depth:
+                self._max_depth = len(self._queue)
+            self._cond.notify_all()
+        self._run_shard_closer(closer)
+        return True
+
+    def _dropped_locked(self, count: int) -> None:
+        if count:
+            first = self._dropped == 0
+            self._dropped += count
+            if first or self._dropped % 50 < count:
+                logger.warning(f"{self.name}: queue full, dropped frames (total {self._dropped})")
+
+    # =========================
+    # Worker
+    # =========================
+    def _ensure_dir(self, directory: str) -> None:
+        """makedirs once per directory"""
+        if not directory or directory in self._known_dirs:
+            return
+        with self._dirs_lock:
+            if directory not in self._known_dirs:
+                os.makedirs(directory, mode=0o755, exist_ok=True)
+                self._known_dirs.add(directory)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                self._in_flight += 1
+                if job.shard is None and job.link_from is None:
+                    self._writing_paths.add(job.path)
+                self._cond.notify_all()  # wake blocked producers
+
+            try:
+                result = self._link(job) if job.link_from is not None else self._write(job)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._writing_paths.discard(job.path)
+                    self._cond.notify_all()
+
+            for listener in self._listeners:
+                try:
+                    listener(result)
+                except Exception as e:
+                    logger.error(f"{self.name}: listener error: {e}")
+
+            if job.shard is not None:
+                with self._cond:
+                    closer = self._release_shard_locked(job)
+                self._run_shard_closer(closer)
+
+    def _write(self, job: FrameJob) -> FrameWriteResult:
+        queue_wait_ms = (time.monotonic() - job.enqueued_at) * 1000.0
+        encode_ms = write_ms = 0.0
+        nbytes = 0
+        error = None
+        path = job.path
+        record = None
+
+        try:
+            t0 = time.perf_counter()
+            frame = job.frame
+            if job.data is None and job.resize is not None and (frame.shape[1], frame.shape[0]) != tuple(job.resize):
+                frame = cv2.resize(frame, tuple(job.resize), interpolation=job.interpolation)
+            if job.data is not None:
+                data = job.data
+            elif job.encoder is not None:
+                data = job.encoder.encode(frame)
+            else:
+                ext = os.path.splitext(job.path)[1] or '.jpg'
+                ok, buf = cv2.imencode(ext, frame, job.params)
+                if not ok:
+                    raise RuntimeError(f"imencode failed for {ext}")
+                data = buf.tobytes()
+            t1 = time.perf_counter()
+            encode_ms = (t1 - t0) * 1000.0
+
+            if job.shard is not None:
+                path = os.path.join(job.shard.directory, job.path)
+                record = job.shard.write(job.path, data, timestamp=job.captured_at,
+                                         meta={'session': job.session} if job.session else None)
+            else:
+                self._ensure_dir(os.path.dirname(job.path))
+                with open(job.path, 'wb') as f:
+                    f.write(data)
+            write_ms = (time.perf_counter() - t1) * 1000.0
+            nbytes = len(data)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"{self.name}: failed to write {path}: {e}")
+
+        now = time.time()
+        with self._stats_lock:
+            if error is None:
+                self._written += 1
+                self._total_bytes += nbytes
+                self._encode_ms_total += encode_ms
+                self._recent.append((now, nbytes))
+                while now - self._recent[0][0] > self._rate_window:
+                    self._recent.popleft()
+            else:
+                self._failed += 1
+
+        return FrameWriteResult(
+            path=path,
+            session=job.session,
+            success=error is None,
+            bytes_written=nbytes,
+            encode_ms=encode_ms,
+            write_ms=write_ms,
+            queue_wait_ms=queue_wait_ms,
+            timestamp=now,
+            error=error,
+            shard=os.path.join(job.shard.directory, record.shard) if record else None,
+            offset=record.offset if record else None,
+            captured_at=job.captured_at
+        )
+
+    def _link(self, job: FrameJob) -> FrameWriteResult:
+        queue_wait_ms = (time.monotonic() - job.enqueued_at) * 1000.0
+        t0 = time.perf_counter()
+        error = None
+        nbytes = 0
+
+        # The source job was queued earlier, so it is already written or in flight
+        with self._cond:
+            self._cond.wait_for(lambda: job.link_from not in self._writing_paths, timeout=10.0)
+        try:
+            self._ensure_dir(os.path.dirname(job.path))
+            try:
+                os.link(job.link_from, job.path)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copyfile(job.link_from, job.path)
+            nbytes = os.path.getsize(job.path)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"{self.name}: failed to link {job.path} -> {job.link_from}: {e}")
+
+        now = time.time()
+        with self._stats_lock:
+            if error is None:
+                self._linked += 1
+            else:
+                self._failed += 1
+
+        return FrameWriteResult(
+            path=job.path,
+            session=job.session,
+            success=error is None,
+            bytes_written=nbytes,
+            encode_ms=0.0,
+            write_ms=(time.perf_counter() - t0) * 1000.0,
+            queue_wait_ms=queue_wait_ms,
+            timestamp=now,
+            error=error,
+            captured_at=job.captured_at,
+            linked_from=job.link_from
+        )
+
+    # =========================
+    # Stats
+    # =========================
+    def queue_depth(self) -> int:
+        """Current number of queued frames"""
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get sink statistics
+
+        Returns:
+            Dictionary with queue depth, counts, avg encode ms and bytes/s
+        """
+        now = time.time()
+        with self._stats_lock:
+            while self._recent and now - self._recent[0][0] > self._rate_window:
+                self._recent.popleft()
+            recent_bytes = sum(b for _, b in self._recent)
+            avg_encode = self._encode_ms_total / self._written if self._written else 0.0
+            return {
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_depth,
+                'submitted': self._submitted,
+                'written': self._written,
+                'dropped': self._dropped,
+                'failed': self._failed,
+                'linked': self._linked,
+                'total_bytes': self._total_bytes,
+                'avg_encode_ms': round(avg_encode, 2),
+                'bytes_per_sec': round(recent_bytes / self._rate_window, 1),
+            }
@@ -0,0 +1,184 @@
+"""
+Session Metadata Log
+
+Append-only JSONL log for per-session MQTT metadata (temperatures, food type
+changes, ...). Entries go to disk as they arrive instead of accumulating in a
+list for the whole session; the file is flushed every `flush_interval`
+seconds, on append() and from the app's main loop via flush_if_due() (so
+buffered entries still reach disk when MQTT goes quiet). A crash loses at
+most about one interval plus one main loop tick.
+
+session_info.json summaries are derived from the log at stop time
+(see read_metadata_log / build_temperature_timeline).
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any, Iterator, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+TEMPERATURE_TYPES = ('oil_temperature', 'probe_temperature')
+
+
+class MetadataLog:
+    """
+    Append-only JSONL metadata log (thread-safe)
+
+    Supports append() and len() like the list it replaces, so MQTT callbacks
+    do not change.
+
+    Example:
+        log = MetadataLog(os.path.join(session_dir, "metadata.jsonl"))
+        log.append({"timestamp": "...", "type": "oil_temperature", "value": 170.0})
+        ...
+        log.close()
+        timeline = build_temperature_timeline(read_metadata_log(log.path))
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0):
+        """
+        Open (or continue) a metadata log
+
+        Args:
+            path: JSONL file path (parent directory is created)
+            flush_interval: Max seconds between flushes to disk
+        """
+        self.path = os.path.expanduser(path)
+        self.flush_interval = flush_interval
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o755, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._last_flush = time.monotonic()
+        self._count = 0
+        self.closed = False
+
+    def append(self, entry: Dict[str, Any]) -> bool:
+        """
+        Write one metadata entry
+
+        Args:
+            entry: JSON-serializable dict
+
+        Returns:
+            True if written, False if the log is already closed
+            (late MQTT message after the session stopped)
+        """
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self.closed:
+                return False
+            self._file.write(line)
+            self._count += 1
+            self._flush_if_due_locked()
+        return True
+
+    def flush_if_due(self) -> bool:
+        """
+        Flush if flush_interval has passed since the last flush
+
+        Call periodically (GUI tick / main loop) so the last entries reach
+        disk even when no further append() arrives.
+
+        Returns:
+            True if the file was flushed
+        """
+        with self._lock:
+            if self.closed:
+                return False
+            return self._flush_if_due_locked()
+
+    def _flush_if_due_locked(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_flush < self.flush_interval:
+            return False
+        self._file.flush()
+        self._last_flush = now
+        return True
+
+    def flush(self) -> None:
+        """Flush buffered entries to disk"""
+        with self._lock:
+            if not self.closed:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Flush and close (further appends are ignored)"""
+        with self._lock:
+            if self.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self.closed = True
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_metadata_log(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream entries from a metadata log
+
+    A truncated last line (crash during write) is skipped.
+
+    Args:
+        path: JSONL file path
+
+    Yields:
+        Metadata entry dicts in write order
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"{os.path.basename(path)}:{line_no}: skipped malformed line")
+
+
+def build_temperature_timeline(
+    entries: Iterable[Dict[str, Any]],
+    position_field: Optional[str] = 'position'
+) -> List[Dict[str, Any]]:
+    """
+    Group temperature entries by timestamp in one pass
+
+    Example output row: {"timestamp": "...", "oil_temp_left": 170.0, "probe_temp_left": 60.5}
+
+    Args:
+        entries: Metadata entries (any iterable, e.g. read_metadata_log())
+        position_field: Field appended to the key ("left" -> oil_temp_left);
+                        None for single-pot logs (oil_temp, probe_temp)
+
+    Returns:
+        Timeline rows in first-seen timestamp order
+    """
+    timeline: Dict[str, Dict[str, Any]] = {}
+    for item in entries:
+        if item.get('type') not in TEMPERATURE_TYPES:
+            continue
+        row = timeline.setdefault(item['timestamp'], {'timestamp': item['timestamp']})
+        key = item['type'].replace('_temperature', '_temp')
+        if position_field and position_field in item:
+            key = f"{key}_{item[position_field]}"
+        row[key] = item['value']
+    return list(timeline.values())
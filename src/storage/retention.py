@@ -0,0 +1,568 @@
+"""
+Space-Aware Retention
+
+Keeps collected data (~/AI_Data, ~/StirFry_Data, motion snapshots) from
+filling the disk. A full disk makes frame writes fail, so old data is
+evicted before that happens - always whole sessions, never single frames.
+
+Usage index:
+- One background scan at start (and every `rescan_interval`) builds
+  per-session byte counts
+- FrameSink listener (on_frame_written) / record() keep the counts current
+  in O(1) - no directory walks between rescans
+
+Eviction (background thread only, capture/sink threads never wait on it):
+- Triggered when free space drops below `min_free_bytes` (high watermark)
+  or the indexed total exceeds `quota_bytes`
+- Evicts until free space reaches `target_free_bytes` (low watermark)
+  and the total is back under `quota_target_ratio * quota_bytes`
+- Order: lowest priority class first, then least recently written
+  (default classes: snapshot < session < completed)
+- Active sessions and sessions written within `active_grace_sec` are never evicted
+- Sessions are only evicted once backed up: a sync pass or USB export
+  writes a marker (.synced / .exported) into the session directory, and
+  data written after the marker makes the session unevictable again.
+  Snapshot day folders (motion snapshots, not part of the dataset) are
+  exempt.
+- Free space is re-read from the filesystem after every deletion
+  (deduplicated frames are hardlinks, so a session can free less than its size)
+
+Example:
+    retention = RetentionManager(min_free_bytes=20 * GB, quota_bytes=200 * GB, catalog=catalog, dry_run=True)
+    sink.add_listener(retention.on_frame_written)
+    retention.start()
+    retention.begin_session(session_dir)
+    ...
+    retention.end_session(session_dir, completed=True)
+
+CLI (report only unless --evict):
+    python3 -m src.storage.retention --min-free-gb 20 --quota-gb 200
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable, Callable, Set
+
+from .catalog import (DEFAULT_ROOTS, SESSION_INFO_FILES, BACKUP_MARKERS, backup_time,
+                      session_dir_for_frame, _CAMERA_DIR)
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+# Eviction order: lower rank is evicted first
+DEFAULT_PRIORITIES = {
+    'snapshot': 0,    # Jetson1 motion snapshot day folders
+    'session': 1,     # Collected sessions without a completion marker
+    'completed': 2,   # Completion-marked sessions (labelled data) - kept longest
+}
+
+
+@dataclass
+class SessionUsage:
+    """Disk usage of one evictable unit (session directory or snapshot day)"""
+    path: str
+    root: str
+    bytes: int = 0
+    files: int = 0
+    last_write: float = 0.0
+    completed: bool = False
+    snapshot: bool = False
+
+    @property
+    def priority_class(self) -> str:
+        if self.snapshot:
+            return 'snapshot'
+        return 'completed' if self.completed else 'session'
+
+
+def _read_completion(session_dir: str) -> bool:
+    """completion_marked from session_info.json / metadata.json (False if missing)"""
+    for name in SESSION_INFO_FILES:
+        path = os.path.join(session_dir, name)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return bool(json.load(f).get('completion_marked'))
+            except (OSError, ValueError):
+                return False
+    return False
+
+
+def _dir_usage(directory: str) -> Dict[str, float]:
+    """Total bytes, file count and newest mtime below a directory (backup markers excluded)"""
+    total = files = 0
+    newest = 0.0
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            if name in BACKUP_MARKERS:
+                continue
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            total += st.st_size
+            files += 1
+            newest = max(newest, st.st_mtime)
+    return {'bytes': total, 'files': files, 'last_write': newest}
+
+
+class RetentionManager:
+    """
+    Quota / free-space retention with an incremental per-session usage index
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[str] = DEFAULT_ROOTS,
+        snapshot_roots: Iterable[str] = (),
+        quota_bytes: Optional[int] = None,
+        quota_target_ratio: float = 0.9,
+        min_free_bytes: int = 10 * GB,
+        target_free_bytes: Optional[int] = None,
+        check_interval: float = 60.0,
+        rescan_interval: float = 6 * 3600.0,
+        active_grace_sec: float = 600.0,
+        priorities: Optional[Dict[str, int]] = None,
+        catalog=None,
+        on_evict: Optional[Callable[[SessionUsage], None]] = None,
+        require_backup: bool = True,
+        dry_run: bool = False
+    ):
+        """
+        Initialize retention manager
+
+        Args:
+            roots: Session data directories (sessions are found below these)
+            snapshot_roots: Directories whose sub-folders (one per day) are evicted
+                            as 'snapshot' units
+            quota_bytes: Max bytes for all indexed data (None = no quota)
+            quota_target_ratio: Evict down to this fraction of the quota
+            min_free_bytes: High watermark - evict when free space is below this
+            target_free_bytes: Low watermark - evict until free space reaches this
+                               (default: 1.5 x min_free_bytes)
+            check_interval: Seconds between watermark checks
+            rescan_interval: Seconds between full rescans (corrects drift from
+                             files written/deleted outside the index)
+            active_grace_sec: Sessions written within this many seconds are not evicted
+            priorities: Class -> rank override (see DEFAULT_PRIORITIES)
+            catalog: SessionCatalog to drop evicted sessions from
+            on_evict: callback(SessionUsage) after each eviction (for app logs)
+            require_backup: Only evict sessions with an up-to-date sync/export marker
+            dry_run: Log what would be evicted without deleting
+        """
+        self.roots = [os.path.abspath(os.path.expanduser(r)) for r in roots]
+        self.snapshot_roots = [os.path.abspath(os.path.expanduser(r)) for r in snapshot_roots]
+        self.quota_bytes = quota_bytes
+        self.quota_target_ratio = quota_target_ratio
+        self.min_free_bytes = int(min_free_bytes)
+        self.target_free_bytes = int(target_free_bytes if target_free_bytes is not None
+                                     else self.min_free_bytes * 1.5)
+        self.check_interval = check_interval
+        self.rescan_interval = rescan_interval
+        self.active_grace_sec = active_grace_sec
+        self.priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self.catalog = catalog
+        self.on_evict = on_evict
+        self.require_backup = require_backup
+        self.dry_run = dry_run
+
+        self._lock = threading.Lock()
+        self._usage: Dict[str, SessionUsage] = {}
+        self._total = 0
+        self._active: Set[str] = set()
+        self._bytes_since_check = 0
+        # Wake the checker early after this many new bytes (or a failed write)
+        self._wake_bytes = max(256 * 1024 * 1024, self.min_free_bytes // 20)
+
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_scan = 0.0
+
+        # Statistics
+        self._evicted_sessions = 0
+        self._evicted_bytes = 0
+        self._last_check: Dict[str, Any] = {}
+
+    # =========================
+    # Lifecycle
+    # =========================
+    def start(self) -> None:
+        """Start the background scan/eviction thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread (an eviction in progress finishes first)"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while self._running:
+            try:
+                if time.monotonic() - self._last_scan >= self.rescan_interval or not self._last_scan:
+                    self.scan()
+                self.check()
+            except Exception as e:
+                logger.error(f"Retention check failed: {e}")
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+
+    # =========================
+    # Incremental updates (never blocks on disk)
+    # =========================
+    def _root_of(self, path: str) -> Optional[str]:
+        for root in self.roots + self.snapshot_roots:
+            if path.startswith(root + os.sep):
+                return root
+        return None
+
+    def _unit_of(self, path: str) -> Optional[str]:
+        """Evictable unit for a written file: snapshot day folder or session directory"""
+        path = os.path.abspath(path)
+        for root in self.snapshot_roots:
+            if path.startswith(root + os.sep):
+                return os.path.join(root, os.path.relpath(path, root).split(os.sep)[0])
+        session_dir, _ = session_dir_for_frame(path)
+        return session_dir
+
+    def record(self, path: str, nbytes: int) -> None:
+        """
+        Count a file written outside the frame sink (e.g. motion snapshots)
+
+        Args:
+            path: Written file path
+            nbytes: File size
+        """
+        unit = self._unit_of(path)
+        with self._lock:
+            usage = self._usage.get(unit)
+            if usage is None:
+                root = self._root_of(unit)
+                if root is None or unit == root:
+                    return  # Not under a managed root - never evicted
+                usage = SessionUsage(path=unit, root=root, snapshot=root in self.snapshot_roots)
+                self._usage[unit] = usage
+            usage.bytes += nbytes
+            usage.files += 1
+            usage.last_write = time.time()
+            self._total += nbytes
+            self._bytes_since_check += nbytes
+            wake = self._bytes_since_check >= self._wake_bytes
+        if wake:
+            self._wake.set()
+
+    def on_frame_written(self, result) -> None:
+        """FrameSink listener: count written bytes; a failed write triggers an early check"""
+        if result.success:
+            self.record(result.path, result.bytes_written)
+        else:
+            self._wake.set()
+
+    def begin_session(self, session_dir: str) -> None:
+        """Protect a session from eviction while it is being collected"""
+        with self._lock:
+            self._active.add(os.path.abspath(os.path.expanduser(session_dir)))
+
+    def end_session(self, session_dir: str, completed: bool = False) -> None:
+        """
+        Release a finished session
+
+        Args:
+            session_dir: Session directory passed to begin_session()
+            completed: Session has a completion marker (higher priority class)
+        """
+        key = os.path.abspath(os.path.expanduser(session_dir))
+        with self._lock:
+            self._active.discard(key)
+            usage = self._usage.get(key)
+            if usage is not None:
+                usage.completed = completed
+                usage.last_write = time.time()
+
+    # =========================
+    # Full scan (background thread)
+    # =========================
+    def scan(self) -> Dict[str, int]:
+        """
+        Rebuild the usage index from disk
+
+        Units written while the scan ran keep their live counts.
+
+        Returns:
+            Counts: units found, total bytes
+        """
+        started = time.time()
+        found: Dict[str, SessionUsage] = {}
+        for root in self.roots:
+            if os.path.isdir(root) and root not in self.snapshot_roots:
+                self._scan_dir(root, root, found, depth=0)
+        for root in self.snapshot_roots:
+            if not os.path.isdir(root):
+                continue
+            for entry in os.scandir(root):
+                if entry.is_dir(follow_symlinks=False):
+                    u = _dir_usage(entry.path)
+                    found[entry.path] = SessionUsage(path=entry.path, root=root, bytes=int(u['bytes']),
+                                                     files=int(u['files']), last_write=u['last_write'],
+                                                     snapshot=True)
+
+        with self._lock:
+            for key, live in self._usage.items():
+                if live.last_write >= started:
+                    scanned = found.get(key)
+                    if scanned is None or scanned.bytes < live.bytes:
+                        found[key] = live
+                elif key in found:
+                    found[key].completed = found[key].completed or live.completed
+            self._usage = found
+            self._total = sum(u.bytes for u in found.values())
+            self._bytes_since_check = 0
+        self._last_scan = time.monotonic()
+
+        result = {'units': len(found), 'bytes': self._total}
+        logger.info(f"Retention scan: {len(found)} units, {self._total / GB:.2f} GB "
+                    f"({time.time() - started:.1f}s)")
+        return result
+
+    def _scan_dir(self, directory: str, root: str, found: Dict[str, SessionUsage], depth: int) -> None:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Cannot list {directory}: {e}")
+            return
+
+        subdirs = [e for e in entries if e.is_dir(follow_symlinks=False)]
+        is_session = (any(_CAMERA_DIR.match(e.name) or e.name == 'shards' for e in subdirs) or
+                      any(e.is_file() and e.name in SESSION_INFO_FILES for e in entries))
+        if is_session and directory != root:
+            u = _dir_usage(directory)
+            found[directory] = SessionUsage(path=directory, root=root, bytes=int(u['bytes']),
+                                            files=int(u['files']), last_write=u['last_write'],
+                                            completed=_read_completion(directory))
+            return
+
+        if depth < 6:
+            for sub in subdirs:
+                self._scan_dir(sub.path, root, found, depth + 1)
+
+    # =========================
+    # Eviction
+    # =========================
+    def _candidates(self, devices: Optional[Set[int]] = None) -> List[SessionUsage]:
+        """Evictable units, eviction order first"""
+        cutoff = time.time() - self.active_grace_sec
+        with self._lock:
+            units = [u for u in self._usage.values()
+                     if u.path not in self._active and u.last_write < cutoff]
+        if devices is not None:
+            units = [u for u in units if self._device(u.root) in devices]
+        if self.require_backup:
+            units = [u for u in units if u.snapshot or self._backed_up(u)]
+        units.sort(key=lambda u: (self.priorities.get(u.priority_class, 1), u.last_write))
+        return units
+
+    @staticmethod
+    def _backed_up(unit: SessionUsage) -> bool:
+        """Session copied off the device after its last write"""
+        marked = backup_time(unit.path)
+        return marked is not None and marked >= unit.last_write
+
+    @staticmethod
+    def _device(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return None
+
+    def _free_by_device(self) -> Dict[int, Dict[str, Any]]:
+        """Free bytes per filesystem holding a root"""
+        devices: Dict[int, Dict[str, Any]] = {}
+        for root in self.roots + self.snapshot_roots:
+            dev = self._device(root)
+            if dev is None or dev in devices:
+                continue
+            usage = shutil.disk_usage(root)
+            devices[dev] = {'root': root, 'free': usage.free, 'total': usage.total}
+        return devices
+
+    def check(self) -> List[SessionUsage]:
+        """
+        Evict sessions if a watermark or the quota is exceeded
+
+        Returns:
+            Evicted units
+        """
+        evicted: List[SessionUsage] = []
+        with self._lock:
+            self._bytes_since_check = 0
+
+        # Free-space watermarks, per filesystem
+        for dev, disk in self._free_by_device().items():
+            if disk['free'] >= self.min_free_bytes:
+                continue
+            free = disk['free']
+            logger.warning(f"Low disk space on {disk['root']}: {free / GB:.2f} GB free "
+                           f"(min {self.min_free_bytes / GB:.1f} GB)")
+            for unit in self._candidates({dev}):
+                if free >= self.target_free_bytes:
+                    break
+                if self._evict(unit):
+                    evicted.append(unit)
+                    if self.dry_run:
+                        free += unit.bytes  # nothing deleted; estimate
+                    else:
+                        free = shutil.disk_usage(disk['root']).free
+            if free < self.target_free_bytes:
+                logger.warning(f"Retention: {free / GB:.2f} GB free on {disk['root']} after eviction; "
+                               f"remaining sessions are active or not yet synced/exported")
+
+        # Quota on indexed data
+        if self.quota_bytes and self._total > self.quota_bytes:
+            target = self.quota_bytes * self.quota_target_ratio
+            logger.warning(f"Data quota exceeded: {self._total / GB:.2f} GB "
+                           f"(quota {self.quota_bytes / GB:.1f} GB)")
+            for unit in self._candidates():
+                if self._total <= target:
+                    break
+                if unit not in evicted and self._evict(unit):
+                    evicted.append(unit)
+
+        self._last_check = {
+            'time': time.time(),
+            'free_bytes': {disk['root']: disk['free'] for disk in self._free_by_device().values()},
+            'evicted': len(evicted),
+        }
+        return evicted
+
+    def _evict(self, unit: SessionUsage) -> bool:
+        """Delete one unit from disk, the index and the catalog"""
+        if self.dry_run:
+            logger.info(f"[dry-run] would evict {unit.path} ({unit.bytes / 1e6:.1f} MB, {unit.priority_class})")
+            with self._lock:
+                if self._usage.pop(unit.path, None) is not None:
+                    self._total -= unit.bytes
+            return True
+
+        with self._lock:
+            if unit.path in self._active:
+                return False
+
+        failed = []
+        shutil.rmtree(unit.path, onerror=lambda func, path, exc: failed.append(path))
+        if failed:
+            logger.error(f"Retention: could not delete {len(failed)} paths under {unit.path}")
+        self._prune_empty_parents(unit.path, unit.root)
+
+        with self._lock:
+            if self._usage.pop(unit.path, None) is not None:
+                self._total -= unit.bytes
+            self._evicted_sessions += 1
+            self._evicted_bytes += unit.bytes
+
+        if self.catalog is not None:
+            try:
+                self.catalog.remove_session(unit.path)
+            except Exception as e:
+                logger.error(f"Retention: catalog update failed ({unit.path}): {e}")
+
+        logger.info(f"Evicted {unit.path} ({unit.bytes / 1e6:.1f} MB, {unit.priority_class})")
+        if self.on_evict:
+            try:
+                self.on_evict(unit)
+            except Exception as e:
+                logger.error(f"Retention: on_evict callback error: {e}")
+        return True
+
+    @staticmethod
+    def _prune_empty_parents(path: str, root: str) -> None:
+        """Remove now-empty pot/session folders up to (not including) the root"""
+        parent = os.path.dirname(path)
+        while parent.startswith(root + os.sep):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    # =========================
+    # Stats
+    # =========================
+    def usage(self) -> List[SessionUsage]:
+        """Indexed units, eviction order first"""
+        with self._lock:
+            units = list(self._usage.values())
+        units.sort(key=lambda u: (self.priorities.get(u.priority_class, 1), u.last_write))
+        return units
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get retention statistics
+
+        Returns:
+            Dictionary with indexed bytes/units per class, active sessions and eviction totals
+        """
+        with self._lock:
+            by_class: Dict[str, Dict[str, int]] = {}
+            for u in self._usage.values():
+                c = by_class.setdefault(u.priority_class, {'units': 0, 'bytes': 0})
+                c['units'] += 1
+                c['bytes'] += u.bytes
+            return {
+                'total_bytes': self._total,
+                'units': len(self._usage),
+                'by_class': by_class,
+                'active_sessions': len(self._active),
+                'evicted_sessions': self._evicted_sessions,
+                'evicted_bytes': self._evicted_bytes,
+                'last_check': self._last_check,
+            }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Disk retention report / eviction for collected data")
+    parser.add_argument('roots', nargs='*', default=list(DEFAULT_ROOTS))
+    parser.add_argument('--snapshots', nargs='*', default=[], help="snapshot root directories (day folders)")
+    parser.add_argument('--min-free-gb', type=float, default=10.0)
+    parser.add_argument('--target-free-gb', type=float)
+    parser.add_argument('--quota-gb', type=float)
+    parser.add_argument('--evict', action='store_true', help="actually delete (default: dry run)")
+    parser.add_argument('--no-require-backup', action='store_true',
+                        help="also evict sessions without a .synced/.exported marker")
+    parser.add_argument('--list', type=int, default=20, help="show the first N eviction candidates")
+    args = parser.parse_args()
+
+    manager = RetentionManager(
+        roots=args.roots,
+        snapshot_roots=args.snapshots,
+        quota_bytes=int(args.quota_gb * GB) if args.quota_gb else None,
+        min_free_bytes=int(args.min_free_gb * GB),
+        target_free_bytes=int(args.target_free_gb * GB) if args.target_free_gb else None,
+        require_backup=not args.no_require_backup,
+        dry_run=not args.evict
+    )
+    manager.scan()
+    for u in manager.usage()[:args.list]:
+        print(f"{u.priority_class:10} {u.bytes / 1e6:>10.1f} MB {u.files:>7}개  "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(u.last_write))}  {u.path}")
+    evicted = manager.check()
+    print(json.dumps(manager.get_stats(), indent=2, ensure_ascii=False))
+    print(f"{'삭제' if args.evict else '삭제 예정'}: {len(evicted)}개 "
+          f"({sum(u.bytes for u in evicted) / GB:.2f} GB)")
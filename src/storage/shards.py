@@ -0,0 +1,488 @@
+"""
+Chunked Shard Storage
+
+Appends encoded frames into large sequential tar files instead of writing
+one small file per image. Each shard has a JSONL index (name, timestamp,
+byte offset, size) next to it, so frames can be read back by random access
+without scanning the tar.
+
+Layout:
+    <directory>/shard-000000.tar          # plain tar (tar -xf works)
+    <directory>/shard-000000.idx.jsonl    # one JSON line per frame
+    <directory>/shard-000001.tar
+    ...
+
+The index is flushed after every frame. If the process dies mid-session the
+tar lacks its end-of-archive marker, but every indexed frame is readable and
+rebuild_index() can regenerate a lost index from the tar headers.
+"""
+
+import os
+import io
+import json
+import time
+import bisect
+import shutil
+import logging
+import tarfile
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any, List, Iterator, Tuple, Union, Iterable
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SHARD_PREFIX = 'shard'
+SHARD_EXT = '.tar'
+INDEX_EXT = '.idx.jsonl'
+DEFAULT_MAX_SHARD_BYTES = 256 * 1024 * 1024
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.npy')
+
+
+@dataclass
+class ShardRecord:
+    """Index entry for one frame inside a shard"""
+    shard: str          # Shard file name (relative to the shard directory)
+    name: str           # Member name, e.g. "camera_0/camera_0_123456_789.jpg"
+    timestamp: float    # Unix time the frame was captured
+    offset: int         # Byte offset of the data inside the shard
+    size: int           # Data size in bytes
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def _shard_name(index: int) -> str:
+    return f"{SHARD_PREFIX}-{index:06d}{SHARD_EXT}"
+
+
+def _index_path(shard_path: str) -> str:
+    return shard_path[:-len(SHARD_EXT)] + INDEX_EXT
+
+
+def _list_shards(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        f for f in os.listdir(directory)
+        if f.startswith(SHARD_PREFIX + '-') and f.endswith(SHARD_EXT)
+    )
+
+
+class ShardWriter:
+    """
+    Append-only shard writer (thread-safe)
+
+    Example:
+        writer = ShardWriter("~/AI_Data/FryingData/pot1/session_x/chicken/shards")
+        writer.write("camera_0/camera_0_101500_123.jpg", jpeg_bytes)
+        ...
+        writer.close()
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+        max_shard_frames: Optional[int] = None
+    ):
+        """
+        Initialize shard writer
+
+        Args:
+            directory: Output directory (created if missing). Existing shards
+                       are kept; new frames go to the next shard number.
+            max_shard_bytes: Roll over to a new shard above this size
+            max_shard_frames: Optional frame count limit per shard
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_shard_bytes = max_shard_bytes
+        self.max_shard_frames = max_shard_frames
+
+        os.makedirs(self.directory, mode=0o755, exist_ok=True)
+        existing = _list_shards(self.directory)
+        self._next_index = int(existing[-1][len(SHARD_PREFIX) + 1:-len(SHARD_EXT)]) + 1 if existing else 0
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._tar: Optional[tarfile.TarFile] = None
+        self._index = None
+        self._shard_name: Optional[str] = None
+        self._shard_frames = 0
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.closed = False
+
+    def _open_next(self) -> None:
+        self._close_current()
+        self._shard_name = _shard_name(self._next_index)
+        self._next_index += 1
+        shard_path = os.path.join(self.directory, self._shard_name)
+        self._file = open(shard_path, 'wb')
+        self._tar = tarfile.open(fileobj=self._file, mode='w', format=tarfile.GNU_FORMAT)
+        self._index = open(_index_path(shard_path), 'w', encoding='utf-8')
+        self._shard_frames = 0
+        logger.info(f"Shard opened: {shard_path}")
+
+    def _close_current(self) -> None:
+        if self._tar is not None:
+            self._tar.close()  # writes end-of-archive blocks
+            self._file.close()
+            self._index.close()
+            logger.info(f"Shard closed: {self._shard_name} ({self._shard_frames} frames)")
+        self._tar = self._file = self._index = None
+
+    def _needs_rollover(self, size: int) -> bool:
+        if self._tar is None:
+            return True
+        if self._shard_frames == 0:
+            return False
+        if self._tar.offset + size > self.max_shard_bytes:
+            return True
+        return self.max_shard_frames is not None and self._shard_frames >= self.max_shard_frames
+
+    def write(
+        self,
+        name: str,
+        data: bytes,
+        timestamp: Optional[float] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> ShardRecord:
+        """
+        Append one encoded frame
+
+        Args:
+            name: Member name (relative path as in the directory layout)
+            data: Encoded file bytes
+            timestamp: Capture time (default: now)
+            meta: Extra fields stored in the index line
+
+        Returns:
+            ShardRecord of the written frame
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"ShardWriter closed: {self.directory}")
+            if self._needs_rollover(len(data)):
+                self._open_next()
+
+            info = tarfile.TarInfo(name=name)
+            info.size = len(data)
+            info.mtime = int(timestamp)
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+
+            # Data ends at tar.offset (padded to 512 bytes)
+            padded = (len(data) + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+            record = ShardRecord(
+                shard=self._shard_name,
+                name=name,
+                timestamp=timestamp,
+                offset=self._tar.offset - padded,
+                size=len(data),
+                meta=meta or {}
+            )
+
+            self._file.flush()
+            self._index.write(json.dumps(asdict(record), ensure_ascii=False) + '\n')
+            self._index.flush()
+
+            self._shard_frames += 1
+            self.frames_written += 1
+            self.bytes_written += len(data)
+            return record
+
+    def close(self) -> None:
+        """Finish the current shard"""
+        with self._lock:
+            if self.closed:
+                return
+            self._close_current()
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def rebuild_index(shard_path: str) -> int:
+    """
+    Regenerate a shard's index from its tar headers
+
+    Works on truncated shards (frames after the last complete member are lost).
+
+    Returns:
+        Number of indexed frames
+    """
+    shard_name = os.path.basename(shard_path)
+    records = []
+    try:
+        with tarfile.open(shard_path, mode='r:') as tar:
+            for member in tar:
+                if member.isfile():
+                    records.append(ShardRecord(shard_name, member.name, float(member.mtime),
+                                               member.offset_data, member.size))
+    except (tarfile.ReadError, EOFError) as e:
+        logger.warning(f"{shard_name}: truncated after {len(records)} frames ({e})")
+
+    with open(_index_path(shard_path), 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(asdict(record), ensure_ascii=False) + '\n')
+    return len(records)
+
+
+class ShardReader:
+    """
+    Random-access reader over all shards in a directory
+
+    Records are ordered by timestamp. Iterating with items() reads in shard
+    order (sequential IO) which is fastest for full passes.
+
+    Example:
+        with ShardReader(shard_dir) as reader:
+            for record in reader.range(t0, t1):
+                frame = reader.read_image(record)
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directory containing shard-*.tar files
+        """
+        self.directory = os.path.expanduser(directory)
+        self.records: List[ShardRecord] = []
+        self._by_name: Dict[str, ShardRecord] = {}
+        self._files: Dict[str, Any] = {}
+        self._files_lock = threading.Lock()
+
+        for shard_name in _list_shards(self.directory):
+            shard_path = os.path.join(self.directory, shard_name)
+            if not os.path.exists(_index_path(shard_path)):
+                logger.warning(f"{shard_name}: index missing, rebuilding from tar headers")
+                rebuild_index(shard_path)
+            self.records.extend(self._load_index(_index_path(shard_path)))
+
+        self.records.sort(key=lambda r: (r.timestamp, r.name))
+        self._timestamps = [r.timestamp for r in self.records]
+        self._by_name = {r.name: r for r in self.records}
+
+    @staticmethod
+    def _load_index(index_path: str) -> List[ShardRecord]:
+        records = []
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(ShardRecord(**json.loads(line)))
+                except (ValueError, TypeError) as e:
+                    # Partial last line after a crash
+                    logger.warning(f"{os.path.basename(index_path)}:{line_no}: skipped ({e})")
+        return records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[ShardRecord]:
+        return iter(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def names(self) -> List[str]:
+        """Member names in timestamp order"""
+        return [r.name for r in self.records]
+
+    def get(self, name: str) -> Optional[ShardRecord]:
+        """Record by member name"""
+        return self._by_name.get(name)
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> List[ShardRecord]:
+        """
+        Records with start <= timestamp < end
+
+        Args:
+            start: Unix time (None = from the first frame)
+            end: Unix time (None = to the last frame)
+        """
+        lo = 0 if start is None else bisect.bisect_left(self._timestamps, start)
+        hi = len(self.records) if end is None else bisect.bisect_left(self._timestamps, end)
+        return self.records[lo:hi]
+
+    def _handle(self, shard_name: str):
+        fh = self._files.get(shard_name)
+        if fh is None:
+            fh = open(os.path.join(self.directory, shard_name), 'rb')
+            self._files[shard_name] = fh
+        return fh
+
+    def read(self, item: Union[str, ShardRecord]) -> bytes:
+        """
+        Read encoded bytes of one frame
+
+        Args:
+            item: Member name or ShardRecord
+        """
+        record = self._by_name[item] if isinstance(item, str) else item
+        with self._files_lock:
+            fh = self._handle(record.shard)
+            fh.seek(record.offset)
+            data = fh.read(record.size)
+        if len(data) != record.size:
+            raise IOError(f"{record.shard}: short read for {record.name}")
+        return data
+
+    def read_image(self, item: Union[str, ShardRecord]) -> np.ndarray:
+        """Read and decode one frame (BGR)"""
+        record = self._by_name[item] if isinstance(item, str) else item
+        data = self.read(record)
+        if record.name.endswith('.npy'):
+            return np.load(io.BytesIO(data), allow_pickle=False)
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"Failed to decode {record.name}")
+        return frame
+
+    def items(self) -> Iterator[Tuple[ShardRecord, bytes]]:
+        """Iterate (record, bytes) in on-disk order"""
+        for record in sorted(self.records, key=lambda r: (r.shard, r.offset)):
+            yield record, self.read(record)
+
+    def close(self) -> None:
+        with self._files_lock:
+            for fh in self._files.values():
+                fh.close()
+            self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def directory_to_shards(
+    src_dir: str,
+    dst_dir: Optional[str] = None,
+    extensions: Iterable[str] = IMAGE_EXTENSIONS,
+    max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+    remove_source: bool = False
+) -> int:
+    """
+    Pack a per-file session directory into shards
+
+    Image files are appended in (mtime, path) order with their relative path
+    as member name and mtime as timestamp. Other files (session_info.json,
+    ...) are copied next to the shards when dst_dir is outside src_dir.
+
+    Args:
+        src_dir: Session directory (e.g. .../pot1/<session>/<food_type>)
+        dst_dir: Shard directory (default: <src_dir>/shards)
+        extensions: File extensions treated as frames
+        max_shard_bytes: Shard rollover size
+        remove_source: Delete packed image files afterwards
+
+    Returns:
+        Number of packed frames
+    """
+    src_dir = os.path.abspath(os.path.expanduser(src_dir))
+    dst_dir = os.path.abspath(os.path.expanduser(dst_dir or os.path.join(src_dir, 'shards')))
+    extensions = tuple(e.lower() for e in extensions)
+    dst_inside = dst_dir == src_dir or dst_dir.startswith(src_dir + os.sep)
+
+    frames, others = [], []
+    for root, dirs, files in os.walk(src_dir):
+        if os.path.abspath(root) == dst_dir:
+            dirs[:] = []
+            continue
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dst_dir]
+        for f in files:
+            path = os.path.join(root, f)
+            if f.lower().endswith(extensions):
+                frames.append((os.path.getmtime(path), os.path.relpath(path, src_dir), path))
+            else:
+                others.append(path)
+    frames.sort()
+
+    with ShardWriter(dst_dir, max_shard_bytes=max_shard_bytes) as writer:
+        for mtime, name, path in frames:
+            with open(path, 'rb') as f:
+                writer.write(name.replace(os.sep, '/'), f.read(), timestamp=mtime)
+
+    if not dst_inside:
+        for path in others:
+            out = os.path.join(dst_dir, os.path.relpath(path, src_dir))
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            shutil.copy2(path, out)
+
+    if remove_source:
+        for _, _, path in frames:
+            os.remove(path)
+
+    logger.info(f"Packed {len(frames)} frames: {src_dir} -> {dst_dir}")
+    return len(frames)
+
+
+def shards_to_directory(shard_dir: str, dst_dir: str) -> int:
+    """
+    Unpack shards back to the one-file-per-frame layout
+
+    File mtimes are restored from the index timestamps.
+
+    Args:
+        shard_dir: Directory containing shard-*.tar files
+        dst_dir: Output directory
+
+    Returns:
+        Number of extracted frames
+    """
+    dst_dir = os.path.expanduser(dst_dir)
+    count = 0
+    with ShardReader(shard_dir) as reader:
+        for record, data in reader.items():
+            out = os.path.join(dst_dir, *record.name.split('/'))
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            with open(out, 'wb') as f:
+                f.write(data)
+            os.utime(out, (record.timestamp, record.timestamp))
+            count += 1
+    logger.info(f"Extracted {count} frames: {shard_dir} -> {dst_dir}")
+    return count
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Convert between per-file frames and shard storage")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_pack = sub.add_parser('pack', help="directory -> shards")
+    p_pack.add_argument('src')
+    p_pack.add_argument('dst', nargs='?')
+    p_pack.add_argument('--max-mb', type=int, default=DEFAULT_MAX_SHARD_BYTES // (1024 * 1024))
+    p_pack.add_argument('--remove-source', action='store_true')
+
+    p_unpack = sub.add_parser('unpack', help="shards -> directory")
+    p_unpack.add_argument('src')
+    p_unpack.add_argument('dst')
+
+    p_index = sub.add_parser('reindex', help="rebuild shard indexes from tar headers")
+    p_index.add_argument('src')
+
+    args = parser.parse_args()
+    if args.command == 'pack':
+        directory_to_shards(args.src, args.dst, max_shard_bytes=args.max_mb * 1024 * 1024,
+                            remove_source=args.remove_source)
+    elif args.command == 'unpack':
+        shards_to_directory(args.src, args.dst)
+    else:
+        for shard in _list_shards(args.src):
+            n = rebuild_index(os.path.join(args.src, shard))
+            print(f"{shard}: {n} frames")
@@ -0,0 +1,475 @@
+"""
+Incremental Dataset Sync
+
+Pushes new/changed files under the data roots (~/AI_Data, ~/StirFry_Data)
+to a collection host. A local per-target manifest (SQLite: path, size,
+mtime, SHA-1) records what the target already has, so each pass only
+hashes and sends the delta instead of re-checking everything.
+
+Targets:
+    user@host:/path     rsync over SSH (--partial resume, --bwlimit)
+    /local/dir          local/mounted directory (for testing; .part resume,
+                        token-bucket bandwidth limit)
+
+Frames are sent before session metadata files (session_info.json, ...),
+so a session's info file appears on the target only with its frames.
+Files modified in the last `settle_sec` (sessions still recording) wait
+for the next pass. After a complete pass every settled session directory
+gets a .synced marker, which is what lets retention evict it. With a WorkScheduler, passes only run outside work
+hours and stop between batches when work hours begin.
+
+Example:
+    agent = SyncAgent("backup@collector:/data/jetson2", bwlimit_kbps=4000)
+    agent.run_once()
+
+CLI:
+    python3 -m src.storage.sync backup@collector:/data/jetson2 --bwlimit 4000 --work-hours 08:30-19:00
+    python3 -m src.storage.sync /mnt/nas/jetson2 --once
+"""
+
+import os
+import re
+import time
+import fnmatch
+import hashlib
+import sqlite3
+import logging
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Callable, Set
+
+from .catalog import (DEFAULT_ROOTS, SESSION_INFO_FILES, METADATA_LOG_FILE, SYNCED_MARKER,
+                      session_dir_for_frame, write_backup_marker)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXCLUDES = ('.*', '*.part', '*.tmp', '*.db', '*.db-wal', '*.db-shm')
+METADATA_FILES = SESSION_INFO_FILES + (METADATA_LOG_FILE,)
+CHUNK_SIZE = 1024 * 1024
+
+_SSH_TARGET = re.compile(r'^[^/:]+:')
+
+
+@dataclass
+class SyncFile:
+    """One file to send"""
+    root: str           # Absolute data root
+    rel: str            # Path relative to the root
+    size: int
+    mtime_ns: int
+    sha1: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, self.rel)
+
+    @property
+    def key(self) -> str:
+        """Target-relative path (<root name>/<rel>)"""
+        return os.path.join(os.path.basename(self.root), self.rel)
+
+
+def file_sha1(path: str) -> str:
+    hasher = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class RateLimiter:
+    """Token bucket (bytes/s) shared by the transfer loop"""
+
+    def __init__(self, rate_bps: Optional[float]):
+        self.rate = rate_bps
+        self._allowance = rate_bps or 0.0
+        self._last = time.monotonic()
+
+    def consume(self, nbytes: int) -> None:
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= nbytes
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.rate)
+
+
+# =========================
+# Targets
+# =========================
+class LocalTarget:
+    """Local or mounted directory target"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        os.makedirs(self.root, mode=0o755, exist_ok=True)
+
+    def send(self, files: List[SyncFile], limiter: RateLimiter,
+             should_stop: Callable[[], bool]) -> List[SyncFile]:
+        """Copy files (resuming .part files); returns the files that were sent"""
+        sent = []
+        for f in files:
+            if should_stop():
+                break
+            dst = os.path.join(self.root, f.key)
+            os.makedirs(os.path.dirname(dst), mode=0o755, exist_ok=True)
+            part = dst + '.part'
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if offset > f.size:
+                offset = 0
+            with open(f.path, 'rb') as src, open(part, 'ab' if offset else 'wb') as out:
+                src.seek(offset)
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    out.write(chunk)
+                    limiter.consume(len(chunk))
+                    if should_stop():
+                        break  # .part kept; resumed on the next pass
+            if os.path.getsize(part) < f.size:
+                break
+            if offset and file_sha1(part) != f.sha1:
+                os.remove(part)  # source changed under a partial copy; restart next pass
+                continue
+            os.utime(part, ns=(f.mtime_ns, f.mtime_ns))
+            os.replace(part, dst)
+            sent.append(f)
+        return sent
+
+
+class RsyncTarget:
+    """user@host:/path target via rsync over SSH"""
+
+    def __init__(self, spec: str, ssh_options: Optional[str] = None):
+        self.spec = spec.rstrip('/')
+        self.ssh_options = ssh_options
+
+    def send(self, files: List[SyncFile], limiter: RateLimiter,
+             should_stop: Callable[[], bool]) -> List[SyncFile]:
+        """rsync one batch per data root; returns the files that were sent"""
+        sent = []
+        by_root: Dict[str, List[SyncFile]] = {}
+        for f in files:
+            by_root.setdefault(f.root, []).append(f)
+
+        for root, batch in by_root.items():
+            if should_stop():
+                break
+            with tempfile.NamedTemporaryFile('w', suffix='.files', delete=False) as lst:
+                lst.write('\n'.join(f.rel for f in batch) + '\n')
+            cmd = ['rsync', '-a', '--partial', '--partial-dir=.rsync-partial',
+                   f'--files-from={lst.name}']
+            if limiter.rate:
+                cmd.append(f'--bwlimit={max(1, int(limiter.rate / 1024))}')
+            if self.ssh_options:
+                cmd += ['-e', f'ssh {self.ssh_options}']
+            cmd += [root + '/', f"{self.spec}/{os.path.basename(root)}/"]
+            try:
+                proc = subprocess.run(cmd, capture_output=True, text=True)
+            finally:
+                os.unlink(lst.name)
+            if proc.returncode != 0:
+                logger.error(f"rsync failed ({proc.returncode}): {proc.stderr.strip()[-500:]}")
+                break
+            sent.extend(batch)
+        return sent
+
+
+def make_target(spec: str, ssh_options: Optional[str] = None):
+    """'user@host:/path' -> RsyncTarget, otherwise LocalTarget"""
+    if _SSH_TARGET.match(spec):
+        return RsyncTarget(spec, ssh_options)
+    return LocalTarget(spec)
+
+
+# =========================
+# Agent
+# =========================
+class SyncAgent:
+    """
+    Delta sync of data roots to one target
+    """
+
+    def __init__(
+        self,
+        target: str,
+        roots: Iterable[str] = DEFAULT_ROOTS,
+        manifest_path: Optional[str] = None,
+        bwlimit_kbps: Optional[float] = None,
+        settle_sec: float = 120.0,
+        batch_files: int = 500,
+        batch_bytes: int = 512 * 1024 * 1024,
+        excludes: Iterable[str] = DEFAULT_EXCLUDES,
+        scheduler=None,
+        ssh_options: Optional[str] = None
+    ):
+        """
+        Initialize sync agent
+
+        Args:
+            target: 'user@host:/path' (rsync over SSH) or a local directory
+            roots: Data roots to sync
+            manifest_path: SQLite manifest (default: ~/.cache/jetson_sync/<target hash>.db)
+            bwlimit_kbps: Bandwidth limit in KB/s (None = unlimited)
+            settle_sec: Skip files modified more recently than this
+            batch_files, batch_bytes: Transfer batch size (idle/stop checked between batches)
+            excludes: fnmatch patterns for file and directory names
+            scheduler: WorkScheduler; passes only run while not is_work_time()
+            ssh_options: Extra ssh options for rsync targets (e.g. "-i ~/.ssh/sync_key")
+        """
+        self.target_spec = target
+        self.target = make_target(target, ssh_options)
+        self.roots = [os.path.abspath(os.path.expanduser(r)) for r in roots]
+        if manifest_path is None:
+            digest = hashlib.sha1(target.encode('utf-8')).hexdigest()[:12]
+            manifest_path = os.path.join('~/.cache/jetson_sync', f"{digest}.db")
+        self.manifest_path = os.path.expanduser(manifest_path)
+        os.makedirs(os.path.dirname(self.manifest_path), mode=0o755, exist_ok=True)
+        self.limiter = RateLimiter(bwlimit_kbps * 1024 if bwlimit_kbps else None)
+        self.settle_sec = settle_sec
+        self.batch_files = batch_files
+        self.batch_bytes = batch_bytes
+        self.excludes = tuple(excludes)
+        self.scheduler = scheduler
+
+        self._conn = sqlite3.connect(self.manifest_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha1 TEXT,
+                synced_at REAL
+            )""")
+        self._conn.commit()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Sessions seen by the last walk: newest mtime / still being written
+        self._sessions: Dict[str, float] = {}
+        self._unsettled: Set[str] = set()
+        self.last_stats: Dict[str, Any] = {}
+
+    # =========================
+    # Delta
+    # =========================
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, p) for p in self.excludes)
+
+    @staticmethod
+    def _session_of(path: str, root: str) -> Optional[str]:
+        """Session directory of a data file (None for files outside a session)"""
+        if os.path.basename(path) in METADATA_FILES:
+            session_dir = os.path.dirname(path)
+        else:
+            session_dir, camera = session_dir_for_frame(path)
+            if camera is None:
+                return None
+        return session_dir if session_dir.startswith(root + os.sep) else None
+
+    def _walk(self) -> Iterator[SyncFile]:
+        cutoff = time.time() - self.settle_sec
+        self._sessions = {}
+        self._unsettled = set()
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = sorted(d for d in dirnames if not self._excluded(d))
+                for name in sorted(filenames):
+                    if self._excluded(name):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    session_dir = self._session_of(path, root)
+                    if st.st_mtime > cutoff:
+                        if session_dir:
+                            self._unsettled.add(session_dir)
+                        continue  # still being written
+                    if session_dir:
+                        self._sessions[session_dir] = max(self._sessions.get(session_dir, 0.0), st.st_mtime)
+                    yield SyncFile(root, os.path.relpath(path, root), st.st_size, st.st_mtime_ns)
+
+    def delta(self) -> List[SyncFile]:
+        """
+        Files that are new or changed since the last successful send
+
+        Only files whose size/mtime changed are hashed; a changed mtime with
+        an unchanged hash is recorded without sending. Metadata files come last.
+        """
+        known = {row[0]: row[1:] for row in self._conn.execute("SELECT key, size, mtime_ns, sha1 FROM files")}
+        pending = []
+        for f in self._walk():
+            entry = known.get(f.key)
+            if entry and entry[0] == f.size and entry[1] == f.mtime_ns:
+                continue
+            f.sha1 = file_sha1(f.path)
+            if entry and entry[0] == f.size and entry[2] == f.sha1:
+                self._conn.execute("UPDATE files SET mtime_ns = ? WHERE key = ?", (f.mtime_ns, f.key))
+                continue
+            pending.append(f)
+        self._conn.commit()
+        pending.sort(key=lambda f: os.path.basename(f.rel) in METADATA_FILES)
+        return pending
+
+    def _batches(self, files: List[SyncFile]) -> Iterator[List[SyncFile]]:
+        batch, nbytes = [], 0
+        for f in files:
+            batch.append(f)
+            nbytes += f.size
+            if len(batch) >= self.batch_files or nbytes >= self.batch_bytes:
+                yield batch
+                batch, nbytes = [], 0
+        if batch:
+            yield batch
+
+    # =========================
+    # Run
+    # =========================
+    def is_idle(self) -> bool:
+        """True outside work hours (always True without a scheduler)"""
+        return self.scheduler is None or not self.scheduler.is_work_time()
+
+    def _should_stop(self) -> bool:
+        return self._stop.is_set() or not self.is_idle()
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        One sync pass (stops early when work hours begin or stop() is called)
+
+        Returns:
+            Stats: pending, sent, bytes, seconds, mb_per_sec, complete, sessions_marked
+        """
+        start = time.monotonic()
+        pending = self.delta()
+        total = sum(f.size for f in pending)
+        logger.info(f"[SYNC] {len(pending)} files to send ({total / 1e6:.1f}MB) -> {self.target_spec}")
+
+        sent_files = sent_bytes = 0
+        for batch in self._batches(pending):
+            if self._should_stop():
+                break
+            sent = self.target.send(batch, self.limiter, self._should_stop)
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (key, size, mtime_ns, sha1, synced_at) VALUES (?, ?, ?, ?, ?)",
+                [(f.key, f.size, f.mtime_ns, f.sha1, now) for f in sent])
+            self._conn.commit()
+            sent_files += len(sent)
+            sent_bytes += sum(f.size for f in sent)
+            elapsed = max(time.monotonic() - start, 1e-6)
+            logger.info(f"[SYNC] {sent_files}/{len(pending)} files, {sent_bytes / 1e6:.1f}/{total / 1e6:.1f}MB, "
+                        f"{sent_bytes / 1e6 / elapsed:.2f}MB/s")
+            if len(sent) < len(batch):
+                break  # interrupted or failed; remaining files retried next pass
+
+        marked = self.mark_synced_sessions() if sent_files == len(pending) else 0
+
+        elapsed = time.monotonic() - start
+        self.last_stats = {
+            'pending': len(pending),
+            'sent': sent_files,
+            'bytes': sent_bytes,
+            'seconds': round(elapsed, 1),
+            'mb_per_sec': round(sent_bytes / 1e6 / elapsed, 2) if elapsed > 0 else 0.0,
+            'complete': sent_files == len(pending),
+            'sessions_marked': marked,
+        }
+        return self.last_stats
+
+    def mark_synced_sessions(self) -> int:
+        """
+        Write .synced into sessions fully sent by the last walk
+
+        Call only after every pending file was sent. Sessions with files
+        inside the settle window are skipped until a later pass.
+
+        Returns:
+            Number of markers written
+        """
+        marked = 0
+        for session_dir, newest in self._sessions.items():
+            if session_dir in self._unsettled:
+                continue
+            try:
+                synced = os.stat(os.path.join(session_dir, SYNCED_MARKER)).st_mtime
+            except OSError:
+                synced = None
+            if synced is not None and synced >= newest:
+                continue
+            try:
+                write_backup_marker(session_dir, SYNCED_MARKER, self.target_spec)
+                marked += 1
+            except OSError as e:
+                logger.error(f"[SYNC] cannot mark {session_dir}: {e}")
+        return marked
+
+    def start(self, interval: float = 600.0) -> None:
+        """Run passes in a background thread every `interval` seconds while idle"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="sync_agent", daemon=True)
+        self._thread.start()
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            if self.is_idle():
+                try:
+                    self.run_once()
+                except (OSError, sqlite3.Error) as e:
+                    logger.error(f"[SYNC] pass failed: {e}")
+            self._stop.wait(interval)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop the background thread (the current file is resumed next time)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+        self._conn.close()
+
+
+if __name__ == '__main__':
+    import json
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Incremental dataset sync to a collection host")
+    parser.add_argument('target', help="user@host:/path (rsync over SSH) or local directory")
+    parser.add_argument('--roots', nargs='*', default=list(DEFAULT_ROOTS))
+    parser.add_argument('--bwlimit', type=float, help="bandwidth limit (KB/s)")
+    parser.add_argument('--work-hours', help="only sync outside these hours, e.g. 08:30-19:00")
+    parser.add_argument('--interval', type=float, default=600, help="seconds between passes")
+    parser.add_argument('--settle', type=float, default=120, help="skip files modified within N seconds")
+    parser.add_argument('--ssh-options', help='extra ssh options, e.g. "-i ~/.ssh/sync_key"')
+    parser.add_argument('--once', action='store_true', help="single pass (ignores work hours)")
+    args = parser.parse_args()
+
+    scheduler = None
+    if args.work_hours and not args.once:
+        from src.scheduler.work_scheduler import WorkScheduler
+        start_hm, end_hm = args.work_hours.split('-')
+        scheduler = WorkScheduler({'work_hours': {'start': start_hm, 'end': end_hm}})
+
+    agent = SyncAgent(args.target, roots=args.roots, bwlimit_kbps=args.bwlimit,
+                      settle_sec=args.settle, scheduler=scheduler, ssh_options=args.ssh_options)
+    try:
+        if args.once:
+            print(json.dumps(agent.run_once(), indent=2))
+        else:
+            agent.start(args.interval)
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close()
@@ -0,0 +1,417 @@
+"""
+USB Dataset Export
+
+Copies collected sessions (from the SessionCatalog, or given directories)
+to a USB drive with a thread pool, instead of a single `cp -r` over tens of
+thousands of small files.
+
+- files mode: every file copied as-is (written to .part, renamed when done)
+- pack mode:  one uncompressed tar per session (JPEGs don't compress; one
+              large sequential write is much faster on USB flash)
+
+Every finished entry is appended to <dest>/manifest.jsonl with source
+size/mtime and the SHA-1 of the copy. A re-run skips entries whose
+manifest entry still matches the source and whose copy is present, so an
+interrupted export resumes where it stopped. Directories whose entries are
+all on the drive get an .exported marker (lets retention evict them).
+
+Example:
+    exporter = UsbExporter("/media/user/USB_DRIVE/jetson2", pack=True)
+    exporter.run(session_dirs)
+
+CLI:
+    python3 -m src.storage.usb_export /media/$USER/USB_DRIVE --food chicken --pack
+    python3 -m src.storage.usb_export /media/$USER/USB_DRIVE --paths ~/Detection
+    python3 -m src.storage.usb_export /media/$USER/USB_DRIVE --verify
+"""
+
+import os
+import json
+import time
+import hashlib
+import tarfile
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .catalog import BACKUP_MARKERS, EXPORTED_MARKER, write_backup_marker
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.jsonl'
+CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 2.0
+
+# Thread pool size by target device type
+WORKERS_ROTATIONAL = 2      # USB HDD: parallel writes only add seeks
+WORKERS_FLASH = 8           # USB flash / SSD: hides per-file latency
+
+
+@dataclass
+class ExportJob:
+    """One manifest entry: a file, or a packed session tar"""
+    path: str                           # Destination path relative to dest
+    src: str                            # Source file / session directory
+    src_size: int                       # Source bytes (sum for packed sessions)
+    src_mtime: float                    # Source mtime (latest for packed sessions)
+    directory: str = ''                 # Exported directory the entry belongs to
+    files: List[Tuple[str, str]] = field(default_factory=list)  # Packed: (arcname, path)
+
+
+def is_rotational(path: str) -> Optional[bool]:
+    """
+    True if the block device holding `path` is a spinning disk (Linux sysfs)
+
+    Returns:
+        True / False, or None if it cannot be determined
+    """
+    try:
+        st = os.stat(path)
+        dev = os.path.realpath(f"/sys/dev/block/{os.major(st.st_dev)}:{os.minor(st.st_dev)}")
+        for candidate in (dev, os.path.dirname(dev)):  # partition -> parent disk
+            flag = os.path.join(candidate, 'queue', 'rotational')
+            if os.path.exists(flag):
+                with open(flag) as f:
+                    return f.read().strip() == '1'
+    except OSError:
+        pass
+    return None
+
+
+def default_workers(dest: str) -> int:
+    """Copy thread count for the target device"""
+    return WORKERS_ROTATIONAL if is_rotational(dest) else WORKERS_FLASH
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts what tarfile writes"""
+
+    def __init__(self, f, hasher, on_bytes):
+        self.f = f
+        self.hasher = hasher
+        self.on_bytes = on_bytes
+
+    def write(self, data) -> int:
+        self.f.write(data)
+        if self.hasher is not None:
+            self.hasher.update(data)
+        self.on_bytes(len(data))
+        return len(data)
+
+
+class UsbExporter:
+    """
+    Parallel, resumable copy of session directories to a removable drive
+    """
+
+    def __init__(
+        self,
+        dest: str,
+        workers: Optional[int] = None,
+        pack: bool = False,
+        checksum: bool = True,
+        base_dir: str = '~'
+    ):
+        """
+        Initialize exporter
+
+        Args:
+            dest: Destination directory (e.g. /media/<user>/USB_DRIVE/jetson2)
+            workers: Copy threads (default: by device type, see default_workers())
+            pack: One tar per session instead of individual files
+            checksum: Compute SHA-1 of every copy (stored in the manifest)
+            base_dir: Source paths are stored relative to this (keeps AI_Data/... layout)
+        """
+        self.dest = os.path.abspath(os.path.expanduser(dest))
+        os.makedirs(self.dest, mode=0o755, exist_ok=True)
+        self.workers = workers or default_workers(self.dest)
+        self.pack = pack
+        self.checksum = checksum
+        self.base_dir = os.path.abspath(os.path.expanduser(base_dir))
+        self.manifest_path = os.path.join(self.dest, MANIFEST_FILE)
+
+        self._lock = threading.Lock()
+        self._manifest_file = None
+        self._known_dirs = set()
+
+        # Progress
+        self._total_bytes = 0
+        self._done_bytes = 0
+        self._total_jobs = 0
+        self._done_jobs = 0
+        self._failed = 0
+        self._failed_dirs = set()
+        self._start = 0.0
+        self._last_report = 0.0
+
+    # =========================
+    # Manifest
+    # =========================
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Manifest entries by destination path (last entry wins)"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        entries[entry['path']] = entry
+                    except (ValueError, KeyError):
+                        continue  # truncated last line after an interrupted run
+        return entries
+
+    def _is_done(self, job: ExportJob, entry: Optional[Dict[str, Any]]) -> bool:
+        if entry is None or entry.get('src_size') != job.src_size or entry.get('src_mtime') != job.src_mtime:
+            return False
+        try:
+            return os.path.getsize(os.path.join(self.dest, job.path)) == entry['size']
+        except OSError:
+            return False
+
+    def _record(self, job: ExportJob, size: int, digest: Optional[str]) -> None:
+        entry = {'path': job.path, 'src': job.src, 'src_size': job.src_size, 'src_mtime': job.src_mtime,
+                 'size': size, 'sha1': digest, 'time': round(time.time(), 3)}
+        if job.files:
+            entry['files'] = len(job.files)
+        with self._lock:
+            self._manifest_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._manifest_file.flush()
+
+    # =========================
+    # Planning
+    # =========================
+    def _relative(self, path: str) -> str:
+        rel = os.path.relpath(path, self.base_dir)
+        return os.path.basename(path) if rel.startswith('..') else rel
+
+    def plan(self, directories: Iterable[str]) -> List[ExportJob]:
+        """
+        Build copy jobs for session directories
+
+        Args:
+            directories: Session (or any) directories to export
+
+        Returns:
+            Jobs (files mode: one per file, pack mode: one per directory)
+        """
+        jobs: List[ExportJob] = []
+        for directory in directories:
+            directory = os.path.abspath(os.path.expanduser(directory))
+            if not os.path.isdir(directory):
+                logger.warning(f"Skipping missing directory: {directory}")
+                continue
+            rel_dir = self._relative(directory)
+            files = []
+            for root, dirnames, filenames in os.walk(directory):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.endswith('.part') or name in BACKUP_MARKERS:
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((os.path.relpath(path, directory), path, st.st_size, st.st_mtime))
+            if not files:
+                continue
+            if self.pack:
+                jobs.append(ExportJob(
+                    path=rel_dir + '.tar',
+                    src=directory,
+                    src_size=sum(f[2] for f in files),
+                    src_mtime=max(f[3] for f in files),
+                    directory=directory,
+                    files=[(os.path.join(os.path.basename(directory), f[0]), f[1]) for f in files]
+                ))
+            else:
+                jobs.extend(ExportJob(path=os.path.join(rel_dir, rel), src=path, src_size=size, src_mtime=mtime,
+                                      directory=directory)
+                            for rel, path, size, mtime in files)
+        return jobs
+
+    # =========================
+    # Copy
+    # =========================
+    def _ensure_dir(self, directory: str) -> None:
+        if directory in self._known_dirs:
+            return
+        os.makedirs(directory, mode=0o755, exist_ok=True)
+        with self._lock:
+            self._known_dirs.add(directory)
+
+    def _add_progress(self, nbytes: int) -> None:
+        with self._lock:
+            self._done_bytes += nbytes
+            now = time.monotonic()
+            if now - self._last_report < PROGRESS_INTERVAL:
+                return
+            self._last_report = now
+            elapsed = max(now - self._start, 1e-6)
+            rate = self._done_bytes / elapsed
+            eta = (self._total_bytes - self._done_bytes) / rate if rate > 0 else 0
+            logger.info(f"[USB] {self._done_jobs}/{self._total_jobs}  "
+                        f"{self._done_bytes / 1e9:.2f}/{self._total_bytes / 1e9:.2f}GB  "
+                        f"{rate / 1e6:.1f}MB/s  ETA {_format_eta(eta)}")
+
+    def _copy(self, job: ExportJob) -> Tuple[int, Optional[str]]:
+        dst = os.path.join(self.dest, job.path)
+        self._ensure_dir(os.path.dirname(dst))
+        tmp = dst + '.part'
+        hasher = hashlib.sha1() if self.checksum else None
+
+        with open(tmp, 'wb') as out:
+            if job.files:
+                writer = _HashingWriter(out, hasher, self._add_progress)
+                with tarfile.open(fileobj=writer, mode='w|') as tar:
+                    for arcname, path in job.files:
+                        tar.add(path, arcname=arcname, recursive=False)
+            else:
+                with open(job.src, 'rb') as src:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        self._add_progress(len(chunk))
+        if not job.files:
+            os.utime(tmp, (job.src_mtime, job.src_mtime))
+        os.replace(tmp, dst)
+        return os.path.getsize(dst), hasher.hexdigest() if hasher else None
+
+    def _run_job(self, job: ExportJob) -> None:
+        try:
+            size, digest = self._copy(job)
+            self._record(job, size, digest)
+            with self._lock:
+                self._done_jobs += 1
+        except OSError as e:
+            logger.error(f"[USB] copy failed {job.src}: {e}")
+            with self._lock:
+                self._failed += 1
+                self._failed_dirs.add(job.directory)
+
+    def run(self, directories: Iterable[str]) -> Dict[str, Any]:
+        """
+        Export directories (resumes from the manifest)
+
+        Args:
+            directories: Session directories
+
+        Returns:
+            Stats: entries, copied, skipped, failed, bytes, seconds, mb_per_sec
+        """
+        jobs = self.plan(directories)
+        manifest = self.load_manifest()
+        pending = [j for j in jobs if not self._is_done(j, manifest.get(j.path))]
+
+        self._total_jobs = len(pending)
+        self._total_bytes = sum(j.src_size for j in pending)
+        self._done_bytes = self._done_jobs = self._failed = 0
+        self._failed_dirs = set()
+        self._start = time.monotonic()
+        logger.info(f"[USB] {len(jobs)} entries, {len(jobs) - len(pending)} already copied, "
+                    f"{len(pending)} to copy ({self._total_bytes / 1e9:.2f}GB, {self.workers} threads) -> {self.dest}")
+
+        self._manifest_file = open(self.manifest_path, 'a', encoding='utf-8')
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='usb_export') as pool:
+                # Largest first so the tail is not one big file on a single thread
+                list(pool.map(self._run_job, sorted(pending, key=lambda j: -j.src_size)))
+        finally:
+            self._manifest_file.close()
+            self._manifest_file = None
+            os.sync()  # flush page cache before the drive is unplugged
+
+        # Marker only after the copies are on the drive (os.sync above)
+        for directory in sorted({j.directory for j in jobs} - self._failed_dirs):
+            try:
+                write_backup_marker(directory, EXPORTED_MARKER, self.dest)
+            except OSError as e:
+                logger.error(f"[USB] cannot mark {directory}: {e}")
+
+        elapsed = time.monotonic() - self._start
+        return {
+            'entries': len(jobs),
+            'copied': self._done_jobs,
+            'skipped': len(jobs) - len(pending),
+            'failed': self._failed,
+            'bytes': self._done_bytes,
+            'seconds': round(elapsed, 1),
+            'mb_per_sec': round(self._done_bytes / 1e6 / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def verify(self) -> Dict[str, Any]:
+        """
+        Re-hash copies against the manifest
+
+        Returns:
+            Counts: ok, mismatch, missing, unchecked (no checksum), and the bad paths
+        """
+        result = {'ok': 0, 'mismatch': 0, 'missing': 0, 'unchecked': 0, 'bad': []}
+        for path, entry in sorted(self.load_manifest().items()):
+            full = os.path.join(self.dest, path)
+            if not os.path.exists(full):
+                result['missing'] += 1
+                result['bad'].append(path)
+                continue
+            if not entry.get('sha1'):
+                result['unchecked'] += 1
+                continue
+            hasher = hashlib.sha1()
+            with open(full, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+            if hasher.hexdigest() == entry['sha1']:
+                result['ok'] += 1
+            else:
+                result['mismatch'] += 1
+                result['bad'].append(path)
+        return result
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Copy collected sessions to a USB drive (parallel, resumable)")
+    parser.add_argument('dest', help="destination directory on the USB drive")
+    parser.add_argument('--paths', nargs='*', help="directories to copy instead of catalog sessions")
+    parser.add_argument('--db', default=None, help="catalog database (default: ~/AI_Data/catalog.db)")
+    parser.add_argument('--food')
+    parser.add_argument('--kind', choices=['frying', 'bucket', 'stirfry'])
+    parser.add_argument('--pot')
+    parser.add_argument('--completed', action='store_true')
+    parser.add_argument('--pack', action='store_true', help="one tar per session")
+    parser.add_argument('--workers', type=int, help="copy threads (default: 2 for HDD, 8 for flash/SSD)")
+    parser.add_argument('--no-checksum', action='store_true', help="skip SHA-1 (faster on slow CPUs)")
+    parser.add_argument('--verify', action='store_true', help="re-hash copies against the manifest and exit")
+    args = parser.parse_args()
+
+    exporter = UsbExporter(args.dest, workers=args.workers, pack=args.pack, checksum=not args.no_checksum)
+    if args.verify:
+        print(json.dumps(exporter.verify(), indent=2, ensure_ascii=False))
+    else:
+        if args.paths:
+            directories = args.paths
+        else:
+            from .catalog import SessionCatalog, DEFAULT_DB_PATH
+            catalog = SessionCatalog(args.db or DEFAULT_DB_PATH)
+            try:
+                directories = [s['session_key'] for s in catalog.find_sessions(
+                    food_type=args.food, kind=args.kind, pot=args.pot,
+                    completed=True if args.completed else None)]
+            finally:
+                catalog.close()
+        print(json.dumps(exporter.run(directories), indent=2))
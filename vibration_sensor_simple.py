@@ -17,13 +17,15 @@ Changes from Windows version:
 
 import os, time, threading, csv, json
 from datetime import datetime
-from collections import deque
 
 import numpy as np
 from pymodbus.client import ModbusSerialClient
 from pymodbus.exceptions import ModbusIOException
 from serial import SerialException
 
+from src.monitoring.vibration.poll_scheduler import PollScheduler, modbus_frame_gap, parse_poll_rates
+from src.monitoring.vibration.spectrum import SampleRing, PeakTracker, METHODS as FFT_METHODS
+
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
@@ -54,12 +56,22 @@ STOPBITS = 1
 BYTESIZE = 8
 TIMEOUT_S = 0.15
 
-# 폴링/버퍼
-POLL_HZ_TOTAL = config.get("poll_hz_total", 45)  # 총 루프 속도(초당 45회 → 유닛당 약 15Hz)
+# 폴링/버퍼 (유닛별 목표 속도, 응답 없는 유닛은 지수 백오프 → 다른 유닛은 계속 폴링)
+# poll_hz_per_unit: 숫자(전체 유닛) 또는 {"0x50": 15, "default": 15}; 구 설정 poll_hz_total 은 유닛 수로 나눔
+POLL_HZ = parse_poll_rates(config.get("poll_hz_per_unit", config.get("poll_hz_total", 45) / max(1, len(UNIT_IDS))), UNIT_IDS)
+POLL_BACKOFF_MAX_SEC = config.get("poll_backoff_max_sec", 5.0)  # 응답 없는 유닛 재시도 간격 상한 (초)
+POLL_STATS_INTERVAL_SEC = config.get("poll_stats_interval_sec", 30)  # 유닛별 실제 Hz 출력 주기 (0 = 끔)
 RETRY_READ = 2
-RECONNECT_TIMEOUT = 3.0
+RECONNECT_TIMEOUT = 3.0   # 이 시간 동안 응답 없는 유닛 → 센서 재시작
+RESTART_SETTLE_SEC = 1.0  # 재시작 후 해당 유닛만 대기 (루프 전체 sleep 없음)
+FRAME_GAP_S = modbus_frame_gap(BAUD, BYTESIZE, PARITY, STOPBITS)  # Modbus RTU 3.5 문자 프레임 간격
 WINDOW_SEC = config.get("window_sec", 5.0)  # X축 시간 범위 (초)
-SAMPLE_RATE_HINT_PER_UNIT = POLL_HZ_TOTAL / max(1, len(UNIT_IDS))
+SAMPLE_RATE_HINT_PER_UNIT = max(POLL_HZ.values(), default=15.0)
+FFT_HOP_SAMPLES = config.get("fft_hop_samples", 1)  # FFT 피크 재계산 간격 (샘플, 1 = 매 샘플 = CSV 값 동일)
+FFT_METHOD = config.get("fft_method", "fft")  # "fft" (hop 마다 FFT) 또는 "sdft" (슬라이딩 DFT, 매 샘플)
+if FFT_METHOD not in FFT_METHODS:
+    print(f"[경고] 알 수 없는 fft_method: {FFT_METHOD} → fft 사용")
+    FFT_METHOD = "fft"
 PLOT_INTERVAL_MS = 100
 
 # 레지스터 맵
@@ -116,6 +128,15 @@ FAULT_DETECTION_CONFIG = config.get("fault_detection", {
     }
 })
 
+# ========== MQTT 텔레메트리 설정 ==========
+# 샘플 단위가 아닌 윈도우(min/max/mean/RMS/피크 주파수/개수) 단위로 발행,
+# 고장/이상 플래그가 켜진 동안에만 원시 샘플도 발행
+MQTT_TELEMETRY_CONFIG = config.get("mqtt_telemetry", {})
+MQTT_TELEMETRY_ENABLED = MQTT_TELEMETRY_CONFIG.get("enabled", False)
+MQTT_TELEMETRY_WINDOW_SEC = MQTT_TELEMETRY_CONFIG.get("window_sec", 2.0)  # 윈도우 길이 = 발행 주기 (초)
+MQTT_TELEMETRY_RAW_ON_FLAG = MQTT_TELEMETRY_CONFIG.get("raw_on_flag", True)
+MQTT_TELEMETRY_RAW_HOLD_SEC = MQTT_TELEMETRY_CONFIG.get("raw_hold_sec", 3.0)  # 플래그 해제 후 원시 샘플 유지 (초)
+
 # 고장 이벤트 로그
 fault_events = []
 fault_event_log_path = None
@@ -320,13 +341,12 @@ for uid in UNIT_IDS:
     csv_writers[uid] = w
 
 # ========== 버퍼(센서별) ==========
+# 유닛별 numpy 링 버퍼 (열: ACC XYZ, VEL XYZ, DISP XYZ, FREQ XYZ), 변위 FFT 피크 추적
 maxlen = int(WINDOW_SEC * SAMPLE_RATE_HINT_PER_UNIT)
-buf_time = {uid: deque(maxlen=maxlen) for uid in UNIT_IDS}
-buf_acc  = {uid: [deque(maxlen=maxlen) for _ in range(3)] for uid in UNIT_IDS}
-buf_vel  = {uid: [deque(maxlen=maxlen) for _ in range(3)] for uid in UNIT_IDS}
-buf_disp = {uid: [deque(maxlen=maxlen) for _ in range(3)] for uid in UNIT_IDS}
-buf_freq = {uid: [deque(maxlen=maxlen) for _ in range(3)] for uid in UNIT_IDS}
-last_ok  = {uid: time.time() for uid in UNIT_IDS}
+COL_ACC, COL_VEL, COL_DISP, COL_FREQ = [0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11]
+buf = {uid: SampleRing(maxlen, 12) for uid in UNIT_IDS}
+fft_tracker = {uid: PeakTracker(buf[uid], columns=COL_DISP, hop=FFT_HOP_SAMPLES, method=FFT_METHOD,
+                                fallback_fs=SAMPLE_RATE_HINT_PER_UNIT) for uid in UNIT_IDS}
 
 # ========== Modbus ==========
 def make_client():
@@ -343,6 +363,43 @@ if not client.connect():
 
 print(f"[연결] {PORT} @ {BAUD}bps")
 
+# ========== MQTT 텔레메트리 ==========
+mqtt_client = None
+telemetry = None
+if MQTT_TELEMETRY_ENABLED:
+    try:
+        from src.communication import MQTTClient
+        from src.monitoring.vibration.telemetry_window import TelemetryWindow
+        mqtt_client = MQTTClient(
+            broker=MQTT_TELEMETRY_CONFIG.get("broker", "localhost"),
+            port=MQTT_TELEMETRY_CONFIG.get("port", 1883),
+            client_id=MQTT_TELEMETRY_CONFIG.get("client_id", "vibration_jetson"),
+            topic_prefix=MQTT_TELEMETRY_CONFIG.get("topic_prefix", "frying_ai/vibration"),
+            codecs=MQTT_TELEMETRY_CONFIG.get("codecs", {})
+        )
+        mqtt_client.connect()
+        telemetry = TelemetryWindow(window_sec=MQTT_TELEMETRY_WINDOW_SEC,
+                                    raw_hold_sec=MQTT_TELEMETRY_RAW_HOLD_SEC)
+        print(f"[MQTT] 진동 텔레메트리: {mqtt_client.broker} ({MQTT_TELEMETRY_WINDOW_SEC}초 윈도우)")
+    except Exception as e:
+        print(f"[MQTT] 초기화 실패: {e} → 텔레메트리 비활성화")
+        mqtt_client = None
+        telemetry = None
+
+def publish_telemetry(uid, t, acc, vel, disp, is_fault, fault_reasons):
+    """윈도우 집계 후 발행 (원시 샘플은 고장/이상 플래그 동안만)"""
+    uid_key = f"0x{uid:02X}"
+    values = (*acc, *vel, *disp)
+    summaries = telemetry.add(uid_key, t, values, fault=is_fault,
+                              anomaly=anomaly_detected[uid], reasons=fault_reasons)
+    if not mqtt_client.is_connected():
+        return
+    for summary in summaries:
+        mqtt_client.publish(f"{uid_key}/window", summary, qos=0, include_metadata=False)
+    if MQTT_TELEMETRY_RAW_ON_FLAG and telemetry.raw_active(uid_key):
+        mqtt_client.publish(f"{uid_key}/raw", telemetry.raw_sample(uid_key, t, values),
+                            qos=0, include_metadata=False)
+
 def unlock_sensor(uid):
     try: client.write_register(address=REG_UNLOCK_ADDR, value=0xB588, device_id=uid)
     except Exception: pass
@@ -354,11 +411,11 @@ def restart_sensor(uid):
     except Exception as e:
         print(f"[UID 0x{uid:02X}] 재시작 오류: {e}")
 
-def read_block_retry(uid):
-    for _ in range(RETRY_READ):
+def read_block_retry(uid, tries=RETRY_READ):
+    for k in range(tries):
         rr = client.read_holding_registers(address=REG_START, count=REG_COUNT, device_id=uid)
         if hasattr(rr, "isError") and not rr.isError(): return rr.registers
-        time.sleep(0.01)
+        if k + 1 < tries: time.sleep(FRAME_GAP_S)
     raise ModbusIOException("read_holding_registers 실패")
 
 def s16(v): return v-0x10000 if v>=0x8000 else v
@@ -375,123 +432,120 @@ def parse_map(regs):
     freq = (HX/FREQ_DIVISOR, HY/FREQ_DIVISOR, HZ/FREQ_DIVISOR)
     return acc, vel, disp, freq
 
-def fft_peak(series, tbuf):
-    """스펙트럼 피크(Hz): 동적 fs 추정 사용"""
-    if len(series) < 16 or len(tbuf) < 2: return 0.0
-    y = np.array(series, dtype=float)
-    dt = (tbuf[-1] - tbuf[0]) / max(1, (len(tbuf)-1))
-    fs = 1.0/dt if dt>0 else SAMPLE_RATE_HINT_PER_UNIT
-    y = y - np.mean(y)
-    Y = np.fft.rfft(np.hanning(len(y)) * y)
-    f = np.fft.rfftfreq(len(y), d=1.0/fs)
-    m = np.abs(Y)
-    return float(f[np.argmax(m[1:])+1]) if len(f)>1 else 0.0
-
 # ========== 수집 스레드 ==========
 stop_event = threading.Event()
 
+def process_sample(uid, regs, t):
+    """한 유닛의 레지스터 블록 처리: 버퍼, FFT, 베이스라인, 고장 감지, MQTT, CSV"""
+    global baseline_mode, baseline_start_time, baseline_data
+    acc, vel, disp, freq = parse_map(regs)
+    evicted = buf[uid].append(t, (*acc, *vel, *disp, *freq))
+
+    # FFT 피크 (변위 기준, FFT_HOP_SAMPLES 샘플마다 재계산 / sdft 는 매 샘플)
+    fx, fy, fz = fft_tracker[uid].update(evicted)
+
+    # 베이스라인 수집 모드
+    if baseline_mode:
+        if baseline_start_time is None:
+            baseline_start_time = t
+            print(f"[베이스라인] 정상 데이터 수집 시작 ({BASELINE_DURATION_SEC}초)")
+
+        elapsed = t - baseline_start_time
+        if elapsed < BASELINE_DURATION_SEC:
+            # 데이터 수집
+            baseline_data[uid]['disp_x'].append(abs(disp[0]))
+            baseline_data[uid]['disp_y'].append(abs(disp[1]))
+            baseline_data[uid]['disp_z'].append(abs(disp[2]))
+            baseline_data[uid]['fft_x'].append(fx)
+            baseline_data[uid]['fft_y'].append(fy)
+            baseline_data[uid]['fft_z'].append(fz)
+
+            # 진행률 표시 (10초마다)
+            if int(elapsed) % 10 == 0 and int(elapsed) > 0:
+                progress = (elapsed / BASELINE_DURATION_SEC) * 100
+                print(f"[베이스라인] 진행률: {progress:.1f}% ({int(elapsed)}초/{BASELINE_DURATION_SEC}초)")
+        else:
+            # 수집 완료
+            print(f"[베이스라인] 수집 완료! 통계 계산 중...")
+            calculate_baseline_stats()
+            baseline_mode = False
+            baseline_start_time = None
+
+    # 고장 감지
+    is_fault, fault_reasons = check_fault(uid, acc, vel, disp, freq, (fx, fy, fz))
+
+    # 기존 anomaly 감지도 유지 (베이스라인이 있을 때만)
+    if baseline_stats and not baseline_mode and not is_fault:
+        is_anomaly = check_anomaly(uid, disp[0], disp[1], disp[2], fx, fy, fz)
+        if is_anomaly and not anomaly_detected[uid]:
+            anomaly_detected[uid] = True
+            print(f"[경고] UID 0x{uid:02X} 이상 진동 감지! DISP:({disp[0]:.2f}, {disp[1]:.2f}, {disp[2]:.2f}) FFT:({fx:.2f}, {fy:.2f}, {fz:.2f})")
+        elif not is_anomaly and anomaly_detected[uid]:
+            anomaly_detected[uid] = False
+            print(f"[정상] UID 0x{uid:02X} 진동 정상 범위로 복귀")
+
+    # MQTT 텔레메트리 (윈도우 집계)
+    if telemetry is not None:
+        publish_telemetry(uid, t, acc, vel, disp, is_fault, fault_reasons)
+
+    # CSV
+    row = [
+        datetime.fromtimestamp(t).isoformat(timespec="milliseconds"),
+        *acc, *vel, *disp, *freq, fx, fy, fz
+    ]
+    try:
+        csv_writers[uid].writerow(row)
+        csv_files[uid].flush()
+    except Exception as e:
+        print(f"[UID 0x{uid:02X}] CSV 오류: {e}")
+
+scheduler = PollScheduler(UNIT_IDS, target_hz=POLL_HZ, frame_gap_sec=FRAME_GAP_S,
+                          backoff_max_sec=POLL_BACKOFF_MAX_SEC,
+                          restart_after_sec=RECONNECT_TIMEOUT,
+                          restart_settle_sec=RESTART_SETTLE_SEC)
+
 def collector_loop():
-    poll_dt = 1.0 / POLL_HZ_TOTAL
+    """유닛별 스케줄 폴링: 가장 늦은 유닛부터, 실패 유닛은 백오프 (다른 유닛을 막지 않음)"""
+    last_stats = time.time()
     while not stop_event.is_set():
-        t_cycle = time.time()
+        # 유닛별 실제 폴링 속도 보고
+        if POLL_STATS_INTERVAL_SEC > 0 and time.time() - last_stats >= POLL_STATS_INTERVAL_SEC:
+            last_stats = time.time()
+            print(f"[폴링] {scheduler.format_stats()}")
+
+        uid, wait = scheduler.next_unit()
+        if wait > 0:
+            stop_event.wait(min(wait, 0.1))
+            continue
         try:
             if not getattr(client, "connected", False):
                 client.connect()
-            # 각 유닛 순차 폴링
-            for uid in UNIT_IDS:
-                try:
-                    regs = read_block_retry(uid)
-                    acc, vel, disp, freq = parse_map(regs)
-                    t = time.time()
-                    buf_time[uid].append(t)
-                    for i in range(3):
-                        buf_acc[uid][i].append(acc[i])
-                        buf_vel[uid][i].append(vel[i])
-                        buf_disp[uid][i].append(disp[i])
-                        buf_freq[uid][i].append(freq[i])
-
-                    # FFT 피크 (변위 기준)
-                    fx = fft_peak(buf_disp[uid][0], buf_time[uid])
-                    fy = fft_peak(buf_disp[uid][1], buf_time[uid])
-                    fz = fft_peak(buf_disp[uid][2], buf_time[uid])
-
-                    # 베이스라인 수집 모드
-                    global baseline_mode, baseline_start_time, baseline_data
-                    if baseline_mode:
-                        if baseline_start_time is None:
-                            baseline_start_time = t
-                            print(f"[베이스라인] 정상 데이터 수집 시작 ({BASELINE_DURATION_SEC}초)")
-
-                        elapsed = t - baseline_start_time
-                        if elapsed < BASELINE_DURATION_SEC:
-                            # 데이터 수집
-                            baseline_data[uid]['disp_x'].append(abs(disp[0]))
-                            baseline_data[uid]['disp_y'].append(abs(disp[1]))
-                            baseline_data[uid]['disp_z'].append(abs(disp[2]))
-                            baseline_data[uid]['fft_x'].append(fx)
-                            baseline_data[uid]['fft_y'].append(fy)
-                            baseline_data[uid]['fft_z'].append(fz)
-
-                            # 진행률 표시 (10초마다)
-                            if int(elapsed) % 10 == 0 and int(elapsed) > 0:
-                                progress = (elapsed / BASELINE_DURATION_SEC) * 100
-                                print(f"[베이스라인] 진행률: {progress:.1f}% ({int(elapsed)}초/{BASELINE_DURATION_SEC}초)")
-                        else:
-                            # 수집 완료
-                            print(f"[베이스라인] 수집 완료! 통계 계산 중...")
-                            calculate_baseline_stats()
-                            baseline_mode = False
-                            baseline_start_time = None
-
-                    # 고장 감지
-                    is_fault, fault_reasons = check_fault(uid, acc, vel, disp, freq, (fx, fy, fz))
-
-                    # 기존 anomaly 감지도 유지 (베이스라인이 있을 때만)
-                    if baseline_stats and not baseline_mode and not is_fault:
-                        is_anomaly = check_anomaly(uid, disp[0], disp[1], disp[2], fx, fy, fz)
-                        if is_anomaly and not anomaly_detected[uid]:
-                            anomaly_detected[uid] = True
-                            print(f"[경고] UID 0x{uid:02X} 이상 진동 감지! DISP:({disp[0]:.2f}, {disp[1]:.2f}, {disp[2]:.2f}) FFT:({fx:.2f}, {fy:.2f}, {fz:.2f})")
-                        elif not is_anomaly and anomaly_detected[uid]:
-                            anomaly_detected[uid] = False
-                            print(f"[정상] UID 0x{uid:02X} 진동 정상 범위로 복귀")
-
-                    # CSV
-                    row = [
-                        datetime.fromtimestamp(t).isoformat(timespec="milliseconds"),
-                        *acc, *vel, *disp, *freq, fx, fy, fz
-                    ]
-                    try:
-                        csv_writers[uid].writerow(row)
-                        csv_files[uid].flush()
-                    except Exception as e:
-                        print(f"[UID 0x{uid:02X}] CSV 오류: {e}")
-                    last_ok[uid] = t
-
-                except (ModbusIOException, SerialException, OSError) as e:
-                    print(f"[UID 0x{uid:02X}] 읽기 오류: {e} → 재시도/재연결")
+            t_req = time.time()
+            try:
+                # 실패 중인 유닛은 1회만 시도 (버스 점유 최소화)
+                regs = read_block_retry(uid, 1 if scheduler.is_failing(uid) else RETRY_READ)
+            except (ModbusIOException, SerialException, OSError) as e:
+                backoff = scheduler.record_failure(uid, t_req, time.time())
+                print(f"[UID 0x{uid:02X}] 읽기 오류: {e} → {backoff:.1f}초 후 재시도")
+                if not isinstance(e, ModbusIOException):
+                    # 포트 오류 → 재연결 (응답 없는 유닛 하나로는 재연결하지 않음)
                     try: client.close()
                     except: pass
                     time.sleep(0.2)
                     client.connect()
-                except Exception as e:
-                    print(f"[UID 0x{uid:02X}] 예외: {e}")
-
-                # 유닛별 타임아웃 → 재부팅
-                if time.time() - last_ok[uid] > RECONNECT_TIMEOUT:
+                # 유닛별 타임아웃 → 재부팅 (해당 유닛만 대기)
+                if scheduler.needs_restart(uid):
                     print(f"[UID 0x{uid:02X}] 타임아웃 → 센서 재시작")
                     restart_sensor(uid)
-                    time.sleep(1.0)
-                    try: client.close()
-                    except: pass
-                    time.sleep(0.2)
-                    client.connect()
+                    scheduler.mark_restarted(uid)
+                continue
 
-        except Exception as e:
-            print(f"[루프 예외] {e}")
+            t = time.time()
+            scheduler.record_success(uid, t_req, t)
+            process_sample(uid, regs, t)
 
-        remain = poll_dt - (time.time() - t_cycle)
-        if remain > 0: time.sleep(remain)
+        except Exception as e:
+            print(f"[UID 0x{uid:02X}] 예외: {e}")
 
 collector_thread = threading.Thread(target=collector_loop, daemon=True)
 collector_thread.start()
@@ -515,13 +569,13 @@ for c, uid in enumerate(UNIT_IDS):
 
 def update(_):
     for uid in UNIT_IDS:
-        if len(buf_time[uid]) < 2: continue
-        t0 = buf_time[uid][0]
-        t  = np.array(buf_time[uid]) - t0
+        if len(buf[uid]) < 2: continue
+        times, disp = buf[uid].snapshot(COL_DISP)
+        t = times - times[0]
 
         # DISP 라인 업데이트
         for i in range(3):
-            lines_disp[uid][i].set_data(t, list(buf_disp[uid][i]))
+            lines_disp[uid][i].set_data(t, disp[:, i])
 
         # 타이틀 업데이트 (베이스라인 모드 / 이상 감지 표시)
         ax_disp = axes[uid]
@@ -595,6 +649,14 @@ stop_event.set()
 collector_thread.join(timeout=1.0)
 try: client.close()
 except: pass
+print(f"[폴링] {scheduler.format_stats()}")
+if mqtt_client is not None:
+    # 마지막 (미완성) 윈도우 발행
+    if mqtt_client.is_connected():
+        for summary in telemetry.flush():
+            mqtt_client.publish(f"{summary['unit']}/window", summary, qos=0, include_metadata=False)
+    print(f"[MQTT] 텔레메트리 통계: {telemetry.get_stats()}")
+    mqtt_client.disconnect()
 for uid in UNIT_IDS:
     try: csv_files[uid].close()
     except: pass